@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from apps.audit.stream import consume_audit_stream
+
+
+class Command(BaseCommand):
+    help = (
+        "Write audit events published to the Redis stream (AUDIT_LOG_MODE=redis_stream) "
+        "into AuditLog in batches. Several consumers may run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--block-ms", type=int, default=5000)
+        parser.add_argument("--consumer", default="", help="Consumer name (default: hostname).")
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep consuming instead of exiting once the stream is drained.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            written = consume_audit_stream(
+                consumer=options["consumer"] or None,
+                count=max(1, options["batch_size"]),
+                block_ms=max(0, options["block_ms"]),
+            )
+            total += written
+            if not written and not options["loop"]:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f"Audit events written: {total}"))
@@ -0,0 +1,15 @@
+from apps.audit.services import audit_batch
+
+
+class AuditBufferMiddleware:
+    """
+    Collect audit events logged while handling a request and write them in one batch
+    when the response is ready (events of rolled-back atomic blocks are dropped).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit_batch():
+            return self.get_response(request)
@@ -0,0 +1,121 @@
+"""
+Redis stream transport for audit events (``AUDIT_LOG_MODE=redis_stream``).
+
+Requests only ``XADD`` their buffered events; ``manage.py consume_audit_stream`` reads them
+through a consumer group, inserts them with ``bulk_create`` (plus webhook fan-out) and
+``XACK``s. Entries left pending by a crashed consumer are reclaimed with ``XAUTOCLAIM``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import socket
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = (
+    "clinic_id",
+    "actor_id",
+    "request_id",
+    "action",
+    "entity_type",
+    "entity_id",
+    "before",
+    "after",
+    "metadata",
+    "created_at",
+)
+
+
+def _stream_name() -> str:
+    return str(getattr(settings, "AUDIT_LOG_REDIS_STREAM", "audit:events") or "audit:events")
+
+
+def _group_name() -> str:
+    return str(getattr(settings, "AUDIT_LOG_REDIS_GROUP", "audit-writer") or "audit-writer")
+
+
+def _get_redis():
+    import django_rq
+
+    return django_rq.get_connection("default")
+
+
+def publish_audit_logs(logs: list[AuditLog], *, redis=None) -> None:
+    redis = redis or _get_redis()
+    maxlen = int(getattr(settings, "AUDIT_LOG_REDIS_MAXLEN", 1_000_000))
+    pipe = redis.pipeline(transaction=False)
+    for log in logs:
+        event = {name: getattr(log, name) for name in _FIELDS}
+        # Full precision (DjangoJSONEncoder would cut it to milliseconds).
+        event["created_at"] = log.created_at.isoformat() if log.created_at else None
+        pipe.xadd(
+            _stream_name(),
+            {"event": json.dumps(event, cls=DjangoJSONEncoder)},
+            maxlen=maxlen,
+            approximate=True,
+        )
+    pipe.execute()
+
+
+def _decode(raw) -> AuditLog:
+    data = raw.get(b"event", raw.get("event"))
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    values = {name: value for name, value in json.loads(data).items() if name in _FIELDS}
+    if values.get("created_at"):
+        values["created_at"] = parse_datetime(values["created_at"])
+    else:
+        # Entries published before created_at was carried: fall back to the write time.
+        values.pop("created_at", None)
+    return AuditLog(**values)
+
+
+def consume_audit_stream(
+    *,
+    redis=None,
+    consumer: str | None = None,
+    count: int = 500,
+    block_ms: int = 5000,
+    min_idle_ms: int = 60_000,
+) -> int:
+    """Persist one batch from the stream; returns the number of events written."""
+    from .services import persist_audit_logs
+
+    redis = redis or _get_redis()
+    stream, group = _stream_name(), _group_name()
+    consumer = consumer or socket.gethostname()
+    try:
+        redis.xgroup_create(stream, group, id="0", mkstream=True)
+    except Exception as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+    # Reclaim entries a dead consumer read but never acknowledged, then read new ones.
+    _cursor, entries, *_ = redis.xautoclaim(
+        stream, group, consumer, min_idle_time=min_idle_ms, start_id="0-0", count=count
+    )
+    if not entries:
+        response = redis.xreadgroup(group, consumer, {stream: ">"}, count=count, block=block_ms)
+        entries = response[0][1] if response else []
+    if not entries:
+        return 0
+
+    ids, logs = [], []
+    for entry_id, fields in entries:
+        ids.append(entry_id)
+        try:
+            logs.append(_decode(fields))
+        except (TypeError, ValueError):
+            logger.exception("Dropping malformed audit stream entry %s", entry_id)
+    if logs:
+        persist_audit_logs(logs)
+    redis.xack(stream, group, *ids)
+    return len(logs)
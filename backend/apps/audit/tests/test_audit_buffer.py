@@ -0,0 +1,199 @@
+import json
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.audit.models import AuditLog
+from apps.audit.services import audit_batch, log_audit_event
+from apps.audit.stream import consume_audit_stream, publish_audit_logs
+from apps.webhooks.models import WebhookDelivery, WebhookEventType, WebhookSubscription
+
+
+def _log(clinic_id, action="patient_updated", entity_id=1, actor=None):
+    return log_audit_event(
+        clinic_id=clinic_id,
+        actor=actor,
+        action=action,
+        entity_type="patient",
+        entity_id=entity_id,
+        after={"n": entity_id},
+    )
+
+
+@pytest.mark.django_db
+def test_audit_batch_writes_events_in_one_insert(clinic):
+    with CaptureQueriesContext(connection) as ctx:
+        with audit_batch():
+            for i in range(20):
+                _log(clinic.id, entity_id=i)
+            assert len(ctx.captured_queries) == 0
+
+    inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+    assert len(ctx.captured_queries) == 1
+    assert len(inserts) == 1
+    assert AuditLog.objects.filter(clinic=clinic).count() == 20
+
+
+@pytest.mark.django_db
+def test_audit_batch_flushes_when_block_raises(clinic):
+    with pytest.raises(RuntimeError):
+        with audit_batch():
+            _log(clinic.id)
+            raise RuntimeError("boom")
+    assert AuditLog.objects.filter(clinic=clinic).count() == 1
+
+
+@pytest.mark.django_db
+def test_audit_batch_drops_events_of_rolled_back_blocks(clinic):
+    with audit_batch():
+        _log(clinic.id, entity_id=1)
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                _log(clinic.id, entity_id=2)
+                raise RuntimeError("boom")
+        with transaction.atomic():
+            _log(clinic.id, entity_id=3)
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    _log(clinic.id, entity_id=4)
+                    raise RuntimeError("boom")
+    assert sorted(AuditLog.objects.values_list("entity_id", flat=True)) == ["1", "3"]
+
+
+@pytest.mark.django_db
+def test_audit_batch_flush_errors_are_not_raised(clinic):
+    with patch("apps.audit.services.write_audit_logs", side_effect=RuntimeError("db down")):
+        with audit_batch():
+            _log(clinic.id)
+    assert not AuditLog.objects.exists()
+
+
+@pytest.mark.django_db
+@override_settings(AUDIT_LOG_BUFFER_MAX_EVENTS=3)
+def test_audit_batch_flushes_early_when_full(clinic):
+    with audit_batch():
+        for i in range(4):
+            _log(clinic.id, entity_id=i)
+        assert AuditLog.objects.filter(clinic=clinic).count() == 3
+    assert AuditLog.objects.filter(clinic=clinic).count() == 4
+
+
+@pytest.mark.django_db
+def test_webhook_subscriptions_are_cached_per_clinic(clinic, clinic_admin):
+    WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.INVOICE_PAYMENT_RECORDED],
+        created_by=clinic_admin,
+    )
+    action = WebhookEventType.INVOICE_PAYMENT_RECORDED
+    with CaptureQueriesContext(connection) as ctx:
+        with audit_batch():
+            for i in range(5):
+                _log(clinic.id, action=action, entity_id=i)
+    # audit insert + subscription lookup + delivery insert
+    assert len(ctx.captured_queries) == 3
+    assert WebhookDelivery.objects.count() == 5
+
+    with CaptureQueriesContext(connection) as ctx:
+        _log(clinic.id, action=action, entity_id=99)
+    assert len(ctx.captured_queries) == 2  # cached lookup: audit insert + delivery insert
+
+    WebhookSubscription.objects.filter(clinic=clinic).get().delete()
+    _log(clinic.id, action=action, entity_id=100)
+    assert WebhookDelivery.objects.count() == 0  # cascade-deleted; no new delivery queued
+
+
+class _FakeStreamRedis:
+    def __init__(self):
+        self.entries = []
+        self.acked = []
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def xadd(self, stream, fields, **kwargs):
+        self.entries.append((f"{len(self.entries) + 1}-0".encode(), fields))
+
+    def execute(self):
+        pass
+
+    def xgroup_create(self, *args, **kwargs):
+        raise Exception("BUSYGROUP Consumer Group name already exists")
+
+    def xautoclaim(self, *args, **kwargs):
+        return [b"0-0", [], []]
+
+    def xreadgroup(self, group, consumer, streams, count, block):
+        batch, self.entries = self.entries[:count], self.entries[count:]
+        return [[b"audit:events", batch]] if batch else []
+
+    def xack(self, stream, group, *ids):
+        self.acked.extend(ids)
+
+
+@pytest.mark.django_db
+@override_settings(AUDIT_LOG_MODE="redis_stream")
+def test_redis_stream_mode_publishes_and_consumer_persists(clinic, clinic_admin, monkeypatch):
+    redis = _FakeStreamRedis()
+    monkeypatch.setattr("apps.audit.stream._get_redis", lambda: redis)
+
+    with audit_batch():
+        _log(clinic.id, entity_id=1, actor=clinic_admin)
+        _log(clinic.id, entity_id=2)
+
+    assert AuditLog.objects.count() == 0
+    assert json.loads(redis.entries[0][1]["event"])["actor_id"] == clinic_admin.id
+
+    assert consume_audit_stream(count=10, block_ms=0) == 2
+    assert redis.acked == [b"1-0", b"2-0"]
+    rows = list(AuditLog.objects.order_by("id"))
+    assert [r.entity_id for r in rows] == ["1", "2"]
+    assert rows[0].actor_id == clinic_admin.id
+    assert rows[1].after == {"n": 2}
+
+
+@pytest.mark.django_db
+@override_settings(AUDIT_LOG_MODE="redis_stream")
+def test_redis_stream_keeps_the_event_time(clinic, clinic_admin, monkeypatch):
+    redis = _FakeStreamRedis()
+    monkeypatch.setattr("apps.audit.stream._get_redis", lambda: redis)
+    WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        created_by=clinic_admin,
+    )
+    logged_at = timezone.now() - timedelta(minutes=10)
+    with patch("apps.audit.services.timezone.now", return_value=logged_at):
+        _log(clinic.id, action=WebhookEventType.PORTAL_APPOINTMENT_BOOKED)
+
+    # The consumer runs later; rows keep the time the event was logged.
+    assert consume_audit_stream(count=10, block_ms=0) == 1
+    assert AuditLog.objects.get().created_at == logged_at
+    delivery = WebhookDelivery.objects.get()
+    assert delivery.payload["occurred_at"] == logged_at.isoformat()
+
+
+@pytest.mark.django_db
+@override_settings(AUDIT_LOG_MODE="redis_stream")
+def test_redis_stream_publish_failure_falls_back_to_db(clinic, monkeypatch):
+    broken = MagicMock()
+    broken.pipeline.return_value.execute.side_effect = ConnectionError("redis down")
+    monkeypatch.setattr("apps.audit.stream._get_redis", lambda: broken)
+
+    _log(clinic.id)
+    assert AuditLog.objects.filter(clinic=clinic).count() == 1
+
+
+def test_publish_uses_single_pipeline_round_trip():
+    redis = MagicMock()
+    logs = [AuditLog(clinic_id=1, action="a", entity_type="t", entity_id=str(i)) for i in range(3)]
+    publish_audit_logs(logs, redis=redis)
+    assert redis.pipeline.return_value.xadd.call_count == 3
+    redis.pipeline.return_value.execute.assert_called_once()
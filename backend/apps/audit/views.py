@@ -6,6 +6,7 @@ from apps.accounts.permissions import HasClinic, IsClinicAdmin
 from apps.tenancy.access import (
     accessible_clinic_ids,
 )
+from apps.tenancy.dates import clinic_timezone, date_range_q
 
 from .models import AuditLog
 from .serializers import AuditLogSerializer
@@ -32,9 +33,8 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(entity_type=entity_type)
         if entity_id:
             qs = qs.filter(entity_id=str(entity_id))
-        if date_from:
-            qs = qs.filter(created_at__date__gte=date_from)
-        if date_to:
-            qs = qs.filter(created_at__date__lte=date_to)
+        if date_from or date_to:
+            zone = clinic_timezone(self.request.user.clinic_id)
+            qs = qs.filter(date_range_q("created_at", date_from, date_to, tz=zone))
 
         return qs
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Invoice, InvoiceLine, Payment, Service
+from .models import DailyRevenueRollup, Invoice, InvoiceLine, Payment, Service
 
 
 @admin.register(Service)
@@ -33,3 +33,11 @@ class InvoiceAdmin(admin.ModelAdmin):
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ("invoice", "amount", "method", "status", "paid_at")
     list_filter = ("method", "status")
+
+
+@admin.register(DailyRevenueRollup)
+class DailyRevenueRollupAdmin(admin.ModelAdmin):
+    list_display = ("clinic", "date", "invoiced_net", "invoiced_gross", "invoice_count", "paid")
+    list_filter = ("clinic",)
+    date_hierarchy = "date"
+    readonly_fields = ("updated_at",)
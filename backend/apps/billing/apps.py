@@ -5,3 +5,6 @@ class BillingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.billing"
     verbose_name = "Billing"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,79 @@
+"""
+Build or rebuild DailyRevenueRollup rows used by the revenue summary.
+Usage: python manage.py rebuild_revenue_rollups [--clinic-id ID] [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--full]
+
+Without dates, each clinic's rollups are extended from the last rolled-up day through
+yesterday (clinic-local), or from its first invoice/payment on the first run; schedule it
+nightly. --full rebuilds everything from the first activity; --from/--to rebuild a window
+(after bulk imports, raw SQL edits or recalculate_invoice_totals). Today is always live.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.billing.services.revenue_rollup import (
+    first_activity_date,
+    rebuild_revenue_rollups,
+    rollup_coverage,
+)
+from apps.tenancy.dates import clinic_timezone
+from apps.tenancy.models import Clinic
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Extend or rebuild daily revenue rollups (DailyRevenueRollup) per clinic."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clinic-id", type=int, default=None)
+        parser.add_argument("--from", dest="date_from", default=None)
+        parser.add_argument("--to", dest="date_to", default=None)
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild from each clinic's first invoice/payment through yesterday.",
+        )
+
+    def handle(self, *args, **options):
+        date_from = self._parse(options["date_from"], "--from")
+        date_to = self._parse(options["date_to"], "--to")
+        clinics = Clinic.objects.order_by("id").values_list("id", flat=True)
+        if options["clinic_id"] is not None:
+            clinics = clinics.filter(pk=options["clinic_id"])
+
+        written = 0
+        for clinic_id in clinics:
+            yesterday = timezone.localdate(timezone=clinic_timezone(clinic_id)) - timedelta(days=1)
+            start = date_from
+            if start is None:
+                coverage = None if options["full"] else rollup_coverage(clinic_id)
+                if coverage is not None:
+                    start = coverage[1] + timedelta(days=1)
+                else:
+                    start = first_activity_date(clinic_id)
+            if start is None:
+                continue
+            end = min(date_to or yesterday, yesterday)
+            rows = rebuild_revenue_rollups(clinic_id, start, end)
+            written += rows
+            if rows:
+                self.stdout.write(f"Clinic {clinic_id}: {rows} day(s) rolled up.")
+
+        logger.info("rebuild_revenue_rollups wrote %s row(s)", written)
+        self.stdout.write(self.style.SUCCESS(f"Done: {written} rollup row(s) written."))
+
+    @staticmethod
+    def _parse(value, flag):
+        if value is None:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"{flag} must be a date (YYYY-MM-DD).")
+        return parsed
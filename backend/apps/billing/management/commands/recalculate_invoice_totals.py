@@ -0,0 +1,70 @@
+"""
+Backfill or verify the stored invoice totals (total_net, total_gross, amount_paid).
+Usage: python manage.py recalculate_invoice_totals [--verify] [--clinic-id ID] [--batch-size N]
+
+Totals are normally maintained when lines or payments change; run this after a bulk import
+or raw SQL edit, or with --verify on a schedule to detect drift (exits non-zero if found).
+"""
+
+from __future__ import annotations
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.billing.models import Invoice
+from apps.billing.services.invoice_totals import sync_invoice_totals
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Recompute stored invoice totals from lines and payments (or only report drift)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report invoices whose stored totals are stale; do not write.",
+        )
+        parser.add_argument("--clinic-id", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        verify = options["verify"]
+        batch_size = max(1, options["batch_size"])
+        qs = Invoice.objects.only("id", *Invoice.TOTAL_FIELDS).order_by("id")
+        if options["clinic_id"] is not None:
+            qs = qs.filter(clinic_id=options["clinic_id"])
+
+        checked = 0
+        stale_total = 0
+        last_id = 0
+        while True:
+            batch = list(qs.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            with transaction.atomic():
+                stale = sync_invoice_totals(batch, write=not verify)
+            checked += len(batch)
+            stale_total += len(stale)
+            if verify:
+                for invoice in stale:
+                    self.stdout.write(
+                        f"Invoice id={invoice.id} stale: net={invoice.total_net} "
+                        f"gross={invoice.total_gross} paid={invoice.amount_paid}"
+                    )
+
+        logger.info(
+            "recalculate_invoice_totals checked=%s stale=%s verify=%s", checked, stale_total, verify
+        )
+        if verify:
+            if stale_total:
+                raise CommandError(f"{stale_total} of {checked} invoice(s) have stale totals.")
+            self.stdout.write(self.style.SUCCESS(f"All {checked} invoice total(s) are up to date."))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} invoice(s), corrected {stale_total}.")
+        )
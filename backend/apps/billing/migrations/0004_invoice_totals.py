@@ -0,0 +1,78 @@
+# Generated by Django 6.1.2 on 2026-10-18 06:08
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+_CENT = Decimal("0.01")
+
+
+def backfill_invoice_totals(apps, schema_editor):
+    """Same arithmetic as InvoiceLine.line_total / line_gross (historical models lack them)."""
+    Invoice = apps.get_model("billing", "Invoice")
+    InvoiceLine = apps.get_model("billing", "InvoiceLine")
+    Payment = apps.get_model("billing", "Payment")
+    net = defaultdict(Decimal)
+    gross = defaultdict(Decimal)
+    for invoice_id, quantity, unit_price, vat_rate in InvoiceLine.objects.values_list(
+        "invoice_id", "quantity", "unit_price", "vat_rate"
+    ).iterator():
+        line_net = (quantity * unit_price).quantize(_CENT)
+        try:
+            vat = (line_net * Decimal(vat_rate) / 100).quantize(_CENT)
+        except Exception:
+            vat = Decimal("0")
+        net[invoice_id] += line_net
+        gross[invoice_id] += line_net + vat
+    paid = dict(
+        Payment.objects.filter(status="completed")
+        .values("invoice_id")
+        .annotate(s=Sum("amount"))
+        .values_list("invoice_id", "s")
+    )
+    for invoice_id in set(net) | set(paid):
+        Invoice.objects.filter(pk=invoice_id).update(
+            total_net=net.get(invoice_id, Decimal("0")),
+            total_gross=gross.get(invoice_id, Decimal("0")),
+            amount_paid=paid.get(invoice_id) or Decimal("0"),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0003_ksef_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="amount_paid",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0"), editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="total_gross",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0"), editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="total_net",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0"), editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["clinic", "status", "due_date"], name="billing_inv_clinic__37991d_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_invoice_totals, migrations.RunPython.noop),
+    ]
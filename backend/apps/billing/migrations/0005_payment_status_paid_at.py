@@ -0,0 +1,17 @@
+# Generated by Django 6.1.2 on 2026-10-18 06:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0004_invoice_totals"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["status", "paid_at"], name="billing_pay_status_64681e_idx"),
+        ),
+    ]
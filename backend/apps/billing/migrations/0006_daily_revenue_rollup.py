@@ -0,0 +1,58 @@
+# Generated by Django 6.1.2 on 2026-10-18 06:31
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0005_payment_status_paid_at"),
+        ("tenancy", "0009_clinic_timezone"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRevenueRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "invoiced_net",
+                    models.DecimalField(decimal_places=2, default=Decimal("0"), max_digits=14),
+                ),
+                (
+                    "invoiced_gross",
+                    models.DecimalField(decimal_places=2, default=Decimal("0"), max_digits=14),
+                ),
+                ("invoice_count", models.PositiveIntegerField(default=0)),
+                (
+                    "paid",
+                    models.DecimalField(decimal_places=2, default=Decimal("0"), max_digits=14),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_revenue_rollups",
+                        to="tenancy.clinic",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["clinic", "date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("clinic", "date"), name="billing_daily_revenue_clinic_date_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
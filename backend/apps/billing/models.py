@@ -94,6 +94,18 @@ class Invoice(models.Model):
     # Human-readable invoice number (e.g. FV/2026/03/0001)
     invoice_number = models.CharField(max_length=64, blank=True)
 
+    # Denormalized totals: sum of line net / gross amounts and of completed payments.
+    # Maintained by apps.billing.services.invoice_totals when lines or payments change.
+    total_net = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0"), editable=False
+    )
+    total_gross = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0"), editable=False
+    )
+    amount_paid = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0"), editable=False
+    )
+
     # KSeF integration
     ksef_number = models.CharField(max_length=128, null=True, blank=True)
     ksef_status = models.CharField(
@@ -116,35 +128,33 @@ class Invoice(models.Model):
             models.Index(fields=["clinic", "status"]),
             models.Index(fields=["clinic", "client"]),
             models.Index(fields=["clinic", "created_at"]),
+            models.Index(fields=["clinic", "status", "due_date"]),
         ]
 
+    TOTAL_FIELDS = ("total_net", "total_gross", "amount_paid")
+
     def __str__(self) -> str:
         return f"Invoice #{self.id} - {self.client} ({self.status})"
 
-    @property
-    def total(self) -> Decimal:
-        return sum(
-            (line.line_total for line in self.lines.all()),
-            Decimal("0"),
-        )
-
-    @property
-    def amount_paid(self) -> Decimal:
-        return sum(
-            (p.amount for p in self.payments.filter(status="completed")),
-            Decimal("0"),
-        )
+    def save(self, *args, **kwargs):
+        # Totals are written only by apps.billing.services.invoice_totals; a plain save() of an
+        # instance loaded before its lines or payments changed must not overwrite them.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.TOTAL_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     @property
-    def total_gross(self) -> Decimal:
-        return sum(
-            (line.line_gross for line in self.lines.all()),
-            Decimal("0"),
-        )
+    def total(self) -> Decimal:
+        """Net total (before VAT)."""
+        return self.total_net
 
     @property
     def balance_due(self) -> Decimal:
-        return self.total - self.amount_paid
+        return self.total_net - self.amount_paid
 
 
 class InvoiceLine(models.Model):
@@ -262,7 +272,44 @@ class Payment(models.Model):
         ordering = ["-paid_at"]
         indexes = [
             models.Index(fields=["invoice"]),
+            models.Index(fields=["status", "paid_at"]),
         ]
 
     def __str__(self) -> str:
         return f"{self.amount} {self.method} for Invoice #{self.invoice_id}"
+
+
+class DailyRevenueRollup(models.Model):
+    """
+    Per-clinic, per-day revenue totals for dashboards (clinic-local calendar dates).
+
+    Rows exist for a contiguous range of closed days (see ``rebuild_revenue_rollups``) and are
+    kept current by ``apps.billing.services.revenue_rollup`` when invoices or payments change;
+    days outside that range are computed live.
+    """
+
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name="daily_revenue_rollups",
+    )
+    date = models.DateField()
+    # Non-cancelled invoices created that day
+    invoiced_net = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0"))
+    invoiced_gross = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0"))
+    invoice_count = models.PositiveIntegerField(default=0)
+    # Completed payments dated that day
+    paid = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0"))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["clinic", "date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["clinic", "date"], name="billing_daily_revenue_clinic_date_uniq"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Revenue {self.date} ({self.clinic_id}): {self.invoiced_net} / {self.paid}"
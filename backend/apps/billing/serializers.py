@@ -18,6 +18,7 @@ from apps.tenancy.access import (
 )
 
 from .models import Invoice, InvoiceLine, Payment, Service
+from .services.invoice_totals import defer_invoice_totals
 
 
 class ServiceSerializer(serializers.ModelSerializer):
@@ -122,10 +123,13 @@ class PaymentWriteSerializer(serializers.ModelSerializer):
 class InvoiceReadSerializer(serializers.ModelSerializer):
     lines = InvoiceLineSerializer(many=True, read_only=True)
     payments = PaymentSerializer(many=True, read_only=True)
-    total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    total_gross = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    amount_paid = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    balance_due = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    # Stored columns (see apps.billing.services.invoice_totals): no line/payment queries needed.
+    total = serializers.DecimalField(
+        source="total_net", max_digits=12, decimal_places=2, read_only=True
+    )
+    total_gross = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    amount_paid = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    balance_due = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     client_detail = ClientSerializer(source="client", read_only=True)
     patient_detail = PatientReadSerializer(source="patient", read_only=True, allow_null=True)
 
@@ -256,7 +260,7 @@ class InvoiceWriteSerializer(serializers.ModelSerializer):
         clinic_id = clinic_id_for_mutation(request.user, request=request, instance_clinic_id=None)
         for line_data in lines_data:
             self._validate_line(line_data, clinic_id)
-        with transaction.atomic():
+        with transaction.atomic(), defer_invoice_totals():
             invoice = Invoice.objects.create(
                 clinic_id=clinic_id,
                 created_by=request.user,
@@ -279,7 +283,7 @@ class InvoiceWriteSerializer(serializers.ModelSerializer):
         if lines_data is not None:
             for line_data in lines_data:
                 self._validate_line(line_data, clinic_id)
-        with transaction.atomic():
+        with transaction.atomic(), defer_invoice_totals():
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
             instance.save()
@@ -0,0 +1,149 @@
+"""
+Maintain the denormalized ``Invoice.total_net`` / ``total_gross`` / ``amount_paid`` columns.
+
+``apps.billing.signals`` calls ``invoice_totals_changed`` whenever an ``InvoiceLine`` or a
+``Payment`` is saved or deleted; only the affected invoice is recomputed, under a row lock and
+inside the caller's transaction, together with its revenue rollup day when the invoiced amount
+changed. Code that writes many lines at once wraps the writes in ``defer_invoice_totals()`` so
+each invoice is recomputed once when the block exits.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from apps.billing.models import Invoice, InvoiceLine, Payment
+
+from .revenue_rollup import local_date, refresh_revenue_day
+
+_ZERO = Decimal("0.00")
+
+
+@dataclass(frozen=True)
+class InvoiceTotals:
+    total_net: Decimal = _ZERO
+    total_gross: Decimal = _ZERO
+    amount_paid: Decimal = _ZERO
+
+    def matches(self, invoice: Invoice) -> bool:
+        return (
+            invoice.total_net == self.total_net
+            and invoice.total_gross == self.total_gross
+            and invoice.amount_paid == self.amount_paid
+        )
+
+    def apply_to(self, invoice: Invoice) -> None:
+        invoice.total_net = self.total_net
+        invoice.total_gross = self.total_gross
+        invoice.amount_paid = self.amount_paid
+
+
+def compute_invoice_totals(invoice_ids: Iterable[int]) -> dict[int, InvoiceTotals]:
+    """Totals from the source rows for each invoice id (two queries, any number of invoices)."""
+    ids = list(invoice_ids)
+    net: dict[int, Decimal] = dict.fromkeys(ids, _ZERO)
+    gross: dict[int, Decimal] = dict.fromkeys(ids, _ZERO)
+    for line in InvoiceLine.objects.filter(invoice_id__in=ids).only(
+        "invoice_id", "quantity", "unit_price", "vat_rate"
+    ):
+        net[line.invoice_id] += line.line_total
+        gross[line.invoice_id] += line.line_gross
+    paid = dict(
+        Payment.objects.filter(invoice_id__in=ids, status=Payment.Status.COMPLETED)
+        .values("invoice_id")
+        .annotate(s=Sum("amount"))
+        .values_list("invoice_id", "s")
+    )
+    return {
+        invoice_id: InvoiceTotals(
+            total_net=net[invoice_id],
+            total_gross=gross[invoice_id],
+            amount_paid=paid.get(invoice_id) or _ZERO,
+        )
+        for invoice_id in ids
+    }
+
+
+def recalculate_invoice_totals(
+    invoice_id: int, *, instances: Iterable[Invoice] = ()
+) -> InvoiceTotals | None:
+    """
+    Recompute and store one invoice's totals. ``instances`` are in-memory copies of the invoice
+    (e.g. the one a line was created with) that get the new values too, so callers holding
+    them do not read stale totals. Returns ``None`` if the invoice no longer exists.
+    """
+    with transaction.atomic():
+        locked = (
+            Invoice.objects.select_for_update()
+            .filter(pk=invoice_id)
+            .values("clinic_id", "created_at", "total_net", "total_gross")
+            .first()
+        )
+        if locked is None:
+            return None
+        totals = compute_invoice_totals([invoice_id])[invoice_id]
+        Invoice.objects.filter(pk=invoice_id).update(
+            total_net=totals.total_net,
+            total_gross=totals.total_gross,
+            amount_paid=totals.amount_paid,
+        )
+        if (locked["total_net"], locked["total_gross"]) != (totals.total_net, totals.total_gross):
+            refresh_revenue_day(
+                locked["clinic_id"], local_date(locked["created_at"], locked["clinic_id"])
+            )
+    for invoice in instances:
+        totals.apply_to(invoice)
+    return totals
+
+
+_deferred = threading.local()
+
+
+def invoice_totals_changed(invoice_id: int | None, instance: Invoice | None = None) -> None:
+    """A line or payment of ``invoice_id`` changed: recompute now, or when the deferral ends."""
+    if invoice_id is None:
+        return
+    pending = getattr(_deferred, "pending", None)
+    if pending is None:
+        recalculate_invoice_totals(invoice_id, instances=[instance] if instance else ())
+        return
+    instances = pending.setdefault(invoice_id, [])
+    if instance is not None and all(instance is not seen for seen in instances):
+        instances.append(instance)
+
+
+@contextmanager
+def defer_invoice_totals():
+    """Recompute each touched invoice once, when the (outermost) block exits."""
+    if getattr(_deferred, "pending", None) is not None:
+        yield
+        return
+    _deferred.pending = {}
+    try:
+        yield
+        pending = _deferred.pending
+    finally:
+        _deferred.pending = None
+    for invoice_id, instances in pending.items():
+        recalculate_invoice_totals(invoice_id, instances=instances)
+
+
+def sync_invoice_totals(invoices: list[Invoice], *, write: bool = True) -> list[Invoice]:
+    """
+    Compare stored totals of ``invoices`` with their source rows; return the stale ones.
+    With ``write`` the stale invoices are corrected in one ``bulk_update``.
+    """
+    fresh = compute_invoice_totals(invoice.pk for invoice in invoices)
+    stale = [invoice for invoice in invoices if not fresh[invoice.pk].matches(invoice)]
+    if write and stale:
+        for invoice in stale:
+            fresh[invoice.pk].apply_to(invoice)
+        Invoice.objects.bulk_update(stale, list(Invoice.TOTAL_FIELDS))
+    return stale
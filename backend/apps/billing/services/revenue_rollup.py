@@ -0,0 +1,196 @@
+"""
+Daily revenue rollups (``DailyRevenueRollup``) behind the revenue summary.
+
+Each clinic has rollup rows for one contiguous range of clinic-local days, written by
+``rebuild_revenue_rollups`` (normally up to yesterday, by the nightly command). Inside that
+range ``refresh_revenue_day`` recomputes a single day whenever an invoice or payment on it
+changes (late payments, cancellations, edited drafts), holding the row lock so concurrent
+refreshes of the same day serialize. Days outside the range — typically just
+today — are aggregated live, so ``daily_revenue`` is exact whether or not rollups exist yet.
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, tzinfo
+from decimal import Decimal
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.billing.models import DailyRevenueRollup, Invoice, Payment
+from apps.tenancy.dates import clinic_timezone, date_range_q
+
+_ZERO = Decimal("0")
+
+
+@dataclass
+class DayRevenue:
+    invoiced_net: Decimal = field(default=_ZERO)
+    invoiced_gross: Decimal = field(default=_ZERO)
+    invoice_count: int = 0
+    paid: Decimal = field(default=_ZERO)
+
+
+def _segments_q(column: str, segments: list[tuple[date, date]], zone: tzinfo) -> Q:
+    return reduce(
+        operator.or_, (date_range_q(column, start, end, tz=zone) for start, end in segments)
+    )
+
+
+def compute_daily_revenue(
+    clinic_id: int, segments: list[tuple[date, date]], zone: tzinfo
+) -> dict[date, DayRevenue]:
+    """Live per-day totals for the given inclusive date segments (two grouped queries)."""
+    days: dict[date, DayRevenue] = {}
+    if not segments:
+        return days
+    invoiced = (
+        Invoice.objects.filter(_segments_q("created_at", segments, zone), clinic_id=clinic_id)
+        .exclude(status=Invoice.Status.CANCELLED)
+        .annotate(day=TruncDate("created_at", tzinfo=zone))
+        .values("day")
+        .annotate(net=Sum("total_net"), gross=Sum("total_gross"), n=Count("id"))
+    )
+    for row in invoiced:
+        day = days.setdefault(row["day"], DayRevenue())
+        day.invoiced_net = row["net"] or _ZERO
+        day.invoiced_gross = row["gross"] or _ZERO
+        day.invoice_count = row["n"]
+    paid = (
+        Payment.objects.filter(
+            _segments_q("paid_at", segments, zone),
+            invoice__clinic_id=clinic_id,
+            status=Payment.Status.COMPLETED,
+        )
+        .annotate(day=TruncDate("paid_at", tzinfo=zone))
+        .values("day")
+        .annotate(s=Sum("amount"))
+    )
+    for row in paid:
+        days.setdefault(row["day"], DayRevenue()).paid = row["s"] or _ZERO
+    return days
+
+
+def rollup_coverage(clinic_id: int) -> tuple[date, date] | None:
+    bounds = DailyRevenueRollup.objects.filter(clinic_id=clinic_id).aggregate(
+        first=Min("date"), last=Max("date")
+    )
+    if bounds["first"] is None:
+        return None
+    return bounds["first"], bounds["last"]
+
+
+def _uncovered(
+    date_from: date, date_to: date, coverage: tuple[date, date] | None
+) -> list[tuple[date, date]]:
+    if coverage is None or coverage[1] < date_from or coverage[0] > date_to:
+        return [(date_from, date_to)]
+    segments = []
+    if date_from < coverage[0]:
+        segments.append((date_from, coverage[0] - timedelta(days=1)))
+    if date_to > coverage[1]:
+        segments.append((coverage[1] + timedelta(days=1), date_to))
+    return segments
+
+
+def daily_revenue(
+    clinic_id: int, date_from: date, date_to: date, zone: tzinfo | None = None
+) -> dict[date, DayRevenue]:
+    """Per-day revenue for ``[date_from, date_to]``: rollup rows plus a live delta."""
+    zone = zone or clinic_timezone(clinic_id)
+    days = {
+        row.date: DayRevenue(
+            invoiced_net=row.invoiced_net,
+            invoiced_gross=row.invoiced_gross,
+            invoice_count=row.invoice_count,
+            paid=row.paid,
+        )
+        for row in DailyRevenueRollup.objects.filter(
+            clinic_id=clinic_id, date__gte=date_from, date__lte=date_to
+        )
+    }
+    live = compute_daily_revenue(
+        clinic_id, _uncovered(date_from, date_to, rollup_coverage(clinic_id)), zone
+    )
+    days.update(live)
+    return days
+
+
+def local_date(value: datetime, clinic_id: int) -> date:
+    return timezone.localtime(value, clinic_timezone(clinic_id)).date()
+
+
+def refresh_revenue_day(clinic_id: int, day: date) -> bool:
+    """Recompute one rollup row if the day is inside the clinic's rollup range."""
+    with transaction.atomic():
+        row = (
+            DailyRevenueRollup.objects.select_for_update()
+            .filter(clinic_id=clinic_id, date=day)
+            .first()
+        )
+        if row is None:
+            return False
+        fresh = compute_daily_revenue(clinic_id, [(day, day)], clinic_timezone(clinic_id)).get(
+            day, DayRevenue()
+        )
+        row.invoiced_net = fresh.invoiced_net
+        row.invoiced_gross = fresh.invoiced_gross
+        row.invoice_count = fresh.invoice_count
+        row.paid = fresh.paid
+        row.save(
+            update_fields=["invoiced_net", "invoiced_gross", "invoice_count", "paid", "updated_at"]
+        )
+    return True
+
+
+def rebuild_revenue_rollups(clinic_id: int, date_from: date, date_to: date) -> int:
+    """
+    Replace rollup rows for ``[date_from, date_to]`` (one per day, zero days included).
+    The range is widened so the clinic's rollups stay contiguous. Returns rows written.
+    """
+    coverage = rollup_coverage(clinic_id)
+    if coverage is not None:
+        date_from = min(date_from, coverage[1] + timedelta(days=1))
+        date_to = max(date_to, coverage[0] - timedelta(days=1))
+    if date_from > date_to:
+        return 0
+    zone = clinic_timezone(clinic_id)
+    with transaction.atomic():
+        fresh = compute_daily_revenue(clinic_id, [(date_from, date_to)], zone)
+        DailyRevenueRollup.objects.filter(
+            clinic_id=clinic_id, date__gte=date_from, date__lte=date_to
+        ).delete()
+        rows = []
+        day = date_from
+        while day <= date_to:
+            revenue = fresh.get(day, DayRevenue())
+            rows.append(
+                DailyRevenueRollup(
+                    clinic_id=clinic_id,
+                    date=day,
+                    invoiced_net=revenue.invoiced_net,
+                    invoiced_gross=revenue.invoiced_gross,
+                    invoice_count=revenue.invoice_count,
+                    paid=revenue.paid,
+                )
+            )
+            day += timedelta(days=1)
+        DailyRevenueRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def first_activity_date(clinic_id: int) -> date | None:
+    """Clinic-local date of the earliest invoice or payment, or ``None`` if there are none."""
+    first_invoice = Invoice.objects.filter(clinic_id=clinic_id).aggregate(m=Min("created_at"))["m"]
+    first_payment = Payment.objects.filter(invoice__clinic_id=clinic_id).aggregate(
+        m=Min("paid_at")
+    )["m"]
+    moments = [m for m in (first_invoice, first_payment) if m is not None]
+    if not moments:
+        return None
+    return local_date(min(moments), clinic_id)
@@ -0,0 +1,67 @@
+"""Keep denormalized invoice totals and daily revenue rollups in step with their sources."""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Invoice, InvoiceLine, Payment
+from .services.invoice_totals import invoice_totals_changed
+from .services.revenue_rollup import local_date, refresh_revenue_day
+
+# Invoice fields that move an invoice into / out of a rollup day (totals are handled by
+# recalculate_invoice_totals).
+_ROLLUP_INVOICE_FIELDS = {"status", "created_at", "clinic"}
+
+
+@receiver(post_save, sender=InvoiceLine)
+@receiver(post_delete, sender=InvoiceLine)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def _invoice_source_row_changed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Invoice):
+        return  # the invoice itself is being deleted
+    invoice_field = sender._meta.get_field("invoice")
+    cached = instance.invoice if invoice_field.is_cached(instance) else None
+    invoice_totals_changed(instance.invoice_id, cached)
+
+
+@receiver(post_save, sender=Invoice)
+def _invoice_saved(sender, instance, created, update_fields=None, **kwargs):
+    if (
+        not created
+        and update_fields is not None
+        and not (_ROLLUP_INVOICE_FIELDS & set(update_fields))
+    ):
+        return
+    refresh_revenue_day(instance.clinic_id, local_date(instance.created_at, instance.clinic_id))
+
+
+@receiver(post_delete, sender=Invoice)
+def _invoice_deleted(sender, instance, **kwargs):
+    refresh_revenue_day(instance.clinic_id, local_date(instance.created_at, instance.clinic_id))
+
+
+@receiver(pre_save, sender=Payment)
+def _payment_remember_previous_day(sender, instance, **kwargs):
+    instance._previous_paid_at = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_paid_at = (
+            Payment.objects.filter(pk=instance.pk).values_list("paid_at", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def _payment_changed(sender, instance, **kwargs):
+    clinic_id = (
+        Invoice.objects.filter(pk=instance.invoice_id).values_list("clinic_id", flat=True).first()
+    )
+    if clinic_id is None:
+        return
+    days = {local_date(instance.paid_at, clinic_id)}
+    previous = getattr(instance, "_previous_paid_at", None)
+    if previous is not None:
+        days.add(local_date(previous, clinic_id))
+    for day in days:
+        refresh_revenue_day(clinic_id, day)
@@ -0,0 +1,111 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.billing.models import Invoice, InvoiceLine, Payment
+from apps.billing.services.invoice_totals import defer_invoice_totals
+
+
+@pytest.fixture
+def invoice(clinic, client_with_membership, patient):
+    return Invoice.objects.create(
+        clinic=clinic,
+        client=client_with_membership,
+        patient=patient,
+        status=Invoice.Status.SENT,
+    )
+
+
+def _add_line(invoice, unit_price, quantity=1, vat_rate="8"):
+    return InvoiceLine.objects.create(
+        invoice=invoice,
+        description="Line",
+        quantity=quantity,
+        unit_price=unit_price,
+        vat_rate=vat_rate,
+    )
+
+
+@pytest.mark.django_db
+def test_totals_follow_line_and_payment_changes(invoice):
+    line = _add_line(invoice, "100.00")
+    _add_line(invoice, "10.00", quantity=3, vat_rate="23")
+    assert invoice.total_net == Decimal("130.00")
+    assert invoice.total_gross == Decimal("144.90")
+
+    line.unit_price = Decimal("50.00")
+    line.save()
+    Payment.objects.create(invoice=invoice, amount=Decimal("40.00"))
+    Payment.objects.create(invoice=invoice, amount=Decimal("99.00"), status="pending")
+    invoice.refresh_from_db()
+    assert invoice.total_net == Decimal("80.00")
+    assert invoice.amount_paid == Decimal("40.00")
+    assert invoice.balance_due == Decimal("40.00")
+
+    line.delete()
+    invoice.refresh_from_db()
+    assert invoice.total_net == Decimal("30.00")
+    assert invoice.total_gross == Decimal("36.90")
+
+
+@pytest.mark.django_db
+def test_full_save_of_stale_instance_keeps_stored_totals(invoice):
+    stale = Invoice.objects.get(pk=invoice.pk)
+    _add_line(invoice, "100.00")
+    stale.invoice_number = "FV/1"
+    stale.save()
+    invoice.refresh_from_db()
+    assert invoice.invoice_number == "FV/1"
+    assert invoice.total_net == Decimal("100.00")
+
+
+@pytest.mark.django_db
+def test_deferred_block_recomputes_each_invoice_once(invoice):
+    with CaptureQueriesContext(connection) as ctx, defer_invoice_totals():
+        for _ in range(5):
+            _add_line(invoice, "20.00")
+    updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "billing_invoice"')]
+    assert len(updates) == 1
+    assert invoice.total_net == Decimal("100.00")
+
+
+@pytest.mark.django_db
+def test_invoice_list_serves_stored_totals(
+    receptionist, client_with_membership, patient, api_client
+):
+    for _ in range(3):
+        inv = Invoice.objects.create(
+            clinic=receptionist.clinic, client=client_with_membership, patient=patient
+        )
+        _add_line(inv, "150.00")
+        Payment.objects.create(invoice=inv, amount=Decimal("50.00"))
+    api_client.force_authenticate(user=receptionist)
+
+    r = api_client.get("/api/billing/invoices/")
+    assert r.status_code == 200
+    rows = r.data["results"] if isinstance(r.data, dict) else r.data
+    assert {row["total"] for row in rows} == {"150.00"}
+    assert {row["total_gross"] for row in rows} == {"162.00"}
+    assert {row["balance_due"] for row in rows} == {"100.00"}
+
+
+@pytest.mark.django_db
+def test_recalculate_command_verifies_and_repairs_drift(invoice):
+    _add_line(invoice, "100.00")
+    Invoice.objects.filter(pk=invoice.pk).update(total_net=Decimal("1.00"))
+
+    with pytest.raises(CommandError, match="1 of 1"):
+        call_command("recalculate_invoice_totals", "--verify", stdout=StringIO())
+    invoice.refresh_from_db()
+    assert invoice.total_net == Decimal("1.00")
+
+    out = StringIO()
+    call_command("recalculate_invoice_totals", stdout=out)
+    assert "corrected 1" in out.getvalue()
+    invoice.refresh_from_db()
+    assert invoice.total_net == Decimal("100.00")
+    call_command("recalculate_invoice_totals", "--verify", stdout=StringIO())
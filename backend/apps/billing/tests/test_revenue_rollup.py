@@ -0,0 +1,99 @@
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.billing.models import DailyRevenueRollup, Invoice, InvoiceLine, Payment
+from apps.billing.services.revenue_rollup import daily_revenue, rebuild_revenue_rollups
+
+
+def _invoice(clinic, client, created_at, amount, status="sent"):
+    invoice = Invoice.objects.create(clinic=clinic, client=client, status=status)
+    InvoiceLine.objects.create(invoice=invoice, description="Visit", quantity=1, unit_price=amount)
+    Invoice.objects.filter(pk=invoice.pk).update(created_at=created_at)
+    invoice.refresh_from_db()
+    return invoice
+
+
+def _rollup(clinic, day):
+    return DailyRevenueRollup.objects.get(clinic=clinic, date=day)
+
+
+@pytest.mark.django_db
+def test_rebuild_writes_contiguous_days_through_yesterday(clinic, client_with_membership):
+    today = timezone.localdate()
+    _invoice(clinic, client_with_membership, timezone.now() - timedelta(days=3), "100.00")
+    _invoice(clinic, client_with_membership, timezone.now(), "40.00")
+
+    out = StringIO()
+    call_command("rebuild_revenue_rollups", stdout=out)
+
+    days = list(DailyRevenueRollup.objects.filter(clinic=clinic).values_list("date", flat=True))
+    assert days == [today - timedelta(days=n) for n in (3, 2, 1)]
+    first = _rollup(clinic, today - timedelta(days=3))
+    assert (first.invoiced_net, first.invoiced_gross, first.invoice_count) == (
+        Decimal("100.00"),
+        Decimal("108.00"),
+        1,
+    )
+    # Today stays live and is added on top of the rollups
+    revenue = daily_revenue(clinic.id, today - timedelta(days=3), today)
+    assert revenue[today].invoiced_net == Decimal("40.00")
+    assert sum(d.invoiced_net for d in revenue.values()) == Decimal("140.00")
+
+    call_command("rebuild_revenue_rollups", stdout=StringIO())
+    assert DailyRevenueRollup.objects.filter(clinic=clinic).count() == 3
+
+
+@pytest.mark.django_db
+def test_summary_reads_rollups_for_covered_days(
+    api_client, clinic_admin, clinic, client_with_membership
+):
+    _invoice(clinic, client_with_membership, datetime(2026, 3, 10, 12, tzinfo=UTC), "150.00")
+    rebuild_revenue_rollups(clinic.id, date(2026, 3, 1), date(2026, 3, 31))
+    # Invoice data no longer consulted for covered days: a tampered rollup shows through.
+    DailyRevenueRollup.objects.filter(clinic=clinic, date=date(2026, 3, 10)).update(
+        invoiced_net=Decimal("999.00")
+    )
+    api_client.force_authenticate(user=clinic_admin)
+
+    r = api_client.get(
+        "/api/billing/revenue-summary/?from=2026-03-01&to=2026-04-30&breakdown=monthly"
+    )
+    assert r.status_code == 200
+    assert r.data["total_invoiced"] == "999.00"
+    assert r.data["monthly"][0] == {"month": "2026-03", "revenue": "999.00", "invoice_count": 1}
+
+
+@pytest.mark.django_db
+def test_rollup_day_follows_later_invoice_and_payment_changes(clinic, client_with_membership):
+    march_10 = datetime(2026, 3, 10, 12, tzinfo=UTC)
+    invoice = _invoice(clinic, client_with_membership, march_10, "100.00")
+    rebuild_revenue_rollups(clinic.id, date(2026, 3, 1), date(2026, 3, 31))
+
+    InvoiceLine.objects.create(invoice=invoice, description="Extra", quantity=2, unit_price=25)
+    assert _rollup(clinic, date(2026, 3, 10)).invoiced_net == Decimal("150.00")
+
+    payment = Payment.objects.create(invoice=invoice, amount=Decimal("60.00"), paid_at=march_10)
+    assert _rollup(clinic, date(2026, 3, 10)).paid == Decimal("60.00")
+
+    payment.paid_at = datetime(2026, 3, 12, 9, tzinfo=UTC)
+    payment.save()
+    assert _rollup(clinic, date(2026, 3, 10)).paid == Decimal("0.00")
+    assert _rollup(clinic, date(2026, 3, 12)).paid == Decimal("60.00")
+
+    invoice.status = Invoice.Status.CANCELLED
+    invoice.save(update_fields=["status", "updated_at"])
+    cancelled = _rollup(clinic, date(2026, 3, 10))
+    assert (cancelled.invoiced_net, cancelled.invoice_count) == (Decimal("0.00"), 0)
+
+
+@pytest.mark.django_db
+def test_rebuild_keeps_rollup_range_contiguous(clinic, client_with_membership):
+    rebuild_revenue_rollups(clinic.id, date(2026, 3, 1), date(2026, 3, 5))
+    rebuild_revenue_rollups(clinic.id, date(2026, 3, 10), date(2026, 3, 12))
+    days = set(DailyRevenueRollup.objects.filter(clinic=clinic).values_list("date", flat=True))
+    assert days == {date(2026, 3, 1) + timedelta(days=n) for n in range(12)}
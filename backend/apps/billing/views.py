@@ -4,12 +4,11 @@ Billing API views.
 
 import calendar
 import csv
+from collections import defaultdict
 from datetime import date, timedelta
 from decimal import Decimal
 from io import StringIO
 
-from django.db.models import Count, DecimalField, F, Sum
-from django.db.models.functions import TruncDate, TruncMonth
 from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import viewsets
@@ -22,12 +21,12 @@ from apps.accounts.permissions import HasClinic, IsAdminOrReadOnly, IsClinicAdmi
 from apps.audit.services import log_audit_event
 from apps.audit.snapshots import invoice_audit_payload
 from apps.tenancy.access import accessible_clinic_ids, clinic_id_for_mutation
-from apps.tenancy.models import Clinic
+from apps.tenancy.clinic_settings import is_clinic_feature_enabled
 
 from .ksef_service import KSeFError
 from .ksef_service import submit_invoice as ksef_submit
 from .ksef_xml import build_fa3_xml
-from .models import Invoice, InvoiceLine, Payment, Service
+from .models import Invoice, Payment, Service
 from .serializers import (
     InvoiceReadSerializer,
     InvoiceWriteSerializer,
@@ -36,6 +35,7 @@ from .serializers import (
     ServiceSerializer,
     ServiceWriteSerializer,
 )
+from .services.revenue_rollup import daily_revenue
 
 
 class ServiceViewSet(viewsets.ModelViewSet):
@@ -185,7 +185,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     def submit_ksef(self, request, pk=None):
         """Build FA3 XML and submit this invoice to KSeF."""
         invoice = self.get_object()
-        if not Clinic.objects.filter(pk=invoice.clinic_id, feature_ksef_enabled=True).exists():
+        if not is_clinic_feature_enabled(invoice.clinic_id, "feature_ksef_enabled"):
             return Response(
                 {"detail": "KSeF is disabled for this clinic."},
                 status=403,
@@ -225,7 +225,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     def ksef_xml_preview(self, request, pk=None):
         """Return the FA3 XML for this invoice (for preview/debugging)."""
         invoice = self.get_object()
-        if not Clinic.objects.filter(pk=invoice.clinic_id, feature_ksef_enabled=True).exists():
+        if not is_clinic_feature_enabled(invoice.clinic_id, "feature_ksef_enabled"):
             return Response(
                 {"detail": "KSeF is disabled for this clinic."},
                 status=403,
@@ -401,80 +401,21 @@ class RevenueSummaryView(APIView):
                 status=403,
             )
 
-        # Total invoiced: sum of line totals for non-cancelled invoices in range
-        line_total_expr = F("quantity") * F("unit_price")
-        invoiced_qs = (
-            InvoiceLine.objects.filter(
-                invoice__clinic_id=clinic_id,
-                invoice__created_at__date__gte=date_from,
-                invoice__created_at__date__lte=date_to,
-            )
-            .exclude(invoice__status=Invoice.Status.CANCELLED)
-            .aggregate(
-                s=Sum(line_total_expr, output_field=DecimalField(max_digits=14, decimal_places=2))
-            )
-        )
-        total_invoiced = invoiced_qs["s"] or Decimal("0")
-
-        # Total paid: sum of completed payments in range
-        paid_qs = Payment.objects.filter(
-            invoice__clinic_id=clinic_id,
-            status=Payment.Status.COMPLETED,
-            paid_at__date__gte=date_from,
-            paid_at__date__lte=date_to,
-        ).aggregate(s=Sum("amount"))
-        total_paid = paid_qs["s"] or Decimal("0")
+        # Per-day totals from the DailyRevenueRollup table, plus live aggregates for days the
+        # rollups do not cover yet (normally just today): O(days), not O(invoices).
+        days = daily_revenue(clinic_id, date_from, date_to)
+        total_invoiced = sum((d.invoiced_net for d in days.values()), Decimal("0"))
+        total_paid = sum((d.paid for d in days.values()), Decimal("0"))
         total_outstanding = total_invoiced - total_paid
 
-        # By period: invoiced and paid grouped by TruncMonth or TruncDate
-        if period_kind == "monthly":
-            trunc_inv = TruncMonth("invoice__created_at")
-            trunc_pay = TruncMonth("paid_at")
-        else:
-            trunc_inv = TruncDate("invoice__created_at")
-            trunc_pay = TruncDate("paid_at")
-
-        invoiced_by_period = (
-            InvoiceLine.objects.filter(
-                invoice__clinic_id=clinic_id,
-                invoice__created_at__date__gte=date_from,
-                invoice__created_at__date__lte=date_to,
-            )
-            .exclude(invoice__status=Invoice.Status.CANCELLED)
-            .annotate(period=trunc_inv)
-            .values("period")
-            .annotate(
-                invoiced=Sum(
-                    line_total_expr, output_field=DecimalField(max_digits=14, decimal_places=2)
-                )
-            )
-            .order_by("period")
-        )
-        paid_by_period = (
-            Payment.objects.filter(
-                invoice__clinic_id=clinic_id,
-                status=Payment.Status.COMPLETED,
-                paid_at__date__gte=date_from,
-                paid_at__date__lte=date_to,
-            )
-            .annotate(period=trunc_pay)
-            .values("period")
-            .annotate(paid=Sum("amount"))
-            .order_by("period")
-        )
-
-        # Build label -> amount maps (period from DB can be date or datetime)
-        def to_label(period_value):
-            if hasattr(period_value, "date"):
-                d = period_value.date()
-            else:
-                d = period_value
-            return d.strftime("%Y-%m") if period_kind == "monthly" else d.strftime("%Y-%m-%d")
+        def to_label(d, kind):
+            return d.strftime("%Y-%m") if kind == "monthly" else d.strftime("%Y-%m-%d")
 
-        invoiced_map = {
-            to_label(row["period"]): row["invoiced"] or Decimal("0") for row in invoiced_by_period
-        }
-        paid_map = {to_label(row["period"]): row["paid"] or Decimal("0") for row in paid_by_period}
+        invoiced_map = defaultdict(Decimal)
+        paid_map = defaultdict(Decimal)
+        for day, revenue in days.items():
+            invoiced_map[to_label(day, period_kind)] += revenue.invoiced_net
+            paid_map[to_label(day, period_kind)] += revenue.paid
 
         by_period = []
         for _period_date, label in _periods_in_range(date_from, date_to, period_kind):
@@ -499,26 +440,14 @@ class RevenueSummaryView(APIView):
         }
 
         if breakdown_param == "monthly":
-            invoice_counts = (
-                Invoice.objects.filter(
-                    clinic_id=clinic_id,
-                    created_at__date__gte=date_from,
-                    created_at__date__lte=date_to,
-                )
-                .exclude(status=Invoice.Status.CANCELLED)
-                .annotate(period=TruncMonth("created_at"))
-                .values("period")
-                .annotate(invoice_count=Count("id"))
-                .order_by("period")
-            )
-            count_by_label = {}
-            for row in invoice_counts:
-                pv = row["period"]
-                d = pv.date() if hasattr(pv, "date") else pv
-                count_by_label[d.strftime("%Y-%m")] = row["invoice_count"]
+            revenue_by_month = defaultdict(Decimal)
+            count_by_label = defaultdict(int)
+            for day, revenue in days.items():
+                revenue_by_month[to_label(day, "monthly")] += revenue.invoiced_net
+                count_by_label[to_label(day, "monthly")] += revenue.invoice_count
             monthly = []
             for _period_date, label in _periods_in_range(date_from, date_to, "monthly"):
-                rev = invoiced_map.get(label, Decimal("0"))
+                rev = revenue_by_month.get(label, Decimal("0"))
                 monthly.append(
                     {
                         "month": label,
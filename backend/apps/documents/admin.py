@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from apps.documents.models import IngestionDocument
+from apps.documents.models import ConversionCacheEntry, IngestionDocument
 
 
 @admin.register(IngestionDocument)
@@ -18,3 +18,18 @@ class IngestionDocumentAdmin(admin.ModelAdmin):
     search_fields = ("original_filename", "job_id__startswith")
     readonly_fields = ("job_id", "sha256", "last_error", "created_at", "updated_at")
     raw_id_fields = ("clinic", "patient", "appointment", "lab_order", "uploaded_by")
+
+
+@admin.register(ConversionCacheEntry)
+class ConversionCacheEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "content_sha256",
+        "converter_version",
+        "size_bytes",
+        "hit_count",
+        "last_used_at",
+    )
+    list_filter = ("converter_version",)
+    search_fields = ("content_sha256__startswith",)
+    readonly_fields = ("created_at",)
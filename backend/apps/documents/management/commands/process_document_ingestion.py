@@ -1,11 +1,19 @@
 """
 Process documents with status=uploaded: download from S3, convert to HTML, upload HTML to S3, set status=ready/failed.
-Usage: python manage.py process_document_ingestion [--limit N] [--max-age-hours H] [--doc-id ID]
+Usage: python manage.py process_document_ingestion [--limit N] [--max-age-hours H] [--doc-id ID] [--workers W]
+
+Claimed documents are downloaded, converted and uploaded by a pool of ``--workers`` threads
+(default ``DOCUMENTS_INGESTION_WORKERS``); status updates are written back on the main thread.
+Uploads whose bytes were converted before (same SHA-256, same converter version) are served
+from the conversion cache by an S3 copy, without downloading or converting them again.
 """
 
 from __future__ import annotations
 
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import timedelta
 from pathlib import Path
 
@@ -17,6 +25,15 @@ from django.utils import timezone
 
 from apps.documents.models import IngestionDocument
 from apps.documents.services.conversion import convert_document_to_html
+from apps.documents.services.conversion_cache import (
+    conversion_cache_enabled,
+    conversion_cache_key,
+    evict_conversion_cache,
+    forget_cache_entry,
+    lookup_conversion_cache,
+    record_cache_hit,
+    record_cache_store,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +52,103 @@ def _truncate_error(message: str) -> str:
     return message[: _LAST_ERROR_MAX - 20] + "\n…(truncated)"
 
 
+def _is_missing_object(exc: ClientError) -> bool:
+    code = (exc.response.get("Error") or {}).get("Code", "")
+    return code in ("NoSuchKey", "404", "NotFound")
+
+
+def _output_key(doc: IngestionDocument) -> str:
+    stem = Path(doc.original_filename or "file").stem
+    safe_stem = "".join(c for c in stem if c.isalnum() or c in "-_")[:100] or "output"
+    return f"documents_data/{doc.job_id}/{safe_stem}.html"
+
+
+@dataclass(frozen=True)
+class _Outcome:
+    output_key: str = ""
+    error: str = ""
+    content_sha256: str = ""
+    cache_hit: bool = False
+    cache_stale: bool = False
+    cached_size: int = 0  # > 0 when the output was stored in the conversion cache
+
+
+def _convert_document(
+    client, bucket: str, doc: IngestionDocument, cached_key: str | None = None
+) -> _Outcome:
+    """Download, convert and upload one document. No database access (runs in pool threads)."""
+    output_key = _output_key(doc)
+    cache_stale = False
+    if cached_key:
+        try:
+            client.copy_object(
+                Bucket=bucket,
+                Key=output_key,
+                CopySource={"Bucket": bucket, "Key": cached_key},
+                ContentType="text/html; charset=utf-8",
+                MetadataDirective="REPLACE",
+            )
+            return _Outcome(output_key=output_key, content_sha256=doc.sha256, cache_hit=True)
+        except ClientError as exc:
+            if not _is_missing_object(exc):
+                logger.warning("Conversion cache copy failed for document id=%s: %s", doc.id, exc)
+            cache_stale = _is_missing_object(exc)
+
+    try:
+        resp = client.get_object(Bucket=bucket, Key=doc.input_s3_key)
+        data = resp["Body"].read()
+    except ClientError as exc:
+        err = exc.response.get("Error") or {}
+        code = err.get("Code", "ClientError")
+        msg = err.get("Message", str(exc))
+        logger.exception("Failed to download document id=%s key=%s", doc.id, doc.input_s3_key)
+        return _Outcome(error=f"S3 download failed ({code}): {msg}", cache_stale=cache_stale)
+    except Exception as exc:
+        logger.exception("Failed to download document id=%s key=%s", doc.id, doc.input_s3_key)
+        return _Outcome(error=f"Download failed: {exc!s}", cache_stale=cache_stale)
+
+    try:
+        html_content = convert_document_to_html(
+            data,
+            doc.content_type or "",
+            doc.original_filename or "",
+        )
+    except Exception as exc:
+        logger.exception("Conversion failed for document id=%s", doc.id)
+        return _Outcome(error=f"Conversion failed: {exc!s}", cache_stale=cache_stale)
+
+    body = html_content.encode("utf-8")
+    try:
+        client.put_object(
+            Bucket=bucket,
+            Key=output_key,
+            Body=body,
+            ContentType="text/html; charset=utf-8",
+        )
+    except Exception as exc:
+        logger.exception("Failed to upload HTML for document id=%s", doc.id)
+        return _Outcome(error=f"S3 upload failed: {exc!s}", cache_stale=cache_stale)
+
+    content_sha256 = doc.sha256 or hashlib.sha256(data).hexdigest()
+    cached_size = 0
+    if conversion_cache_enabled():
+        try:
+            client.copy_object(
+                Bucket=bucket,
+                Key=conversion_cache_key(content_sha256),
+                CopySource={"Bucket": bucket, "Key": output_key},
+            )
+            cached_size = len(body)
+        except Exception:
+            logger.exception("Failed to store conversion cache for document id=%s", doc.id)
+    return _Outcome(
+        output_key=output_key,
+        content_sha256=content_sha256,
+        cache_stale=cache_stale,
+        cached_size=cached_size,
+    )
+
+
 class Command(BaseCommand):
     help = (
         "Process uploaded documents: download from S3, convert to HTML, upload HTML, update status."
@@ -49,6 +163,12 @@ class Command(BaseCommand):
             default=None,
             help="Process exactly this document id (must be status=uploaded).",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Documents converted concurrently (default: DOCUMENTS_INGESTION_WORKERS).",
+        )
 
     def handle(self, *args, **options):
         bucket = getattr(settings, "DOCUMENTS_DATA_S3_BUCKET", None)
@@ -76,10 +196,7 @@ class Command(BaseCommand):
                 self.stdout.write("No documents to process.")
                 return
 
-        client = get_s3_client()
-        ready = 0
-        failed = 0
-
+        claimed_docs = []
         for doc in docs:
             claimed = IngestionDocument.objects.filter(
                 pk=doc.pk,
@@ -95,74 +212,75 @@ class Command(BaseCommand):
                     )
                 continue
             doc.refresh_from_db()
+            claimed_docs.append(doc)
 
-            try:
-                resp = client.get_object(Bucket=bucket, Key=doc.input_s3_key)
-                data = resp["Body"].read()
-            except ClientError as exc:
-                err = exc.response.get("Error") or {}
-                code = err.get("Code", "ClientError")
-                msg = err.get("Message", str(exc))
-                message = _truncate_error(f"S3 download failed ({code}): {msg}")
-                logger.exception(
-                    "Failed to download document id=%s key=%s", doc.id, doc.input_s3_key
-                )
-                doc.status = IngestionDocument.Status.FAILED
-                doc.last_error = message
-                doc.save(update_fields=["status", "last_error", "updated_at"])
-                failed += 1
-                continue
-            except Exception as exc:
-                message = _truncate_error(f"Download failed: {exc!s}")
-                logger.exception(
-                    "Failed to download document id=%s key=%s", doc.id, doc.input_s3_key
-                )
-                doc.status = IngestionDocument.Status.FAILED
-                doc.last_error = message
-                doc.save(update_fields=["status", "last_error", "updated_at"])
-                failed += 1
-                continue
-
-            try:
-                html_content = convert_document_to_html(
-                    data,
-                    doc.content_type or "",
-                    doc.original_filename or "",
-                )
-            except Exception as exc:
-                message = _truncate_error(f"Conversion failed: {exc!s}")
-                logger.exception("Conversion failed for document id=%s", doc.id)
-                doc.status = IngestionDocument.Status.FAILED
-                doc.last_error = message
-                doc.save(update_fields=["status", "last_error", "updated_at"])
-                failed += 1
-                continue
-
-            stem = Path(doc.original_filename or "file").stem
-            safe_stem = "".join(c for c in stem if c.isalnum() or c in "-_")[:100] or "output"
-            output_key = f"documents_data/{doc.job_id}/{safe_stem}.html"
+        client = get_s3_client()
+        workers = options["workers"]
+        if workers is None:
+            workers = int(getattr(settings, "DOCUMENTS_INGESTION_WORKERS", 4))
+        cached = lookup_conversion_cache(doc.sha256 for doc in claimed_docs)
+        jobs = [
+            (doc, cached[doc.sha256].s3_key if doc.sha256 in cached else None)
+            for doc in claimed_docs
+        ]
+        ready = 0
+        failed = 0
+        hits = 0
+        misses = 0
 
-            try:
-                client.put_object(
-                    Bucket=bucket,
-                    Key=output_key,
-                    Body=html_content.encode("utf-8"),
-                    ContentType="text/html; charset=utf-8",
+        for doc, outcome in self._iter_outcomes(client, bucket, jobs, workers):
+            if outcome.cache_stale:
+                forget_cache_entry(doc.sha256)
+            if outcome.cache_hit:
+                record_cache_hit(outcome.content_sha256)
+                hits += 1
+            elif outcome.output_key and conversion_cache_enabled():
+                misses += 1
+            if outcome.cached_size:
+                record_cache_store(
+                    content_sha256=outcome.content_sha256,
+                    s3_key=conversion_cache_key(outcome.content_sha256),
+                    size_bytes=outcome.cached_size,
                 )
-            except Exception as exc:
-                message = _truncate_error(f"S3 upload failed: {exc!s}")
-                logger.exception("Failed to upload HTML for document id=%s", doc.id)
+            if outcome.content_sha256 and not doc.sha256:
+                doc.sha256 = outcome.content_sha256
+                doc.save(update_fields=["sha256", "updated_at"])
+            if outcome.error:
                 doc.status = IngestionDocument.Status.FAILED
-                doc.last_error = message
+                doc.last_error = _truncate_error(outcome.error)
                 doc.save(update_fields=["status", "last_error", "updated_at"])
                 failed += 1
                 continue
-
-            doc.output_html_s3_key = output_key
+            doc.output_html_s3_key = outcome.output_key
             doc.status = IngestionDocument.Status.READY
             doc.last_error = ""
             doc.save(update_fields=["output_html_s3_key", "status", "last_error", "updated_at"])
             ready += 1
-            self.stdout.write(f"Processed document id={doc.id} job_id={doc.job_id} -> {output_key}")
+            self.stdout.write(
+                f"Processed document id={doc.id} job_id={doc.job_id} -> {outcome.output_key}"
+            )
 
+        if conversion_cache_enabled():
+            evicted = evict_conversion_cache(client, bucket)
+            lookups = hits + misses
+            rate = f"{hits / lookups:.0%}" if lookups else "n/a"
+            self.stdout.write(
+                f"Conversion cache: {hits} hit(s), {misses} miss(es), hit rate {rate}, "
+                f"{evicted} evicted."
+            )
         self.stdout.write(self.style.SUCCESS(f"Done: {ready} ready, {failed} failed."))
+
+    def _iter_outcomes(self, client, bucket, jobs, workers):
+        if workers <= 1 or len(jobs) <= 1:
+            for doc, cached_key in jobs:
+                yield doc, _convert_document(client, bucket, doc, cached_key)
+            return
+        with ThreadPoolExecutor(
+            max_workers=min(workers, len(jobs)), thread_name_prefix="doc-ingest"
+        ) as executor:
+            futures = {
+                executor.submit(_convert_document, client, bucket, doc, cached_key): doc
+                for doc, cached_key in jobs
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
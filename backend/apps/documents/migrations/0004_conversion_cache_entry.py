@@ -0,0 +1,39 @@
+# Generated by Django 6.1.2 on 2026-10-18 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0003_ingestiondocument_last_error"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConversionCacheEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("content_sha256", models.CharField(max_length=64)),
+                ("converter_version", models.CharField(max_length=64)),
+                ("s3_key", models.CharField(max_length=1024)),
+                ("size_bytes", models.BigIntegerField(default=0)),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("content_sha256", "converter_version"),
+                        name="documents_conversion_cache_unique_hash_version",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -99,3 +99,26 @@ class IngestionDocument(models.Model):
 
     def __str__(self) -> str:
         return f"IngestionDocument({self.id}, job_id={self.job_id}, status={self.status})"
+
+
+class ConversionCacheEntry(models.Model):
+    """Index of cached conversion output (HTML in S3) by input content hash."""
+
+    content_sha256 = models.CharField(max_length=64)
+    converter_version = models.CharField(max_length=64)
+    s3_key = models.CharField(max_length=1024)
+    size_bytes = models.BigIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_sha256", "converter_version"],
+                name="documents_conversion_cache_unique_hash_version",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"ConversionCacheEntry({self.content_sha256[:12]}, v={self.converter_version})"
@@ -1,22 +1,39 @@
 """
 Convert uploaded documents (PDF, images) to HTML.
 PDF: PyMuPDF text extraction; if minimal text, render pages to images and use OpenAI vision for OCR.
+
+OCR calls share one OpenAI client and a process-wide semaphore (``DOCUMENTS_OCR_CONCURRENCY``),
+so pages of a scanned PDF — and pages of documents converted in parallel — are OCR'd
+concurrently without exceeding that many in-flight requests. Page text is cached by the
+SHA-256 of the rendered image, so reprocessing a document never re-OCRs identical pages.
 """
 
 from __future__ import annotations
 
 import base64
+import hashlib
 import html
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 import fitz
 from django.conf import settings
+from django.core.cache import cache
 from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
 MIN_TEXT_LENGTH = 50  # Below this we use OCR for PDF
+OCR_MODEL = "gpt-4o-mini"
+OCR_RENDER_DPI = 150
+# Bump whenever conversion output changes; keys the content-addressed conversion cache.
+CONVERTER_VERSION = f"1-{OCR_MODEL}"
+
+_client_lock = threading.Lock()
+_clients: dict[str, OpenAI] = {}
+_ocr_slots: threading.BoundedSemaphore | None = None
 
 
 def _text_to_simple_html(raw: str) -> str:
@@ -30,16 +47,37 @@ def _text_to_simple_html(raw: str) -> str:
     return "<html><body>\n" + "\n".join(paragraphs) + "\n</body></html>"
 
 
-def _ocr_image_with_openai(image_bytes: bytes, mime_type: str = "image/png") -> str:
-    """Send a single image to OpenAI vision and return extracted text."""
+def _get_openai_client() -> OpenAI:
+    """One client (and its HTTP connection pool) per API key, shared by all OCR threads."""
     api_key = getattr(settings, "OPENAI_API_KEY", None)
     if not api_key:
         raise ValueError("OPENAI_API_KEY not set; cannot run OCR.")
+    with _client_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = OpenAI(api_key=api_key)
+    return client
+
+
+def _get_ocr_slots() -> threading.BoundedSemaphore:
+    global _ocr_slots
+    with _client_lock:
+        if _ocr_slots is None:
+            _ocr_slots = threading.BoundedSemaphore(_ocr_concurrency())
+    return _ocr_slots
+
+
+def _ocr_concurrency() -> int:
+    return max(1, int(getattr(settings, "DOCUMENTS_OCR_CONCURRENCY", 4)))
+
+
+def _ocr_image_with_openai(image_bytes: bytes, mime_type: str = "image/png") -> str:
+    """Send a single image to OpenAI vision and return extracted text."""
+    client = _get_openai_client()
     b64 = base64.standard_b64encode(image_bytes).decode("ascii")
     data_uri = f"data:{mime_type};base64,{b64}"
-    client = OpenAI(api_key=api_key)
     response = client.chat.completions.create(
-        model="gpt-4o-mini",
+        model=OCR_MODEL,
         messages=[
             {
                 "role": "user",
@@ -57,10 +95,51 @@ def _ocr_image_with_openai(image_bytes: bytes, mime_type: str = "image/png") ->
     return (response.choices[0].message.content or "").strip()
 
 
+def ocr_page_cache_key(image_bytes: bytes) -> str:
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    return f"documents:ocr:{OCR_MODEL}:{digest}"
+
+
+def _ocr_image_cached(image_bytes: bytes, mime_type: str = "image/png") -> str:
+    """OCR one image, reusing cached text for byte-identical images."""
+    key = ocr_page_cache_key(image_bytes)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    with _get_ocr_slots():
+        text = _ocr_image_with_openai(image_bytes, mime_type)
+    timeout = int(getattr(settings, "DOCUMENTS_OCR_CACHE_TIMEOUT", 30 * 24 * 3600))
+    cache.set(key, text, timeout)
+    return text
+
+
+def _ocr_pdf_pages(doc) -> list[str]:
+    """
+    Render pages on this thread (a PyMuPDF document is not thread-safe) and OCR them in a
+    pool while later pages render. Identical pages are OCR'd once; text keeps page order.
+    """
+    by_hash: dict[str, Future] = {}
+    page_futures: list[Future] = []
+    with ThreadPoolExecutor(
+        max_workers=min(_ocr_concurrency(), len(doc)) or 1, thread_name_prefix="doc-ocr"
+    ) as executor:
+        for page_num in range(len(doc)):
+            pix = doc[page_num].get_pixmap(dpi=OCR_RENDER_DPI, alpha=False)
+            img_bytes = pix.tobytes("png")
+            digest = hashlib.sha256(img_bytes).hexdigest()
+            future = by_hash.get(digest)
+            if future is None:
+                future = by_hash[digest] = executor.submit(
+                    _ocr_image_cached, img_bytes, "image/png"
+                )
+            page_futures.append(future)
+        return [future.result() for future in page_futures]
+
+
 def convert_pdf_to_html(pdf_bytes: bytes) -> str:
     """
     Convert PDF to HTML. Uses PyMuPDF text extraction; if very little text,
-    renders each page to an image and uses OpenAI vision for OCR.
+    renders each page to an image and OCRs the pages concurrently with OpenAI vision.
     """
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     try:
@@ -74,14 +153,7 @@ def convert_pdf_to_html(pdf_bytes: bytes) -> str:
             return _text_to_simple_html(combined)
         # Minimal text: use OCR per page
         logger.info("PDF has minimal text, using OpenAI vision OCR for %s page(s)", len(doc))
-        ocr_parts = []
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            pix = page.get_pixmap(dpi=150, alpha=False)
-            img_bytes = pix.tobytes("png")
-            part = _ocr_image_with_openai(img_bytes, "image/png")
-            if part:
-                ocr_parts.append(part)
+        ocr_parts = [part for part in _ocr_pdf_pages(doc) if part]
         combined = "\n\n".join(ocr_parts)
         return _text_to_simple_html(combined or "(No text extracted)")
     finally:
@@ -91,7 +163,7 @@ def convert_pdf_to_html(pdf_bytes: bytes) -> str:
 def convert_image_to_html(image_bytes: bytes, content_type: str) -> str:
     """Convert a single image to HTML by OCR."""
     mime = content_type or "image/png"
-    text = _ocr_image_with_openai(image_bytes, mime)
+    text = _ocr_image_cached(image_bytes, mime)
     return _text_to_simple_html(text or "(No text extracted)")
 
 
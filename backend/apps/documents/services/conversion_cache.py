@@ -0,0 +1,119 @@
+"""
+Content-addressed cache of converted document HTML.
+
+Converted HTML is kept in the documents bucket under
+``{DOCUMENTS_CONVERSION_CACHE_PREFIX}/{converter_version}/{sha256}.html``, indexed by
+``ConversionCacheEntry`` rows keyed by (input SHA-256, ``CONVERTER_VERSION``). A re-upload of
+identical bytes is served by a server-side S3 copy instead of a new conversion (and new paid
+OCR). When the cached objects exceed ``DOCUMENTS_CONVERSION_CACHE_MAX_MB`` the least recently
+used entries are evicted.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.documents.models import ConversionCacheEntry
+from apps.documents.services.conversion import CONVERTER_VERSION
+
+logger = logging.getLogger(__name__)
+
+_S3_DELETE_BATCH = 1000
+
+
+def conversion_cache_enabled() -> bool:
+    return bool(getattr(settings, "DOCUMENTS_CONVERSION_CACHE_ENABLED", True))
+
+
+def conversion_cache_key(content_sha256: str, converter_version: str = CONVERTER_VERSION) -> str:
+    prefix = str(
+        getattr(settings, "DOCUMENTS_CONVERSION_CACHE_PREFIX", "documents_data/_conversion_cache")
+    ).strip("/")
+    return f"{prefix}/{converter_version}/{content_sha256}.html"
+
+
+def lookup_conversion_cache(hashes: Iterable[str]) -> dict[str, ConversionCacheEntry]:
+    """Current-version cache entries for the given input hashes (one query)."""
+    hashes = {h for h in hashes if h}
+    if not hashes or not conversion_cache_enabled():
+        return {}
+    entries = ConversionCacheEntry.objects.filter(
+        content_sha256__in=hashes, converter_version=CONVERTER_VERSION
+    )
+    return {entry.content_sha256: entry for entry in entries}
+
+
+def record_cache_hit(content_sha256: str) -> None:
+    ConversionCacheEntry.objects.filter(
+        content_sha256=content_sha256, converter_version=CONVERTER_VERSION
+    ).update(hit_count=F("hit_count") + 1, last_used_at=timezone.now())
+
+
+def record_cache_store(*, content_sha256: str, s3_key: str, size_bytes: int) -> None:
+    ConversionCacheEntry.objects.update_or_create(
+        content_sha256=content_sha256,
+        converter_version=CONVERTER_VERSION,
+        defaults={"s3_key": s3_key, "size_bytes": size_bytes, "last_used_at": timezone.now()},
+    )
+
+
+def forget_cache_entry(content_sha256: str) -> None:
+    """Drop an index row whose object has vanished from the bucket."""
+    ConversionCacheEntry.objects.filter(
+        content_sha256=content_sha256, converter_version=CONVERTER_VERSION
+    ).delete()
+
+
+def evict_conversion_cache(client, bucket: str, *, max_bytes: int | None = None) -> int:
+    """
+    Delete least recently used entries (objects + rows) until under budget; return count.
+    Rows are only deleted for objects S3 confirms as removed.
+    """
+    if max_bytes is None:
+        max_bytes = int(getattr(settings, "DOCUMENTS_CONVERSION_CACHE_MAX_MB", 2048)) * 1024 * 1024
+    total = ConversionCacheEntry.objects.aggregate(total=Sum("size_bytes"))["total"] or 0
+    if total <= max_bytes:
+        return 0
+
+    victims: list[tuple[int, str]] = []
+    for entry_id, s3_key, size in (
+        ConversionCacheEntry.objects.order_by("last_used_at", "id")
+        .values_list("id", "s3_key", "size_bytes")
+        .iterator()
+    ):
+        if total <= max_bytes:
+            break
+        victims.append((entry_id, s3_key))
+        total -= size
+
+    evicted = 0
+    for start in range(0, len(victims), _S3_DELETE_BATCH):
+        batch = victims[start : start + _S3_DELETE_BATCH]
+        try:
+            response = client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for _id, key in batch], "Quiet": True},
+            )
+        except Exception:
+            logger.exception("Conversion cache eviction failed for %s object(s)", len(batch))
+            continue
+        # Quiet mode reports failures only; their rows stay so the objects remain reachable.
+        errors = response.get("Errors") or []
+        if errors:
+            logger.error(
+                "Conversion cache eviction could not delete %s of %s object(s): %s %s",
+                len(errors),
+                len(batch),
+                errors[0].get("Code", ""),
+                errors[0].get("Message", ""),
+            )
+        failed = {error.get("Key") for error in errors}
+        removed = [entry_id for entry_id, key in batch if key not in failed]
+        ConversionCacheEntry.objects.filter(id__in=removed).delete()
+        evicted += len(removed)
+    return evicted
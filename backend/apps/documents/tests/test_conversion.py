@@ -0,0 +1,92 @@
+"""Tests for PDF OCR fan-out and the per-page OCR cache."""
+
+import hashlib
+import threading
+import time
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from apps.documents.services.conversion import OCR_RENDER_DPI, convert_pdf_to_html
+
+OCR_TARGET = "apps.documents.services.conversion._ocr_image_with_openai"
+
+
+def _scanned_pdf(offsets) -> bytes:
+    """Text-free PDF: one page per offset with a rectangle drawn at that position."""
+    doc = fitz.open()
+    for offset in offsets:
+        page = doc.new_page(width=200, height=200)
+        page.draw_rect(fitz.Rect(offset, offset, offset + 40, offset + 40), fill=(0, 0, 0))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _page_hashes(pdf_bytes: bytes) -> list[str]:
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [
+            hashlib.sha256(
+                page.get_pixmap(dpi=OCR_RENDER_DPI, alpha=False).tobytes("png")
+            ).hexdigest()
+            for page in doc
+        ]
+    finally:
+        doc.close()
+
+
+@pytest.fixture
+def fake_ocr(settings):
+    settings.OPENAI_API_KEY = "test-key"
+    state = {"calls": 0, "active": 0, "peak": 0, "labels": {}}
+    lock = threading.Lock()
+
+    def ocr(image_bytes, mime_type="image/png"):
+        with lock:
+            state["calls"] += 1
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        label = state["labels"][hashlib.sha256(image_bytes).hexdigest()]
+        # Earlier pages finish last, so stitching must not rely on completion order.
+        time.sleep(0.02 * (len(state["labels"]) - int(label.split("-")[1])))
+        with lock:
+            state["active"] -= 1
+        return label
+
+    with patch(OCR_TARGET, side_effect=ocr):
+        yield state
+
+
+def test_scanned_pdf_pages_are_ocrd_concurrently_in_page_order(fake_ocr):
+    pdf = _scanned_pdf([10, 40, 70, 100])
+    fake_ocr["labels"] = {h: f"page-{i}" for i, h in enumerate(_page_hashes(pdf))}
+
+    html = convert_pdf_to_html(pdf)
+
+    positions = [html.index(f"page-{i}") for i in range(4)]
+    assert positions == sorted(positions)
+    assert fake_ocr["calls"] == 4
+    assert fake_ocr["peak"] > 1
+
+
+def test_reprocessing_reuses_cached_page_text(fake_ocr):
+    pdf = _scanned_pdf([10, 40, 70])
+    fake_ocr["labels"] = {h: f"page-{i}" for i, h in enumerate(_page_hashes(pdf))}
+
+    first = convert_pdf_to_html(pdf)
+    second = convert_pdf_to_html(pdf)
+
+    assert first == second
+    assert fake_ocr["calls"] == 3
+
+
+def test_identical_pages_are_ocrd_once(fake_ocr):
+    pdf = _scanned_pdf([10, 10, 10])
+    fake_ocr["labels"] = {h: "page-0" for h in _page_hashes(pdf)}
+
+    html = convert_pdf_to_html(pdf)
+
+    assert html.count("page-0") == 3
+    assert fake_ocr["calls"] == 1
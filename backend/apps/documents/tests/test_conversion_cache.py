@@ -0,0 +1,157 @@
+"""Tests for the content-addressed conversion cache used by process_document_ingestion."""
+
+import io
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.documents.models import ConversionCacheEntry, IngestionDocument
+from apps.documents.services.conversion import CONVERTER_VERSION
+from apps.documents.services.conversion_cache import conversion_cache_key, evict_conversion_cache
+
+COMMAND = "apps.documents.management.commands.process_document_ingestion"
+SHA = "a" * 64
+
+
+@pytest.fixture
+def uploaded_doc(clinic, patient, doctor, settings):
+    settings.DOCUMENTS_DATA_S3_BUCKET = "test-bucket"
+    doc = IngestionDocument.objects.create(
+        clinic=clinic,
+        patient=patient,
+        original_filename="referral.pdf",
+        content_type="application/pdf",
+        sha256=SHA,
+        status=IngestionDocument.Status.UPLOADED,
+        uploaded_by=doctor,
+    )
+    doc.input_s3_key = f"documents_data/{doc.job_id}/referral.pdf"
+    doc.save(update_fields=["input_s3_key"])
+    return doc
+
+
+def _run(mock_s3, convert=None):
+    convert = convert or MagicMock(return_value="<html><body><p>converted</p></body></html>")
+    out = io.StringIO()
+    with patch(f"{COMMAND}.get_s3_client", return_value=mock_s3):
+        with patch(f"{COMMAND}.convert_document_to_html", convert):
+            call_command("process_document_ingestion", stdout=out)
+    return out.getvalue(), convert
+
+
+@pytest.mark.django_db
+def test_duplicate_upload_is_served_from_cache(uploaded_doc):
+    ConversionCacheEntry.objects.create(
+        content_sha256=SHA,
+        converter_version=CONVERTER_VERSION,
+        s3_key=conversion_cache_key(SHA),
+        size_bytes=100,
+        last_used_at=timezone.now() - timedelta(days=1),
+    )
+    mock_s3 = MagicMock()
+
+    output, convert = _run(mock_s3)
+
+    convert.assert_not_called()
+    mock_s3.get_object.assert_not_called()
+    copy = mock_s3.copy_object.call_args.kwargs
+    assert copy["CopySource"] == {"Bucket": "test-bucket", "Key": conversion_cache_key(SHA)}
+    uploaded_doc.refresh_from_db()
+    assert uploaded_doc.status == IngestionDocument.Status.READY
+    assert uploaded_doc.output_html_s3_key == copy["Key"]
+    entry = ConversionCacheEntry.objects.get()
+    assert entry.hit_count == 1
+    assert entry.last_used_at > timezone.now() - timedelta(minutes=1)
+    assert "1 hit(s), 0 miss(es), hit rate 100%" in output
+
+
+@pytest.mark.django_db
+def test_first_conversion_is_stored_in_cache(uploaded_doc):
+    mock_s3 = MagicMock()
+    mock_s3.get_object.return_value = {"Body": io.BytesIO(b"%PDF-1.4")}
+
+    output, convert = _run(mock_s3)
+
+    convert.assert_called_once()
+    uploaded_doc.refresh_from_db()
+    copy = mock_s3.copy_object.call_args.kwargs
+    assert copy["Key"] == conversion_cache_key(SHA)
+    assert copy["CopySource"]["Key"] == uploaded_doc.output_html_s3_key
+    entry = ConversionCacheEntry.objects.get(content_sha256=SHA)
+    assert entry.size_bytes == len(b"<html><body><p>converted</p></body></html>")
+    assert "0 hit(s), 1 miss(es), hit rate 0%" in output
+
+
+@pytest.mark.django_db
+def test_missing_cache_object_falls_back_to_conversion(uploaded_doc):
+    ConversionCacheEntry.objects.create(
+        content_sha256=SHA,
+        converter_version=CONVERTER_VERSION,
+        s3_key=conversion_cache_key(SHA),
+        size_bytes=100,
+        hit_count=5,
+        last_used_at=timezone.now(),
+    )
+    mock_s3 = MagicMock()
+    mock_s3.get_object.return_value = {"Body": io.BytesIO(b"%PDF-1.4")}
+    missing = ClientError({"Error": {"Code": "NoSuchKey", "Message": "gone"}}, "CopyObject")
+    mock_s3.copy_object.side_effect = [missing, None]
+
+    _output, convert = _run(mock_s3)
+
+    convert.assert_called_once()
+    uploaded_doc.refresh_from_db()
+    assert uploaded_doc.status == IngestionDocument.Status.READY
+    entry = ConversionCacheEntry.objects.get(content_sha256=SHA)
+    assert entry.hit_count == 0
+
+
+@pytest.mark.django_db
+def test_eviction_drops_least_recently_used_entries():
+    now = timezone.now()
+    for i in range(4):
+        ConversionCacheEntry.objects.create(
+            content_sha256=f"{i}" * 64,
+            converter_version=CONVERTER_VERSION,
+            s3_key=f"cache/{i}.html",
+            size_bytes=100,
+            last_used_at=now - timedelta(hours=4 - i),
+        )
+    mock_s3 = MagicMock()
+    mock_s3.delete_objects.return_value = {}
+
+    assert evict_conversion_cache(mock_s3, "test-bucket", max_bytes=250) == 2
+
+    deleted = mock_s3.delete_objects.call_args.kwargs["Delete"]["Objects"]
+    assert deleted == [{"Key": "cache/0.html"}, {"Key": "cache/1.html"}]
+    assert set(ConversionCacheEntry.objects.values_list("s3_key", flat=True)) == {
+        "cache/2.html",
+        "cache/3.html",
+    }
+
+
+@pytest.mark.django_db
+def test_eviction_keeps_rows_of_objects_s3_did_not_delete():
+    now = timezone.now()
+    for i in range(3):
+        ConversionCacheEntry.objects.create(
+            content_sha256=f"{i}" * 64,
+            converter_version=CONVERTER_VERSION,
+            s3_key=f"cache/{i}.html",
+            size_bytes=100,
+            last_used_at=now - timedelta(hours=3 - i),
+        )
+    mock_s3 = MagicMock()
+    mock_s3.delete_objects.return_value = {
+        "Errors": [{"Key": "cache/0.html", "Code": "AccessDenied", "Message": "Access Denied"}]
+    }
+
+    assert evict_conversion_cache(mock_s3, "test-bucket", max_bytes=150) == 1
+    assert set(ConversionCacheEntry.objects.values_list("s3_key", flat=True)) == {
+        "cache/0.html",
+        "cache/2.html",
+    }
@@ -76,3 +76,62 @@ def test_process_document_ingestion_nothing_to_process(clinic, patient, settings
         call_command("process_document_ingestion", stdout=out)
     assert "No documents" in out.getvalue()
     mock_s3.get_object.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_process_document_ingestion_converts_documents_in_parallel(
+    clinic, patient, doctor, settings
+):
+    """With --workers > 1 documents are converted concurrently; failures stay per document."""
+    import threading
+    import time
+
+    settings.DOCUMENTS_DATA_S3_BUCKET = "test-bucket"
+    docs = []
+    for name in ("a.pdf", "b.pdf", "broken.pdf"):
+        doc = IngestionDocument.objects.create(
+            clinic=clinic,
+            patient=patient,
+            original_filename=name,
+            content_type="application/pdf",
+            status=IngestionDocument.Status.UPLOADED,
+            uploaded_by=doctor,
+        )
+        doc.input_s3_key = f"documents_data/{doc.job_id}/{name}"
+        doc.save(update_fields=["input_s3_key"])
+        docs.append(doc)
+
+    mock_s3 = MagicMock()
+    mock_s3.get_object.side_effect = lambda **kw: {"Body": io.BytesIO(kw["Key"].encode())}
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def convert(data, content_type, filename):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        if filename == "broken.pdf":
+            raise ValueError("bad pdf")
+        return "<html><body><p>ok</p></body></html>"
+
+    with patch(
+        "apps.documents.management.commands.process_document_ingestion.get_s3_client",
+        return_value=mock_s3,
+    ):
+        with patch(
+            "apps.documents.management.commands.process_document_ingestion.convert_document_to_html",
+            side_effect=convert,
+        ):
+            out = io.StringIO()
+            call_command("process_document_ingestion", "--workers=3", stdout=out)
+
+    assert active["peak"] > 1
+    assert "2 ready, 1 failed" in out.getvalue()
+    statuses = {d.original_filename: d for d in IngestionDocument.objects.all()}
+    assert statuses["a.pdf"].status == IngestionDocument.Status.READY
+    assert statuses["broken.pdf"].status == IngestionDocument.Status.FAILED
+    assert statuses["broken.pdf"].last_error == "Conversion failed: bad pdf"
+    assert mock_s3.put_object.call_count == 2
@@ -1,3 +1,6 @@
+import logging
+
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -36,6 +39,8 @@ from .services.ingestion_pipeline import (
 )
 from .services.materialization import materialize_lab_order, refresh_order_status_after_integration
 
+logger = logging.getLogger(__name__)
+
 
 class LabIntegrationDeviceViewSet(viewsets.ModelViewSet):
     """Configure analyzers / ingest endpoints (admin)."""
@@ -206,3 +211,57 @@ class LabDeviceIngestView(APIView):
             {**ser.data, "created": created},
             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
         )
+
+
+class LabDeviceIngestBatchView(APIView):
+    """
+    Several ingest payloads in one request (lab connector outbox bursts), same token check as
+    :class:`LabDeviceIngestView`. Body: ``{"envelopes": ["<json payload>", ...]}``; each payload
+    is a string so it is stored and idempotency-hashed exactly as a single ingest POST would be.
+    Every payload is processed on its own; ``results`` holds one entry per payload, in order.
+    """
+
+    permission_classes = [AllowAny]
+
+    def post(self, request, device_id: int):
+        device = get_object_or_404(
+            LabIntegrationDevice,
+            pk=device_id,
+            is_active=True,
+        )
+        token = request.headers.get("X-Lab-Ingest-Token")
+        if not verify_ingest_token(device, token):
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        envelopes = request.data.get("envelopes") if isinstance(request.data, dict) else None
+        if not isinstance(envelopes, list) or not all(isinstance(e, str) for e in envelopes):
+            return Response(
+                {"detail": "Expected {'envelopes': [<payload string>, ...]}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = settings.LAB_INGEST_BATCH_MAX_ENVELOPES
+        if len(envelopes) > limit:
+            return Response(
+                {"detail": f"At most {limit} envelopes per batch."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = []
+        for raw in envelopes:
+            try:
+                env, created = create_envelope_and_process(
+                    clinic_id=device.clinic_id, device=device, raw_bytes=raw.encode("utf-8")
+                )
+            except Exception as exc:  # noqa: BLE001 - one payload must not fail the batch
+                logger.exception("lab_ingest_batch_item_failed device_id=%s", device.id)
+                results.append({"ok": False, "status": 500, "error": str(exc)[:500]})
+                continue
+            results.append(
+                {
+                    "ok": True,
+                    "status": 201 if created else 200,
+                    "id": env.id,
+                    "created": created,
+                    "processing_status": env.processing_status,
+                }
+            )
+        return Response({"results": results}, status=status.HTTP_200_OK)
@@ -0,0 +1,155 @@
+"""
+Cached vendor code maps for lab ingestion.
+
+A ``CodeMapSnapshot`` holds every ``LabTestCodeMap`` row that applies to one
+(clinic, device) pair — device-specific and global — so resolving an analyte is a dict
+lookup. Snapshots live in a small in-process LRU in front of the Django cache and embed a
+per-clinic version counter; ``apps.labs.signals`` bumps the version whenever a code map (or
+a mapped ``LabTest``) changes. Local entries are trusted for
+``LAB_CODE_MAP_LOCAL_TTL_SECONDS`` before the shared version is re-checked, so other
+processes pick up a change within that window; the process that made the change drops its
+entries immediately.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from apps.labs.models import LabTest, LabTestCodeMap
+
+
+@dataclass(frozen=True)
+class CodeMapSnapshot:
+    # vendor_code -> ((is_device_specific, species, lab_test), ...) by priority desc, id asc
+    entries: dict[str, tuple[tuple[bool, str, LabTest], ...]]
+
+    def resolve(self, vendor_code: str, species: str = "") -> LabTest | None:
+        """Device-specific maps beat global ones; highest priority wins within each tier."""
+        allowed = ("", species) if species else ("",)
+        fallback = None
+        for is_specific, map_species, lab_test in self.entries.get(vendor_code, ()):
+            if map_species not in allowed:
+                continue
+            if is_specific:
+                return lab_test
+            if fallback is None:
+                fallback = lab_test
+        return fallback
+
+
+@dataclass
+class _LocalEntry:
+    version: int
+    checked_at: float
+    snapshot: CodeMapSnapshot
+
+
+_local: OrderedDict[tuple[int, int], _LocalEntry] = OrderedDict()
+_lock = threading.Lock()
+_stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+
+def code_map_version_cache_key(clinic_id: int) -> str:
+    return f"labs:code_map:version:{clinic_id}"
+
+
+def code_map_cache_key(*, clinic_id: int, device_id: int | None, version: int) -> str:
+    return f"labs:code_map:{clinic_id}:{device_id or '-'}:v{version}"
+
+
+def get_code_map_version(clinic_id: int) -> int:
+    return int(cache.get(code_map_version_cache_key(clinic_id)) or 0)
+
+
+def invalidate_code_map(clinic_id: int | None) -> None:
+    """Make every cached snapshot for the clinic stale (all devices, all processes)."""
+    if clinic_id is None:
+        return
+    key = code_map_version_cache_key(clinic_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+    with _lock:
+        for local_key in [k for k in _local if k[0] == clinic_id]:
+            del _local[local_key]
+
+
+def get_code_map(clinic_id: int, device_id: int | None) -> CodeMapSnapshot:
+    local_key = (clinic_id, device_id or 0)
+    now = time.monotonic()
+    ttl = float(getattr(settings, "LAB_CODE_MAP_LOCAL_TTL_SECONDS", 30))
+    with _lock:
+        entry = _local.get(local_key)
+        if entry is not None:
+            _local.move_to_end(local_key)
+            if now - entry.checked_at < ttl:
+                _stats["local_hits"] += 1
+                return entry.snapshot
+
+    version = get_code_map_version(clinic_id)
+    if entry is not None and entry.version == version:
+        with _lock:
+            entry.checked_at = now
+            _stats["local_hits"] += 1
+        return entry.snapshot
+
+    shared_key = code_map_cache_key(clinic_id=clinic_id, device_id=device_id, version=version)
+    snapshot = cache.get(shared_key)
+    if snapshot is None:
+        snapshot = load_code_map(clinic_id, device_id)
+        cache.set(shared_key, snapshot, int(getattr(settings, "LAB_CODE_MAP_CACHE_TIMEOUT", 3600)))
+        stat = "misses"
+    else:
+        stat = "shared_hits"
+
+    max_entries = int(getattr(settings, "LAB_CODE_MAP_LRU_SIZE", 256))
+    with _lock:
+        _stats[stat] += 1
+        _local[local_key] = _LocalEntry(version=version, checked_at=now, snapshot=snapshot)
+        _local.move_to_end(local_key)
+        while len(_local) > max_entries:
+            _local.popitem(last=False)
+    return snapshot
+
+
+def load_code_map(clinic_id: int, device_id: int | None) -> CodeMapSnapshot:
+    device_q = Q(device__isnull=True)
+    if device_id:
+        device_q |= Q(device_id=device_id)
+    entries: dict[str, list[tuple[bool, str, LabTest]]] = {}
+    for code_map in (
+        LabTestCodeMap.objects.filter(device_q, clinic_id=clinic_id)
+        .select_related("lab_test")
+        .order_by("-priority", "id")
+    ):
+        entries.setdefault(code_map.vendor_code, []).append(
+            (code_map.device_id is not None, code_map.species, code_map.lab_test)
+        )
+    return CodeMapSnapshot(entries={code: tuple(rows) for code, rows in entries.items()})
+
+
+def code_map_cache_stats() -> dict[str, float]:
+    """In-process counters: local LRU hits, shared (Django cache) hits, DB loads."""
+    with _lock:
+        stats: dict[str, float] = dict(_stats)
+        stats["size"] = len(_local)
+    lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["local_hits"] + stats["shared_hits"]) / lookups if lookups else 0.0
+    return stats
+
+
+def clear_code_map_cache() -> None:
+    """Drop the in-process LRU and reset counters (tests / admin tooling)."""
+    with _lock:
+        _local.clear()
+        for key in _stats:
+            _stats[key] = 0
@@ -11,7 +11,6 @@ from apps.labs.models import (
     LabIngestionEnvelope,
     LabIntegrationDevice,
     LabObservation,
-    LabOrder,
     LabOrderLine,
 )
 from apps.labs.services.identifier_resolution import resolve_order_from_identifiers
@@ -20,7 +19,7 @@ from apps.labs.services.lab_ingestion_storage import (
     should_store_raw_on_s3,
     upload_raw_bytes,
 )
-from apps.labs.services.mapping import resolve_internal_test
+from apps.labs.services.mapping import resolve_internal_tests
 from apps.labs.services.materialization import (
     materialize_lab_order,
     refresh_order_status_after_integration,
@@ -146,17 +145,27 @@ def process_lab_ingestion_envelope(envelope_id: int) -> None:
 
     LabObservation.objects.filter(envelope=env).delete()
 
-    order_ids: set[int] = set()
+    # One code-map query and one order-line query per envelope, however many analytes it has.
+    internal_by_code = resolve_internal_tests(
+        clinic_id=env.clinic_id,
+        device=device,
+        vendor_codes=[draft.vendor_code for draft in parsed.observations],
+    )
+    lines_by_test: dict[int, LabOrderLine] = {}
+    if order:
+        test_ids = {test.id for test in internal_by_code.values() if test}
+        lines_by_test = {
+            line.test_id: line
+            for line in LabOrderLine.objects.filter(order=order, test_id__in=test_ids)
+        }
+
+    observations = []
     for draft in parsed.observations:
-        internal = resolve_internal_test(
-            clinic_id=env.clinic_id,
-            device=device,
-            vendor_code=draft.vendor_code,
-        )
+        internal = internal_by_code.get(draft.vendor_code)
         line = None
         match_status = LabObservation.MatchStatus.UNMATCHED
         if order and internal:
-            line = LabOrderLine.objects.filter(order=order, test=internal).first()
+            line = lines_by_test.get(internal.id)
             if line:
                 match_status = LabObservation.MatchStatus.MATCHED
             else:
@@ -164,35 +173,35 @@ def process_lab_ingestion_envelope(envelope_id: int) -> None:
         elif order and not internal:
             match_status = LabObservation.MatchStatus.AMBIGUOUS
 
-        LabObservation.objects.create(
-            clinic_id=env.clinic_id,
-            envelope=env,
-            device=device,
-            lab_order=order,
-            lab_order_line=line,
-            sample=sample,
-            match_status=match_status,
-            vendor_test_code=draft.vendor_code,
-            vendor_test_name=draft.vendor_name,
-            internal_test=internal,
-            value_text=draft.value_text,
-            value_numeric=draft.value_numeric,
-            unit=draft.unit,
-            ref_low=draft.ref_low,
-            ref_high=draft.ref_high,
-            abnormal_flag=draft.abnormal_flag,
-            result_status=draft.result_status,
-            natural_key=draft.natural_key,
-            observed_at=draft.observed_at,
+        observations.append(
+            LabObservation(
+                clinic_id=env.clinic_id,
+                envelope=env,
+                device=device,
+                lab_order=order,
+                lab_order_line=line,
+                sample=sample,
+                match_status=match_status,
+                vendor_test_code=draft.vendor_code,
+                vendor_test_name=draft.vendor_name,
+                internal_test=internal,
+                value_text=draft.value_text,
+                value_numeric=draft.value_numeric,
+                unit=draft.unit,
+                ref_low=draft.ref_low,
+                ref_high=draft.ref_high,
+                abnormal_flag=draft.abnormal_flag,
+                result_status=draft.result_status,
+                natural_key=draft.natural_key,
+                observed_at=draft.observed_at,
+            )
         )
-        if order:
-            order_ids.add(order.id)
+    LabObservation.objects.bulk_create(observations)
 
     env.processing_status = LabIngestionEnvelope.ProcessingStatus.ATTACHING
     env.save(update_fields=["processing_status"])
 
-    for oid in order_ids:
-        order = LabOrder.objects.get(pk=oid)
+    if order and observations:
         materialize_lab_order(order)
         refresh_order_status_after_integration(order)
 
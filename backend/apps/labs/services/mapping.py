@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from apps.labs.models import LabIntegrationDevice, LabTest, LabTestCodeMap
+from collections.abc import Iterable
+
+from apps.labs.models import LabIntegrationDevice, LabTest
+from apps.labs.services.code_map_cache import get_code_map
 
 
 def resolve_internal_test(
@@ -13,21 +16,27 @@ def resolve_internal_test(
     """Pick lab catalog test for a vendor code; device-specific maps beat global (device NULL)."""
     if not vendor_code:
         return None
+    return resolve_internal_tests(
+        clinic_id=clinic_id, device=device, vendor_codes=[vendor_code], species=species
+    ).get(vendor_code)
 
-    base_qs = LabTestCodeMap.objects.filter(
-        clinic_id=clinic_id,
-        vendor_code=vendor_code,
-    ).select_related("lab_test")
-
-    if species:
-        qs = base_qs.filter(species__in=["", species]).order_by("-priority")
-    else:
-        qs = base_qs.filter(species="").order_by("-priority")
 
-    if device and device.id:
-        specific = qs.filter(device_id=device.id).first()
-        if specific:
-            return specific.lab_test
-
-    global_map = qs.filter(device__isnull=True).first()
-    return global_map.lab_test if global_map else None
+def resolve_internal_tests(
+    *,
+    clinic_id: int,
+    device: LabIntegrationDevice | None,
+    vendor_codes: Iterable[str],
+    species: str = "",
+) -> dict[str, LabTest | None]:
+    """
+    Batch form of ``resolve_internal_test``, answered from the cached (clinic, device) code
+    map (see ``code_map_cache``). Same rules per code — device-specific maps beat global
+    ones, then highest ``priority``; species-specific and species-agnostic maps compete only
+    when ``species`` is given.
+    """
+    codes = {code for code in vendor_codes if code}
+    if not codes:
+        return {}
+    device_id = device.id if device and device.id else None
+    snapshot = get_code_map(clinic_id, device_id)
+    return {code: snapshot.resolve(code, species) for code in codes}
@@ -19,68 +19,107 @@ def _apply_legacy_scalar_from_component(result: LabResult, comp: LabResultCompon
         result.reference_range = f"{low}-{high}" if low and high else (low or high or "")
 
 
+_COMPONENT_UPDATE_FIELDS = [
+    "clinic",
+    "source_observation",
+    "value_text",
+    "value_numeric",
+    "unit",
+    "ref_low",
+    "ref_high",
+    "abnormal_flag",
+    "sort_order",
+]
+_RESULT_UPDATE_FIELDS = [
+    "value",
+    "value_numeric",
+    "unit",
+    "reference_range",
+    "source",
+    "integration_updated_at",
+    "primary_observation",
+    "status",
+    "completed_at",
+]
+
+
 def materialize_lab_order(order: LabOrder) -> None:
-    """Promote matched observations on this order into LabResult + LabResultComponent rows."""
-    for line in order.lines.select_related("result", "test").prefetch_related("result__components"):
+    """
+    Promote matched observations on this order into LabResult + LabResultComponent rows.
+
+    The latest matched observation per line wins. Runs a fixed number of queries per order:
+    lines, observations, one component upsert and one result ``bulk_update``.
+    """
+    lines = list(order.lines.select_related("result"))
+    if not lines:
+        return
+    test_by_line = {line.id: line.test_id for line in lines}
+    latest: dict[int, LabObservation] = {}
+    for obs in LabObservation.objects.filter(
+        lab_order_line_id__in=list(test_by_line),
+        match_status=LabObservation.MatchStatus.MATCHED,
+    ).order_by("id"):
+        if obs.internal_test_id == test_by_line[obs.lab_order_line_id]:
+            latest[obs.lab_order_line_id] = obs
+    if not latest:
+        return
+
+    components: list[LabResultComponent] = []
+    results: list[LabResult] = []
+    now = timezone.now()
+    for line in lines:
+        obs = latest.get(line.id)
+        if obs is None:
+            continue
         result = line.result
-        observations = LabObservation.objects.filter(
-            lab_order_line=line,
-            internal_test=line.test,
-            match_status=LabObservation.MatchStatus.MATCHED,
-        ).order_by("id")
+        comp = LabResultComponent(
+            clinic_id=order.clinic_id,
+            lab_result=result,
+            lab_test_id=line.test_id,
+            source_observation=obs,
+            value_text=obs.value_text,
+            value_numeric=obs.value_numeric,
+            unit=obs.unit,
+            ref_low=obs.ref_low,
+            ref_high=obs.ref_high,
+            abnormal_flag=obs.abnormal_flag,
+            sort_order=0,
+        )
+        components.append(comp)
 
-        for obs in observations:
-            LabResultComponent.objects.update_or_create(
-                lab_result=result,
-                lab_test=line.test,
-                defaults={
-                    "clinic_id": order.clinic_id,
-                    "source_observation": obs,
-                    "value_text": obs.value_text,
-                    "value_numeric": obs.value_numeric,
-                    "unit": obs.unit,
-                    "ref_low": obs.ref_low,
-                    "ref_high": obs.ref_high,
-                    "abnormal_flag": obs.abnormal_flag,
-                    "sort_order": 0,
-                },
-            )
+        _apply_legacy_scalar_from_component(result, comp)
+        if result.source == LabResult.Source.MANUAL:
+            result.source = LabResult.Source.MIXED
+        else:
+            result.source = LabResult.Source.INTEGRATION
+        result.integration_updated_at = now
+        result.primary_observation_id = obs.id
+        result.status = LabResult.Status.COMPLETED
+        if not result.completed_at:
+            result.completed_at = now
+        results.append(result)
 
-        if observations.exists():
-            comp = result.components.filter(lab_test=line.test).first()
-            if comp:
-                _apply_legacy_scalar_from_component(result, comp)
-            if result.source == LabResult.Source.MANUAL:
-                result.source = LabResult.Source.MIXED
-            else:
-                result.source = LabResult.Source.INTEGRATION
-            result.integration_updated_at = timezone.now()
-            result.primary_observation_id = observations.last().id
-            result.status = LabResult.Status.COMPLETED
-            if not result.completed_at:
-                result.completed_at = timezone.now()
-            result.save(
-                update_fields=[
-                    "value",
-                    "value_numeric",
-                    "unit",
-                    "reference_range",
-                    "source",
-                    "integration_updated_at",
-                    "primary_observation",
-                    "status",
-                    "completed_at",
-                ]
-            )
+    LabResultComponent.objects.bulk_create(
+        components,
+        update_conflicts=True,
+        unique_fields=["lab_result", "lab_test"],
+        update_fields=_COMPONENT_UPDATE_FIELDS,
+    )
+    LabResult.objects.bulk_update(results, _RESULT_UPDATE_FIELDS)
 
 
 def refresh_order_status_after_integration(order: LabOrder) -> None:
     """Set partial_result / completed when components exist on line results."""
-    lines = list(order.lines.select_related("result").prefetch_related("result__components"))
-    if not lines:
+    line_ids = list(order.lines.values_list("id", flat=True))
+    if not line_ids:
         return
-    any_comp = any(line.result.components.exists() for line in lines)
-    all_comp = all(line.result.components.exists() for line in lines)
+    with_components = set(
+        LabResultComponent.objects.filter(lab_result__order_line_id__in=line_ids)
+        .values_list("lab_result__order_line_id", flat=True)
+        .distinct()
+    )
+    any_comp = bool(with_components)
+    all_comp = len(with_components) == len(line_ids)
     if all_comp:
         order.status = LabOrder.Status.COMPLETED
         if not order.completed_at:
@@ -0,0 +1,33 @@
+"""Invalidate cached vendor code maps when mappings or mapped catalog tests change."""
+
+from __future__ import annotations
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import LabTest, LabTestCodeMap
+from .services.code_map_cache import invalidate_code_map
+
+
+@receiver(post_save, sender=LabTestCodeMap)
+@receiver(post_delete, sender=LabTestCodeMap)
+def _lab_test_code_map_changed(sender, instance, **kwargs):
+    # After commit: a concurrent reader must not cache pre-commit mappings under the new version.
+    transaction.on_commit(partial(invalidate_code_map, instance.clinic_id))
+
+
+@receiver(post_save, sender=LabTest)
+def _lab_test_changed(sender, instance, created, **kwargs):
+    # Snapshots embed the LabTest rows; deletes cascade to the maps and fire the handler above.
+    if created:
+        return
+    clinic_ids = (
+        LabTestCodeMap.objects.filter(lab_test=instance)
+        .values_list("clinic_id", flat=True)
+        .distinct()
+    )
+    for clinic_id in clinic_ids:
+        transaction.on_commit(partial(invalidate_code_map, clinic_id))
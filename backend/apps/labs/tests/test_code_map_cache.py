@@ -0,0 +1,99 @@
+"""Tests for the in-process / shared cache of lab vendor code maps."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.labs.models import LabIntegrationDevice, LabTest, LabTestCodeMap
+from apps.labs.services.code_map_cache import (
+    clear_code_map_cache,
+    code_map_cache_stats,
+    get_code_map,
+)
+from apps.labs.services.mapping import resolve_internal_tests
+
+
+@pytest.fixture
+def device(clinic, lab):
+    return LabIntegrationDevice.objects.create(
+        clinic=clinic,
+        lab=lab,
+        name="Analyzer",
+        connection_kind=LabIntegrationDevice.ConnectionKind.FILE_DROP,
+        ingest_token="secret",
+    )
+
+
+@pytest.fixture
+def hgb(clinic, lab, device):
+    test = LabTest.objects.create(lab=lab, code="HGB", name="Hemoglobin")
+    LabTestCodeMap.objects.create(clinic=clinic, device=device, vendor_code="HGB", lab_test=test)
+    return test
+
+
+@pytest.mark.django_db
+def test_repeat_lookups_are_served_from_local_lru(clinic, device, hgb):
+    resolve_internal_tests(clinic_id=clinic.id, device=device, vendor_codes=["HGB"])
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(5):
+            resolved = resolve_internal_tests(
+                clinic_id=clinic.id, device=device, vendor_codes=["HGB"]
+            )
+    assert len(ctx.captured_queries) == 0
+    assert resolved == {"HGB": hgb}
+    stats = code_map_cache_stats()
+    assert stats["misses"] == 1
+    assert stats["local_hits"] == 5
+    assert stats["hit_rate"] == pytest.approx(5 / 6)
+
+
+@pytest.mark.django_db
+def test_other_process_uses_shared_cache(clinic, device, hgb):
+    get_code_map(clinic.id, device.id)
+    clear_code_map_cache()  # simulate a fresh worker process sharing the Django cache
+    with CaptureQueriesContext(connection) as ctx:
+        snapshot = get_code_map(clinic.id, device.id)
+    assert len(ctx.captured_queries) == 0
+    assert snapshot.resolve("HGB") == hgb
+    assert code_map_cache_stats()["shared_hits"] == 1
+
+
+@pytest.mark.django_db
+def test_code_map_changes_invalidate_cache(
+    clinic, lab, device, hgb, django_capture_on_commit_callbacks
+):
+    assert get_code_map(clinic.id, device.id).resolve("HGB") == hgb
+
+    other = LabTest.objects.create(lab=lab, code="HGB2", name="Hemoglobin (alt)")
+    with django_capture_on_commit_callbacks(execute=True):
+        LabTestCodeMap.objects.create(
+            clinic=clinic, device=device, vendor_code="HGB", lab_test=other, priority=50
+        )
+    assert get_code_map(clinic.id, device.id).resolve("HGB") == other
+
+    with django_capture_on_commit_callbacks(execute=True):
+        LabTestCodeMap.objects.filter(lab_test=other).get().delete()
+    assert get_code_map(clinic.id, device.id).resolve("HGB") == hgb
+
+    hgb.name = "Hemoglobin (g/dL)"
+    with django_capture_on_commit_callbacks(execute=True):
+        hgb.save()
+    assert get_code_map(clinic.id, device.id).resolve("HGB").name == "Hemoglobin (g/dL)"
+
+
+@pytest.mark.django_db
+def test_stale_local_entry_revalidates_against_shared_version(settings, clinic, device, hgb):
+    settings.LAB_CODE_MAP_LOCAL_TTL_SECONDS = 0
+    get_code_map(clinic.id, device.id)
+    with CaptureQueriesContext(connection) as ctx:
+        get_code_map(clinic.id, device.id)
+    assert len(ctx.captured_queries) == 0
+    assert code_map_cache_stats()["local_hits"] == 1
+
+
+@pytest.mark.django_db
+def test_lru_evicts_least_recently_used(settings, clinic, lab, device, hgb):
+    settings.LAB_CODE_MAP_LRU_SIZE = 1
+    get_code_map(clinic.id, device.id)
+    get_code_map(clinic.id, None)
+    assert code_map_cache_stats()["size"] == 1
@@ -0,0 +1,202 @@
+"""Tests for batched lab instrument ingestion (code mapping + materialization)."""
+
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.labs.models import (
+    LabExternalIdentifier,
+    LabIntegrationDevice,
+    LabObservation,
+    LabOrder,
+    LabOrderLine,
+    LabResult,
+    LabResultComponent,
+    LabSample,
+    LabTest,
+    LabTestCodeMap,
+)
+from apps.labs.services.code_map_cache import get_code_map
+from apps.labs.services.ingestion_pipeline import create_envelope_and_process
+from apps.labs.services.mapping import resolve_internal_test, resolve_internal_tests
+
+
+@pytest.fixture(autouse=True)
+def _inline_lab_payloads(settings):
+    settings.LAB_INGESTION_S3_MODE = "never"
+
+
+@pytest.fixture
+def device(clinic, lab):
+    return LabIntegrationDevice.objects.create(
+        clinic=clinic,
+        lab=lab,
+        name="Analyzer",
+        connection_kind=LabIntegrationDevice.ConnectionKind.FILE_DROP,
+        ingest_token="secret",
+    )
+
+
+def _panel(clinic, lab, device, doctor, patient, *, size: int, barcode: str) -> LabOrder:
+    order = LabOrder.objects.create(
+        clinic=clinic,
+        patient=patient,
+        lab=lab,
+        status=LabOrder.Status.SENT,
+        ordered_by=doctor,
+    )
+    for i in range(size):
+        test = LabTest.objects.create(lab=lab, code=f"{barcode}-T{i}", name=f"Analyte {i}")
+        LabTestCodeMap.objects.create(
+            clinic=clinic, device=device, vendor_code=test.code, lab_test=test, priority=10
+        )
+        line = LabOrderLine.objects.create(order=order, test=test)
+        LabResult.objects.create(order_line=line)
+    sample = LabSample.objects.create(
+        clinic=clinic,
+        lab_order=order,
+        internal_sample_code=f"S-{barcode}",
+        status=LabSample.SampleStatus.COLLECTED,
+    )
+    LabExternalIdentifier.objects.create(
+        clinic=clinic, sample=sample, scheme="barcode", value=barcode
+    )
+    return order
+
+
+def _payload(order: LabOrder, barcode: str, *, value: str = "1.5") -> bytes:
+    observations = [
+        {
+            "vendor_code": line.test.code,
+            "value_numeric": value,
+            "unit": "g/L",
+            "natural_key": str(i),
+        }
+        for i, line in enumerate(order.lines.select_related("test"))
+    ]
+    observations.append({"vendor_code": "UNKNOWN", "value_text": "n/a", "natural_key": "x"})
+    return json.dumps(
+        {"identifiers": [{"scheme": "barcode", "value": barcode}], "observations": observations}
+    ).encode("utf-8")
+
+
+@pytest.mark.django_db
+def test_ingestion_query_count_does_not_grow_with_analytes(clinic, lab, device, doctor, patient):
+    small = _panel(clinic, lab, device, doctor, patient, size=2, barcode="BC-SMALL")
+    large = _panel(clinic, lab, device, doctor, patient, size=25, barcode="BC-LARGE")
+    get_code_map(clinic.id, device.id)  # measure steady state, not the first code-map load
+
+    with CaptureQueriesContext(connection) as small_ctx:
+        create_envelope_and_process(
+            clinic_id=clinic.id, device=device, raw_bytes=_payload(small, "BC-SMALL")
+        )
+    with CaptureQueriesContext(connection) as large_ctx:
+        create_envelope_and_process(
+            clinic_id=clinic.id, device=device, raw_bytes=_payload(large, "BC-LARGE")
+        )
+
+    assert len(large_ctx.captured_queries) == len(small_ctx.captured_queries)
+    assert LabResultComponent.objects.filter(lab_result__order_line__order=large).count() == 25
+    large.refresh_from_db()
+    assert large.status == LabOrder.Status.COMPLETED
+    unknown = LabObservation.objects.get(lab_order=large, vendor_test_code="UNKNOWN")
+    assert unknown.match_status == LabObservation.MatchStatus.AMBIGUOUS
+
+
+@pytest.mark.django_db
+def test_reingest_updates_components_from_latest_observation(clinic, lab, device, doctor, patient):
+    order = _panel(clinic, lab, device, doctor, patient, size=2, barcode="BC-RE")
+    create_envelope_and_process(
+        clinic_id=clinic.id, device=device, raw_bytes=_payload(order, "BC-RE", value="1.5")
+    )
+    create_envelope_and_process(
+        clinic_id=clinic.id, device=device, raw_bytes=_payload(order, "BC-RE", value="2.25")
+    )
+
+    components = LabResultComponent.objects.filter(lab_result__order_line__order=order)
+    assert components.count() == 2
+    latest_obs = LabObservation.objects.filter(
+        lab_order=order, match_status=LabObservation.MatchStatus.MATCHED
+    ).order_by("-id")
+    for comp in components:
+        assert str(comp.value_numeric).startswith("2.25")
+        assert comp.source_observation_id in {o.id for o in latest_obs[:2]}
+        result = comp.lab_result
+        assert result.status == LabResult.Status.COMPLETED
+        assert result.source == LabResult.Source.INTEGRATION
+        assert result.value.startswith("2.25")
+        assert result.unit == "g/L"
+        assert result.primary_observation_id == comp.source_observation_id
+
+
+@pytest.mark.django_db
+def test_resolve_internal_tests_matches_single_lookup_rules(clinic, lab, device):
+    t_global, t_specific, t_low, t_cat = (
+        LabTest.objects.create(lab=lab, code=code, name=code) for code in ("G", "S", "L", "C")
+    )
+    # Device-specific map wins over a higher-priority global one.
+    LabTestCodeMap.objects.create(clinic=clinic, vendor_code="HGB", lab_test=t_global, priority=99)
+    LabTestCodeMap.objects.create(
+        clinic=clinic, device=device, vendor_code="HGB", lab_test=t_specific, priority=1
+    )
+    # Within a tier the highest priority wins.
+    LabTestCodeMap.objects.create(clinic=clinic, vendor_code="WBC", lab_test=t_low, priority=1)
+    LabTestCodeMap.objects.create(clinic=clinic, vendor_code="WBC", lab_test=t_global, priority=5)
+    # Species-specific maps only apply when a species is given.
+    LabTestCodeMap.objects.create(
+        clinic=clinic, vendor_code="RBC", lab_test=t_cat, priority=50, species="feline"
+    )
+    LabTestCodeMap.objects.create(clinic=clinic, vendor_code="RBC", lab_test=t_low, priority=0)
+
+    codes = ["HGB", "WBC", "RBC", "MISSING"]
+    for species in ("", "feline"):
+        batch = resolve_internal_tests(
+            clinic_id=clinic.id, device=device, vendor_codes=codes, species=species
+        )
+        for code in codes:
+            single = resolve_internal_test(
+                clinic_id=clinic.id, device=device, vendor_code=code, species=species
+            )
+            assert batch[code] == single
+
+    plain = resolve_internal_tests(clinic_id=clinic.id, device=device, vendor_codes=codes)
+    assert plain == {"HGB": t_specific, "WBC": t_global, "RBC": t_low, "MISSING": None}
+    feline = resolve_internal_tests(
+        clinic_id=clinic.id, device=None, vendor_codes=["HGB", "RBC"], species="feline"
+    )
+    assert feline == {"HGB": t_global, "RBC": t_cat}
+
+
+@pytest.mark.django_db
+def test_batch_ingest_matches_single_ingest_idempotency(
+    api_client, clinic, lab, device, doctor, patient
+):
+    first = _panel(clinic, lab, device, doctor, patient, size=2, barcode="BATCH-1")
+    second = _panel(clinic, lab, device, doctor, patient, size=2, barcode="BATCH-2")
+    body_1 = _payload(first, "BATCH-1")
+    body_2 = _payload(second, "BATCH-2")
+    # Delivered singly before (e.g. retried by the connector): the batch reports a duplicate.
+    create_envelope_and_process(clinic_id=clinic.id, device=device, raw_bytes=body_1)
+    url = f"/api/lab-devices/{device.id}/ingest/batch/"
+
+    assert api_client.post(url, {"envelopes": []}, format="json").status_code == 401
+    response = api_client.post(
+        url,
+        {"envelopes": [body_1.decode(), body_2.decode()]},
+        format="json",
+        HTTP_X_LAB_INGEST_TOKEN="secret",
+    )
+
+    assert response.status_code == 200
+    results = response.data["results"]
+    assert [(r["ok"], r["status"], r["created"]) for r in results] == [
+        (True, 200, False),
+        (True, 201, True),
+    ]
+    assert LabResultComponent.objects.filter(lab_result__order_line__order=second).count() == 2
+    bad = api_client.post(
+        url, {"envelopes": [{"not": "a string"}]}, format="json", HTTP_X_LAB_INGEST_TOKEN="secret"
+    )
+    assert bad.status_code == 400
@@ -2,6 +2,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .integration_views import (
+    LabDeviceIngestBatchView,
     LabDeviceIngestView,
     LabIngestionEnvelopeViewSet,
     LabIntegrationDeviceViewSet,
@@ -31,5 +32,10 @@ urlpatterns = [
         LabDeviceIngestView.as_view(),
         name="lab-device-ingest",
     ),
+    path(
+        "lab-devices/<int:device_id>/ingest/batch/",
+        LabDeviceIngestBatchView.as_view(),
+        name="lab-device-ingest-batch",
+    ),
     path("", include(router.urls)),
 ]
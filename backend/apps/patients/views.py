@@ -40,7 +40,7 @@ from apps.tenancy.access import (
     clinic_instance_for_mutation,
     user_can_access_clinic,
 )
-from apps.tenancy.models import Clinic
+from apps.tenancy.clinic_settings import is_clinic_feature_enabled
 from apps.tenancy.reception_fts import filter_patients_queryset_for_reception
 
 
@@ -438,7 +438,7 @@ class PatientViewSet(viewsets.ModelViewSet):
         GET /api/patients/<id>/ai-summary/ -> Generate AI summary of patient history and condition
         """
         patient = self.get_object()
-        if not Clinic.objects.filter(pk=patient.clinic_id, feature_ai_enabled=True).exists():
+        if not is_clinic_feature_enabled(patient.clinic_id, "feature_ai_enabled"):
             return Response(
                 {"detail": "AI summary is disabled for this clinic."},
                 status=403,
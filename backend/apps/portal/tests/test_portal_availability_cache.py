@@ -0,0 +1,73 @@
+from datetime import datetime, time, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.scheduling.models import Appointment
+from apps.scheduling.models_exceptions import VetAvailabilityException
+from apps.scheduling.services.availability_cache import (
+    availability_cache_stats,
+    get_availability_version,
+)
+from apps.tenancy.models import ClinicHoliday
+
+
+def _aware(day, hh: int):
+    return timezone.make_aware(datetime.combine(day, time(hh, 0)), timezone.get_current_timezone())
+
+
+@pytest.mark.django_db
+def test_public_availability_served_from_cache_until_appointment_changes(
+    api_client, clinic, doctor, patient, django_capture_on_commit_callbacks
+):
+    day = timezone.localdate() + timedelta(days=1)
+    url = f"/api/portal/clinics/{clinic.slug}/availability/"
+    params = {"date": day.isoformat(), "vet": doctor.id}
+
+    first = api_client.get(url, params)
+    assert first.status_code == 200
+    assert availability_cache_stats() == {"hits": 0, "misses": 1}
+
+    with CaptureQueriesContext(connection) as ctx:
+        second = api_client.get(url, params)
+    assert second.data == first.data
+    assert availability_cache_stats() == {"hits": 1, "misses": 1}
+    assert not any("scheduling_appointment" in q["sql"] for q in ctx.captured_queries)
+
+    version = get_availability_version(clinic.id)
+    with django_capture_on_commit_callbacks(execute=True):
+        Appointment.objects.create(
+            clinic=clinic,
+            patient=patient,
+            vet=doctor,
+            starts_at=_aware(day, 9),
+            ends_at=_aware(day, 10),
+        )
+        # Not before commit: a concurrent reader would cache the old rows under it.
+        assert get_availability_version(clinic.id) == version
+    assert get_availability_version(clinic.id) == version + 1
+
+    third = api_client.get(url, params)
+    assert availability_cache_stats() == {"hits": 1, "misses": 2}
+    assert third.data["free"][0]["start"] == _aware(day, 10).isoformat()
+
+
+@pytest.mark.django_db
+def test_holiday_and_vet_exception_bump_clinic_version(
+    clinic, doctor, django_capture_on_commit_callbacks
+):
+    day = timezone.localdate() + timedelta(days=1)
+    v0 = get_availability_version(clinic.id)
+    with django_capture_on_commit_callbacks(execute=True):
+        holiday = ClinicHoliday.objects.create(clinic=clinic, date=day, reason="Closed")
+    assert get_availability_version(clinic.id) == v0 + 1
+    with django_capture_on_commit_callbacks(execute=True):
+        holiday.delete()
+    assert get_availability_version(clinic.id) == v0 + 2
+    with django_capture_on_commit_callbacks(execute=True):
+        VetAvailabilityException.objects.create(
+            clinic=clinic, vet=doctor, date=day, is_day_off=True
+        )
+    assert get_availability_version(clinic.id) == v0 + 3
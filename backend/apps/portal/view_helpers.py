@@ -11,6 +11,8 @@ from rest_framework.response import Response
 from apps.billing.models import Invoice
 from apps.scheduling.models import Appointment
 from apps.scheduling.services.availability import compute_availability
+from apps.scheduling.services.availability_cache import cached_availability
+from apps.tenancy.clinic_settings import get_clinic_settings_by_slug
 from apps.tenancy.models import Clinic
 
 from .authentication import PortalPrincipal
@@ -22,19 +24,9 @@ def generate_portal_code() -> str:
 
 
 def get_clinic_by_slug(slug: str) -> Clinic | None:
-    return (
-        Clinic.objects.filter(slug=slug)
-        .only(
-            "id",
-            "slug",
-            "name",
-            "online_booking_enabled",
-            "portal_booking_deposit_amount",
-            "portal_booking_deposit_line_label",
-            "feature_portal_deposit_enabled",
-        )
-        .first()
-    )
+    """Clinic from the cached clinic settings (no query on a warm cache)."""
+    clinic_settings = get_clinic_settings_by_slug(slug)
+    return clinic_settings.to_clinic() if clinic_settings else None
 
 
 def portal_appointment_booking_payload(appt: Appointment, invoice: Invoice | None) -> dict:
@@ -107,7 +99,25 @@ def public_clinic_or_404(slug: str) -> tuple[Response | None, Clinic | None]:
 def dump_public_availability(
     clinic_id: int, date_str: str, vet_id: int | None, room_id: int | None
 ):
+    """
+    Public availability payload, served from the versioned availability cache.
+
+    Booking must not rely on this: it re-verifies via ``portal_slot_matches_availability``.
+    """
     slot = int(getattr(settings, "DEFAULT_SLOT_MINUTES", 30))
+    return cached_availability(
+        clinic_id=clinic_id,
+        date_str=date_str,
+        vet_id=vet_id,
+        room_id=room_id,
+        slot_minutes=slot,
+        compute=lambda: _compute_public_availability(clinic_id, date_str, vet_id, room_id, slot),
+    )
+
+
+def _compute_public_availability(
+    clinic_id: int, date_str: str, vet_id: int | None, room_id: int | None, slot: int
+):
     data = compute_availability(
         clinic_id=clinic_id,
         date_str=date_str,
@@ -5,3 +5,6 @@ class RemindersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.reminders"
     verbose_name = "Reminders"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,291 @@
+"""
+Claim-based reminder delivery used by ``process_reminders``.
+
+Workers claim due reminders with ``select_for_update(skip_locked=True)`` and lease them by
+setting ``leased_until``, so several worker processes can drain the queue side by side
+without sending the same reminder twice. A crashed worker's lease simply expires and the
+reminders become due again. Provider calls run in a bounded thread pool over shared
+keep-alive provider sessions (``apps.reminders.transport``); SendGrid email is sent as
+multi-recipient requests. Status updates and ``ReminderEvent`` rows are written back per
+batch with ``bulk_update`` / ``bulk_create``, for the reminders the batch still holds only:
+one cancelled, resent or re-leased meanwhile keeps its newer state.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.reminders import services
+from apps.reminders.models import Reminder, ReminderEvent, ReminderPreference
+from apps.tenancy.clinic_settings import is_clinic_feature_enabled
+
+_CLAIMABLE = [Reminder.Status.QUEUED, Reminder.Status.DEFERRED]
+
+_UPDATE_FIELDS = [
+    "attempts",
+    "status",
+    "scheduled_for",
+    "leased_until",
+    "sent_at",
+    "provider",
+    "provider_message_id",
+    "provider_status",
+    "last_error",
+    "updated_at",
+]
+
+
+@dataclass
+class DeliveryCounts:
+    sent: int = 0
+    failed: int = 0
+    rescheduled: int = 0
+    deferred: int = 0
+    cancelled: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(getattr(self, f.name) for f in fields(self))
+
+    def add(self, other: DeliveryCounts) -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+def claim_due_reminders(*, now: datetime, batch_size: int, lease_seconds: int) -> list[Reminder]:
+    """
+    Lock up to ``batch_size`` due, unleased reminders (skipping rows locked by other workers)
+    and lease them until ``now + lease_seconds``. ``scheduled_for`` is left untouched.
+    """
+    with transaction.atomic():
+        claimed = list(
+            Reminder.objects.select_for_update(skip_locked=True)
+            .filter(status__in=_CLAIMABLE, scheduled_for__lte=now)
+            .filter(Q(leased_until__isnull=True) | Q(leased_until__lte=now))
+            .order_by("scheduled_for", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not claimed:
+            return []
+        Reminder.objects.filter(id__in=claimed).update(
+            leased_until=now + timedelta(seconds=lease_seconds)
+        )
+
+    return list(
+        Reminder.objects.filter(id__in=claimed)
+        .select_related("patient")
+        .order_by("scheduled_for", "id")
+    )
+
+
+def process_reminder_batch(
+    reminders: list[Reminder],
+    *,
+    now: datetime,
+    retry_minutes: int,
+    concurrency: int = 1,
+) -> DeliveryCounts:
+    """Apply consent / quiet-hours / clinic policy, send the rest, persist results in bulk."""
+    counts = DeliveryCounts()
+    if not reminders:
+        return counts
+
+    preferences = _preferences_for(reminders)
+    events: list[ReminderEvent] = []
+    to_send: list[Reminder] = []
+
+    for reminder in reminders:
+        owner_id = getattr(reminder.patient, "owner_id", None) if reminder.patient_id else None
+        preference = preferences.get((reminder.clinic_id, owner_id)) if owner_id else None
+        if preference and not _consent_allows_channel(reminder, preference):
+            reminder.status = Reminder.Status.CANCELLED
+            reminder.last_error = "Consent not granted for selected channel."
+            events.append(
+                ReminderEvent(
+                    reminder=reminder,
+                    event_type=ReminderEvent.EventType.CANCELLED,
+                    payload={"reason": "consent_denied"},
+                )
+            )
+            counts.cancelled += 1
+            continue
+
+        should_defer, defer_until = services.should_defer_for_quiet_hours(
+            reminder, preference, now=now
+        )
+        if should_defer and defer_until is not None:
+            reminder.status = Reminder.Status.DEFERRED
+            reminder.scheduled_for = defer_until
+            reminder.last_error = "Deferred by quiet-hours policy."
+            events.append(
+                ReminderEvent(
+                    reminder=reminder,
+                    event_type=ReminderEvent.EventType.DEFERRED,
+                    payload={"defer_until": defer_until.isoformat()},
+                )
+            )
+            counts.deferred += 1
+            continue
+
+        if reminder.channel == Reminder.Channel.SMS and not is_clinic_feature_enabled(
+            reminder.clinic_id, "reminder_sms_enabled"
+        ):
+            reminder.status = Reminder.Status.CANCELLED
+            reminder.last_error = "SMS reminders are disabled for this clinic."
+            events.append(
+                ReminderEvent(
+                    reminder=reminder,
+                    event_type=ReminderEvent.EventType.CANCELLED,
+                    payload={"reason": "reminder_sms_disabled"},
+                )
+            )
+            counts.cancelled += 1
+            continue
+
+        to_send.append(reminder)
+
+    results = _send_all(to_send, concurrency=concurrency)
+    for reminder, (provider_message_id, provider_status, exc) in zip(to_send, results, strict=True):
+        reminder.attempts += 1
+        if exc is not None:
+            reminder.last_error = str(exc)[:1000]
+            if reminder.attempts >= reminder.max_attempts:
+                reminder.status = Reminder.Status.FAILED
+                events.append(
+                    ReminderEvent(
+                        reminder=reminder,
+                        event_type=ReminderEvent.EventType.FAILED,
+                        payload={"error": reminder.last_error},
+                    )
+                )
+                counts.failed += 1
+            else:
+                reminder.status = Reminder.Status.QUEUED
+                reminder.scheduled_for = now + timedelta(minutes=retry_minutes)
+                counts.rescheduled += 1
+            continue
+
+        reminder.status = Reminder.Status.SENT
+        reminder.sent_at = now
+        reminder.provider_message_id = provider_message_id
+        reminder.provider_status = provider_status
+        reminder.last_error = ""
+        events.append(
+            ReminderEvent(
+                reminder=reminder,
+                event_type=ReminderEvent.EventType.SENT,
+                payload={
+                    "provider_message_id": provider_message_id,
+                    "provider_status": provider_status,
+                },
+            )
+        )
+        counts.sent += 1
+
+    updated_at = timezone.now()
+    with transaction.atomic():
+        # Rows cancelled, resent or re-leased since the claim no longer match their lease.
+        held = set(
+            Reminder.objects.select_for_update()
+            .filter(
+                id__in=[r.id for r in reminders],
+                status__in=_CLAIMABLE,
+                leased_until__in={r.leased_until for r in reminders},
+            )
+            .values_list("id", "leased_until")
+        )
+        current = [r for r in reminders if (r.id, r.leased_until) in held]
+        for reminder in current:
+            reminder.leased_until = None
+            reminder.updated_at = updated_at
+        Reminder.objects.bulk_update(current, _UPDATE_FIELDS)
+        current_ids = {r.id for r in current}
+        ReminderEvent.objects.bulk_create([e for e in events if e.reminder.id in current_ids])
+    return counts
+
+
+def _send_all(
+    reminders: list[Reminder], *, concurrency: int
+) -> list[tuple[str, str, Exception | None]]:
+    # Providers are resolved up front so sender threads never touch the database.
+    providers = services.resolve_reminder_providers({r.clinic_id for r in reminders})
+
+    def _provider(reminder: Reminder) -> str | None:
+        return providers.get(reminder.clinic_id, {}).get(reminder.channel)
+
+    def _send_one(group: list[Reminder]) -> list[tuple[str, str, Exception | None]]:
+        (reminder,) = group
+        try:
+            message_id, status = services.send_reminder(reminder, provider=_provider(reminder))
+        except Exception as exc:  # noqa: BLE001 - one failure must not stop the batch
+            return [("", "", exc)]
+        return [(message_id, status, None)]
+
+    # SendGrid email goes out as multi-recipient requests; everything else one by one.
+    batched = [
+        r
+        for r in reminders
+        if _provider(r) == Reminder.Provider.SENDGRID and services.sendgrid_batchable(r)
+    ]
+    batched_ids = {id(r) for r in batched}
+    singles = [r for r in reminders if id(r) not in batched_ids]
+    jobs: list[tuple[list[Reminder], Callable]] = [([r], _send_one) for r in singles]
+    if batched:
+        size = services.sendgrid_batch_size()
+        jobs += [
+            (batched[start : start + size], services.send_sendgrid_batch)
+            for start in range(0, len(batched), size)
+        ]
+
+    def _run(job: tuple[list[Reminder], Callable]) -> list[tuple[str, str, Exception | None]]:
+        group, send = job
+        return send(group)
+
+    if concurrency <= 1 or len(jobs) <= 1:
+        outcomes = [_run(job) for job in jobs]
+    else:
+        with ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="reminder-send"
+        ) as pool:
+            outcomes = list(pool.map(_run, jobs))
+    results: dict[int, tuple[str, str, Exception | None]] = {}
+    for (group, _send), outcome in zip(jobs, outcomes, strict=True):
+        for reminder, result in zip(group, outcome, strict=True):
+            results[id(reminder)] = result
+    return [results[id(reminder)] for reminder in reminders]
+
+
+def _preferences_for(
+    reminders: list[Reminder],
+) -> dict[tuple[int, int], ReminderPreference]:
+    pairs = {
+        (r.clinic_id, r.patient.owner_id)
+        for r in reminders
+        if r.patient_id and getattr(r.patient, "owner_id", None)
+    }
+    if not pairs:
+        return {}
+    rows = ReminderPreference.objects.filter(
+        clinic_id__in={clinic_id for clinic_id, _ in pairs},
+        client_id__in={client_id for _, client_id in pairs},
+    )
+    return {
+        (pref.clinic_id, pref.client_id): pref
+        for pref in rows
+        if (pref.clinic_id, pref.client_id) in pairs
+    }
+
+
+def _consent_allows_channel(reminder: Reminder, preference: ReminderPreference) -> bool:
+    if reminder.channel == Reminder.Channel.EMAIL:
+        return preference.allow_email
+    if reminder.channel == Reminder.Channel.SMS:
+        return preference.allow_sms
+    return False
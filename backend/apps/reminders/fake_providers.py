@@ -0,0 +1,129 @@
+"""
+Local stand-in for the SendGrid and Twilio send APIs, for load tests of reminder delivery.
+
+Serves ``POST /v3/mail/send`` and ``POST /2010-04-01/Accounts/<sid>/Messages.json`` over
+HTTP/1.1 keep-alive and counts connections, requests and messages, so a run can show how
+many connections and round trips a batch of reminders really costs. Point
+``REMINDER_SENDGRID_API_BASE_URL`` / ``REMINDER_TWILIO_API_BASE_URL`` at it; started by
+``manage.py run_fake_reminder_providers`` or in-process from tests.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+_TWILIO_MESSAGES_PATH = re.compile(r"^/2010-04-01/Accounts/[^/]+/Messages\.json$")
+
+
+@dataclass
+class FakeProviderStats:
+    connections: int = 0
+    sendgrid_requests: int = 0
+    emails: int = 0
+    twilio_requests: int = 0
+    sms: int = 0
+    recipients: list[str] = field(default_factory=list)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeProviderServer
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats.connections += 1
+
+    def log_message(self, format, *args) -> None:  # noqa: A002 - BaseHTTPRequestHandler API
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler API
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.path == "/v3/mail/send":
+            self._mail_send(body)
+        elif _TWILIO_MESSAGES_PATH.match(self.path):
+            self._twilio_message(body)
+        else:
+            self._reply(404, b'{"error": "not found"}')
+
+    def _mail_send(self, body: bytes) -> None:
+        try:
+            personalizations = json.loads(body)["personalizations"]
+            recipients = [to["email"] for p in personalizations for to in p["to"]]
+        except (ValueError, KeyError, TypeError):
+            self._reply(400, b'{"errors": [{"message": "invalid payload"}]}')
+            return
+        with self.server.stats_lock:
+            self.server.stats.sendgrid_requests += 1
+            self.server.stats.emails += len(personalizations)
+            self.server.stats.recipients.extend(recipients)
+        self._reply(202, b"", headers={"X-Message-Id": uuid.uuid4().hex[:22]})
+
+    def _twilio_message(self, body: bytes) -> None:
+        form = parse_qs(body.decode("utf-8"))
+        recipient = (form.get("To") or [""])[0]
+        if not recipient:
+            self._reply(400, b'{"message": "A \'To\' phone number is required."}')
+            return
+        with self.server.stats_lock:
+            self.server.stats.twilio_requests += 1
+            self.server.stats.sms += 1
+            self.server.stats.recipients.append(recipient)
+        payload = {"sid": f"SM{uuid.uuid4().hex}", "status": "queued", "to": recipient}
+        self._reply(201, json.dumps(payload).encode("utf-8"))
+
+    def _reply(self, status: int, body: bytes, *, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        *,
+        latency: float = 0.0,
+        verbose: bool = False,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.verbose = verbose
+        self.stats = FakeProviderStats()
+        self.stats_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> FakeProviderServer:
+        """Serve from a daemon thread (tests); use ``serve_forever`` to block instead."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="fake-reminder-providers", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
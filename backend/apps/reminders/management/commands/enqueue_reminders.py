@@ -1,23 +1,41 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from datetime import datetime, time, timedelta
+from itertools import batched
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 
 from apps.billing.models import Invoice
 from apps.medical.models import Vaccination
 from apps.reminders.models import Reminder, ReminderEvent, ReminderPreference
 from apps.reminders.services import (
+    ReminderTemplateCache,
     build_portal_action_urls,
     build_reminder_context,
     pick_channel_and_recipient,
-    render_reminder_content,
     resolve_experiment_variant,
 )
 from apps.scheduling.models import Appointment
 
 
+@dataclass(frozen=True)
+class _ReminderCandidate:
+    """One source row (appointment / vaccination / invoice) that may get a reminder."""
+
+    clinic_id: int
+    client_id: int
+    patient_id: int | None
+    source_id: int
+    email: str
+    phone: str
+    scheduled_for: datetime
+    context: dict[str, str]
+
+
 class Command(BaseCommand):
     help = (
         "Enqueue reminder records for upcoming appointments, vaccinations, and invoice due dates."
@@ -27,9 +45,17 @@ class Command(BaseCommand):
         parser.add_argument("--appointment-hours", type=int, default=24)
         parser.add_argument("--vaccination-days", type=int, default=30)
         parser.add_argument("--invoice-days", type=int, default=7)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Source rows processed (and reminders bulk-inserted) per batch.",
+        )
 
     def handle(self, *args, **options):
         now = timezone.now()
+        self.chunk_size = max(1, options["chunk_size"])
+        self.templates = ReminderTemplateCache()
 
         appointment_count = self._enqueue_appointments(now, options["appointment_hours"])
         vaccination_count = self._enqueue_vaccinations(now, options["vaccination_days"])
@@ -51,78 +77,34 @@ class Command(BaseCommand):
                 starts_at__lte=window_end,
                 status__in=[Appointment.Status.SCHEDULED, Appointment.Status.CONFIRMED],
             )
-            .select_related("patient", "patient__owner")
+            .select_related("clinic", "patient", "patient__owner")
             .order_by("starts_at")
         )
-        created = 0
-        for appointment in qs:
-            owner = appointment.patient.owner
-            preference = self._get_preference(appointment.clinic_id, owner.id)
-            channel, recipient = pick_channel_and_recipient(
-                preference,
-                email=owner.email,
-                phone=owner.phone,
-            )
-            if not recipient:
-                continue
 
-            scheduled_for = max(appointment.starts_at - timedelta(hours=24), now)
-            exists = Reminder.objects.filter(
-                appointment_id=appointment.id,
-                reminder_type=Reminder.ReminderType.APPOINTMENT,
-                channel=channel,
-            ).exclude(status=Reminder.Status.CANCELLED)
-            if exists.exists():
-                continue
-
-            context = build_reminder_context(
-                clinic_name=appointment.clinic.name,
-                patient_name=appointment.patient.name,
-                owner_name=f"{owner.first_name} {owner.last_name}".strip(),
-                appointment_start=timezone.localtime(appointment.starts_at).isoformat(),
-            )
-            locale = getattr(preference, "locale", "en") if preference else "en"
-            subject, body = render_reminder_content(
-                clinic_id=appointment.clinic_id,
-                reminder_type=Reminder.ReminderType.APPOINTMENT,
-                channel=channel,
-                locale=locale,
-                context=context,
-            )
-            experiment_key, experiment_variant = resolve_experiment_variant(
-                reminder_type=Reminder.ReminderType.APPOINTMENT,
-                source_object_id=appointment.id,
-                patient_id=appointment.patient_id,
-            )
-            reminder = Reminder.objects.create(
-                clinic_id=appointment.clinic_id,
-                patient_id=appointment.patient_id,
-                appointment_id=appointment.id,
-                reminder_type=Reminder.ReminderType.APPOINTMENT,
-                channel=channel,
-                recipient=recipient,
-                subject=subject,
-                body=body,
-                experiment_key=experiment_key,
-                experiment_variant=experiment_variant,
-                scheduled_for=scheduled_for,
-            )
-            portal_links = build_portal_action_urls(reminder)
-            if any(portal_links.values()):
-                context.update(portal_links)
-                reminder.subject, reminder.body = render_reminder_content(
+        def candidates() -> Iterator[_ReminderCandidate]:
+            for appointment in qs.iterator(chunk_size=self.chunk_size):
+                owner = appointment.patient.owner
+                yield _ReminderCandidate(
                     clinic_id=appointment.clinic_id,
-                    reminder_type=Reminder.ReminderType.APPOINTMENT,
-                    channel=channel,
-                    locale=locale,
-                    context=context,
+                    client_id=owner.id,
+                    patient_id=appointment.patient_id,
+                    source_id=appointment.id,
+                    email=owner.email,
+                    phone=owner.phone,
+                    scheduled_for=max(appointment.starts_at - timedelta(hours=24), now),
+                    context=build_reminder_context(
+                        clinic_name=appointment.clinic.name,
+                        patient_name=appointment.patient.name,
+                        owner_name=f"{owner.first_name} {owner.last_name}".strip(),
+                        appointment_start=timezone.localtime(appointment.starts_at).isoformat(),
+                    ),
                 )
-                reminder.save(update_fields=["subject", "body", "updated_at"])
-            ReminderEvent.objects.create(
-                reminder=reminder, event_type=ReminderEvent.EventType.ENQUEUED
-            )
-            created += 1
-        return created
+
+        return self._enqueue_bulk(
+            candidates(),
+            reminder_type=Reminder.ReminderType.APPOINTMENT,
+            source_field="appointment_id",
+        )
 
     def _enqueue_vaccinations(self, now, days_ahead: int) -> int:
         today = timezone.localdate()
@@ -131,64 +113,41 @@ class Command(BaseCommand):
             Vaccination.objects.filter(
                 next_due_at__isnull=False, next_due_at__gte=today, next_due_at__lte=due_end
             )
-            .select_related("patient", "patient__owner")
+            .select_related("clinic", "patient", "patient__owner")
             .order_by("next_due_at")
         )
-        created = 0
-        for vaccination in qs:
-            owner = vaccination.patient.owner
-            preference = self._get_preference(vaccination.clinic_id, owner.id)
-            channel, recipient = pick_channel_and_recipient(
-                preference,
-                email=owner.email,
-                phone=owner.phone,
-            )
-            if not recipient:
-                continue
+        scheduled_for = max(
+            timezone.make_aware(datetime.combine(today, time(hour=9, minute=0))),
+            now,
+        )
 
-            scheduled_for = max(
-                timezone.make_aware(datetime.combine(today, time(hour=9, minute=0))),
-                now,
-            )
-            exists = Reminder.objects.filter(
-                vaccination_id=vaccination.id,
-                reminder_type=Reminder.ReminderType.VACCINATION,
-                channel=channel,
-            ).exclude(status=Reminder.Status.CANCELLED)
-            if exists.exists():
-                continue
+        def candidates() -> Iterator[_ReminderCandidate]:
+            for vaccination in qs.iterator(chunk_size=self.chunk_size):
+                owner = vaccination.patient.owner
+                yield _ReminderCandidate(
+                    clinic_id=vaccination.clinic_id,
+                    client_id=owner.id,
+                    patient_id=vaccination.patient_id,
+                    source_id=vaccination.id,
+                    email=owner.email,
+                    phone=owner.phone,
+                    scheduled_for=scheduled_for,
+                    context=build_reminder_context(
+                        clinic_name=vaccination.clinic.name,
+                        patient_name=vaccination.patient.name,
+                        owner_name=f"{owner.first_name} {owner.last_name}".strip(),
+                        due_date=(
+                            vaccination.next_due_at.isoformat() if vaccination.next_due_at else ""
+                        ),
+                        vaccine_name=vaccination.vaccine_name,
+                    ),
+                )
 
-            context = build_reminder_context(
-                clinic_name=vaccination.clinic.name,
-                patient_name=vaccination.patient.name,
-                owner_name=f"{owner.first_name} {owner.last_name}".strip(),
-                due_date=vaccination.next_due_at.isoformat() if vaccination.next_due_at else "",
-                vaccine_name=vaccination.vaccine_name,
-            )
-            locale = getattr(preference, "locale", "en") if preference else "en"
-            subject, body = render_reminder_content(
-                clinic_id=vaccination.clinic_id,
-                reminder_type=Reminder.ReminderType.VACCINATION,
-                channel=channel,
-                locale=locale,
-                context=context,
-            )
-            reminder = Reminder.objects.create(
-                clinic_id=vaccination.clinic_id,
-                patient_id=vaccination.patient_id,
-                vaccination_id=vaccination.id,
-                reminder_type=Reminder.ReminderType.VACCINATION,
-                channel=channel,
-                recipient=recipient,
-                subject=subject,
-                body=body,
-                scheduled_for=scheduled_for,
-            )
-            ReminderEvent.objects.create(
-                reminder=reminder, event_type=ReminderEvent.EventType.ENQUEUED
-            )
-            created += 1
-        return created
+        return self._enqueue_bulk(
+            candidates(),
+            reminder_type=Reminder.ReminderType.VACCINATION,
+            source_field="vaccination_id",
+        )
 
     def _enqueue_invoices(self, now, days_ahead: int) -> int:
         today = timezone.localdate()
@@ -200,62 +159,166 @@ class Command(BaseCommand):
                 due_date__lte=due_end,
                 status__in=[Invoice.Status.SENT, Invoice.Status.OVERDUE],
             )
-            .select_related("client", "patient")
+            .select_related("clinic", "client", "patient")
             .order_by("due_date")
         )
+
+        def candidates() -> Iterator[_ReminderCandidate]:
+            for invoice in qs.iterator(chunk_size=self.chunk_size):
+                patient_name = invoice.patient.name if invoice.patient_id else "your pet"
+                yield _ReminderCandidate(
+                    clinic_id=invoice.clinic_id,
+                    client_id=invoice.client_id,
+                    patient_id=invoice.patient_id,
+                    source_id=invoice.id,
+                    email=invoice.client.email,
+                    phone=invoice.client.phone,
+                    scheduled_for=now,
+                    context=build_reminder_context(
+                        clinic_name=invoice.clinic.name,
+                        patient_name=patient_name,
+                        owner_name=(
+                            f"{invoice.client.first_name} {invoice.client.last_name}".strip()
+                        ),
+                        due_date=invoice.due_date.isoformat() if invoice.due_date else "",
+                        invoice_number=str(invoice.id),
+                    ),
+                )
+
+        return self._enqueue_bulk(
+            candidates(),
+            reminder_type=Reminder.ReminderType.INVOICE,
+            source_field="invoice_id",
+        )
+
+    def _enqueue_bulk(
+        self,
+        candidates: Iterable[_ReminderCandidate],
+        *,
+        reminder_type: str,
+        source_field: str,
+    ) -> int:
         created = 0
-        for invoice in qs:
-            preference = self._get_preference(invoice.clinic_id, invoice.client_id)
+        for chunk in batched(candidates, self.chunk_size):
+            created += self._enqueue_chunk(
+                chunk, reminder_type=reminder_type, source_field=source_field
+            )
+        return created
+
+    def _enqueue_chunk(
+        self,
+        chunk: tuple[_ReminderCandidate, ...],
+        *,
+        reminder_type: str,
+        source_field: str,
+    ) -> int:
+        preferences = self._get_preferences(chunk)
+        existing = set(
+            Reminder.objects.filter(
+                **{f"{source_field}__in": [c.source_id for c in chunk]},
+                reminder_type=reminder_type,
+            )
+            .exclude(status=Reminder.Status.CANCELLED)
+            .values_list(source_field, "channel")
+        )
+        self.templates.preload({c.clinic_id for c in chunk})
+
+        pending: list[tuple[Reminder, _ReminderCandidate, str]] = []
+        for candidate in chunk:
+            preference = preferences.get((candidate.clinic_id, candidate.client_id))
             channel, recipient = pick_channel_and_recipient(
                 preference,
-                email=invoice.client.email,
-                phone=invoice.client.phone,
+                email=candidate.email,
+                phone=candidate.phone,
             )
             if not recipient:
                 continue
-
-            scheduled_for = now
-            exists = Reminder.objects.filter(
-                invoice_id=invoice.id,
-                reminder_type=Reminder.ReminderType.INVOICE,
-                channel=channel,
-            ).exclude(status=Reminder.Status.CANCELLED)
-            if exists.exists():
+            if (candidate.source_id, channel) in existing:
                 continue
 
-            patient_name = invoice.patient.name if invoice.patient_id else "your pet"
-            context = build_reminder_context(
-                clinic_name=invoice.clinic.name,
-                patient_name=patient_name,
-                owner_name=f"{invoice.client.first_name} {invoice.client.last_name}".strip(),
-                due_date=invoice.due_date.isoformat() if invoice.due_date else "",
-                invoice_number=str(invoice.id),
-            )
             locale = getattr(preference, "locale", "en") if preference else "en"
-            subject, body = render_reminder_content(
-                clinic_id=invoice.clinic_id,
-                reminder_type=Reminder.ReminderType.INVOICE,
+            subject, body = self.templates.render(
+                clinic_id=candidate.clinic_id,
+                reminder_type=reminder_type,
                 channel=channel,
                 locale=locale,
-                context=context,
+                context=candidate.context,
             )
-            reminder = Reminder.objects.create(
-                clinic_id=invoice.clinic_id,
-                patient_id=invoice.patient_id,
-                invoice_id=invoice.id,
-                reminder_type=Reminder.ReminderType.INVOICE,
+            experiment_key, experiment_variant = resolve_experiment_variant(
+                reminder_type=reminder_type,
+                source_object_id=candidate.source_id,
+                patient_id=candidate.patient_id,
+            )
+            reminder = Reminder(
+                clinic_id=candidate.clinic_id,
+                patient_id=candidate.patient_id,
+                reminder_type=reminder_type,
                 channel=channel,
                 recipient=recipient,
                 subject=subject,
                 body=body,
-                scheduled_for=scheduled_for,
+                experiment_key=experiment_key,
+                experiment_variant=experiment_variant,
+                scheduled_for=candidate.scheduled_for,
+            )
+            setattr(reminder, source_field, candidate.source_id)
+            pending.append((reminder, candidate, locale))
+
+        if not pending:
+            return 0
+
+        with transaction.atomic():
+            reminders = Reminder.objects.bulk_create(
+                [reminder for reminder, _, _ in pending], batch_size=self.chunk_size
             )
-            ReminderEvent.objects.create(
-                reminder=reminder, event_type=ReminderEvent.EventType.ENQUEUED
+            self._apply_portal_links(pending, reminder_type)
+            ReminderEvent.objects.bulk_create(
+                [
+                    ReminderEvent(reminder=reminder, event_type=ReminderEvent.EventType.ENQUEUED)
+                    for reminder in reminders
+                ],
+                batch_size=self.chunk_size,
+            )
+        return len(reminders)
+
+    def _apply_portal_links(
+        self,
+        pending: list[tuple[Reminder, _ReminderCandidate, str]],
+        reminder_type: str,
+    ) -> None:
+        # Portal action tokens reference the reminder id, so links are rendered after insert.
+        updated: list[Reminder] = []
+        now = timezone.now()
+        for reminder, candidate, locale in pending:
+            portal_links = build_portal_action_urls(reminder)
+            if not any(portal_links.values()):
+                continue
+            context = {**candidate.context, **portal_links}
+            reminder.subject, reminder.body = self.templates.render(
+                clinic_id=candidate.clinic_id,
+                reminder_type=reminder_type,
+                channel=reminder.channel,
+                locale=locale,
+                context=context,
+            )
+            reminder.updated_at = now
+            updated.append(reminder)
+        if updated:
+            Reminder.objects.bulk_update(
+                updated, ["subject", "body", "updated_at"], batch_size=self.chunk_size
             )
-            created += 1
-        return created
 
     @staticmethod
-    def _get_preference(clinic_id: int, client_id: int):
-        return ReminderPreference.objects.filter(clinic_id=clinic_id, client_id=client_id).first()
+    def _get_preferences(
+        chunk: Iterable[_ReminderCandidate],
+    ) -> dict[tuple[int, int], ReminderPreference]:
+        pairs = {(c.clinic_id, c.client_id) for c in chunk}
+        rows = ReminderPreference.objects.filter(
+            clinic_id__in={clinic_id for clinic_id, _ in pairs},
+            client_id__in={client_id for _, client_id in pairs},
+        )
+        return {
+            (pref.clinic_id, pref.client_id): pref
+            for pref in rows
+            if (pref.clinic_id, pref.client_id) in pairs
+        }
@@ -0,0 +1,56 @@
+"""
+Run a local fake SendGrid/Twilio API for reminder delivery load tests.
+
+Usage:
+  python manage.py run_fake_reminder_providers --port 8025 [--latency-ms 20]
+
+then run workers with REMINDER_SENDGRID_API_BASE_URL / REMINDER_TWILIO_API_BASE_URL set to
+http://127.0.0.1:8025. Connection / request / message counts are printed on Ctrl+C.
+"""
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from apps.reminders.fake_providers import FakeProviderServer
+
+
+class Command(BaseCommand):
+    help = "Serve fake SendGrid and Twilio send endpoints and count connections and messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8025)
+        parser.add_argument(
+            "--latency-ms",
+            type=int,
+            default=0,
+            help="Delay added to every response, to mimic provider round trips.",
+        )
+        parser.add_argument("--verbose-requests", action="store_true")
+
+    def handle(self, *args, **options):
+        server = FakeProviderServer(
+            (options["host"], options["port"]),
+            latency=max(0, options["latency_ms"]) / 1000,
+            verbose=options["verbose_requests"],
+        )
+        self.stdout.write(f"Fake reminder providers listening on {server.base_url}")
+        self.stdout.write(
+            f"  REMINDER_SENDGRID_API_BASE_URL={server.base_url}\n"
+            f"  REMINDER_TWILIO_API_BASE_URL={server.base_url}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        stats = server.stats
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"connections={stats.connections} "
+                f"sendgrid_requests={stats.sendgrid_requests} emails={stats.emails} "
+                f"twilio_requests={stats.twilio_requests} sms={stats.sms}"
+            )
+        )
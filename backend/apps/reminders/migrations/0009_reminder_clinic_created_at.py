@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-18 06:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reminders", "0008_alter_reminderevent_event_type_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reminder",
+            index=models.Index(
+                fields=["clinic", "created_at"], name="reminders_r_clinic__d11459_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reminders", "0009_reminder_clinic_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reminder",
+            name="leased_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -80,6 +80,8 @@ class Reminder(models.Model):
     body = models.TextField(blank=True)
 
     scheduled_for = models.DateTimeField(default=timezone.now)
+    # Set while a ``process_reminders`` worker holds the reminder (see ``apps.reminders.delivery``).
+    leased_until = models.DateTimeField(null=True, blank=True)
     sent_at = models.DateTimeField(null=True, blank=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
     attempts = models.PositiveIntegerField(default=0)
@@ -97,6 +99,7 @@ class Reminder(models.Model):
             models.Index(fields=["clinic", "reminder_type", "status"]),
             models.Index(fields=["clinic", "channel", "status"]),
             models.Index(fields=["clinic", "experiment_key", "experiment_variant"]),
+            models.Index(fields=["clinic", "created_at"]),
         ]
 
     def __str__(self) -> str:
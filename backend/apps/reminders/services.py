@@ -1,17 +1,16 @@
 from __future__ import annotations
 
-import base64
 import hashlib
-import json
 import logging
 from datetime import UTC, datetime, timedelta
-from urllib import error, parse, request
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from django.conf import settings
 from django.core import signing
+from django.core.cache import cache
 from django.utils import timezone
 
+from . import transport
 from .models import (
     Reminder,
     ReminderPortalActionToken,
@@ -29,21 +28,24 @@ class _SafeTemplateDict(dict):
         return ""
 
 
-def send_reminder(reminder: Reminder) -> tuple[str, str]:
+def send_reminder(reminder: Reminder, *, provider: str | None = None) -> tuple[str, str]:
     """
     Provider-agnostic delivery entrypoint. Returns (message_id, provider_status).
+
+    ``provider`` skips the per-clinic provider lookup when the caller already resolved it
+    (batch workers send from threads without touching the database).
     """
     if reminder.channel == Reminder.Channel.EMAIL:
-        return _send_email(reminder)
+        return _send_email(reminder, provider=provider)
     if reminder.channel == Reminder.Channel.SMS:
-        return _send_sms(reminder)
+        return _send_sms(reminder, provider=provider)
     raise ValueError(f"Unsupported reminder channel: {reminder.channel}")
 
 
-def _send_email(reminder: Reminder) -> tuple[str, str]:
+def _send_email(reminder: Reminder, *, provider: str | None = None) -> tuple[str, str]:
     if not reminder.recipient:
         raise ValueError("Cannot send email reminder without recipient.")
-    provider = resolve_email_provider(clinic_id=reminder.clinic_id)
+    provider = provider or resolve_email_provider(clinic_id=reminder.clinic_id)
     reminder.provider = (
         Reminder.Provider.SENDGRID
         if provider == Reminder.Provider.SENDGRID
@@ -61,10 +63,10 @@ def _send_email(reminder: Reminder) -> tuple[str, str]:
     return f"email-{reminder.id}", "accepted"
 
 
-def _send_sms(reminder: Reminder) -> tuple[str, str]:
+def _send_sms(reminder: Reminder, *, provider: str | None = None) -> tuple[str, str]:
     if not reminder.recipient:
         raise ValueError("Cannot send SMS reminder without recipient.")
-    provider = resolve_sms_provider(clinic_id=reminder.clinic_id)
+    provider = provider or resolve_sms_provider(clinic_id=reminder.clinic_id)
     reminder.provider = (
         Reminder.Provider.TWILIO
         if provider == Reminder.Provider.TWILIO
@@ -221,17 +223,57 @@ def render_reminder_content(
         .first()
     )
     if template:
-        subject = render_message_template(template.subject_template, context)
-        body = render_message_template(template.body_template, context)
-        return subject, body
+        return _render_pair(template.subject_template, template.body_template, context)
+    return _render_pair(*get_fallback_templates(reminder_type), context)
+
 
-    fallback_subject, fallback_body = get_fallback_templates(reminder_type)
+def _render_pair(
+    subject_template: str, body_template: str, context: dict[str, object]
+) -> tuple[str, str]:
     return (
-        render_message_template(fallback_subject, context),
-        render_message_template(fallback_body, context),
+        render_message_template(subject_template, context),
+        render_message_template(body_template, context),
     )
 
 
+class ReminderTemplateCache:
+    """
+    Per-run memo of active templates keyed by (clinic, reminder_type, channel, locale).
+
+    Same lookup semantics as :func:`render_reminder_content`, but templates are loaded
+    once per clinic (one query for a whole batch of clinics) instead of once per reminder.
+    """
+
+    def __init__(self) -> None:
+        self._templates: dict[tuple[int, str, str, str], tuple[str, str]] = {}
+        self._loaded_clinic_ids: set[int] = set()
+
+    def preload(self, clinic_ids) -> None:
+        missing = set(clinic_ids) - self._loaded_clinic_ids
+        if not missing:
+            return
+        rows = ReminderTemplate.objects.filter(clinic_id__in=missing, is_active=True).values_list(
+            "clinic_id", "reminder_type", "channel", "locale", "subject_template", "body_template"
+        )
+        for clinic_id, reminder_type, channel, locale, subject_tpl, body_tpl in rows:
+            self._templates[(clinic_id, reminder_type, channel, locale)] = (subject_tpl, body_tpl)
+        self._loaded_clinic_ids |= missing
+
+    def render(
+        self,
+        *,
+        clinic_id: int,
+        reminder_type: str,
+        channel: str,
+        locale: str,
+        context: dict[str, object],
+    ) -> tuple[str, str]:
+        self.preload([clinic_id])
+        key = (clinic_id, reminder_type, channel, locale or ReminderTemplate.Locale.EN)
+        template = self._templates.get(key) or get_fallback_templates(reminder_type)
+        return _render_pair(*template, context)
+
+
 def resolve_experiment_variant(
     *,
     reminder_type: str,
@@ -319,105 +361,168 @@ def build_portal_action_urls(reminder: Reminder) -> dict[str, str]:
     }
 
 
-def resolve_email_provider(*, clinic_id: int | None) -> str:
-    if clinic_id:
-        config = (
-            ReminderProviderConfig.objects.filter(clinic_id=clinic_id)
-            .only("email_provider")
-            .first()
+PROVIDER_CONFIG_CACHE_PREFIX = "reminders:provider_config"
+
+
+def provider_config_cache_key(clinic_id: int) -> str:
+    return f"{PROVIDER_CONFIG_CACHE_PREFIX}:{clinic_id}"
+
+
+def _provider_config_cache_timeout() -> int:
+    return int(getattr(settings, "REMINDER_PROVIDER_CONFIG_CACHE_TIMEOUT", 300))
+
+
+def _clinic_provider_overrides(clinic_ids) -> dict[int, tuple[str, str] | None]:
+    """
+    ``{clinic_id: (email_provider, sms_provider)}`` from ``ReminderProviderConfig``, ``None``
+    for clinics without a config row. Cached per clinic; ``apps.reminders.signals`` drops
+    the entry when the config changes.
+    """
+    ids = {cid for cid in clinic_ids if cid}
+    if not ids:
+        return {}
+    keys = {provider_config_cache_key(cid): cid for cid in ids}
+    cached = cache.get_many(list(keys))
+    # Cached as a tuple, or () for "no config row" so misses are cached too.
+    overrides = {keys[key]: (tuple(value) or None) for key, value in cached.items()}
+    missing = ids - set(overrides)
+    if missing:
+        found = {cid: None for cid in missing}
+        rows = ReminderProviderConfig.objects.filter(clinic_id__in=missing).values_list(
+            "clinic_id", "email_provider", "sms_provider"
+        )
+        for clinic_id, email_provider, sms_provider in rows:
+            found[clinic_id] = (str(email_provider).lower(), str(sms_provider).lower())
+        cache.set_many(
+            {provider_config_cache_key(cid): value or () for cid, value in found.items()},
+            _provider_config_cache_timeout(),
         )
-        if config:
-            return str(config.email_provider).lower()
+        overrides.update(found)
+    return overrides
+
+
+def resolve_email_provider(*, clinic_id: int | None) -> str:
+    override = _clinic_provider_overrides([clinic_id]).get(clinic_id) if clinic_id else None
+    if override:
+        return override[0]
     return str(getattr(settings, "REMINDER_EMAIL_PROVIDER", "internal")).lower()
 
 
 def resolve_sms_provider(*, clinic_id: int | None) -> str:
-    if clinic_id:
-        config = (
-            ReminderProviderConfig.objects.filter(clinic_id=clinic_id).only("sms_provider").first()
-        )
-        if config:
-            return str(config.sms_provider).lower()
+    override = _clinic_provider_overrides([clinic_id]).get(clinic_id) if clinic_id else None
+    if override:
+        return override[1]
     return str(getattr(settings, "REMINDER_SMS_PROVIDER", "internal")).lower()
 
 
-def _send_via_sendgrid(reminder: Reminder) -> tuple[str, str]:
-    api_key = str(getattr(settings, "REMINDER_SENDGRID_API_KEY", "")).strip()
-    from_email = str(getattr(settings, "REMINDER_SENDGRID_FROM_EMAIL", "")).strip()
-    from_name = str(getattr(settings, "REMINDER_SENDGRID_FROM_NAME", "Veto Clinic")).strip()
-    if not api_key:
-        raise ValueError("SendGrid API key is not configured.")
-    if not from_email:
-        raise ValueError("SendGrid from email is not configured.")
+def resolve_reminder_providers(clinic_ids) -> dict[int, dict[str, str]]:
+    """
+    Resolve email/SMS providers for many clinics (one cache round trip, at most one query).
 
-    payload = {
-        "from": {"email": from_email, "name": from_name},
-        "personalizations": [{"to": [{"email": reminder.recipient}]}],
-        "subject": reminder.subject or "Clinic reminder",
-        "content": [{"type": "text/plain", "value": reminder.body or ""}],
-        "custom_args": {"reminder_id": str(reminder.id)},
-    }
-    req = request.Request(
-        url="https://api.sendgrid.com/v3/mail/send",
-        data=json.dumps(payload).encode("utf-8"),
-        method="POST",
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
+    Returns ``{clinic_id: {"email": ..., "sms": ...}}`` with the same fallbacks as
+    :func:`resolve_email_provider` / :func:`resolve_sms_provider`.
+    """
+    default_email = str(getattr(settings, "REMINDER_EMAIL_PROVIDER", "internal")).lower()
+    default_sms = str(getattr(settings, "REMINDER_SMS_PROVIDER", "internal")).lower()
+    resolved = {}
+    for clinic_id, override in _clinic_provider_overrides(clinic_ids).items():
+        email_provider, sms_provider = override or (default_email, default_sms)
+        resolved[clinic_id] = {"email": email_provider, "sms": sms_provider}
+    return resolved
+
+
+def _sendgrid_client() -> transport.SendGridClient:
+    return transport.get_provider_client("sendgrid")  # type: ignore[return-value]
+
+
+def _send_via_sendgrid(reminder: Reminder) -> tuple[str, str]:
+    response = _sendgrid_client().send_mail(
+        {
+            "personalizations": [{"to": [{"email": reminder.recipient}]}],
+            "subject": reminder.subject or "Clinic reminder",
+            "content": [{"type": "text/plain", "value": reminder.body or ""}],
+            "custom_args": {"reminder_id": str(reminder.id)},
+        }
     )
-    try:
-        response = request.urlopen(req, timeout=15)
-    except error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="ignore")
-        raise ValueError(f"SendGrid request failed: {exc.code} {detail}") from exc
-    except error.URLError as exc:
-        raise ValueError(f"SendGrid connection failed: {exc.reason}") from exc
-
-    status_code = getattr(response, "status", 0) or response.getcode()
-    if not 200 <= int(status_code) < 300:
-        raise ValueError(f"SendGrid request failed with status {status_code}")
-    message_id = response.headers.get("X-Message-Id") or f"sendgrid-{reminder.id}"
+    message_id = response.header("x-message-id") or f"sendgrid-{reminder.id}"
     return message_id, "accepted"
 
 
-def _send_via_twilio(reminder: Reminder) -> tuple[str, str]:
-    account_sid = str(getattr(settings, "REMINDER_TWILIO_ACCOUNT_SID", "")).strip()
-    auth_token = str(getattr(settings, "REMINDER_TWILIO_AUTH_TOKEN", "")).strip()
-    from_number = str(getattr(settings, "REMINDER_TWILIO_FROM_NUMBER", "")).strip()
-    if not account_sid or not auth_token:
-        raise ValueError("Twilio credentials are not configured.")
-    if not from_number:
-        raise ValueError("Twilio from number is not configured.")
-
-    form_payload = {
-        "From": from_number,
-        "To": reminder.recipient,
-        "Body": reminder.body or reminder.subject or "Clinic reminder",
-    }
-    status_callback = str(getattr(settings, "REMINDER_TWILIO_STATUS_CALLBACK_URL", "")).strip()
-    if status_callback:
-        form_payload["StatusCallback"] = status_callback
-    body = parse.urlencode(form_payload).encode("utf-8")
-    basic = base64.b64encode(f"{account_sid}:{auth_token}".encode()).decode("ascii")
-    req = request.Request(
-        url=f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json",
-        data=body,
-        method="POST",
-        headers={
-            "Authorization": f"Basic {basic}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        },
+# Substitution tag replaced per personalization in batched SendGrid sends; SendGrid caps
+# substitutions at 10000 bytes per personalization, longer bodies are sent one by one.
+_SENDGRID_BODY_TAG = "-reminder_body-"
+_SENDGRID_SUBSTITUTION_LIMIT = 9000
+
+
+def sendgrid_batchable(reminder: Reminder) -> bool:
+    return (
+        reminder.channel == Reminder.Channel.EMAIL
+        and bool(reminder.recipient)
+        and len((reminder.body or "").encode("utf-8")) <= _SENDGRID_SUBSTITUTION_LIMIT
     )
+
+
+def sendgrid_batch_size() -> int:
+    return _sendgrid_client().batch_size
+
+
+def send_sendgrid_batch(
+    reminders: list[Reminder],
+) -> list[tuple[str, str, Exception | None]]:
+    """
+    Send email reminders in one SendGrid request, one personalization per reminder (own
+    recipient, subject and body via a substitution). Results are per reminder, in order; a
+    failed request fails every reminder in it. The request's ``X-Message-Id`` is shared, so
+    each reminder stores it suffixed with its own id (``sendgrid_batch_message_id``); webhooks
+    must carry the ``reminder_id`` custom arg to match one.
+    """
+    if not reminders:
+        return []
+    for reminder in reminders:
+        reminder.provider = Reminder.Provider.SENDGRID
     try:
-        response = request.urlopen(req, timeout=15)
-        payload = json.loads(response.read().decode("utf-8"))
-    except error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="ignore")
-        raise ValueError(f"Twilio request failed: {exc.code} {detail}") from exc
-    except error.URLError as exc:
-        raise ValueError(f"Twilio connection failed: {exc.reason}") from exc
+        response = _sendgrid_client().send_mail(
+            {
+                "personalizations": [
+                    {
+                        "to": [{"email": reminder.recipient}],
+                        "subject": reminder.subject or "Clinic reminder",
+                        "substitutions": {_SENDGRID_BODY_TAG: reminder.body or ""},
+                        "custom_args": {"reminder_id": str(reminder.id)},
+                    }
+                    for reminder in reminders
+                ],
+                "subject": "Clinic reminder",
+                "content": [{"type": "text/plain", "value": _SENDGRID_BODY_TAG}],
+            }
+        )
+    except Exception as exc:  # noqa: BLE001 - reported per reminder by the caller
+        return [("", "", exc) for _ in reminders]
+    message_id = response.header("x-message-id")
+    return [
+        (
+            (
+                sendgrid_batch_message_id(message_id, reminder.id)
+                if message_id
+                else f"sendgrid-{reminder.id}"
+            ),
+            "accepted",
+            None,
+        )
+        for reminder in reminders
+    ]
+
+
+def sendgrid_batch_message_id(message_id: str, reminder_id: int) -> str:
+    """Unique ``provider_message_id`` of one reminder in a batched SendGrid request."""
+    return f"{message_id}:{reminder_id}"
 
+
+def _send_via_twilio(reminder: Reminder) -> tuple[str, str]:
+    client: transport.TwilioClient = transport.get_provider_client("twilio")  # type: ignore[assignment]
+    payload = client.send_message(
+        to=reminder.recipient, body=reminder.body or reminder.subject or "Clinic reminder"
+    )
     sid = payload.get("sid", "")
     status_value = payload.get("status", "accepted")
     if not sid:
@@ -0,0 +1,12 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ReminderProviderConfig
+from .services import provider_config_cache_key
+
+
+@receiver(post_save, sender=ReminderProviderConfig)
+@receiver(post_delete, sender=ReminderProviderConfig)
+def _provider_config_changed(sender, instance: ReminderProviderConfig, **kwargs) -> None:
+    cache.delete(provider_config_cache_key(instance.clinic_id))
@@ -4,6 +4,8 @@ from datetime import timedelta
 
 import pytest
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from apps.accounts.models import User
@@ -194,7 +196,7 @@ def test_process_reminders_retries_and_fails(clinic, patient, client_with_member
         max_attempts=2,
     )
 
-    def _always_fail(_reminder):
+    def _always_fail(_reminder, **_kwargs):
         raise RuntimeError("provider down")
 
     monkeypatch.setattr(services, "send_reminder", _always_fail)
@@ -482,3 +484,148 @@ def test_run_reminder_escalations_flags_unresolved_reschedule_reply(clinic, pati
     assert ReminderEscalationExecution.objects.filter(
         reminder=reminder, status=ReminderEscalationExecution.Status.APPLIED
     ).exists()
+
+
+@pytest.mark.django_db
+def test_enqueue_reminders_query_count_independent_of_volume(clinic, patient, doctor):
+    ReminderPreference.objects.create(
+        clinic=clinic,
+        client=patient.owner,
+        allow_email=True,
+        allow_sms=True,
+        preferred_channel=ReminderPreference.PreferredChannel.SMS,
+    )
+    now = timezone.now()
+
+    def add_appointments(count: int, offset_hours: int) -> None:
+        for i in range(count):
+            starts_at = now + timedelta(hours=offset_hours, minutes=30 * i)
+            Appointment.objects.create(
+                clinic=clinic,
+                patient=patient,
+                vet=doctor,
+                starts_at=starts_at,
+                ends_at=starts_at + timedelta(minutes=15),
+                status=Appointment.Status.SCHEDULED,
+            )
+
+    add_appointments(2, 1)
+    with CaptureQueriesContext(connection) as small:
+        call_command("enqueue_reminders", appointment_hours=24)
+    assert Reminder.objects.count() == 2
+
+    Reminder.objects.all().delete()
+    add_appointments(20, 2)
+    with CaptureQueriesContext(connection) as large:
+        call_command("enqueue_reminders", appointment_hours=24)
+
+    assert Reminder.objects.count() == 22
+    assert set(Reminder.objects.values_list("channel", flat=True)) == {Reminder.Channel.SMS}
+    assert ReminderEvent.objects.filter(event_type=ReminderEvent.EventType.ENQUEUED).count() == 22
+    assert len(large.captured_queries) == len(small.captured_queries)
+
+
+@pytest.mark.django_db
+def test_process_reminders_concurrent_batches_drain_queue(
+    clinic, patient, client_with_membership, monkeypatch
+):
+    import threading
+
+    from apps.reminders import services
+
+    invoice = Invoice.objects.create(
+        clinic=clinic,
+        client=client_with_membership,
+        patient=patient,
+        status=Invoice.Status.SENT,
+        due_date=timezone.localdate() + timedelta(days=1),
+    )
+    due = timezone.now() - timedelta(minutes=1)
+    Reminder.objects.bulk_create(
+        [
+            Reminder(
+                clinic=clinic,
+                patient=patient,
+                invoice=invoice,
+                reminder_type=Reminder.ReminderType.INVOICE,
+                channel=Reminder.Channel.EMAIL,
+                recipient=f"owner{i}@example.com",
+                subject="Invoice reminder",
+                body="Please pay",
+                scheduled_for=due,
+            )
+            for i in range(25)
+        ]
+    )
+    thread_names: set[str] = set()
+
+    def _fake_send(reminder, *, provider=None):
+        thread_names.add(threading.current_thread().name)
+        return f"msg-{reminder.id}", "accepted"
+
+    monkeypatch.setattr(services, "send_reminder", _fake_send)
+
+    with CaptureQueriesContext(connection) as ctx:
+        call_command("process_reminders", limit=0, batch_size=10, concurrency=4)
+
+    assert Reminder.objects.filter(status=Reminder.Status.SENT).count() == 25
+    assert ReminderEvent.objects.filter(event_type=ReminderEvent.EventType.SENT).count() == 25
+    assert set(Reminder.objects.values_list("scheduled_for", flat=True)) == {due}
+    assert any(name.startswith("reminder-send") for name in thread_names)
+    # Per batch: claim + lease + load + preferences + providers + bulk writes, not per reminder.
+    assert len(ctx.captured_queries) < 40
+
+
+@pytest.mark.django_db
+def test_reminder_batch_does_not_overwrite_concurrent_changes(
+    clinic, patient, client_with_membership, monkeypatch
+):
+    from apps.reminders import services
+    from apps.reminders.delivery import claim_due_reminders, process_reminder_batch
+
+    invoice = Invoice.objects.create(
+        clinic=clinic,
+        client=client_with_membership,
+        patient=patient,
+        status=Invoice.Status.SENT,
+        due_date=timezone.localdate() + timedelta(days=1),
+    )
+    now = timezone.now()
+    due = now - timedelta(minutes=1)
+    kept, cancelled, reclaimed = Reminder.objects.bulk_create(
+        [
+            Reminder(
+                clinic=clinic,
+                patient=patient,
+                invoice=invoice,
+                reminder_type=Reminder.ReminderType.INVOICE,
+                channel=Reminder.Channel.EMAIL,
+                recipient=f"owner{i}@example.com",
+                subject="Invoice reminder",
+                body="Please pay",
+                scheduled_for=due,
+            )
+            for i in range(3)
+        ]
+    )
+    monkeypatch.setattr(
+        services, "send_reminder", lambda reminder, *, provider=None: ("msg", "accepted")
+    )
+
+    batch = claim_due_reminders(now=now, batch_size=10, lease_seconds=300)
+    assert claim_due_reminders(now=now, batch_size=10, lease_seconds=300) == []
+    assert set(Reminder.objects.values_list("scheduled_for", flat=True)) == {due}
+
+    Reminder.objects.filter(pk=cancelled.pk).update(status=Reminder.Status.CANCELLED)
+    Reminder.objects.filter(pk=reclaimed.pk).update(leased_until=now + timedelta(hours=1))
+    process_reminder_batch(batch, now=now, retry_minutes=5)
+
+    assert Reminder.objects.get(pk=kept.pk).status == Reminder.Status.SENT
+    assert Reminder.objects.get(pk=kept.pk).leased_until is None
+    assert Reminder.objects.get(pk=cancelled.pk).status == Reminder.Status.CANCELLED
+    assert Reminder.objects.get(pk=reclaimed.pk).status == Reminder.Status.QUEUED
+    assert list(
+        ReminderEvent.objects.filter(event_type=ReminderEvent.EventType.SENT).values_list(
+            "reminder_id", flat=True
+        )
+    ) == [kept.pk]
@@ -2,27 +2,21 @@ from __future__ import annotations
 
 import json
 from datetime import timedelta
-from urllib.error import HTTPError
 
 import pytest
 from django.utils import timezone
 
 from apps.billing.models import Invoice
-from apps.reminders import services
+from apps.reminders import services, transport
 from apps.reminders.models import Reminder, ReminderProviderConfig
 
 
-class _FakeResponse:
-    def __init__(self, *, status=202, headers=None, body="{}"):
-        self.status = status
-        self.headers = headers or {}
-        self._body = body.encode("utf-8")
-
-    def getcode(self):
-        return self.status
-
-    def read(self):
-        return self._body
+def _fake_response(*, status=202, headers=None, body="{}"):
+    return transport.ProviderResponse(
+        status=status,
+        headers={k.lower(): v for k, v in (headers or {}).items()},
+        body=body.encode("utf-8"),
+    )
 
 
 @pytest.mark.django_db
@@ -52,10 +46,10 @@ def test_sendgrid_provider_adapter_returns_message_id(
     settings.REMINDER_SENDGRID_FROM_EMAIL = "noreply@example.com"
     settings.REMINDER_SENDGRID_FROM_NAME = "Veto"
 
-    def _fake_urlopen(_req, timeout=15):
-        return _FakeResponse(status=202, headers={"X-Message-Id": "sg-msg-1"})
+    def _fake_request(_session, _method, _path, *, body=b"", headers=None):
+        return _fake_response(status=202, headers={"X-Message-Id": "sg-msg-1"})
 
-    monkeypatch.setattr(services.request, "urlopen", _fake_urlopen)
+    monkeypatch.setattr(transport.HttpSession, "request", _fake_request)
     message_id, provider_status = services.send_reminder(reminder)
     assert message_id == "sg-msg-1"
     assert provider_status == "accepted"
@@ -89,10 +83,10 @@ def test_twilio_provider_adapter_returns_sid(
     settings.REMINDER_TWILIO_AUTH_TOKEN = "auth"
     settings.REMINDER_TWILIO_FROM_NUMBER = "+48999999999"
 
-    def _fake_urlopen(_req, timeout=15):
-        return _FakeResponse(status=201, body=json.dumps({"sid": "SM123", "status": "queued"}))
+    def _fake_request(_session, _method, _path, *, body=b"", headers=None):
+        return _fake_response(status=201, body=json.dumps({"sid": "SM123", "status": "queued"}))
 
-    monkeypatch.setattr(services.request, "urlopen", _fake_urlopen)
+    monkeypatch.setattr(transport.HttpSession, "request", _fake_request)
     message_id, provider_status = services.send_reminder(reminder)
     assert message_id == "SM123"
     assert provider_status == "queued"
@@ -125,10 +119,10 @@ def test_sendgrid_http_error_raises_validation(
     settings.REMINDER_SENDGRID_API_KEY = "sg-key"
     settings.REMINDER_SENDGRID_FROM_EMAIL = "noreply@example.com"
 
-    def _fake_urlopen(_req, timeout=15):
-        raise HTTPError(url="http://example.com", code=401, msg="Unauthorized", hdrs=None, fp=None)
+    def _fake_request(_session, _method, _path, *, body=b"", headers=None):
+        return _fake_response(status=401, body='{"errors": [{"message": "Unauthorized"}]}')
 
-    monkeypatch.setattr(services.request, "urlopen", _fake_urlopen)
+    monkeypatch.setattr(transport.HttpSession, "request", _fake_request)
     with pytest.raises(ValueError):
         services.send_reminder(reminder)
 
@@ -164,10 +158,10 @@ def test_clinic_provider_config_overrides_global_provider(
     settings.REMINDER_SENDGRID_API_KEY = "sg-key"
     settings.REMINDER_SENDGRID_FROM_EMAIL = "noreply@example.com"
 
-    def _fake_urlopen(_req, timeout=15):
-        return _FakeResponse(status=202, headers={"X-Message-Id": "sg-msg-override"})
+    def _fake_request(_session, _method, _path, *, body=b"", headers=None):
+        return _fake_response(status=202, headers={"X-Message-Id": "sg-msg-override"})
 
-    monkeypatch.setattr(services.request, "urlopen", _fake_urlopen)
+    monkeypatch.setattr(transport.HttpSession, "request", _fake_request)
     message_id, provider_status = services.send_reminder(reminder)
     assert message_id == "sg-msg-override"
     assert provider_status == "accepted"
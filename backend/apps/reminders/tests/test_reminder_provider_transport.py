@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.billing.models import Invoice
+from apps.reminders import services, transport
+from apps.reminders.fake_providers import FakeProviderServer
+from apps.reminders.models import Reminder, ReminderInboundReply, ReminderProviderConfig
+
+
+@pytest.fixture
+def fake_providers(settings):
+    server = FakeProviderServer().start()
+    settings.REMINDER_SENDGRID_API_BASE_URL = server.base_url
+    settings.REMINDER_TWILIO_API_BASE_URL = server.base_url
+    settings.REMINDER_SENDGRID_API_KEY = "sg-key"
+    settings.REMINDER_SENDGRID_FROM_EMAIL = "noreply@example.com"
+    settings.REMINDER_TWILIO_ACCOUNT_SID = "AC123"
+    settings.REMINDER_TWILIO_AUTH_TOKEN = "auth"
+    settings.REMINDER_TWILIO_FROM_NUMBER = "+48999999999"
+    settings.REMINDER_SENDGRID_RATE_PER_SECOND = 0
+    settings.REMINDER_TWILIO_RATE_PER_SECOND = 0
+    yield server
+    transport.close_provider_clients()
+    server.stop()
+
+
+def _due_reminders(clinic, patient, client, *, channel, count, prefix):
+    invoice = Invoice.objects.create(
+        clinic=clinic,
+        client=client,
+        patient=patient,
+        status=Invoice.Status.SENT,
+        due_date=timezone.localdate() + timedelta(days=1),
+    )
+    return Reminder.objects.bulk_create(
+        Reminder(
+            clinic=clinic,
+            patient=patient,
+            invoice=invoice,
+            reminder_type=Reminder.ReminderType.INVOICE,
+            channel=channel,
+            recipient=f"{prefix}{n}",
+            subject="Invoice reminder",
+            body=f"Please pay invoice #{n}",
+            scheduled_for=timezone.now() - timedelta(minutes=1),
+        )
+        for n in range(count)
+    )
+
+
+def test_token_bucket_spaces_requests_and_honours_pause():
+    now = [0.0]
+    slept = []
+
+    def _sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = transport.TokenBucket(2, burst=2, clock=lambda: now[0], sleep=_sleep)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.5]
+
+    bucket.pause(3)
+    assert bucket.acquire() == pytest.approx(3.0)
+    assert slept == [0.5, pytest.approx(3.0)]
+
+
+@pytest.mark.django_db
+def test_process_reminders_reuses_one_connection_per_provider(
+    clinic, patient, client_with_membership, fake_providers, settings
+):
+    settings.REMINDER_EMAIL_PROVIDER = "sendgrid"
+    settings.REMINDER_SMS_PROVIDER = "twilio"
+    settings.REMINDER_SENDGRID_BATCH_SIZE = 100
+    emails = _due_reminders(
+        clinic,
+        patient,
+        client_with_membership,
+        channel=Reminder.Channel.EMAIL,
+        count=250,
+        prefix="owner-",
+    )
+    _due_reminders(
+        clinic,
+        patient,
+        client_with_membership,
+        channel=Reminder.Channel.SMS,
+        count=40,
+        prefix="+48500000",
+    )
+
+    call_command("process_reminders", limit=0, batch_size=500)
+
+    stats = fake_providers.stats
+    assert (stats.emails, stats.sendgrid_requests) == (250, 3)
+    assert (stats.sms, stats.twilio_requests) == (40, 40)
+    assert stats.connections == 2
+    assert Reminder.objects.filter(status=Reminder.Status.SENT).count() == 290
+    assert set(
+        Reminder.objects.filter(channel=Reminder.Channel.EMAIL).values_list("provider", flat=True)
+    ) == {Reminder.Provider.SENDGRID}
+    assert Reminder.objects.get(pk=emails[0].pk).provider_message_id
+
+
+@pytest.mark.django_db
+def test_batched_sendgrid_webhook_matches_reminder_by_custom_arg(
+    api_client, clinic, patient, client_with_membership, fake_providers, settings
+):
+    settings.REMINDER_EMAIL_PROVIDER = "sendgrid"
+    first, second = _due_reminders(
+        clinic,
+        patient,
+        client_with_membership,
+        channel=Reminder.Channel.EMAIL,
+        count=2,
+        prefix="owner-",
+    )
+    call_command("process_reminders")
+    first.refresh_from_db()
+    second.refresh_from_db()
+    shared = first.provider_message_id.removesuffix(f":{first.id}")
+    assert first.provider_message_id == f"{shared}:{first.id}"
+    assert second.provider_message_id == f"{shared}:{second.id}"
+
+    # Without the custom arg the shared id names no single reminder.
+    event = {"sg_message_id": f"{shared}.filter0001.1.0", "event": "dropped"}
+    response = api_client.post("/api/reminders/webhooks/sendgrid/", [event], format="json")
+    assert response.status_code == 404
+
+    response = api_client.post(
+        "/api/reminders/webhooks/sendgrid/",
+        [{**event, "reminder_id": str(second.id)}],
+        format="json",
+    )
+    assert response.status_code == 200
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.status == Reminder.Status.SENT
+    assert second.status == Reminder.Status.FAILED
+
+
+@pytest.mark.django_db
+def test_reply_to_a_batched_sendgrid_send_needs_the_reminder_id(
+    api_client, clinic, patient, client_with_membership, fake_providers, settings
+):
+    settings.REMINDER_EMAIL_PROVIDER = "sendgrid"
+    first, second = _due_reminders(
+        clinic,
+        patient,
+        client_with_membership,
+        channel=Reminder.Channel.EMAIL,
+        count=2,
+        prefix="owner-",
+    )
+    call_command("process_reminders")
+    first.refresh_from_db()
+    shared = first.provider_message_id.removesuffix(f":{first.id}")
+
+    reply = {"reply_id": "sg-reply-1", "message_id": shared, "text": "cancel"}
+    response = api_client.post("/api/reminders/replies/sendgrid/", reply, format="json")
+    assert response.status_code == 200
+    assert (response.data["processed"], response.data["missing"]) == (0, 1)
+    assert not ReminderInboundReply.objects.exists()
+
+    response = api_client.post(
+        "/api/reminders/replies/sendgrid/",
+        {**reply, "reminder_id": str(second.id)},
+        format="json",
+    )
+    assert response.data["processed"] == 1
+    assert ReminderInboundReply.objects.get().reminder_id == second.id
+
+
+@pytest.mark.django_db
+def test_provider_config_is_cached_per_clinic(clinic, django_assert_num_queries, settings):
+    settings.REMINDER_EMAIL_PROVIDER = "internal"
+    with django_assert_num_queries(1):
+        assert services.resolve_email_provider(clinic_id=clinic.id) == "internal"
+    with django_assert_num_queries(0):
+        assert services.resolve_reminder_providers([clinic.id]) == {
+            clinic.id: {"email": "internal", "sms": "internal"}
+        }
+
+    config = ReminderProviderConfig.objects.create(
+        clinic=clinic, email_provider=ReminderProviderConfig.EmailProvider.SENDGRID
+    )
+    assert services.resolve_email_provider(clinic_id=clinic.id) == "sendgrid"
+    with django_assert_num_queries(0):
+        assert services.resolve_sms_provider(clinic_id=clinic.id) == "internal"
+
+    config.delete()
+    assert services.resolve_email_provider(clinic_id=clinic.id) == "internal"
@@ -0,0 +1,319 @@
+"""
+HTTP transport for reminder providers (SendGrid, Twilio).
+
+Each provider gets one process-wide :class:`ProviderClient` holding a keep-alive
+:class:`HttpSession` and a :class:`TokenBucket`. Sender threads share the session's small
+connection pool, so a ``process_reminders`` run opens about one connection per provider
+(one per concurrent thread at most) instead of a TCP + TLS handshake per message, and the
+bucket keeps the request rate under the provider's limit instead of running into 429s.
+A 429 answer pauses the bucket for the provider's ``Retry-After``.
+
+Clients are rebuilt when the provider settings change (``get_provider_client`` keys them by
+their configuration), so tests using ``settings`` overrides get fresh clients.
+"""
+
+from __future__ import annotations
+
+import base64
+import http.client
+import json
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from urllib.parse import urlencode, urlsplit
+
+from config.http_pool import KeepAlivePool
+from django.conf import settings
+
+
+class ProviderError(ValueError):
+    """A provider request failed (connection error or non-2xx answer)."""
+
+    def __init__(self, message: str, *, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class ProviderResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+    def header(self, name: str, default: str = "") -> str:
+        return self.headers.get(name.lower(), default)
+
+    def json(self) -> dict:
+        return json.loads(self.body.decode("utf-8") or "{}")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` tokens per second, at most ``burst`` stored.
+    ``acquire`` blocks until a token is available; a rate of 0 disables limiting.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = max(0.0, float(rate))
+        self.burst = max(1.0, float(burst if burst is not None else self.rate or 1.0))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take ``tokens`` (possibly going negative) and return how long the caller must wait."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` may be spent; returns the seconds waited."""
+        if not self.rate:
+            return 0.0
+        wait = self._reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold all callers for ``seconds`` (provider asked us to back off)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + max(0.0, seconds))
+
+
+class HttpSession:
+    """
+    Requests to one provider origin over a keep-alive :class:`config.http_pool.KeepAlivePool`.
+
+    Idle connections are pooled (up to ``max_idle``) and shared between sender threads; a
+    request takes one, or opens a new one when all are busy.
+    """
+
+    def __init__(self, base_url: str, *, timeout: float = 15.0, max_idle: int = 8) -> None:
+        parts = urlsplit(base_url)
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"Unsupported provider URL: {base_url!r}")
+        self.base_url = base_url.rstrip("/")
+        self.pool = KeepAlivePool(max_idle_per_host=max_idle, timeout=timeout)
+
+    def request(
+        self, method: str, path: str, *, body: bytes = b"", headers: dict[str, str] | None = None
+    ) -> ProviderResponse:
+        result = self.pool.request(method, self.base_url + path, body=body, headers=headers)
+        return ProviderResponse(status=result.status, headers=result.headers, body=result.body)
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def _retry_after_seconds(response: ProviderResponse, default: float = 1.0) -> float:
+    try:
+        return max(0.0, float(response.header("retry-after") or default))
+    except ValueError:
+        return default
+
+
+class ProviderClient:
+    """Session + rate limit for one provider; subclasses build the provider's requests."""
+
+    label = "Provider"
+
+    def __init__(self, session: HttpSession, bucket: TokenBucket) -> None:
+        self.session = session
+        self.bucket = bucket
+
+    def post(self, path: str, *, body: bytes, headers: dict[str, str]) -> ProviderResponse:
+        self.bucket.acquire()
+        try:
+            response = self.session.request("POST", path, body=body, headers=headers)
+        except (OSError, http.client.HTTPException) as exc:
+            raise ProviderError(f"{self.label} connection failed: {exc}") from exc
+        if response.status == 429:
+            self.bucket.pause(_retry_after_seconds(response))
+        if not 200 <= response.status < 300:
+            detail = response.body.decode("utf-8", errors="ignore")
+            raise ProviderError(
+                f"{self.label} request failed: {response.status} {detail}".strip(),
+                status=response.status,
+            )
+        return response
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class SendGridClient(ProviderClient):
+    label = "SendGrid"
+    # Hard limit of the v3 mail/send API.
+    MAX_PERSONALIZATIONS = 1000
+
+    def __init__(
+        self,
+        session: HttpSession,
+        bucket: TokenBucket,
+        *,
+        api_key: str,
+        from_email: str,
+        from_name: str,
+        batch_size: int,
+    ) -> None:
+        super().__init__(session, bucket)
+        self.api_key = api_key
+        self.from_email = from_email
+        self.from_name = from_name
+        self.batch_size = max(1, min(batch_size, self.MAX_PERSONALIZATIONS))
+
+    def send_mail(self, payload: dict) -> ProviderResponse:
+        if not self.api_key:
+            raise ValueError("SendGrid API key is not configured.")
+        if not self.from_email:
+            raise ValueError("SendGrid from email is not configured.")
+        payload = {"from": {"email": self.from_email, "name": self.from_name}, **payload}
+        return self.post(
+            "/v3/mail/send",
+            body=json.dumps(payload).encode("utf-8"),
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+        )
+
+
+class TwilioClient(ProviderClient):
+    label = "Twilio"
+
+    def __init__(
+        self,
+        session: HttpSession,
+        bucket: TokenBucket,
+        *,
+        account_sid: str,
+        auth_token: str,
+        from_number: str,
+        status_callback: str,
+    ) -> None:
+        super().__init__(session, bucket)
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.status_callback = status_callback
+
+    def send_message(self, *, to: str, body: str) -> dict:
+        if not self.account_sid or not self.auth_token:
+            raise ValueError("Twilio credentials are not configured.")
+        if not self.from_number:
+            raise ValueError("Twilio from number is not configured.")
+        form = {"From": self.from_number, "To": to, "Body": body}
+        if self.status_callback:
+            form["StatusCallback"] = self.status_callback
+        basic = base64.b64encode(f"{self.account_sid}:{self.auth_token}".encode()).decode("ascii")
+        response = self.post(
+            f"/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+            body=urlencode(form).encode("utf-8"),
+            headers={
+                "Authorization": f"Basic {basic}",
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
+        )
+        try:
+            return response.json()
+        except ValueError as exc:
+            raise ProviderError("Twilio response was not valid JSON.") from exc
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _sendgrid_config() -> tuple:
+    return (
+        str(_setting("REMINDER_SENDGRID_API_BASE_URL", "https://api.sendgrid.com")).strip(),
+        str(_setting("REMINDER_SENDGRID_API_KEY", "")).strip(),
+        str(_setting("REMINDER_SENDGRID_FROM_EMAIL", "")).strip(),
+        str(_setting("REMINDER_SENDGRID_FROM_NAME", "Veto Clinic")).strip(),
+        int(_setting("REMINDER_SENDGRID_BATCH_SIZE", 500)),
+        float(_setting("REMINDER_SENDGRID_RATE_PER_SECOND", 10)),
+        float(_setting("REMINDER_PROVIDER_TIMEOUT_SECONDS", 15)),
+    )
+
+
+def _twilio_config() -> tuple:
+    return (
+        str(_setting("REMINDER_TWILIO_API_BASE_URL", "https://api.twilio.com")).strip(),
+        str(_setting("REMINDER_TWILIO_ACCOUNT_SID", "")).strip(),
+        str(_setting("REMINDER_TWILIO_AUTH_TOKEN", "")).strip(),
+        str(_setting("REMINDER_TWILIO_FROM_NUMBER", "")).strip(),
+        str(_setting("REMINDER_TWILIO_STATUS_CALLBACK_URL", "")).strip(),
+        float(_setting("REMINDER_TWILIO_RATE_PER_SECOND", 10)),
+        float(_setting("REMINDER_PROVIDER_TIMEOUT_SECONDS", 15)),
+    )
+
+
+def _build_sendgrid(config: tuple) -> SendGridClient:
+    base_url, api_key, from_email, from_name, batch_size, rate, timeout = config
+    return SendGridClient(
+        HttpSession(base_url, timeout=timeout),
+        TokenBucket(rate),
+        api_key=api_key,
+        from_email=from_email,
+        from_name=from_name,
+        batch_size=batch_size,
+    )
+
+
+def _build_twilio(config: tuple) -> TwilioClient:
+    base_url, account_sid, auth_token, from_number, status_callback, rate, timeout = config
+    return TwilioClient(
+        HttpSession(base_url, timeout=timeout),
+        TokenBucket(rate),
+        account_sid=account_sid,
+        auth_token=auth_token,
+        from_number=from_number,
+        status_callback=status_callback,
+    )
+
+
+_PROVIDERS = {
+    "sendgrid": (_sendgrid_config, _build_sendgrid),
+    "twilio": (_twilio_config, _build_twilio),
+}
+_clients: dict[str, tuple[tuple, ProviderClient]] = {}
+_clients_lock = threading.Lock()
+
+
+def get_provider_client(name: str) -> ProviderClient:
+    """The shared client for ``name`` ("sendgrid" / "twilio"), rebuilt if its settings changed."""
+    read_config, build = _PROVIDERS[name]
+    config = read_config()
+    with _clients_lock:
+        current = _clients.get(name)
+        if current is not None and current[0] == config:
+            return current[1]
+        client = build(config)
+        _clients[name] = (config, client)
+    if current is not None:
+        current[1].close()
+    return client
+
+
+def close_provider_clients() -> None:
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for _config, client in clients:
+        client.close()
@@ -28,6 +28,7 @@ from apps.tenancy.access import (
     accessible_clinic_ids,
     clinic_id_for_mutation,
 )
+from apps.tenancy.dates import clinic_timezone, date_range_q
 
 from .models import (
     Reminder,
@@ -51,7 +52,12 @@ from .serializers import (
     ReminderTemplatePreviewSerializer,
     ReminderTemplateSerializer,
 )
-from .services import decode_portal_action_token, parse_reply_intent, render_message_template
+from .services import (
+    decode_portal_action_token,
+    parse_reply_intent,
+    render_message_template,
+    sendgrid_batch_message_id,
+)
 
 
 class ReminderViewSet(viewsets.ReadOnlyModelViewSet):
@@ -88,6 +94,7 @@ class ReminderViewSet(viewsets.ReadOnlyModelViewSet):
         }
         reminder.status = Reminder.Status.QUEUED
         reminder.scheduled_for = timezone.now()
+        reminder.leased_until = None
         reminder.sent_at = None
         reminder.attempts = 0
         reminder.last_error = ""
@@ -95,6 +102,7 @@ class ReminderViewSet(viewsets.ReadOnlyModelViewSet):
             update_fields=[
                 "status",
                 "scheduled_for",
+                "leased_until",
                 "sent_at",
                 "attempts",
                 "last_error",
@@ -179,7 +187,8 @@ class ReminderViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        today = timezone.localdate()
+        zone = clinic_timezone(request.user.clinic_id)
+        today = timezone.localdate(timezone=zone)
         default_from = date(today.year, today.month, 1) - timedelta(days=150)
         from_date = parse_date(request.query_params.get("from", "")) or default_from
         to_date = parse_date(request.query_params.get("to", "")) or today
@@ -190,9 +199,8 @@ class ReminderViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
         clinic_qs = Reminder.objects.filter(
+            date_range_q("created_at", from_date, to_date, tz=zone),
             clinic_id__in=accessible_clinic_ids(request.user),
-            created_at__date__gte=from_date,
-            created_at__date__lte=to_date,
         )
         channel = request.query_params.get("channel")
         provider = request.query_params.get("provider")
@@ -210,7 +218,11 @@ class ReminderViewSet(viewsets.ReadOnlyModelViewSet):
         cancelled = clinic_qs.filter(status=Reminder.Status.CANCELLED).count()
         delivered = clinic_qs.filter(delivered_at__isnull=False).count()
 
-        trunc = TruncMonth("created_at") if period == "monthly" else TruncDate("created_at")
+        trunc = (
+            TruncMonth("created_at", tzinfo=zone)
+            if period == "monthly"
+            else TruncDate("created_at", tzinfo=zone)
+        )
         grouped_rows = (
             clinic_qs.annotate(bucket=trunc)
             .values("bucket")
@@ -311,7 +323,8 @@ class ReminderViewSet(viewsets.ReadOnlyModelViewSet):
         permission_classes=[IsAuthenticated, HasClinic, IsClinicAdmin],
     )
     def experiment_attribution(self, request):
-        today = timezone.localdate()
+        zone = clinic_timezone(request.user.clinic_id)
+        today = timezone.localdate(timezone=zone)
         default_from = date(today.year, today.month, 1) - timedelta(days=90)
         from_date = parse_date(request.query_params.get("from", "")) or default_from
         to_date = parse_date(request.query_params.get("to", "")) or today
@@ -324,11 +337,10 @@ class ReminderViewSet(viewsets.ReadOnlyModelViewSet):
         minimum_sample_size = max(1, minimum_sample_size)
 
         reminders_qs = Reminder.objects.filter(
+            date_range_q("created_at", from_date, to_date, tz=zone),
             clinic_id__in=accessible_clinic_ids(request.user),
             reminder_type=Reminder.ReminderType.APPOINTMENT,
             appointment_id__isnull=False,
-            created_at__date__gte=from_date,
-            created_at__date__lte=to_date,
         ).select_related("appointment")
         channel = request.query_params.get("channel")
         provider = request.query_params.get("provider")
@@ -663,6 +675,27 @@ class ReminderEscalationMetricsView(APIView):
         return Response(payload, status=200)
 
 
+def _reminder_for_message(message_id: str, reminder_id: int | None = None) -> Reminder | None:
+    """
+    Reminder a provider message id refers to. Batched SendGrid sends share the request's
+    message id, so they are matched only together with ``reminder_id``; a bare id that
+    matches several reminders is rejected rather than applied to an arbitrary one.
+    """
+    if reminder_id:
+        return Reminder.objects.filter(
+            Q(provider_message_id=sendgrid_batch_message_id(message_id, reminder_id))
+            | Q(provider_message_id=message_id),
+            id=reminder_id,
+        ).first()
+    matches = list(Reminder.objects.filter(provider_message_id=message_id)[:2])
+    return matches[0] if len(matches) == 1 else None
+
+
+def _reminder_id_arg(value) -> int | None:
+    value = str(value or "").strip()
+    return int(value) if value.isdigit() else None
+
+
 class ReminderReplyWebhookView(APIView):
     permission_classes = [AllowAny]
 
@@ -678,7 +711,7 @@ class ReminderReplyWebhookView(APIView):
         duplicates = 0
         missing = 0
         for reply in replies:
-            reminder = Reminder.objects.filter(provider_message_id=reply["message_id"]).first()
+            reminder = _reminder_for_message(reply["message_id"], reply["reminder_id"])
             if not reminder:
                 missing += 1
                 continue
@@ -804,6 +837,7 @@ class ReminderReplyWebhookView(APIView):
                 {
                     "provider_reply_id": provider_reply_id,
                     "message_id": message_id,
+                    "reminder_id": _reminder_id_arg(item.get("reminder_id")),
                     "text": text,
                 }
             )
@@ -1072,7 +1106,7 @@ class ReminderWebhookView(APIView):
         updated = 0
         missing = 0
         for update in updates:
-            reminder = Reminder.objects.filter(provider_message_id=update["message_id"]).first()
+            reminder = _reminder_for_message(update["message_id"], update.get("reminder_id"))
             if not reminder:
                 missing += 1
                 continue
@@ -1125,6 +1159,7 @@ class ReminderWebhookView(APIView):
                 updates.append(
                     {
                         "message_id": str(message_id),
+                        "reminder_id": _reminder_id_arg(item.get("reminder_id")),
                         "status": str(status_value),
                         "error": str(item.get("reason") or item.get("error") or ""),
                     }
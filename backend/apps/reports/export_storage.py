@@ -0,0 +1,237 @@
+"""
+Object storage for generated report exports (gzip-compressed CSV).
+
+Rows are written through ``csv.writer`` into a gzip stream that is flushed straight to the
+destination: an S3 multipart upload when a bucket is configured (``REPORT_EXPORTS_S3_BUCKET``,
+falling back to ``DOCUMENTS_DATA_S3_BUCKET``), or, with ``REPORT_EXPORTS_LOCAL_STORAGE`` on, a
+file under ``REPORT_EXPORTS_LOCAL_ROOT``. Only a pointer (storage / bucket / key / size) is kept
+on the ``ReportExportJob`` row, and downloads are streamed back chunk by chunk. With neither, the
+CSV is stored inline in ``file_content`` as before object storage existed.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import logging
+import zlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import boto3
+from botocore.exceptions import ClientError
+from django.conf import settings
+
+from apps.reports.models import ReportExportJob
+
+logger = logging.getLogger(__name__)
+
+_READ_CHUNK_BYTES = 64 * 1024
+_MIN_S3_PART_BYTES = 5 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class StoredReportExport:
+    storage: str
+    bucket: str
+    key: str
+    size: int
+    # Inline storage only: the CSV itself, kept uncompressed on the job row.
+    content: str = ""
+
+
+def get_report_exports_bucket() -> str:
+    dedicated = str(getattr(settings, "REPORT_EXPORTS_S3_BUCKET", "") or "").strip()
+    if dedicated:
+        return dedicated
+    return str(getattr(settings, "DOCUMENTS_DATA_S3_BUCKET", "") or "").strip()
+
+
+def _get_s3_client():
+    region = getattr(settings, "REPORT_EXPORTS_S3_REGION", None) or getattr(
+        settings, "DOCUMENTS_S3_REGION", "us-east-1"
+    )
+    return boto3.client("s3", region_name=region)
+
+
+def _local_root() -> Path:
+    root = getattr(settings, "REPORT_EXPORTS_LOCAL_ROOT", "") or ""
+    return Path(root) if root else Path(settings.MEDIA_ROOT) / "report-exports"
+
+
+def build_storage_key(*, job: ReportExportJob, file_name: str) -> str:
+    prefix = (
+        str(getattr(settings, "REPORT_EXPORTS_S3_PREFIX", "report-exports") or "report-exports")
+        .strip()
+        .strip("/")
+    )
+    return f"{prefix}/clinic_{job.clinic_id}/job_{job.id}/{file_name}.gz"
+
+
+class _S3MultipartWriter:
+    """Minimal binary sink that uploads whatever it is given as S3 multipart parts."""
+
+    def __init__(self, client, *, bucket: str, key: str, part_size: int):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = max(part_size, _MIN_S3_PART_BYTES)
+        self._buffer = bytearray()
+        self._parts: list[dict] = []
+        self.size = 0
+        upload = client.create_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            ContentType="text/csv; charset=utf-8",
+            ContentEncoding="gzip",
+            ServerSideEncryption="AES256",
+        )
+        self._upload_id = upload["UploadId"]
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self.size += len(data)
+        if len(self._buffer) >= self._part_size:
+            self._upload_part()
+        return len(data)
+
+    def flush(self) -> None:
+        # Parts are only sent once they reach the S3 minimum size (see ``write``).
+        pass
+
+    def _upload_part(self) -> None:
+        number = len(self._parts) + 1
+        response = self._client.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=bytes(self._buffer),
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+        self._buffer.clear()
+
+    def complete(self) -> None:
+        if self._buffer or not self._parts:
+            self._upload_part()
+        self._client.complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    def abort(self) -> None:
+        try:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+            )
+        except ClientError as e:
+            logger.warning(
+                "Report export multipart abort failed bucket=%s key=%s error=%s",
+                self._bucket,
+                self._key,
+                e,
+            )
+
+
+def _write_csv_gzip(sink, rows: Iterable[Iterable]) -> None:
+    level = int(getattr(settings, "REPORT_EXPORTS_GZIP_LEVEL", 6))
+    with gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=level) as gz:
+        with io.TextIOWrapper(gz, encoding="utf-8", newline="") as text:
+            csv.writer(text).writerows(rows)
+
+
+def write_report_export(
+    *, job: ReportExportJob, file_name: str, rows: Iterable[Iterable]
+) -> StoredReportExport:
+    """Stream ``rows`` as gzip CSV to S3 (multipart) or local storage, else build it inline."""
+    key = build_storage_key(job=job, file_name=file_name)
+    bucket = get_report_exports_bucket()
+
+    if bucket:
+        part_mb = int(getattr(settings, "REPORT_EXPORTS_S3_PART_SIZE_MB", 8))
+        writer = _S3MultipartWriter(
+            _get_s3_client(), bucket=bucket, key=key, part_size=part_mb * 1024 * 1024
+        )
+        try:
+            _write_csv_gzip(writer, rows)
+            writer.complete()
+        except BaseException:
+            writer.abort()
+            raise
+        logger.info(
+            "Report export uploaded to S3 job_id=%s key=%s bytes=%s", job.id, key, writer.size
+        )
+        return StoredReportExport(
+            storage=ReportExportJob.Storage.S3, bucket=bucket, key=key, size=writer.size
+        )
+
+    # A file on one task's disk cannot be downloaded through another, so local storage is opt-in.
+    if not getattr(settings, "REPORT_EXPORTS_LOCAL_STORAGE", False):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        content = buffer.getvalue()
+        return StoredReportExport(
+            storage=ReportExportJob.Storage.INLINE,
+            bucket="",
+            key="",
+            size=len(content.encode("utf-8")),
+            content=content,
+        )
+    path = _local_root() / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with path.open("wb") as fh:
+            _write_csv_gzip(fh, rows)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return StoredReportExport(
+        storage=ReportExportJob.Storage.LOCAL, bucket="", key=key, size=path.stat().st_size
+    )
+
+
+def _iter_stored_bytes(job: ReportExportJob) -> Iterator[bytes]:
+    if job.storage == ReportExportJob.Storage.S3:
+        try:
+            obj = _get_s3_client().get_object(Bucket=job.storage_bucket, Key=job.storage_key)
+        except ClientError as e:
+            logger.warning(
+                "Report export S3 download failed bucket=%s key=%s error=%s",
+                job.storage_bucket,
+                job.storage_key,
+                e,
+            )
+            raise
+        yield from obj["Body"].iter_chunks(chunk_size=_READ_CHUNK_BYTES)
+        return
+    with (_local_root() / job.storage_key).open("rb") as fh:
+        while chunk := fh.read(_READ_CHUNK_BYTES):
+            yield chunk
+
+
+def iter_report_export_bytes(job: ReportExportJob, *, decompress: bool = True) -> Iterator[bytes]:
+    """
+    Yield the stored export in chunks. With ``decompress=False`` the stored bytes are passed
+    through as-is (gzip for object-stored exports), for clients that accept gzip encoding.
+    """
+    if job.storage == ReportExportJob.Storage.INLINE:
+        yield job.file_content.encode("utf-8")
+        return
+    if not decompress or job.content_encoding != "gzip":
+        yield from _iter_stored_bytes(job)
+        return
+    inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in _iter_stored_bytes(job):
+        if data := inflater.decompress(chunk):
+            yield data
+    if tail := inflater.flush():
+        yield tail
+
+
+def read_report_export_text(job: ReportExportJob) -> str:
+    """Whole export as text; for tests and small reports only."""
+    return b"".join(iter_report_export_bytes(job)).decode("utf-8")
@@ -9,13 +9,15 @@ from __future__ import annotations
 from django.db import transaction
 from django.utils import timezone
 
+from apps.reports.export_storage import write_report_export
 from apps.reports.models import ReportExportJob
-from apps.reports.services import build_report_csv
+from apps.reports.services import iter_report_rows
 
 
 def execute_report_export_job_by_id(job_id: int) -> str:
     """
-    Claim a pending job (skip_locked) and generate CSV.
+    Claim a pending job (skip_locked) and stream its gzip CSV to export storage (inline CSV
+    when no object storage is configured).
 
     Returns one of: ``processed``, ``failed``, ``skipped``.
     """
@@ -33,15 +35,26 @@ def execute_report_export_job_by_id(job_id: int) -> str:
 
     job.refresh_from_db()
     try:
-        file_name, content = build_report_csv(job)
+        file_name, rows = iter_report_rows(job)
+        stored = write_report_export(job=job, file_name=file_name, rows=rows)
         job.file_name = file_name
-        job.file_content = content
+        job.file_content = stored.content
+        job.storage = stored.storage
+        job.storage_bucket = stored.bucket
+        job.storage_key = stored.key
+        job.content_encoding = "" if stored.storage == ReportExportJob.Storage.INLINE else "gzip"
+        job.file_size = stored.size
         job.status = ReportExportJob.Status.COMPLETED
         job.completed_at = timezone.now()
         job.save(
             update_fields=[
                 "file_name",
                 "file_content",
+                "storage",
+                "storage_bucket",
+                "storage_key",
+                "content_encoding",
+                "file_size",
                 "status",
                 "completed_at",
                 "updated_at",
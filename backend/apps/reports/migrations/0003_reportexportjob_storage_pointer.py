@@ -0,0 +1,46 @@
+# Generated by Django 6.1.2 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0002_alter_reportexportjob_report_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportexportjob",
+            name="content_encoding",
+            field=models.CharField(blank=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name="reportexportjob",
+            name="file_size",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="reportexportjob",
+            name="storage",
+            field=models.CharField(
+                choices=[
+                    ("inline", "Inline (legacy file_content)"),
+                    ("local", "Local filesystem"),
+                    ("s3", "S3"),
+                ],
+                default="inline",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="reportexportjob",
+            name="storage_bucket",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="reportexportjob",
+            name="storage_key",
+            field=models.CharField(blank=True, max_length=512),
+        ),
+    ]
@@ -17,6 +17,11 @@ class ReportExportJob(models.Model):
         COMPLETED = "completed", "Completed"
         FAILED = "failed", "Failed"
 
+    class Storage(models.TextChoices):
+        INLINE = "inline", "Inline (legacy file_content)"
+        LOCAL = "local", "Local filesystem"
+        S3 = "s3", "S3"
+
     clinic = models.ForeignKey(
         Clinic,
         on_delete=models.PROTECT,
@@ -33,8 +38,14 @@ class ReportExportJob(models.Model):
     params = models.JSONField(default=dict, blank=True)
     status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
     file_name = models.CharField(max_length=255, blank=True)
+    # Legacy: exports created before object storage kept the CSV inline.
     file_content = models.TextField(blank=True)
     content_type = models.CharField(max_length=64, default="text/csv")
+    storage = models.CharField(max_length=16, choices=Storage.choices, default=Storage.INLINE)
+    storage_bucket = models.CharField(max_length=255, blank=True)
+    storage_key = models.CharField(max_length=512, blank=True)
+    content_encoding = models.CharField(max_length=16, blank=True)
+    file_size = models.PositiveBigIntegerField(default=0)
     error = models.TextField(blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -53,5 +64,11 @@ class ReportExportJob(models.Model):
             ),
         ]
 
+    @property
+    def has_file(self) -> bool:
+        if self.storage == self.Storage.INLINE:
+            return bool(self.file_content)
+        return bool(self.storage_key)
+
     def __str__(self):
         return f"ReportExportJob({self.report_type}, {self.status}, clinic={self.clinic_id})"
@@ -1,5 +1,7 @@
 import csv
+from collections.abc import Iterable, Iterator
 from datetime import timedelta
+from decimal import Decimal
 from io import StringIO
 
 from django.db.models import Count
@@ -8,9 +10,15 @@ from django.utils import timezone
 from apps.billing.models import Invoice, InvoiceLine, Payment
 from apps.reminders.models import Reminder
 from apps.scheduling.models import Appointment
+from apps.tenancy.dates import clinic_timezone, date_range_q
 
 from .models import ReportExportJob
 
+# Rows fetched per server-side cursor round trip while streaming an export.
+EXPORT_ITERATOR_CHUNK_SIZE = 2000
+
+_CENT = Decimal("0.01")
+
 
 def _as_date(value, default_date):
     if not value:
@@ -28,186 +36,247 @@ def _as_bool(params: dict, key: str, *, default: bool = False) -> bool:
     return s in ("1", "true", "yes")
 
 
-def build_report_csv(job: ReportExportJob) -> tuple[str, str]:
-    today = timezone.localdate()
-    params = job.params or {}
-
-    if job.report_type == ReportExportJob.ReportType.REVENUE_SUMMARY:
-        date_from = _as_date(params.get("from"), today - timedelta(days=30))
-        date_to = _as_date(params.get("to"), today)
-        lines = (
-            InvoiceLine.objects.filter(
-                invoice__clinic_id=job.clinic_id,
-                invoice__created_at__date__gte=date_from,
-                invoice__created_at__date__lte=date_to,
-            )
-            .exclude(invoice__status=Invoice.Status.CANCELLED)
-            .select_related("invoice")
+def _line_amounts(quantity: Decimal, unit_price: Decimal, vat_rate: str):
+    """Net / VAT / gross for raw line values; mirrors the ``InvoiceLine`` properties."""
+    net = (quantity * unit_price).quantize(_CENT)
+    try:
+        vat = (net * Decimal(vat_rate) / 100).quantize(_CENT)
+    except Exception:
+        vat = Decimal("0")
+    return net, vat, net + vat
+
+
+def _revenue_summary_rows(job, params, today, zone) -> tuple[str, Iterator[Iterable]]:
+    date_from = _as_date(params.get("from"), today - timedelta(days=30))
+    date_to = _as_date(params.get("to"), today)
+    lines = (
+        InvoiceLine.objects.filter(
+            date_range_q("invoice__created_at", date_from, date_to, tz=zone),
+            invoice__clinic_id=job.clinic_id,
         )
-        paid_map = dict(
-            Payment.objects.filter(
-                invoice__clinic_id=job.clinic_id,
-                status=Payment.Status.COMPLETED,
-                paid_at__date__gte=date_from,
-                paid_at__date__lte=date_to,
-            )
-            .values("invoice_id")
-            .annotate(amount=Count("id"))
-            .values_list("invoice_id", "amount")
+        .exclude(invoice__status=Invoice.Status.CANCELLED)
+        .order_by("id")
+        .values_list(
+            "invoice_id", "invoice__created_at", "invoice__status", "quantity", "unit_price"
         )
-
-        buffer = StringIO()
-        writer = csv.writer(buffer)
-        writer.writerow(["invoice_id", "created_date", "status", "line_total", "payments_count"])
-        for line in lines:
-            writer.writerow(
-                [
-                    line.invoice_id,
-                    line.invoice.created_at.date().isoformat(),
-                    line.invoice.status,
-                    str(line.line_total),
-                    paid_map.get(line.invoice_id, 0),
-                ]
-            )
-        return (
-            f"revenue-summary-{date_from.isoformat()}-to-{date_to.isoformat()}.csv",
-            buffer.getvalue(),
+    )
+    paid_map = dict(
+        Payment.objects.filter(
+            date_range_q("paid_at", date_from, date_to, tz=zone),
+            invoice__clinic_id=job.clinic_id,
+            status=Payment.Status.COMPLETED,
         )
+        .values("invoice_id")
+        .annotate(amount=Count("id"))
+        .values_list("invoice_id", "amount")
+    )
+
+    def rows():
+        yield ["invoice_id", "created_date", "status", "line_total", "payments_count"]
+        for invoice_id, created_at, status, quantity, unit_price in lines.iterator(
+            chunk_size=EXPORT_ITERATOR_CHUNK_SIZE
+        ):
+            yield [
+                invoice_id,
+                timezone.localtime(created_at, zone).date().isoformat(),
+                status,
+                str((quantity * unit_price).quantize(_CENT)),
+                paid_map.get(invoice_id, 0),
+            ]
 
-    if job.report_type == ReportExportJob.ReportType.REMINDER_ANALYTICS:
-        date_from = _as_date(params.get("from"), today - timedelta(days=30))
-        date_to = _as_date(params.get("to"), today)
-        rows = (
-            Reminder.objects.filter(
-                clinic_id=job.clinic_id,
-                created_at__date__gte=date_from,
-                created_at__date__lte=date_to,
-            )
-            .values("status", "channel", "provider")
-            .annotate(total=Count("id"))
-            .order_by("status", "channel", "provider")
+    return (
+        f"revenue-summary-{date_from.isoformat()}-to-{date_to.isoformat()}.csv",
+        rows(),
+    )
+
+
+def _reminder_analytics_rows(job, params, today, zone) -> tuple[str, Iterator[Iterable]]:
+    date_from = _as_date(params.get("from"), today - timedelta(days=30))
+    date_to = _as_date(params.get("to"), today)
+    groups = (
+        Reminder.objects.filter(
+            date_range_q("created_at", date_from, date_to, tz=zone),
+            clinic_id=job.clinic_id,
         )
-        buffer = StringIO()
-        writer = csv.writer(buffer)
-        writer.writerow(["status", "channel", "provider", "total"])
-        for row in rows:
-            writer.writerow([row["status"], row["channel"], row["provider"], row["total"]])
-        return (
-            f"reminder-analytics-{date_from.isoformat()}-to-{date_to.isoformat()}.csv",
-            buffer.getvalue(),
+        .values("status", "channel", "provider")
+        .annotate(total=Count("id"))
+        .order_by("status", "channel", "provider")
+        .values_list("status", "channel", "provider", "total")
+    )
+
+    def rows():
+        yield ["status", "channel", "provider", "total"]
+        yield from groups.iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE)
+
+    return (
+        f"reminder-analytics-{date_from.isoformat()}-to-{date_to.isoformat()}.csv",
+        rows(),
+    )
+
+
+def _cancellation_analytics_rows(job, params, today, zone) -> tuple[str, Iterator[Iterable]]:
+    date_from = _as_date(params.get("date_from"), today - timedelta(days=30))
+    date_to = _as_date(params.get("date_to"), today)
+    groups = (
+        Appointment.objects.filter(
+            date_range_q("starts_at", date_from, date_to, tz=zone),
+            clinic_id=job.clinic_id,
+            status__in=[Appointment.Status.CANCELLED, Appointment.Status.NO_SHOW],
         )
+        .values("status", "cancelled_by")
+        .annotate(total=Count("id"))
+        .order_by("status", "cancelled_by")
+        .values_list("status", "cancelled_by", "total")
+    )
+
+    def rows():
+        yield ["status", "cancelled_by", "total"]
+        yield from groups.iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE)
 
-    if job.report_type == ReportExportJob.ReportType.CANCELLATION_ANALYTICS:
-        date_from = _as_date(params.get("date_from"), today - timedelta(days=30))
-        date_to = _as_date(params.get("date_to"), today)
-        rows = (
-            Appointment.objects.filter(
-                clinic_id=job.clinic_id,
-                starts_at__date__gte=date_from,
-                starts_at__date__lte=date_to,
-                status__in=[Appointment.Status.CANCELLED, Appointment.Status.NO_SHOW],
-            )
-            .values("status", "cancelled_by")
-            .annotate(total=Count("id"))
-            .order_by("status", "cancelled_by")
+    return (
+        f"cancellation-analytics-{date_from.isoformat()}-to-{date_to.isoformat()}.csv",
+        rows(),
+    )
+
+
+def _accounting_invoice_lines_rows(job, params, today, zone) -> tuple[str, Iterator[Iterable]]:
+    date_from = _as_date(params.get("from"), today - timedelta(days=30))
+    date_to = _as_date(params.get("to"), today)
+    statuses = [
+        Invoice.Status.SENT,
+        Invoice.Status.PAID,
+        Invoice.Status.OVERDUE,
+    ]
+    if _as_bool(params, "include_drafts"):
+        statuses.append(Invoice.Status.DRAFT)
+    if _as_bool(params, "include_cancelled"):
+        statuses.append(Invoice.Status.CANCELLED)
+
+    lines = (
+        InvoiceLine.objects.filter(
+            date_range_q("invoice__created_at", date_from, date_to, tz=zone),
+            invoice__clinic_id=job.clinic_id,
+            invoice__status__in=statuses,
         )
-        buffer = StringIO()
-        writer = csv.writer(buffer)
-        writer.writerow(["status", "cancelled_by", "total"])
-        for row in rows:
-            writer.writerow([row["status"], row["cancelled_by"], row["total"]])
-        return (
-            f"cancellation-analytics-{date_from.isoformat()}-to-{date_to.isoformat()}.csv",
-            buffer.getvalue(),
+        .order_by("invoice__created_at", "invoice_id", "id")
+        .values_list(
+            "invoice_id",
+            "invoice__invoice_number",
+            "invoice__created_at",
+            "invoice__status",
+            "invoice__currency",
+            "invoice__due_date",
+            "invoice__client_id",
+            "invoice__client__first_name",
+            "invoice__client__last_name",
+            "invoice__patient_id",
+            "id",
+            "description",
+            "quantity",
+            "unit",
+            "unit_price",
+            "vat_rate",
+            "service_id",
+            "inventory_item_id",
         )
+    )
 
-    if job.report_type == ReportExportJob.ReportType.ACCOUNTING_INVOICE_LINES:
-        date_from = _as_date(params.get("from"), today - timedelta(days=30))
-        date_to = _as_date(params.get("to"), today)
-        statuses = [
-            Invoice.Status.SENT,
-            Invoice.Status.PAID,
-            Invoice.Status.OVERDUE,
+    def rows():
+        yield [
+            "invoice_id",
+            "invoice_number",
+            "invoice_created_date",
+            "invoice_status",
+            "currency",
+            "due_date",
+            "client_id",
+            "client_name",
+            "patient_id",
+            "line_id",
+            "line_description",
+            "quantity",
+            "unit",
+            "unit_price",
+            "vat_rate",
+            "line_net",
+            "line_vat",
+            "line_gross",
+            "service_id",
+            "inventory_item_id",
         ]
-        if _as_bool(params, "include_drafts"):
-            statuses.append(Invoice.Status.DRAFT)
-        if _as_bool(params, "include_cancelled"):
-            statuses.append(Invoice.Status.CANCELLED)
-
-        lines = (
-            InvoiceLine.objects.filter(
-                invoice__clinic_id=job.clinic_id,
-                invoice__created_at__date__gte=date_from,
-                invoice__created_at__date__lte=date_to,
-                invoice__status__in=statuses,
-            )
-            .select_related(
-                "invoice",
-                "invoice__client",
-                "invoice__patient",
-                "service",
-                "inventory_item",
-            )
-            .order_by("invoice__created_at", "invoice_id", "id")
-        )
-
-        buffer = StringIO()
-        writer = csv.writer(buffer)
-        writer.writerow(
-            [
-                "invoice_id",
-                "invoice_number",
-                "invoice_created_date",
-                "invoice_status",
-                "currency",
-                "due_date",
-                "client_id",
-                "client_name",
-                "patient_id",
-                "line_id",
-                "line_description",
-                "quantity",
-                "unit",
-                "unit_price",
-                "vat_rate",
-                "line_net",
-                "line_vat",
-                "line_gross",
-                "service_id",
-                "inventory_item_id",
+        for (
+            invoice_id,
+            invoice_number,
+            created_at,
+            status,
+            currency,
+            due_date,
+            client_id,
+            first_name,
+            last_name,
+            patient_id,
+            line_id,
+            description,
+            quantity,
+            unit,
+            unit_price,
+            vat_rate,
+            service_id,
+            inventory_item_id,
+        ) in lines.iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE):
+            net, vat, gross = _line_amounts(quantity, unit_price, vat_rate)
+            yield [
+                invoice_id,
+                invoice_number or "",
+                timezone.localtime(created_at, zone).date().isoformat(),
+                status,
+                currency,
+                due_date.isoformat() if due_date else "",
+                client_id,
+                f"{first_name} {last_name}".strip(),
+                patient_id or "",
+                line_id,
+                description,
+                str(quantity),
+                unit,
+                str(unit_price),
+                vat_rate,
+                str(net),
+                str(vat),
+                str(gross),
+                service_id or "",
+                inventory_item_id or "",
             ]
-        )
-        for line in lines:
-            inv = line.invoice
-            client = inv.client
-            client_name = f"{client.first_name} {client.last_name}".strip()
-            writer.writerow(
-                [
-                    inv.id,
-                    inv.invoice_number or "",
-                    inv.created_at.date().isoformat(),
-                    inv.status,
-                    inv.currency,
-                    inv.due_date.isoformat() if inv.due_date else "",
-                    client.id,
-                    client_name,
-                    inv.patient_id or "",
-                    line.id,
-                    line.description,
-                    str(line.quantity),
-                    line.unit,
-                    str(line.unit_price),
-                    line.vat_rate,
-                    str(line.line_total),
-                    str(line.line_vat_amount),
-                    str(line.line_gross),
-                    line.service_id or "",
-                    line.inventory_item_id or "",
-                ]
-            )
-        return (
-            f"accounting-invoice-lines-{date_from.isoformat()}-to-{date_to.isoformat()}.csv",
-            buffer.getvalue(),
-        )
 
-    raise ValueError(f"Unsupported report_type: {job.report_type}")
+    return (
+        f"accounting-invoice-lines-{date_from.isoformat()}-to-{date_to.isoformat()}.csv",
+        rows(),
+    )
+
+
+_ROW_BUILDERS = {
+    ReportExportJob.ReportType.REVENUE_SUMMARY: _revenue_summary_rows,
+    ReportExportJob.ReportType.REMINDER_ANALYTICS: _reminder_analytics_rows,
+    ReportExportJob.ReportType.CANCELLATION_ANALYTICS: _cancellation_analytics_rows,
+    ReportExportJob.ReportType.ACCOUNTING_INVOICE_LINES: _accounting_invoice_lines_rows,
+}
+
+
+def iter_report_rows(job: ReportExportJob) -> tuple[str, Iterator[Iterable]]:
+    """
+    Return ``(file_name, rows)`` for a job; ``rows`` lazily yields the CSV header and then
+    one list per data row, reading the database in ``EXPORT_ITERATOR_CHUNK_SIZE`` batches.
+    """
+    builder = _ROW_BUILDERS.get(job.report_type)
+    if builder is None:
+        raise ValueError(f"Unsupported report_type: {job.report_type}")
+    zone = clinic_timezone(job.clinic_id)
+    return builder(job, job.params or {}, timezone.localdate(timezone=zone), zone)
+
+
+def build_report_csv(job: ReportExportJob) -> tuple[str, str]:
+    """In-memory CSV of a report; exports use ``export_storage.write_report_export`` instead."""
+    file_name, rows = iter_report_rows(job)
+    buffer = StringIO()
+    csv.writer(buffer).writerows(rows)
+    return file_name, buffer.getvalue()
@@ -1,3 +1,4 @@
+import gzip
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -7,10 +8,19 @@ from django.urls import reverse
 from apps.accounts.models import User
 from apps.audit.models import AuditLog
 from apps.billing.models import Invoice, InvoiceLine
+from apps.reports.export_storage import read_report_export_text
 from apps.reports.models import ReportExportJob
 from apps.tenancy.models import Clinic
 
 
+@pytest.fixture(autouse=True)
+def _local_report_storage(settings, tmp_path):
+    settings.REPORT_EXPORTS_S3_BUCKET = ""
+    settings.DOCUMENTS_DATA_S3_BUCKET = ""
+    settings.REPORT_EXPORTS_LOCAL_STORAGE = True
+    settings.REPORT_EXPORTS_LOCAL_ROOT = str(tmp_path / "report-exports")
+
+
 @pytest.mark.django_db
 def test_create_report_export_job_admin_only(api_client, clinic_admin, receptionist):
     api_client.force_authenticate(user=receptionist)
@@ -97,14 +107,17 @@ def test_process_pending_and_download_report(
 
     job.refresh_from_db()
     assert job.status == ReportExportJob.Status.COMPLETED
-    assert job.file_content
+    assert job.storage == ReportExportJob.Storage.LOCAL
+    assert job.storage_key.endswith(".csv.gz")
+    assert job.file_size > 0
+    assert job.file_content == ""
 
     download = api_client.get(reverse("report-exports-download", args=[job.id]))
     assert download.status_code == 200
     assert download["Content-Type"].startswith("text/csv")
-    assert "invoice_id,created_date,status,line_total,payments_count" in download.content.decode(
-        "utf-8"
-    )
+    body = b"".join(download.streaming_content).decode("utf-8")
+    assert "invoice_id,created_date,status,line_total,payments_count" in body
+    assert f"{invoice.id}," in body and ",100.00,0" in body
     assert AuditLog.objects.filter(
         clinic_id=clinic.id,
         action="report_export_job_downloaded",
@@ -192,9 +205,175 @@ def test_accounting_invoice_lines_export_csv(
 
     job.refresh_from_db()
     assert job.status == ReportExportJob.Status.COMPLETED
-    body = job.file_content
+    body = read_report_export_text(job)
     assert "invoice_id,invoice_number" in body
     assert "line_net,line_vat,line_gross" in body
     assert "FV/2026/001" in body
     assert "Consultation" in body
     assert str(invoice.id) in body
+
+
+@pytest.mark.django_db
+def test_download_passes_gzip_through_when_accepted(api_client, clinic_admin, clinic):
+    from apps.reports.job_runner import execute_report_export_job_by_id
+
+    job = ReportExportJob.objects.create(
+        clinic=clinic,
+        requested_by=clinic_admin,
+        report_type=ReportExportJob.ReportType.REMINDER_ANALYTICS,
+        params={},
+    )
+    assert execute_report_export_job_by_id(job.id) == "processed"
+
+    api_client.force_authenticate(user=clinic_admin)
+    response = api_client.get(
+        reverse("report-exports-download", args=[job.id]), HTTP_ACCEPT_ENCODING="gzip"
+    )
+    assert response.status_code == 200
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    raw = b"".join(response.streaming_content)
+    assert gzip.decompress(raw).decode("utf-8").startswith("status,channel,provider,total")
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip", True),
+        ("br, gzip;q=0.5", True),
+        ("*", True),
+        ("gzip;q=0", False),
+        ("gzip; q=0.0, *", False),
+        ("*;q=0", False),
+        ("identity", False),
+        ("gzipped", False),
+        ("", False),
+    ],
+)
+def test_accept_encoding_q_values(accept_encoding, expected):
+    from apps.reports.views import _accepts_gzip
+
+    assert _accepts_gzip(accept_encoding) is expected
+
+
+@pytest.mark.django_db
+def test_download_decompresses_when_gzip_is_refused(api_client, clinic_admin, clinic):
+    from apps.reports.job_runner import execute_report_export_job_by_id
+
+    job = ReportExportJob.objects.create(
+        clinic=clinic,
+        requested_by=clinic_admin,
+        report_type=ReportExportJob.ReportType.REMINDER_ANALYTICS,
+        params={},
+    )
+    assert execute_report_export_job_by_id(job.id) == "processed"
+
+    api_client.force_authenticate(user=clinic_admin)
+    response = api_client.get(
+        reverse("report-exports-download", args=[job.id]), HTTP_ACCEPT_ENCODING="gzip;q=0"
+    )
+    assert response.status_code == 200
+    assert not response.has_header("Content-Encoding")
+    body = b"".join(response.streaming_content).decode("utf-8")
+    assert body.startswith("status,channel,provider,total")
+
+
+@pytest.mark.django_db
+def test_export_without_object_storage_is_stored_inline(api_client, settings, clinic, clinic_admin):
+    from apps.reports.job_runner import execute_report_export_job_by_id
+
+    settings.REPORT_EXPORTS_LOCAL_STORAGE = False
+    job = ReportExportJob.objects.create(
+        clinic=clinic,
+        requested_by=clinic_admin,
+        report_type=ReportExportJob.ReportType.REMINDER_ANALYTICS,
+        params={},
+    )
+    assert execute_report_export_job_by_id(job.id) == "processed"
+    job.refresh_from_db()
+    assert job.storage == ReportExportJob.Storage.INLINE
+    assert (job.storage_key, job.content_encoding) == ("", "")
+    assert job.file_content.startswith("status,channel,provider,total")
+
+    api_client.force_authenticate(user=clinic_admin)
+    response = api_client.get(
+        reverse("report-exports-download", args=[job.id]), HTTP_ACCEPT_ENCODING="gzip"
+    )
+    assert not response.has_header("Content-Encoding")
+    assert b"".join(response.streaming_content).decode("utf-8") == job.file_content
+
+
+@pytest.mark.django_db
+def test_download_legacy_inline_export(api_client, clinic_admin, clinic):
+    job = ReportExportJob.objects.create(
+        clinic=clinic,
+        requested_by=clinic_admin,
+        report_type=ReportExportJob.ReportType.REVENUE_SUMMARY,
+        status=ReportExportJob.Status.COMPLETED,
+        file_name="legacy.csv",
+        file_content="a,b\r\n1,2\r\n",
+    )
+    api_client.force_authenticate(user=clinic_admin)
+    response = api_client.get(reverse("report-exports-download", args=[job.id]))
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"a,b\r\n1,2\r\n"
+
+
+@pytest.mark.django_db
+def test_export_streams_to_s3_multipart(settings, clinic, clinic_admin, client_with_membership):
+    from apps.reports.job_runner import execute_report_export_job_by_id
+
+    settings.REPORT_EXPORTS_S3_BUCKET = "exports-bucket"
+    invoice = Invoice.objects.create(
+        clinic=clinic, client=client_with_membership, status=Invoice.Status.SENT
+    )
+    InvoiceLine.objects.create(invoice=invoice, description="X-ray", quantity=2, unit_price=50)
+    job = ReportExportJob.objects.create(
+        clinic=clinic,
+        requested_by=clinic_admin,
+        report_type=ReportExportJob.ReportType.ACCOUNTING_INVOICE_LINES,
+        params={},
+    )
+
+    s3 = MagicMock()
+    s3.create_multipart_upload.return_value = {"UploadId": "up-1"}
+    s3.upload_part.return_value = {"ETag": '"etag-1"'}
+    with patch("apps.reports.export_storage._get_s3_client", return_value=s3):
+        assert execute_report_export_job_by_id(job.id) == "processed"
+
+    job.refresh_from_db()
+    assert job.storage == ReportExportJob.Storage.S3
+    assert job.storage_bucket == "exports-bucket"
+    assert job.storage_key == (f"report-exports/clinic_{clinic.id}/job_{job.id}/{job.file_name}.gz")
+    s3.complete_multipart_upload.assert_called_once_with(
+        Bucket="exports-bucket",
+        Key=job.storage_key,
+        UploadId="up-1",
+        MultipartUpload={"Parts": [{"ETag": '"etag-1"', "PartNumber": 1}]},
+    )
+    body = gzip.decompress(s3.upload_part.call_args.kwargs["Body"]).decode("utf-8")
+    assert "X-ray,2.000,usł,50.00,8,100.00,8.00,108.00" in body
+    assert job.file_size == len(s3.upload_part.call_args.kwargs["Body"])
+
+
+@pytest.mark.django_db
+def test_failed_s3_export_aborts_multipart_upload(settings, clinic, clinic_admin):
+    from apps.reports.job_runner import execute_report_export_job_by_id
+
+    settings.REPORT_EXPORTS_S3_BUCKET = "exports-bucket"
+    job = ReportExportJob.objects.create(
+        clinic=clinic,
+        requested_by=clinic_admin,
+        report_type=ReportExportJob.ReportType.REVENUE_SUMMARY,
+        params={},
+    )
+    s3 = MagicMock()
+    s3.create_multipart_upload.return_value = {"UploadId": "up-2"}
+    s3.upload_part.side_effect = RuntimeError("network down")
+    with patch("apps.reports.export_storage._get_s3_client", return_value=s3):
+        assert execute_report_export_job_by_id(job.id) == "failed"
+
+    s3.abort_multipart_upload.assert_called_once()
+    job.refresh_from_db()
+    assert job.status == ReportExportJob.Status.FAILED
+    assert "network down" in job.error
@@ -1,8 +1,9 @@
 from datetime import datetime, timedelta
 from datetime import time as dt_time
 
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -17,12 +18,37 @@ from apps.tenancy.access import (
     clinic_id_for_mutation,
 )
 
+from .export_storage import iter_report_export_bytes
 from .job_runner import execute_report_export_job_by_id
 from .models import ReportExportJob
 from .rq_tasks import try_enqueue_report_export_job
 from .serializers import ReportExportJobCreateSerializer, ReportExportJobReadSerializer
 
 
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """True when ``Accept-Encoding`` allows gzip with a non-zero q-value (RFC 9110 12.5.3)."""
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    if "gzip" in qualities:
+        return qualities["gzip"] > 0
+    if "x-gzip" in qualities:
+        return qualities["x-gzip"] > 0
+    return qualities.get("*", 0) > 0
+
+
 class PortalBookingMetricsView(APIView):
     """
     GET /api/reports/portal-booking-metrics/?from=YYYY-MM-DD&to=YYYY-MM-DD
@@ -117,7 +143,7 @@ class ReportExportJobViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], url_path="download")
     def download(self, request, pk=None):
         job = self.get_object()
-        if job.status != ReportExportJob.Status.COMPLETED or not job.file_content:
+        if job.status != ReportExportJob.Status.COMPLETED or not job.has_file:
             return Response(
                 {"detail": "Report is not ready for download."},
                 status=status.HTTP_409_CONFLICT,
@@ -130,7 +156,18 @@ class ReportExportJobViewSet(viewsets.ModelViewSet):
             entity_id=job.id,
             metadata={"report_type": job.report_type, "file_name": job.file_name or ""},
         )
-        response = HttpResponse(job.file_content, content_type=f"{job.content_type}; charset=utf-8")
+        # Gzip-stored exports are passed through untouched when the client accepts gzip.
+        passthrough = job.content_encoding == "gzip" and _accepts_gzip(
+            request.headers.get("Accept-Encoding", "")
+        )
+        response = StreamingHttpResponse(
+            iter_report_export_bytes(job, decompress=not passthrough),
+            content_type=f"{job.content_type}; charset=utf-8",
+        )
+        if passthrough:
+            response["Content-Encoding"] = "gzip"
+            response["Content-Length"] = str(job.file_size)
+        patch_vary_headers(response, ("Accept-Encoding",))
         response["Content-Disposition"] = f'attachment; filename="{job.file_name or "report.csv"}"'
         return response
 
@@ -0,0 +1,68 @@
+"""
+Generate pending medication administrations (MAR slots) for every admitted hospital stay.
+Usage: python manage.py generate_medication_schedules [--clinic-id ID | --network-id ID] [--horizon-hours 24] [--past-hours 12]
+
+Run it at shift change (or on a schedule) instead of calling generate-schedule per stay.
+Idempotent: slots that already exist for an order are skipped.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.scheduling.services.medication_schedule import generate_medication_schedules
+from apps.tenancy.models import Clinic
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Generate pending medication administrations for all admitted hospital stays."
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument("--clinic-id", type=int, default=None)
+        scope.add_argument("--network-id", type=int, default=None)
+        parser.add_argument("--horizon-hours", type=int, default=24)
+        parser.add_argument("--past-hours", type=int, default=12)
+
+    def handle(self, *args, **options):
+        horizon_hours = options["horizon_hours"]
+        past_hours = options["past_hours"]
+        if horizon_hours <= 0 or horizon_hours > 24 * 14:
+            raise CommandError("--horizon-hours must be between 1 and 336.")
+        if past_hours < 0 or past_hours > 24 * 14:
+            raise CommandError("--past-hours must be between 0 and 336.")
+
+        clinics = Clinic.objects.order_by("id").values_list("id", flat=True)
+        if options["clinic_id"] is not None:
+            clinics = clinics.filter(pk=options["clinic_id"])
+        if options["network_id"] is not None:
+            clinics = clinics.filter(network_id=options["network_id"])
+        clinic_ids = list(clinics)
+        if not clinic_ids:
+            raise CommandError("No matching clinics.")
+
+        now = timezone.now()
+        result = generate_medication_schedules(
+            clinic_ids,
+            window_start=now - timedelta(hours=past_hours),
+            window_end=now + timedelta(hours=horizon_hours),
+        )
+        logger.info(
+            "generate_medication_schedules clinics=%s orders=%s created=%s skipped=%s",
+            len(clinic_ids),
+            result.orders,
+            result.created,
+            result.skipped_existing,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {result.created} administration(s) created, "
+                f"{result.skipped_existing} already scheduled, {result.orders} order(s)."
+            )
+        )
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from contextlib import closing
 from datetime import timedelta
 
 import boto3
@@ -78,7 +79,6 @@ class Command(BaseCommand):
 
             try:
                 resp = client.get_object(Bucket=bucket, Key=recording.input_s3_key)
-                audio_bytes = resp["Body"].read()
             except ClientError as exc:
                 err = exc.response.get("Error") or {}
                 msg = f"S3 download failed ({err.get('Code', 'ClientError')}): {err.get('Message', str(exc))}"
@@ -101,7 +101,9 @@ class Command(BaseCommand):
                 continue
 
             try:
-                process_visit_recording(recording=recording, audio_bytes=audio_bytes)
+                # Streamed to Whisper in blocks; the recording is never held whole in memory.
+                with closing(resp["Body"]) as audio_file:
+                    process_visit_recording(recording=recording, audio_file=audio_file)
             except Exception as exc:
                 logger.exception("Visit recording processing failed id=%s", recording.id)
                 recording.refresh_from_db()
@@ -2,11 +2,24 @@ from __future__ import annotations
 
 from datetime import timedelta
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from apps.scheduling.models import VisitTranscriptionJob
-from apps.scheduling.services.visit_transcription_job import process_visit_transcription_job
+from apps.scheduling.services.visit_transcription_job import (
+    fail_stalled_visit_transcription_jobs,
+    poll_visit_transcription_job,
+    process_visit_transcription_job,
+    submit_visit_transcription_job,
+)
+
+
+def _async_enabled() -> bool:
+    """Submit-and-poll needs the self-hosted service (the OpenAI fallback is synchronous)."""
+    return bool(str(getattr(settings, "WHISPER_SERVICE_URL", "")).strip()) and bool(
+        getattr(settings, "WHISPER_ASYNC_JOBS", False)
+    )
 
 
 class Command(BaseCommand):
@@ -16,6 +29,11 @@ class Command(BaseCommand):
         parser.add_argument("--limit", type=int, default=10)
         parser.add_argument("--max-age-hours", type=int, default=72)
         parser.add_argument("--job-id", type=int, default=None)
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Transcribe in this process even when the Whisper service supports jobs.",
+        )
 
     def handle(self, *args, **options):
         limit = options["limit"]
@@ -28,6 +46,10 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f"Processed job id={job_id} (if it was pending)."))
             return
 
+        if not options["sync"] and _async_enabled():
+            self._submit_and_poll(limit=limit, cutoff=cutoff)
+            return
+
         qs = VisitTranscriptionJob.objects.filter(
             status=VisitTranscriptionJob.Status.PENDING,
             created_at__gte=cutoff,
@@ -41,3 +63,42 @@ class Command(BaseCommand):
             process_visit_transcription_job(jid)
 
         self.stdout.write(self.style.SUCCESS(f"Processed {len(ids)} transcription job(s)."))
+
+    def _submit_and_poll(self, *, limit, cutoff):
+        deadline_minutes = int(getattr(settings, "WHISPER_JOB_DEADLINE_MINUTES", 120))
+        stalled = fail_stalled_visit_transcription_jobs(
+            submitted_before=timezone.now() - timedelta(minutes=deadline_minutes),
+            created_before=cutoff,
+        )
+        in_flight = VisitTranscriptionJob.objects.filter(
+            status=VisitTranscriptionJob.Status.PROCESSING,
+        ).exclude(whisper_job_id="")
+        finished = 0
+        for job in in_flight.order_by("whisper_submitted_at"):
+            if poll_visit_transcription_job(job) in ("completed", "failed"):
+                finished += 1
+
+        ids = list(
+            VisitTranscriptionJob.objects.filter(
+                status=VisitTranscriptionJob.Status.PENDING,
+                created_at__gte=cutoff,
+            )
+            .order_by("created_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        submitted = 0
+        busy = False
+        for jid in ids:
+            if not submit_visit_transcription_job(jid):
+                busy = True
+                break
+            submitted += 1
+
+        note = " (Whisper service busy; remaining jobs stay pending)" if busy else ""
+        if stalled:
+            note += f"; {stalled} stalled job(s) failed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Finished {finished} transcription job(s), submitted {submitted}{note}."
+            )
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-18 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0019_visittrancriptionjob_appointment_nullable"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="visitrecording",
+            name="transcript_chunks_done",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="visitrecording",
+            name="transcript_chunks_total",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-18 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0020_visitrecording_transcript_progress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="visittranscriptionjob",
+            name="whisper_job_id",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="visittranscriptionjob",
+            name="whisper_submitted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:30
+
+from django.db import migrations, models
+
+
+def deduplicate_pending_slots(apps, schema_editor):
+    """Keep the oldest pending administration per (order, scheduled_for) before the constraint."""
+    HospitalMedicationAdministration = apps.get_model(
+        "scheduling", "HospitalMedicationAdministration"
+    )
+    from django.db.models import Count, Min
+
+    dupes = (
+        HospitalMedicationAdministration.objects.filter(
+            status="pending", scheduled_for__isnull=False
+        )
+        .values("medication_order_id", "scheduled_for")
+        .annotate(n=Count("id"), keep_id=Min("id"))
+        .filter(n__gt=1)
+    )
+    for row in dupes:
+        HospitalMedicationAdministration.objects.filter(
+            status="pending",
+            medication_order_id=row["medication_order_id"],
+            scheduled_for=row["scheduled_for"],
+        ).exclude(pk=row["keep_id"]).delete()
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0021_visittranscriptionjob_whisper_job"),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_pending_slots, noop),
+        migrations.AddConstraint(
+            model_name="hospitalmedicationadministration",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "pending")),
+                fields=("medication_order", "scheduled_for"),
+                name="scheduling_hospmedadmin_pending_slot_uniq",
+            ),
+        ),
+    ]
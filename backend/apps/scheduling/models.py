@@ -412,6 +412,14 @@ class HospitalMedicationAdministration(models.Model):
                 name="scheduli_hospita_91e80a_idx",
             ),
         ]
+        constraints = [
+            # One pending slot per order and time; lets schedule generation use ignore_conflicts.
+            models.UniqueConstraint(
+                fields=["medication_order", "scheduled_for"],
+                condition=models.Q(status="pending"),
+                name="scheduling_hospmedadmin_pending_slot_uniq",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"HospitalMedicationAdministration(order={self.medication_order_id}, status={self.status})"
@@ -553,6 +561,9 @@ class VisitRecording(models.Model):
 
     input_s3_key = models.CharField(max_length=1024, blank=True)
     transcript = models.TextField(blank=True)
+    # Chunked transcription progress; ``transcript`` holds the ordered partial text meanwhile.
+    transcript_chunks_done = models.PositiveIntegerField(default=0)
+    transcript_chunks_total = models.PositiveIntegerField(default=0)
     summary_text = models.TextField(blank=True)
     summary_structured = models.JSONField(default=dict, blank=True)
 
@@ -615,6 +626,10 @@ class VisitTranscriptionJob(models.Model):
     content_type = models.CharField(max_length=255, blank=True)
     size_bytes = models.BigIntegerField()
 
+    # Set while the audio is queued on the self-hosted Whisper service (async submission).
+    whisper_job_id = models.CharField(max_length=64, blank=True, db_index=True)
+    whisper_submitted_at = models.DateTimeField(null=True, blank=True)
+
     transcript = models.TextField(blank=True)
     structured = models.JSONField(default=dict, blank=True)
     needs_review = models.BooleanField(null=True, blank=True)
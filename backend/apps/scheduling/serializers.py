@@ -277,6 +277,8 @@ class VisitRecordingSerializer(serializers.ModelSerializer):
             "last_error",
             "input_s3_key",
             "transcript",
+            "transcript_chunks_done",
+            "transcript_chunks_total",
             "summary_text",
             "summary_structured",
             "created_at",
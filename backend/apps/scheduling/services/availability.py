@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from collections.abc import Iterable
 from dataclasses import dataclass
+from datetime import date as date_type
 from datetime import datetime, time, timedelta
 
 from apps.scheduling.models import Appointment
 from apps.scheduling.models_clinic_hours import ClinicWorkingHours
+from apps.scheduling.models_exceptions import VetAvailabilityException
 from apps.scheduling.models_working_hours import VetWorkingHours
 from apps.tenancy.models import ClinicHoliday
 from django.conf import settings
@@ -92,155 +95,248 @@ def _split_into_slots(intervals: Iterable[Interval], slot_minutes: int) -> list[
     return out
 
 
-def compute_availability(
+def _closed_day(tz, slot_minutes: int, reason: str) -> dict:
+    return {
+        "timezone": str(tz),
+        "work_intervals": [],
+        "work_bounds": None,
+        "busy_raw": [],
+        "busy_merged": [],
+        "free_slots": [],
+        "slot_minutes": slot_minutes,
+        "closed_reason": reason,
+    }
+
+
+def _daterange(date_from: date_type, date_to: date_type) -> Iterable[date_type]:
+    day = date_from
+    while day <= date_to:
+        yield day
+        day = day + timedelta(days=1)
+
+
+def compute_availability_range(
     *,
     clinic_id: int,
-    date_str: str,
-    vet_id: int | None,
-    room_id: int | None,
-    slot_minutes: int | None,
-):
+    date_from: date_type,
+    date_to: date_type,
+    vet_ids: Iterable[int | None] = (None,),
+    room_ids: Iterable[int | None] = (None,),
+    slot_minutes: int | None = None,
+) -> dict[tuple[date_type, int | None, int | None], dict]:
     """
-    Compute availability for a clinic on a given date.
-    - If vet_id is provided: use vet working hours (if configured) for that weekday,
-      otherwise fall back to default clinic hours from settings.
-    - If room_id is provided: busy intervals are only from appointments in that room.
-    - Excludes CANCELLED appointments from busy time.
-    - Respects clinic holidays (ClinicHoliday): returns closed_reason + empty slots.
+    Compute availability for every (day, vet, room) combination in [date_from, date_to].
+
+    Holidays, clinic hours, vet hours, vet exceptions and overlapping appointments are
+    loaded once for the whole range (at most five queries), then the interval
+    merge/subtract/split runs in memory. `None` in vet_ids / room_ids means
+    "no vet / room filter", exactly like the single-day `compute_availability`.
+
+    Returns a dict keyed by (day, vet_id, room_id) with the same shape as
+    `compute_availability`.
     """
     tz = timezone.get_current_timezone()
+    vet_ids = list(dict.fromkeys(vet_ids)) or [None]
+    room_ids = list(dict.fromkeys(room_ids)) or [None]
+    slot_minutes_final = int(slot_minutes or getattr(settings, "DEFAULT_SLOT_MINUTES", 30))
+    if date_to < date_from:
+        return {}
 
-    # Parse date
-    day = datetime.fromisoformat(date_str).date()
+    concrete_vet_ids = [v for v in vet_ids if v is not None]
+    concrete_room_ids = [r for r in room_ids if r is not None]
 
-    # Clinic closure check
-    holiday = (
-        ClinicHoliday.objects.filter(
+    holidays = {
+        day: reason
+        for day, reason in ClinicHoliday.objects.filter(
             clinic_id=clinic_id,
-            date=day,
+            date__gte=date_from,
+            date__lte=date_to,
             is_active=True,
-        )
-        .only("id", "reason")
-        .first()
-    )
-    if holiday:
-        return {
-            "timezone": str(tz),
-            "work_intervals": [],
-            "work_bounds": None,
-            "busy_raw": [],
-            "busy_merged": [],
-            "free_slots": [],
-            "slot_minutes": int(slot_minutes or getattr(settings, "DEFAULT_SLOT_MINUTES", 30)),
-            "closed_reason": holiday.reason or "Clinic closed",
-        }
-
-    weekday = day.weekday()  # Monday=0 ... Sunday=6
-
-    # Clinic working hours (set by admin in planner)
-    clinic_wh = ClinicWorkingHours.objects.filter(
-        clinic_id=clinic_id, weekday=weekday, is_active=True
-    ).first()
-
-    if clinic_wh:
-        open_t = clinic_wh.start_time
-        close_t = clinic_wh.end_time
-    else:
-        has_any_clinic_hours = ClinicWorkingHours.objects.filter(
-            clinic_id=clinic_id, is_active=True
-        ).exists()
-        if has_any_clinic_hours:
-            return {
-                "timezone": str(tz),
-                "work_intervals": [],
-                "work_bounds": None,
-                "busy_raw": [],
-                "busy_merged": [],
-                "free_slots": [],
-                "slot_minutes": int(slot_minutes or getattr(settings, "DEFAULT_SLOT_MINUTES", 30)),
-                "closed_reason": "Clinic is closed on this day",
-            }
-        # No clinic hours configured at all — fall back to settings defaults
-        open_t = _parse_hhmm(getattr(settings, "DEFAULT_CLINIC_OPEN_TIME", "09:00"))
-        close_t = _parse_hhmm(getattr(settings, "DEFAULT_CLINIC_CLOSE_TIME", "17:00"))
+        ).values_list("date", "reason")
+    }
 
-    slot_minutes_final = int(slot_minutes or getattr(settings, "DEFAULT_SLOT_MINUTES", 30))
+    # Clinic working hours (set by admin in planner); unique per weekday
+    clinic_hours = {
+        weekday: (start_t, end_t)
+        for weekday, start_t, end_t in ClinicWorkingHours.objects.filter(
+            clinic_id=clinic_id, is_active=True
+        )
+        .order_by("weekday")
+        .values_list("weekday", "start_time", "end_time")
+    }
+    default_open = _parse_hhmm(getattr(settings, "DEFAULT_CLINIC_OPEN_TIME", "09:00"))
+    default_close = _parse_hhmm(getattr(settings, "DEFAULT_CLINIC_CLOSE_TIME", "17:00"))
 
     # Vet-specific hours override (MVP: take the first active interval for that weekday)
-    if vet_id is not None:
-        wh = (
-            VetWorkingHours.objects.filter(vet_id=vet_id, weekday=weekday, is_active=True)
-            .order_by("start_time")
-            .first()
+    vet_hours: dict[tuple[int, int], VetWorkingHours] = {}
+    exceptions: dict[tuple[int, date_type], VetAvailabilityException] = {}
+    if concrete_vet_ids:
+        for wh in VetWorkingHours.objects.filter(
+            vet_id__in=concrete_vet_ids, is_active=True
+        ).order_by("vet_id", "weekday", "start_time"):
+            vet_hours.setdefault((wh.vet_id, wh.weekday), wh)
+        for exc in VetAvailabilityException.objects.filter(
+            clinic_id=clinic_id,
+            vet_id__in=concrete_vet_ids,
+            date__gte=date_from,
+            date__lte=date_to,
+        ).only("vet_id", "date", "is_day_off", "start_time", "end_time"):
+            exceptions[(exc.vet_id, exc.date)] = exc
+
+    # Busy appointments overlapping the whole range, bucketed by local day touched
+    range_start = timezone.make_aware(datetime.combine(date_from, time.min), tz)
+    range_end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min), tz)
+    qs = (
+        Appointment.objects.filter(
+            clinic_id=clinic_id,
+            starts_at__lt=range_end,
+            ends_at__gt=range_start,
+        )
+        .exclude(status=Appointment.Status.CANCELLED)
+        .only("id", "starts_at", "ends_at", "vet_id", "room_id")
+        .order_by("starts_at", "id")
+    )
+    if None not in vet_ids:
+        qs = qs.filter(vet_id__in=concrete_vet_ids)
+    if None not in room_ids:
+        qs = qs.filter(room_id__in=concrete_room_ids)
+
+    appointments_by_day: dict[date_type, list[Appointment]] = defaultdict(list)
+    for appt in qs:
+        first_day = max(timezone.localtime(appt.starts_at, tz).date(), date_from)
+        last_day = min(
+            timezone.localtime(appt.ends_at - timedelta(microseconds=1), tz).date(), date_to
         )
-        if wh:
-            if getattr(wh, "is_day_off", False):
-                return {
-                    "timezone": str(tz),
-                    "work_intervals": [],
-                    "work_bounds": None,
-                    "busy_raw": [],
-                    "busy_merged": [],
-                    "free_slots": [],
-                    "slot_minutes": slot_minutes_final,
-                    "closed_reason": "Vet is off",
-                }
-            open_t = wh.start_time
-            close_t = wh.end_time
+        for day in _daterange(first_day, last_day):
+            appointments_by_day[day].append(appt)
+
+    result: dict[tuple[date_type, int | None, int | None], dict] = {}
+    for day in _daterange(date_from, date_to):
+        if day in holidays:
+            for vet_id in vet_ids:
+                for room_id in room_ids:
+                    result[(day, vet_id, room_id)] = _closed_day(
+                        tz, slot_minutes_final, holidays[day] or "Clinic closed"
+                    )
+            continue
 
+        weekday = day.weekday()  # Monday=0 ... Sunday=6
+        if weekday in clinic_hours:
+            clinic_open, clinic_close = clinic_hours[weekday]
+        elif clinic_hours:
+            for vet_id in vet_ids:
+                for room_id in room_ids:
+                    result[(day, vet_id, room_id)] = _closed_day(
+                        tz, slot_minutes_final, "Clinic is closed on this day"
+                    )
+            continue
+        else:
+            # No clinic hours configured at all — fall back to settings defaults
+            clinic_open, clinic_close = default_open, default_close
+
+        day_appointments = appointments_by_day.get(day, [])
+        for vet_id in vet_ids:
+            open_t, close_t = clinic_open, clinic_close
+            off_reason = None
+            if vet_id is not None:
+                exc = exceptions.get((vet_id, day))
+                wh = vet_hours.get((vet_id, weekday))
+                if exc is not None and exc.is_day_off:
+                    off_reason = "Vet is off"
+                elif exc is not None and exc.start_time and exc.end_time:
+                    open_t, close_t = exc.start_time, exc.end_time
+                elif wh is not None:
+                    if getattr(wh, "is_day_off", False):
+                        off_reason = "Vet is off"
+                    else:
+                        open_t, close_t = wh.start_time, wh.end_time
+
+            for room_id in room_ids:
+                if off_reason:
+                    result[(day, vet_id, room_id)] = _closed_day(tz, slot_minutes_final, off_reason)
+                    continue
+                result[(day, vet_id, room_id)] = _day_availability(
+                    tz=tz,
+                    day=day,
+                    open_t=open_t,
+                    close_t=close_t,
+                    appointments=[
+                        a
+                        for a in day_appointments
+                        if (vet_id is None or a.vet_id == vet_id)
+                        and (room_id is None or a.room_id == room_id)
+                    ],
+                    slot_minutes=slot_minutes_final,
+                )
+
+    return result
+
+
+def _day_availability(
+    *,
+    tz,
+    day: date_type,
+    open_t: time,
+    close_t: time,
+    appointments: list[Appointment],
+    slot_minutes: int,
+) -> dict:
     # Build work interval in current TZ
     work_start = timezone.make_aware(datetime.combine(day, open_t), tz)
     work_end = timezone.make_aware(datetime.combine(day, close_t), tz)
 
     # Edge case: invalid bounds (should not happen if data is clean)
     if work_end <= work_start:
-        return {
-            "timezone": str(tz),
-            "work_intervals": [],
-            "work_bounds": None,
-            "busy_raw": [],
-            "busy_merged": [],
-            "free_slots": [],
-            "slot_minutes": slot_minutes_final,
-            "closed_reason": "Invalid working hours configuration",
-        }
+        return _closed_day(tz, slot_minutes, "Invalid working hours configuration")
 
     work = Interval(start=work_start, end=work_end)
-
-    # Query busy appointments that overlap the work interval
-    qs = (
-        Appointment.objects.filter(
-            clinic_id=clinic_id,
-            starts_at__lt=work.end,
-            ends_at__gt=work.start,
-        )
-        .exclude(status=Appointment.Status.CANCELLED)
-        .only("id", "starts_at", "ends_at", "vet_id", "room_id")
-    )
-
-    if vet_id is not None:
-        qs = qs.filter(vet_id=vet_id)
-    if room_id is not None:
-        qs = qs.filter(room_id=room_id)
-
     busy_raw: list[tuple[int, Interval]] = [
-        (a.id, Interval(start=a.starts_at, end=a.ends_at)) for a in qs
+        (a.id, Interval(start=a.starts_at, end=a.ends_at))
+        for a in appointments
+        if a.starts_at < work.end and a.ends_at > work.start
     ]
     busy_merged = _merge_intervals([b for _, b in busy_raw])
     free_blocks = _subtract(work, busy_merged)
-    free_slots = _split_into_slots(free_blocks, slot_minutes_final)
-
-    # work is a single Interval (bounds for the day)
-    work_bounds = work
-    work_intervals = [work_bounds]
+    free_slots = _split_into_slots(free_blocks, slot_minutes)
 
     return {
         "timezone": str(tz),
-        "work_intervals": work_intervals,
-        "work_bounds": work_bounds,
+        # work is a single Interval (bounds for the day)
+        "work_intervals": [work],
+        "work_bounds": work,
         "busy_raw": busy_raw,
         "busy_merged": busy_merged,
         "free_slots": free_slots,
-        "slot_minutes": slot_minutes_final,
+        "slot_minutes": slot_minutes,
         "closed_reason": None,
     }
+
+
+def compute_availability(
+    *,
+    clinic_id: int,
+    date_str: str,
+    vet_id: int | None,
+    room_id: int | None,
+    slot_minutes: int | None,
+):
+    """
+    Compute availability for a clinic on a given date.
+    - If vet_id is provided: use the vet's availability exception for that date (day off or
+      custom hours), else vet working hours (if configured) for that weekday,
+      otherwise fall back to clinic hours.
+    - If room_id is provided: busy intervals are only from appointments in that room.
+    - Excludes CANCELLED appointments from busy time.
+    - Respects clinic holidays (ClinicHoliday): returns closed_reason + empty slots.
+
+    Thin wrapper over `compute_availability_range` for a single day.
+    """
+    day = datetime.fromisoformat(date_str).date()
+    return compute_availability_range(
+        clinic_id=clinic_id,
+        date_from=day,
+        date_to=day,
+        vet_ids=[vet_id],
+        room_ids=[room_id],
+        slot_minutes=slot_minutes,
+    )[(day, vet_id, room_id)]
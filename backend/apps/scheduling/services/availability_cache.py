@@ -0,0 +1,110 @@
+"""
+Versioned Django-cache snapshots of computed availability (portal hot path).
+
+Entries are keyed per (clinic, date, vet, room, slot_minutes) and embed a per-clinic
+version counter. Any change to an Appointment, ClinicHoliday, ClinicWorkingHours,
+VetWorkingHours or VetAvailabilityException row bumps the clinic version after commit (see
+``apps.scheduling.signals``), so stale snapshots are never read again and simply expire.
+
+The cache only serves read endpoints; booking always re-verifies the slot against the
+database via ``portal_slot_matches_availability``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+AVAILABILITY_CACHE_HITS_KEY = "scheduling:availability:stats:hits"
+AVAILABILITY_CACHE_MISSES_KEY = "scheduling:availability:stats:misses"
+
+
+def availability_version_cache_key(clinic_id: int) -> str:
+    return f"scheduling:availability:version:{clinic_id}"
+
+
+def _availability_cache_timeout() -> int:
+    return int(getattr(settings, "AVAILABILITY_CACHE_TIMEOUT", 300))
+
+
+def _incr(key: str) -> int:
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def get_availability_version(clinic_id: int) -> int:
+    return int(cache.get(availability_version_cache_key(clinic_id)) or 0)
+
+
+def bump_availability_version(clinic_id: int | None) -> None:
+    """Invalidate every cached availability snapshot for the clinic."""
+    if clinic_id is None:
+        return
+    _incr(availability_version_cache_key(clinic_id))
+
+
+def availability_cache_key(
+    *,
+    clinic_id: int,
+    date_str: str,
+    vet_id: int | None,
+    room_id: int | None,
+    slot_minutes: int,
+    version: int,
+) -> str:
+    return (
+        f"scheduling:availability:{clinic_id}:v{version}:{date_str}:"
+        f"{vet_id or '-'}:{room_id or '-'}:{slot_minutes}"
+    )
+
+
+def cached_availability(
+    *,
+    clinic_id: int,
+    date_str: str,
+    vet_id: int | None,
+    room_id: int | None,
+    slot_minutes: int,
+    compute: Callable[[], dict],
+) -> dict:
+    """
+    Return the cached availability payload, or compute and store it.
+
+    ``compute`` must return a cache-serializable dict. Raises ``ValueError`` for an
+    invalid ``date_str`` (same as ``compute_availability``).
+    """
+    timeout = _availability_cache_timeout()
+    if timeout <= 0:
+        return compute()
+
+    day = datetime.fromisoformat(date_str).date()
+    key = availability_cache_key(
+        clinic_id=clinic_id,
+        date_str=day.isoformat(),
+        vet_id=vet_id,
+        room_id=room_id,
+        slot_minutes=slot_minutes,
+        version=get_availability_version(clinic_id),
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        _incr(AVAILABILITY_CACHE_HITS_KEY)
+        return cached
+
+    _incr(AVAILABILITY_CACHE_MISSES_KEY)
+    payload = compute()
+    cache.set(key, payload, timeout)
+    return payload
+
+
+def availability_cache_stats() -> dict[str, int]:
+    hits = int(cache.get(AVAILABILITY_CACHE_HITS_KEY) or 0)
+    misses = int(cache.get(AVAILABILITY_CACHE_MISSES_KEY) or 0)
+    return {"hits": hits, "misses": misses}
@@ -0,0 +1,127 @@
+"""
+Medication-due engine shared by the hospitalization endpoints.
+
+A medication order is next due at ``starts_at`` until its first GIVEN administration,
+then ``frequency_hours`` after the latest one. All active orders in scope are read in a
+single grouped query that annotates ``last_given_at``; next-due / overdue / due-soon are
+derived in Python from that row, so the cost no longer grows with one query per order.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from apps.scheduling.models import (
+    HospitalMedicationAdministration,
+    HospitalMedicationOrder,
+    HospitalStay,
+)
+from django.db.models import Max, Q, QuerySet
+
+
+@dataclass(frozen=True)
+class MedicationDue:
+    order: HospitalMedicationOrder
+    last_given_at: datetime | None
+    next_due_at: datetime
+    is_overdue: bool
+    overdue_minutes: int
+
+
+def active_medication_orders(
+    clinic_ids: Iterable[int],
+    *,
+    now: datetime,
+    hospital_stay: HospitalStay | None = None,
+    hospital_stay_ids: Iterable[int] | None = None,
+    admitted_only: bool = False,
+) -> QuerySet[HospitalMedicationOrder]:
+    """
+    Active, not yet ended medication orders annotated with ``last_given_at`` (latest GIVEN
+    administration, ``None`` when never given).
+    """
+    clinic_ids = list(clinic_ids)
+    qs = HospitalMedicationOrder.objects.filter(
+        Q(ends_at__isnull=True) | Q(ends_at__gte=now),
+        clinic_id__in=clinic_ids,
+        is_active=True,
+    )
+    if hospital_stay is not None:
+        qs = qs.filter(hospital_stay=hospital_stay)
+    if hospital_stay_ids is not None:
+        qs = qs.filter(hospital_stay_id__in=list(hospital_stay_ids))
+    if admitted_only:
+        qs = qs.filter(hospital_stay__status=HospitalStay.Status.ADMITTED)
+    return qs.annotate(
+        last_given_at=Max(
+            "administrations__administered_at",
+            filter=Q(
+                administrations__status=HospitalMedicationAdministration.Status.GIVEN,
+                administrations__clinic_id__in=clinic_ids,
+            ),
+        )
+    )
+
+
+def next_due_at(order: HospitalMedicationOrder) -> datetime:
+    last_given_at = getattr(order, "last_given_at", None)
+    if last_given_at is None:
+        return order.starts_at
+    return last_given_at + timedelta(hours=int(order.frequency_hours or 0))
+
+
+def medication_due(order: HospitalMedicationOrder, *, now: datetime) -> MedicationDue:
+    due_at = next_due_at(order)
+    overdue = due_at < now
+    return MedicationDue(
+        order=order,
+        last_given_at=getattr(order, "last_given_at", None),
+        next_due_at=due_at,
+        is_overdue=overdue,
+        overdue_minutes=int((now - due_at).total_seconds() // 60) if overdue else 0,
+    )
+
+
+def overdue_medication_orders_count(
+    clinic_ids: Iterable[int],
+    *,
+    now: datetime,
+    hospital_stay: HospitalStay | None = None,
+    admitted_only: bool = False,
+) -> int:
+    orders = active_medication_orders(
+        clinic_ids, now=now, hospital_stay=hospital_stay, admitted_only=admitted_only
+    ).only("id", "frequency_hours", "starts_at")
+    return sum(1 for order in orders if next_due_at(order) < now)
+
+
+def medication_due_counts_by_stay(
+    clinic_ids: Iterable[int],
+    hospital_stay_ids: Iterable[int],
+    *,
+    now: datetime,
+    horizon: datetime,
+) -> tuple[dict[int, int], dict[int, int]]:
+    """
+    ``(overdue, due_soon)`` order counts per stay; due-soon means due by ``horizon``.
+    Orders without a frequency are not scheduled and are left out.
+    """
+    stay_ids = list(hospital_stay_ids)
+    overdue: dict[int, int] = {sid: 0 for sid in stay_ids}
+    due_soon: dict[int, int] = {sid: 0 for sid in stay_ids}
+    if not stay_ids:
+        return overdue, due_soon
+    orders = (
+        active_medication_orders(clinic_ids, now=now, hospital_stay_ids=stay_ids)
+        .filter(frequency_hours__gt=0)
+        .only("id", "hospital_stay_id", "frequency_hours", "starts_at")
+    )
+    for order in orders:
+        due_at = next_due_at(order)
+        if due_at < now:
+            overdue[order.hospital_stay_id] = overdue.get(order.hospital_stay_id, 0) + 1
+        elif due_at <= horizon:
+            due_soon[order.hospital_stay_id] = due_soon.get(order.hospital_stay_id, 0) + 1
+    return overdue, due_soon
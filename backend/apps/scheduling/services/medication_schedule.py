@@ -0,0 +1,123 @@
+"""
+Pending medication administration schedule (MAR slots) for hospital medication orders.
+
+Slots follow each order's cadence: ``starts_at + k * frequency_hours`` up to ``ends_at``.
+Generation is idempotent: a slot is skipped when the order already has an administration
+scheduled at that time. Every order in scope is handled in one pass — one fetch of the
+existing ``(order, scheduled_for)`` pairs and one chunked ``bulk_create`` — whether that
+is one stay or every admitted stay of a clinic network. A partial unique constraint on
+pending slots makes concurrent runs safe (``ignore_conflicts``).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from apps.scheduling.models import (
+    HospitalMedicationAdministration,
+    HospitalMedicationOrder,
+    HospitalStay,
+)
+from django.db import transaction
+from django.db.models import Q
+
+BULK_CREATE_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class ScheduleResult:
+    orders: int
+    created: int
+    skipped_existing: int
+
+
+def dose_times(
+    *,
+    starts_at: datetime,
+    frequency_hours: int,
+    ends_at: datetime | None,
+    window_start: datetime,
+    window_end: datetime,
+) -> list[datetime]:
+    """Cadence slots of one order inside ``[window_start, window_end]``."""
+    if frequency_hours <= 0:
+        return []
+    step = timedelta(hours=frequency_hours)
+    first = max(starts_at, window_start)
+    last = min(window_end, ends_at) if ends_at else window_end
+    if last < first:
+        return []
+    first_step = -((starts_at - first) // step)
+    last_step = (last - starts_at) // step
+    return [starts_at + step * k for k in range(first_step, last_step + 1)]
+
+
+def generate_medication_schedules(
+    clinic_ids: Iterable[int],
+    *,
+    window_start: datetime,
+    window_end: datetime,
+    hospital_stay: HospitalStay | None = None,
+) -> ScheduleResult:
+    """
+    Create pending administrations for the active orders of ``hospital_stay``, or of every
+    admitted stay in ``clinic_ids`` when no stay is given.
+    """
+    clinic_ids = list(clinic_ids)
+    orders_qs = HospitalMedicationOrder.objects.filter(
+        Q(ends_at__isnull=True) | Q(ends_at__gte=window_start),
+        clinic_id__in=clinic_ids,
+        is_active=True,
+        starts_at__lte=window_end,
+        frequency_hours__gt=0,
+    )
+    if hospital_stay is not None:
+        orders_qs = orders_qs.filter(hospital_stay=hospital_stay)
+    else:
+        orders_qs = orders_qs.filter(hospital_stay__status=HospitalStay.Status.ADMITTED)
+    orders = list(
+        orders_qs.order_by("-created_at", "-id").only(
+            "id", "clinic_id", "frequency_hours", "starts_at", "ends_at"
+        )
+    )
+    if not orders:
+        return ScheduleResult(orders=0, created=0, skipped_existing=0)
+
+    with transaction.atomic():
+        existing = set(
+            HospitalMedicationAdministration.objects.filter(
+                clinic_id__in=clinic_ids,
+                medication_order__in=orders_qs.values("id"),
+                scheduled_for__gte=window_start,
+                scheduled_for__lte=window_end,
+            ).values_list("medication_order_id", "scheduled_for")
+        )
+        to_create = []
+        skipped_existing = 0
+        for order in orders:
+            for slot in dose_times(
+                starts_at=order.starts_at,
+                frequency_hours=int(order.frequency_hours or 0),
+                ends_at=order.ends_at,
+                window_start=window_start,
+                window_end=window_end,
+            ):
+                if (order.id, slot) in existing:
+                    skipped_existing += 1
+                    continue
+                to_create.append(
+                    HospitalMedicationAdministration(
+                        clinic_id=order.clinic_id,
+                        medication_order_id=order.id,
+                        scheduled_for=slot,
+                        status=HospitalMedicationAdministration.Status.PENDING,
+                    )
+                )
+        HospitalMedicationAdministration.objects.bulk_create(
+            to_create, batch_size=BULK_CREATE_BATCH_SIZE, ignore_conflicts=True
+        )
+    return ScheduleResult(
+        orders=len(orders), created=len(to_create), skipped_existing=skipped_existing
+    )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import date as date_type
@@ -52,73 +53,130 @@ def _day_bounds(day: date_type, tz) -> tuple[datetime, datetime]:
     return day_start, day_end
 
 
-def _is_holiday(clinic_id: int, day: date_type) -> bool:
-    return ClinicHoliday.objects.filter(clinic_id=clinic_id, date=day, is_active=True).exists()
+@dataclass
+class _ScheduleInputs:
+    """Holidays, exceptions, working hours and appointments for a vet set and date range."""
 
+    holidays: set[date_type]
+    exceptions: dict[tuple[int, date_type], VetAvailabilityException]
+    working_hours: dict[tuple[int, int], list[VetWorkingHours]]
+    appointments: dict[tuple[int, date_type], list[Appointment]]
 
-def _get_vet_intervals(clinic_id: int, vet_id: int, day: date_type) -> list[TimeInterval]:
-    tz = timezone.get_current_timezone()
-    if _is_holiday(clinic_id, day):
-        return []
-
-    exception = (
-        VetAvailabilityException.objects.filter(clinic_id=clinic_id, vet_id=vet_id, date=day)
-        .only("is_day_off", "start_time", "end_time")
-        .first()
-    )
-    if exception:
-        if exception.is_day_off:
+    def vet_intervals(self, vet_id: int, day: date_type) -> list[TimeInterval]:
+        tz = timezone.get_current_timezone()
+        if day in self.holidays:
             return []
-        if exception.start_time and exception.end_time:
+
+        exception = self.exceptions.get((vet_id, day))
+        if exception:
+            if exception.is_day_off:
+                return []
+            if exception.start_time and exception.end_time:
+                return [
+                    TimeInterval(
+                        start=timezone.make_aware(datetime.combine(day, exception.start_time), tz),
+                        end=timezone.make_aware(datetime.combine(day, exception.end_time), tz),
+                    )
+                ]
+
+        work_rows = self.working_hours.get((vet_id, day.weekday()))
+        if work_rows:
             return [
                 TimeInterval(
-                    start=timezone.make_aware(datetime.combine(day, exception.start_time), tz),
-                    end=timezone.make_aware(datetime.combine(day, exception.end_time), tz),
+                    start=timezone.make_aware(datetime.combine(day, row.start_time), tz),
+                    end=timezone.make_aware(datetime.combine(day, row.end_time), tz),
                 )
+                for row in work_rows
             ]
 
-    weekday = day.weekday()
-    work_rows = list(
-        VetWorkingHours.objects.filter(vet_id=vet_id, weekday=weekday, is_active=True)
-        .order_by("start_time")
-        .only("start_time", "end_time")
-    )
-    if work_rows:
+        default_open = _parse_hhmm(getattr(settings, "DEFAULT_CLINIC_OPEN_TIME", "09:00"))
+        default_close = _parse_hhmm(getattr(settings, "DEFAULT_CLINIC_CLOSE_TIME", "17:00"))
+        if default_close <= default_open:
+            return []
         return [
             TimeInterval(
-                start=timezone.make_aware(datetime.combine(day, row.start_time), tz),
-                end=timezone.make_aware(datetime.combine(day, row.end_time), tz),
+                start=timezone.make_aware(datetime.combine(day, default_open), tz),
+                end=timezone.make_aware(datetime.combine(day, default_close), tz),
             )
-            for row in work_rows
         ]
 
-    default_open = _parse_hhmm(getattr(settings, "DEFAULT_CLINIC_OPEN_TIME", "09:00"))
-    default_close = _parse_hhmm(getattr(settings, "DEFAULT_CLINIC_CLOSE_TIME", "17:00"))
-    if default_close <= default_open:
-        return []
-    return [
-        TimeInterval(
-            start=timezone.make_aware(datetime.combine(day, default_open), tz),
-            end=timezone.make_aware(datetime.combine(day, default_close), tz),
+    def day_appointments(self, vet_id: int, day: date_type) -> list[Appointment]:
+        """Active appointments of the vet overlapping the local day, sorted by start."""
+        return self.appointments.get((vet_id, day), [])
+
+
+def _load_schedule_inputs(
+    clinic_id: int,
+    vet_ids: list[int],
+    start_date: date_type,
+    end_date: date_type,
+    *,
+    with_appointments: bool = True,
+) -> _ScheduleInputs:
+    """Fetch everything capacity math needs for the range in a constant number of queries."""
+    tz = timezone.get_current_timezone()
+    holidays = set(
+        ClinicHoliday.objects.filter(
+            clinic_id=clinic_id, date__gte=start_date, date__lte=end_date, is_active=True
+        ).values_list("date", flat=True)
+    )
+
+    exceptions: dict[tuple[int, date_type], VetAvailabilityException] = {}
+    working_hours: dict[tuple[int, int], list[VetWorkingHours]] = defaultdict(list)
+    appointments: dict[tuple[int, date_type], list[Appointment]] = defaultdict(list)
+    if not vet_ids:
+        return _ScheduleInputs(holidays, exceptions, working_hours, appointments)
+
+    for exception in VetAvailabilityException.objects.filter(
+        clinic_id=clinic_id, vet_id__in=vet_ids, date__gte=start_date, date__lte=end_date
+    ).only("vet_id", "date", "is_day_off", "start_time", "end_time"):
+        exceptions.setdefault((exception.vet_id, exception.date), exception)
+
+    for row in (
+        VetWorkingHours.objects.filter(vet_id__in=vet_ids, is_active=True)
+        .order_by("vet_id", "weekday", "start_time")
+        .only("vet_id", "weekday", "start_time", "end_time")
+    ):
+        working_hours[(row.vet_id, row.weekday)].append(row)
+
+    if not with_appointments:
+        return _ScheduleInputs(holidays, exceptions, working_hours, appointments)
+
+    range_start, _ = _day_bounds(start_date, tz)
+    _, range_end = _day_bounds(end_date, tz)
+    for appt in (
+        Appointment.objects.filter(
+            clinic_id=clinic_id,
+            vet_id__in=vet_ids,
+            status__in=ACTIVE_APPOINTMENT_STATUSES,
+            starts_at__lt=range_end,
+            ends_at__gt=range_start,
         )
-    ]
+        .only("vet_id", "starts_at", "ends_at")
+        .order_by("starts_at", "id")
+    ):
+        # Sweep each appointment into every local day it touches.
+        first_day = max(timezone.localtime(appt.starts_at, tz).date(), start_date)
+        last_day = min(timezone.localtime(appt.ends_at, tz).date(), end_date)
+        for day in _daterange(first_day, last_day):
+            day_start, day_end = _day_bounds(day, tz)
+            if appt.starts_at < day_end and appt.ends_at > day_start:
+                appointments[(appt.vet_id, day)].append(appt)
+
+    return _ScheduleInputs(holidays, exceptions, working_hours, appointments)
+
+
+def _get_vet_intervals(clinic_id: int, vet_id: int, day: date_type) -> list[TimeInterval]:
+    inputs = _load_schedule_inputs(clinic_id, [vet_id], day, day, with_appointments=False)
+    return inputs.vet_intervals(vet_id, day)
 
 
 def _interval_minutes(intervals: Iterable[TimeInterval]) -> int:
     return int(sum((it.end - it.start).total_seconds() // 60 for it in intervals))
 
 
-def _day_booked_minutes(clinic_id: int, vet_id: int, day: date_type) -> int:
-    tz = timezone.get_current_timezone()
-    day_start, day_end = _day_bounds(day, tz)
-    qs = Appointment.objects.filter(
-        clinic_id=clinic_id,
-        vet_id=vet_id,
-        status__in=ACTIVE_APPOINTMENT_STATUSES,
-        starts_at__lt=day_end,
-        ends_at__gt=day_start,
-    ).only("starts_at", "ends_at")
-    return sum(_minutes_overlap(a.starts_at, a.ends_at, day_start, day_end) for a in qs)
+def _booked_minutes(appointments: Iterable[Appointment], start: datetime, end: datetime) -> int:
+    return sum(_minutes_overlap(a.starts_at, a.ends_at, start, end) for a in appointments)
 
 
 def _hour_bucket_minutes(intervals: Iterable[TimeInterval], bucket_start: datetime) -> int:
@@ -161,12 +219,14 @@ def generate_capacity_insights(
     vets = User.objects.filter(clinic_id=clinic_id, is_vet=True).order_by("id")
     if vet_id:
         vets = vets.filter(id=vet_id)
+    vets = list(vets)
 
     rows: list[dict[str, object]] = []
     overload_windows: list[dict[str, object]] = []
     by_vet: dict[int, dict[str, object]] = {}
     by_day: dict[str, dict[str, object]] = {}
     tz = timezone.get_current_timezone()
+    inputs = _load_schedule_inputs(clinic_id, [v.id for v in vets], start_date, end_date)
 
     for vet in vets:
         by_vet[vet.id] = {
@@ -177,35 +237,26 @@ def generate_capacity_insights(
             "utilization_pct": 0.0,
         }
         for day in _daterange(start_date, end_date):
-            intervals = _get_vet_intervals(clinic_id, vet.id, day)
+            intervals = inputs.vet_intervals(vet.id, day)
+            day_appointments = inputs.day_appointments(vet.id, day)
+            day_start, day_end = _day_bounds(day, tz)
             available_minutes_day = _interval_minutes(intervals)
-            booked_minutes_day = _day_booked_minutes(clinic_id, vet.id, day)
+            booked_minutes_day = _booked_minutes(day_appointments, day_start, day_end)
 
             if granularity == "hour":
-                day_start, _day_end = _day_bounds(day, tz)
                 for h in range(24):
                     bucket_start = day_start + timedelta(hours=h)
+                    bucket_end = bucket_start + timedelta(hours=1)
                     available_minutes = _hour_bucket_minutes(intervals, bucket_start)
                     if available_minutes <= 0:
                         continue
-                    booked_minutes = sum(
-                        _minutes_overlap(
-                            a.starts_at, a.ends_at, bucket_start, bucket_start + timedelta(hours=1)
-                        )
-                        for a in Appointment.objects.filter(
-                            clinic_id=clinic_id,
-                            vet_id=vet.id,
-                            status__in=ACTIVE_APPOINTMENT_STATUSES,
-                            starts_at__lt=bucket_start + timedelta(hours=1),
-                            ends_at__gt=bucket_start,
-                        ).only("starts_at", "ends_at")
-                    )
+                    booked_minutes = _booked_minutes(day_appointments, bucket_start, bucket_end)
                     utilization_pct = round((booked_minutes / available_minutes) * 100, 2)
                     row = {
                         "vet_id": vet.id,
                         "vet_name": vet.get_full_name() or vet.username,
                         "bucket_start": bucket_start.isoformat(),
-                        "bucket_end": (bucket_start + timedelta(hours=1)).isoformat(),
+                        "bucket_end": bucket_end.isoformat(),
                         "available_minutes": available_minutes,
                         "booked_minutes": booked_minutes,
                         "utilization_pct": utilization_pct,
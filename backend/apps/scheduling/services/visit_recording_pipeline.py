@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from typing import BinaryIO
 
 from apps.medical.models import ClinicalExam, MedicalRecord, PatientHistoryEntry
 from apps.scheduling.models import VisitRecording
@@ -35,12 +36,58 @@ def format_summary(structured: dict[str, str]) -> str:
     ).strip()
 
 
-def process_visit_recording(*, recording: VisitRecording, audio_bytes: bytes) -> None:
-    transcript = transcribe_audio_with_whisper(
-        audio_bytes=audio_bytes,
-        filename=recording.original_filename or f"visit-{recording.appointment_id}.webm",
-        content_type=recording.content_type or "application/octet-stream",
+def _persist_transcript_progress(recording: VisitRecording):
+    """Save ordered partial transcripts on the recording as chunks come back (for polling)."""
+
+    def on_progress(transcript: str, chunks_done: int, chunks_total: int) -> None:
+        recording.transcript = transcript
+        recording.transcript_chunks_done = chunks_done
+        recording.transcript_chunks_total = chunks_total
+        recording.save(
+            update_fields=[
+                "transcript",
+                "transcript_chunks_done",
+                "transcript_chunks_total",
+                "updated_at",
+            ]
+        )
+
+    return on_progress
+
+
+def _clear_transcript_progress(recording: VisitRecording) -> None:
+    """Drop a partial transcript so a failed recording never shows half a visit as its text."""
+    recording.transcript = ""
+    recording.transcript_chunks_done = 0
+    recording.transcript_chunks_total = 0
+    recording.save(
+        update_fields=[
+            "transcript",
+            "transcript_chunks_done",
+            "transcript_chunks_total",
+            "updated_at",
+        ]
     )
+
+
+def process_visit_recording(
+    *,
+    recording: VisitRecording,
+    audio_bytes: bytes | None = None,
+    audio_file: BinaryIO | None = None,
+) -> None:
+    try:
+        transcript = transcribe_audio_with_whisper(
+            audio_bytes=audio_bytes,
+            audio_file=audio_file,
+            filename=recording.original_filename or f"visit-{recording.appointment_id}.webm",
+            content_type=recording.content_type or "application/octet-stream",
+            on_progress=_persist_transcript_progress(recording),
+        )
+    except Exception:
+        if recording.transcript_chunks_done:
+            _clear_transcript_progress(recording)
+        raise
     structured_raw = structure_transcript_with_claude(transcript=transcript)
     structured, needs_review = enforce_strict_summary(
         transcript=transcript,
@@ -3,7 +3,9 @@ from __future__ import annotations
 import json
 import re
 import uuid
-from urllib import error, request
+from collections.abc import Callable, Iterator
+from typing import BinaryIO
+from urllib import error, parse, request
 
 from django.conf import settings
 
@@ -12,6 +14,25 @@ class VisitTranscriptionError(Exception):
     pass
 
 
+class WhisperServiceBusy(VisitTranscriptionError):
+    """The Whisper service is saturated (HTTP 429); retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int = 0):
+        super().__init__(f"Whisper service is busy; retry after {retry_after}s.")
+        self.retry_after = retry_after
+
+
+def _raise_for_whisper_http_error(exc: error.HTTPError) -> None:
+    if exc.code == 429:
+        try:
+            retry_after = int(exc.headers.get("Retry-After") or 0)
+        except ValueError:
+            retry_after = 0
+        raise WhisperServiceBusy(retry_after) from exc
+    detail = exc.read().decode("utf-8", errors="ignore")
+    raise VisitTranscriptionError(f"Whisper service error: {detail}") from exc
+
+
 SUMMARY_SCHEMA_KEYS = [
     "anamnesis",
     "clinical_findings",
@@ -21,6 +42,9 @@ SUMMARY_SCHEMA_KEYS = [
 ]
 SUMMARY_UNKNOWN = "UNKNOWN"
 
+# (transcript so far, chunks done, chunks total) — called as ordered partial transcripts arrive.
+TranscriptProgressCallback = Callable[[str, int, int], None]
+
 
 def _build_multipart_form_data(
     *,
@@ -88,11 +112,165 @@ def _transcribe_with_self_hosted_whisper(
     return transcript
 
 
-def transcribe_audio_with_whisper(*, audio_bytes: bytes, filename: str, content_type: str) -> str:
+# Block size for the chunked upload to ``/transcribe/stream``; matches the read size
+# on the service side.
+UPLOAD_BLOCK_BYTES = 1024 * 1024
+
+
+def _iter_upload_blocks(audio: bytes | BinaryIO) -> Iterator[bytes]:
+    if isinstance(audio, (bytes, bytearray)):
+        view = memoryview(audio)
+        for start in range(0, len(view), UPLOAD_BLOCK_BYTES):
+            yield bytes(view[start : start + UPLOAD_BLOCK_BYTES])
+        return
+    while block := audio.read(UPLOAD_BLOCK_BYTES):
+        yield block
+
+
+def _read_audio(audio_bytes: bytes | None, audio_file: BinaryIO | None) -> bytes:
+    if audio_bytes is not None:
+        return audio_bytes
+    if audio_file is None:
+        raise VisitTranscriptionError("No audio to transcribe.")
+    return audio_file.read()
+
+
+def _stream_transcribe_with_self_hosted_whisper(
+    *,
+    audio: bytes | BinaryIO,
+    filename: str,
+    content_type: str,
+    base_url: str,
+    on_progress: TranscriptProgressCallback | None = None,
+) -> str:
+    """
+    Send the raw audio to ``/transcribe/stream``. The service splits it into VAD-aligned
+    chunks, transcribes them in parallel and streams NDJSON lines back in chunk order, so
+    partial transcripts can be persisted while later chunks are still running.
+
+    ``audio`` may be a file object (e.g. the S3 body); it is uploaded with chunked
+    transfer encoding in ``UPLOAD_BLOCK_BYTES`` blocks, never read whole into memory.
+    """
+    query = parse.urlencode({"filename": filename})
+    req = request.Request(
+        url=f"{base_url.rstrip('/')}/transcribe/stream?{query}",
+        # An iterable body has no Content-Length, so urllib sends it chunked.
+        data=_iter_upload_blocks(audio),
+        method="POST",
+        headers={"Content-Type": content_type or "application/octet-stream"},
+    )
+    # Per-read timeout: each chunk line must arrive within it, not the whole recording.
+    timeout = float(getattr(settings, "WHISPER_STREAM_READ_TIMEOUT_SECONDS", 300))
+    parts: list[str] = []
+    total = 0
+    finished = False
+    try:
+        with request.urlopen(req, timeout=timeout) as response:
+            for raw_line in response:
+                if not raw_line.strip():
+                    continue
+                event = json.loads(raw_line.decode("utf-8"))
+                kind = event.get("type")
+                if kind == "plan":
+                    total = int(event.get("chunks") or 0)
+                elif kind == "chunk":
+                    text = str(event.get("text", "")).strip()
+                    if text:
+                        parts.append(text)
+                    if on_progress is not None:
+                        on_progress(" ".join(parts), int(event.get("index", 0)) + 1, total)
+                elif kind == "error":
+                    raise VisitTranscriptionError(
+                        f"Whisper service returned error: {event.get('error', '')}"
+                    )
+                elif kind == "done":
+                    finished = True
+    except error.HTTPError as exc:
+        _raise_for_whisper_http_error(exc)
+    except (error.URLError, TimeoutError, json.JSONDecodeError) as exc:
+        raise VisitTranscriptionError(
+            "Failed to reach self-hosted Whisper service. Is it running?"
+        ) from exc
+
+    if not finished:
+        raise VisitTranscriptionError("Whisper stream ended before the last chunk.")
+    transcript = " ".join(parts).strip()
+    if not transcript:
+        raise VisitTranscriptionError("Whisper returned empty transcript.")
+    return transcript
+
+
+def submit_whisper_job(*, audio_bytes: bytes, filename: str, content_type: str) -> str:
+    """
+    Queue audio on the self-hosted service (``POST /jobs``) without waiting for the
+    transcript; returns the service job id. Raises ``WhisperServiceBusy`` when saturated.
+    """
+    base_url = str(getattr(settings, "WHISPER_SERVICE_URL", "")).strip()
+    if not base_url:
+        raise VisitTranscriptionError("WHISPER_SERVICE_URL is not configured.")
+    query = parse.urlencode({"filename": filename})
+    req = request.Request(
+        url=f"{base_url.rstrip('/')}/jobs?{query}",
+        data=audio_bytes,
+        method="POST",
+        headers={"Content-Type": content_type or "application/octet-stream"},
+    )
+    try:
+        with request.urlopen(req, timeout=60) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+    except error.HTTPError as exc:
+        _raise_for_whisper_http_error(exc)
+    except (error.URLError, TimeoutError, json.JSONDecodeError) as exc:
+        raise VisitTranscriptionError(
+            "Failed to reach self-hosted Whisper service. Is it running?"
+        ) from exc
+    job_id = str(payload.get("id") or "")
+    if not job_id:
+        raise VisitTranscriptionError("Whisper service did not return a job id.")
+    return job_id
+
+
+def get_whisper_job(job_id: str) -> dict | None:
+    """Poll ``GET /jobs/<id>``; ``None`` when the service no longer knows the job."""
+    base_url = str(getattr(settings, "WHISPER_SERVICE_URL", "")).strip()
+    req = request.Request(url=f"{base_url.rstrip('/')}/jobs/{parse.quote(job_id)}", method="GET")
+    try:
+        with request.urlopen(req, timeout=30) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except error.HTTPError as exc:
+        if exc.code == 404:
+            return None
+        _raise_for_whisper_http_error(exc)
+    except (error.URLError, TimeoutError, json.JSONDecodeError) as exc:
+        raise VisitTranscriptionError(
+            "Failed to reach self-hosted Whisper service. Is it running?"
+        ) from exc
+
+
+def transcribe_audio_with_whisper(
+    *,
+    audio_bytes: bytes | None = None,
+    audio_file: BinaryIO | None = None,
+    filename: str,
+    content_type: str,
+    on_progress: TranscriptProgressCallback | None = None,
+) -> str:
+    """
+    Transcribe ``audio_bytes`` or ``audio_file``. Only the chunked self-hosted path
+    streams a file object; the other backends need the whole recording and read it.
+    """
     whisper_url = str(getattr(settings, "WHISPER_SERVICE_URL", "")).strip()
     if whisper_url:
+        if getattr(settings, "WHISPER_CHUNKED_TRANSCRIPTION", True):
+            return _stream_transcribe_with_self_hosted_whisper(
+                audio=audio_bytes if audio_bytes is not None else audio_file,
+                filename=filename,
+                content_type=content_type,
+                base_url=whisper_url,
+                on_progress=on_progress,
+            )
         return _transcribe_with_self_hosted_whisper(
-            audio_bytes=audio_bytes,
+            audio_bytes=_read_audio(audio_bytes, audio_file),
             filename=filename,
             content_type=content_type,
             base_url=whisper_url,
@@ -108,7 +286,7 @@ def transcribe_audio_with_whisper(*, audio_bytes: bytes, filename: str, content_
         file_field="file",
         filename=filename,
         content_type=content_type or "application/octet-stream",
-        file_bytes=audio_bytes,
+        file_bytes=_read_audio(audio_bytes, audio_file),
     )
     req = request.Request(
         url="https://api.openai.com/v1/audio/transcriptions",
@@ -1,24 +1,29 @@
 """
 Process VisitTranscriptionJob rows: Whisper + structuring + ClinicalExam update.
+
+``process_visit_transcription_job`` runs the whole pipeline synchronously (inline API mode).
+With a self-hosted Whisper service, ``process_visit_transcription_jobs`` instead hands the
+audio to the service with ``submit_visit_transcription_job`` and later finishes it with
+``poll_visit_transcription_job``, so a worker never blocks on a long transcription. Finishing
+a submitted job is claimed under a row lock, so overlapping runs structure it only once;
+``fail_stalled_visit_transcription_jobs`` gives up on jobs the service never finishes.
 """
 
 from __future__ import annotations
 
 import logging
+from datetime import datetime
 
 from apps.medical.models import ClinicalExam, MedicalRecord, PatientHistoryEntry
 from apps.scheduling.models import VisitTranscriptionJob
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
 
-def process_visit_transcription_job(job_id: int) -> None:
-    """
-    Claim a pending job, run AI pipeline, update ClinicalExam, mark job completed/failed.
-
-    No-op if job is missing or not pending (another worker may have claimed it).
-    """
+def _claim_pending_job(job_id: int) -> VisitTranscriptionJob | None:
     with transaction.atomic():
         job = (
             VisitTranscriptionJob.objects.select_for_update(skip_locked=True)
@@ -29,47 +34,218 @@ def process_visit_transcription_job(job_id: int) -> None:
             .first()
         )
         if job is None:
-            return
+            return None
         job.status = VisitTranscriptionJob.Status.PROCESSING
         job.save(update_fields=["status", "updated_at"])
 
     job.refresh_from_db()
+    return job
+
+
+def _fail_job(job: VisitTranscriptionJob, message: str) -> None:
+    job.status = VisitTranscriptionJob.Status.FAILED
+    job.last_error = message
+    job.save(update_fields=["status", "last_error", "updated_at"])
+
+
+def _read_job_audio(job: VisitTranscriptionJob) -> bytes:
+    from .visit_transcription import VisitTranscriptionError
+
+    with job.audio.open("rb") as audio_f:
+        audio_bytes = audio_f.read()
+    if not audio_bytes:
+        raise VisitTranscriptionError("Stored audio file is empty.")
+    return audio_bytes
+
+
+def process_visit_transcription_job(job_id: int) -> None:
+    """
+    Claim a pending job, run AI pipeline, update ClinicalExam, mark job completed/failed.
+
+    No-op if job is missing or not pending (another worker may have claimed it).
+    """
+    job = _claim_pending_job(job_id)
+    if job is None:
+        return
+
+    from .visit_transcription import VisitTranscriptionError, transcribe_audio_with_whisper
+
+    try:
+        audio_bytes = _read_job_audio(job)
+        transcript = transcribe_audio_with_whisper(
+            audio_bytes=audio_bytes,
+            filename=job.original_filename or f"visit-{job.appointment_id}.webm",
+            content_type=job.content_type or "application/octet-stream",
+        )
+    except VisitTranscriptionError as exc:
+        _fail_job(job, str(exc))
+        logger.warning("VisitTranscriptionJob %s failed: %s", job_id, exc)
+        return
+    except Exception as exc:  # pragma: no cover - defensive
+        _fail_job(job, str(exc))
+        logger.exception("VisitTranscriptionJob %s unexpected error", job_id)
+        return
+
+    _complete_job(job, transcript)
+
+
+def submit_visit_transcription_job(job_id: int) -> bool:
+    """
+    Claim a pending job and queue its audio on the Whisper service without waiting.
+
+    Returns ``False`` only when the service is saturated: the job goes back to ``pending`` and
+    the caller should stop submitting for now.
+    """
+    job = _claim_pending_job(job_id)
+    if job is None:
+        return True
+
+    from .visit_transcription import (
+        VisitTranscriptionError,
+        WhisperServiceBusy,
+        submit_whisper_job,
+    )
+
+    try:
+        remote_id = submit_whisper_job(
+            audio_bytes=_read_job_audio(job),
+            filename=job.original_filename or f"visit-{job.appointment_id}.webm",
+            content_type=job.content_type or "application/octet-stream",
+        )
+    except WhisperServiceBusy as exc:
+        job.status = VisitTranscriptionJob.Status.PENDING
+        job.save(update_fields=["status", "updated_at"])
+        logger.info("Whisper service busy; job %s stays pending (%s)", job_id, exc)
+        return False
+    except VisitTranscriptionError as exc:
+        _fail_job(job, str(exc))
+        logger.warning("VisitTranscriptionJob %s failed: %s", job_id, exc)
+        return True
+    except Exception as exc:  # pragma: no cover - defensive
+        _fail_job(job, str(exc))
+        logger.exception("VisitTranscriptionJob %s unexpected error", job_id)
+        return True
+
+    job.whisper_job_id = remote_id
+    job.whisper_submitted_at = timezone.now()
+    job.save(update_fields=["whisper_job_id", "whisper_submitted_at", "updated_at"])
+    return True
+
+
+def poll_visit_transcription_job(job: VisitTranscriptionJob) -> str:
+    """
+    Check a submitted job on the Whisper service and finish it when the transcript is ready.
+    Returns the remote status (``queued`` / ``running`` / ``completed`` / ``failed`` /
+    ``missing``), or ``claimed`` when another run already took the job over. A job the service
+    no longer knows (e.g. restart) is queued again.
+    """
+    from .visit_transcription import VisitTranscriptionError, get_whisper_job
+
+    try:
+        remote = get_whisper_job(job.whisper_job_id)
+    except VisitTranscriptionError as exc:
+        logger.warning("Polling Whisper job for VisitTranscriptionJob %s failed: %s", job.id, exc)
+        return "unreachable"
+
+    if remote is None:
+        requeued = VisitTranscriptionJob.objects.filter(
+            pk=job.pk,
+            status=VisitTranscriptionJob.Status.PROCESSING,
+            whisper_job_id=job.whisper_job_id,
+        ).update(
+            status=VisitTranscriptionJob.Status.PENDING,
+            whisper_job_id="",
+            whisper_submitted_at=None,
+            updated_at=timezone.now(),
+        )
+        return "missing" if requeued else "claimed"
+
+    status = str(remote.get("status") or "")
+    transcript = str(remote.get("transcript") or "").strip()
+    if status in ("failed", "completed"):
+        claimed = _claim_submitted_job(job)
+        if claimed is None:
+            return "claimed"
+        if status == "failed":
+            _fail_job(claimed, f"Whisper service returned error: {remote.get('error', '')}")
+        elif transcript:
+            _complete_job(claimed, transcript)
+        else:
+            _fail_job(claimed, "Whisper returned empty transcript.")
+    elif transcript and transcript != job.transcript:
+        VisitTranscriptionJob.objects.filter(
+            pk=job.pk,
+            status=VisitTranscriptionJob.Status.PROCESSING,
+            whisper_job_id=job.whisper_job_id,
+        ).update(transcript=transcript, updated_at=timezone.now())
+    return status
 
+
+def _claim_submitted_job(job: VisitTranscriptionJob) -> VisitTranscriptionJob | None:
+    """
+    Take over finishing a job the Whisper service reports as done. Re-checks the row under a
+    lock and clears ``whisper_job_id``, so a concurrent poller sees it as already claimed.
+    """
+    with transaction.atomic():
+        locked = (
+            VisitTranscriptionJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                pk=job.pk,
+                status=VisitTranscriptionJob.Status.PROCESSING,
+                whisper_job_id=job.whisper_job_id,
+            )
+            .first()
+        )
+        if locked is None:
+            return None
+        locked.whisper_job_id = ""
+        locked.save(update_fields=["whisper_job_id", "updated_at"])
+    return locked
+
+
+def fail_stalled_visit_transcription_jobs(
+    *, submitted_before: datetime, created_before: datetime
+) -> int:
+    """
+    Fail jobs still on the Whisper service after the submission deadline (or older than the
+    command's ``--max-age-hours``), and jobs whose completion stopped midway (the worker
+    died after claiming it). Returns the number of jobs failed.
+    """
+    return VisitTranscriptionJob.objects.filter(
+        Q(whisper_submitted_at__lt=submitted_before) | Q(created_at__lt=created_before),
+        status=VisitTranscriptionJob.Status.PROCESSING,
+        whisper_submitted_at__isnull=False,
+    ).update(
+        status=VisitTranscriptionJob.Status.FAILED,
+        whisper_job_id="",
+        last_error="Whisper service did not finish the transcription before the deadline.",
+        updated_at=timezone.now(),
+    )
+
+
+def _complete_job(job: VisitTranscriptionJob, transcript: str) -> None:
+    """Structure the transcript, update ClinicalExam / history and mark the job completed."""
     from .visit_transcription import (
         SUMMARY_UNKNOWN,
         VisitTranscriptionError,
         enforce_strict_summary,
         structure_transcript_with_claude,
         summarize_visit_for_history,
-        transcribe_audio_with_whisper,
     )
 
+    job_id = job.id
     try:
-        with job.audio.open("rb") as audio_f:
-            audio_bytes = audio_f.read()
-        if not audio_bytes:
-            raise VisitTranscriptionError("Stored audio file is empty.")
-
-        transcript = transcribe_audio_with_whisper(
-            audio_bytes=audio_bytes,
-            filename=job.original_filename or f"visit-{job.appointment_id}.webm",
-            content_type=job.content_type or "application/octet-stream",
-        )
         structured_raw = structure_transcript_with_claude(transcript=transcript)
         structured, needs_review = enforce_strict_summary(
             transcript=transcript,
             structured=structured_raw,
         )
     except VisitTranscriptionError as exc:
-        job.status = VisitTranscriptionJob.Status.FAILED
-        job.last_error = str(exc)
-        job.save(update_fields=["status", "last_error", "updated_at"])
+        _fail_job(job, str(exc))
         logger.warning("VisitTranscriptionJob %s failed: %s", job_id, exc)
         return
     except Exception as exc:  # pragma: no cover - defensive
-        job.status = VisitTranscriptionJob.Status.FAILED
-        job.last_error = str(exc)
-        job.save(update_fields=["status", "last_error", "updated_at"])
+        _fail_job(job, str(exc))
         logger.exception("VisitTranscriptionJob %s unexpected error", job_id)
         return
 
@@ -0,0 +1,202 @@
+"""
+Materialized ward board behind the nursing dashboard (wall screens poll it every few seconds).
+
+Each clinic has a cached board snapshot — its admitted stays, newest first — keyed by a
+per-clinic version counter. Every stay row is also cached on its own, keyed by a per-stay
+version. Saving a stay, note, task, medication order or administration — or the patient or
+attending vet of an admitted stay — bumps both counters (see ``apps.scheduling.signals``), so the next read rebuilds the board from the cached rows and
+re-queries only the stays that actually changed.
+
+Rows keep each active order's next-due and end times rather than counts; overdue / due-soon
+counts are derived at read time, so the snapshot stays valid as the clock moves. The board is
+served with an ETag over its final content, so polling screens get ``304`` while it is unchanged.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from apps.scheduling.models import HospitalStay, HospitalStayNote, HospitalStayTask
+from apps.scheduling.serializers import HospitalStayReadSerializer
+from apps.scheduling.services.medication_due import active_medication_orders, next_due_at
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, OuterRef, Q, Subquery
+
+# Upper bound of the nursing-dashboard ``limit`` parameter; a clinic board never holds more.
+WARD_BOARD_MAX_STAYS = 200
+
+
+def ward_board_version_cache_key(clinic_id: int) -> str:
+    return f"scheduling:ward_board:version:{clinic_id}"
+
+
+def ward_board_stay_version_cache_key(hospital_stay_id: int) -> str:
+    return f"scheduling:ward_board:stay_version:{hospital_stay_id}"
+
+
+def _ward_board_cache_timeout() -> int:
+    return int(getattr(settings, "WARD_BOARD_CACHE_TIMEOUT", 300))
+
+
+def _incr(key: str) -> int:
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def bump_ward_board_version(clinic_id: int | None, hospital_stay_id: int | None = None) -> None:
+    """Invalidate the clinic board and, when given, the cached row of one stay."""
+    if hospital_stay_id is not None:
+        _incr(ward_board_stay_version_cache_key(hospital_stay_id))
+    if clinic_id is not None:
+        _incr(ward_board_version_cache_key(clinic_id))
+
+
+def _build_rows(clinic_id: int, stay_ids: list[int], now: datetime) -> dict[int, dict]:
+    latest_note_qs = HospitalStayNote.objects.filter(
+        clinic_id=clinic_id,
+        hospital_stay_id=OuterRef("pk"),
+    ).order_by("-created_at", "-id")
+    stays = HospitalStay.objects.filter(clinic_id=clinic_id, pk__in=stay_ids).annotate(
+        last_round_note=Subquery(latest_note_qs.values("note")[:1]),
+        last_round_at=Subquery(latest_note_qs.values("created_at")[:1]),
+        open_high_priority_tasks=Count(
+            "tasks",
+            filter=Q(tasks__priority=HospitalStayTask.Priority.HIGH)
+            & ~Q(tasks__status=HospitalStayTask.Status.COMPLETED),
+            distinct=True,
+        ),
+    )
+    doses: dict[int, list[tuple[float, float | None]]] = {sid: [] for sid in stay_ids}
+    orders = (
+        active_medication_orders([clinic_id], now=now, hospital_stay_ids=stay_ids)
+        .filter(frequency_hours__gt=0)
+        .only("id", "hospital_stay_id", "frequency_hours", "starts_at", "ends_at")
+    )
+    for order in orders:
+        doses[order.hospital_stay_id].append(
+            (
+                next_due_at(order).timestamp(),
+                order.ends_at.timestamp() if order.ends_at else None,
+            )
+        )
+
+    rows = {}
+    for stay in stays:
+        data = dict(HospitalStayReadSerializer(stay).data)
+        data["last_round_note"] = stay.last_round_note
+        data["last_round_at"] = stay.last_round_at.isoformat() if stay.last_round_at else None
+        data["open_high_priority_tasks"] = int(stay.open_high_priority_tasks or 0)
+        rows[stay.id] = {"item": data, "doses": doses.get(stay.id, [])}
+    return rows
+
+
+def _build_clinic_board(clinic_id: int, now: datetime, timeout: int) -> list[dict]:
+    admitted = list(
+        HospitalStay.objects.filter(clinic_id=clinic_id, status=HospitalStay.Status.ADMITTED)
+        .order_by("-admitted_at")
+        .values_list("id", "admitted_at")[:WARD_BOARD_MAX_STAYS]
+    )
+    stay_ids = [sid for sid, _ in admitted]
+    rows: dict[int, dict] = {}
+    row_keys: dict[int, str] = {}
+    if timeout > 0 and stay_ids:
+        versions = cache.get_many([ward_board_stay_version_cache_key(sid) for sid in stay_ids])
+        row_keys = {
+            sid: (
+                f"scheduling:ward_board:stay:{sid}:"
+                f"v{int(versions.get(ward_board_stay_version_cache_key(sid)) or 0)}"
+            )
+            for sid in stay_ids
+        }
+        cached = cache.get_many(list(row_keys.values()))
+        rows = {sid: cached[key] for sid, key in row_keys.items() if key in cached}
+
+    missing = [sid for sid in stay_ids if sid not in rows]
+    if missing:
+        built = _build_rows(clinic_id, missing, now)
+        rows.update(built)
+        if timeout > 0:
+            cache.set_many({row_keys[sid]: row for sid, row in built.items()}, timeout)
+
+    return [
+        {"admitted_ts": admitted_at.timestamp(), **rows[sid]}
+        for sid, admitted_at in admitted
+        if sid in rows
+    ]
+
+
+def _clinic_boards(clinic_ids: list[int], now: datetime) -> list[list[dict]]:
+    timeout = _ward_board_cache_timeout()
+    if timeout <= 0:
+        return [_build_clinic_board(cid, now, timeout) for cid in clinic_ids]
+
+    versions = cache.get_many([ward_board_version_cache_key(cid) for cid in clinic_ids])
+    board_keys = {
+        cid: (
+            f"scheduling:ward_board:clinic:{cid}:"
+            f"v{int(versions.get(ward_board_version_cache_key(cid)) or 0)}"
+        )
+        for cid in clinic_ids
+    }
+    cached = cache.get_many(list(board_keys.values()))
+    boards = []
+    for cid, key in board_keys.items():
+        board = cached.get(key)
+        if board is None:
+            board = _build_clinic_board(cid, now, timeout)
+            cache.set(key, board, timeout)
+        boards.append(board)
+    return boards
+
+
+def ward_board_items(
+    clinic_ids: Iterable[int],
+    *,
+    now: datetime,
+    window_minutes: int,
+    limit: int,
+) -> tuple[list[dict], str]:
+    """
+    Nursing-dashboard items (most urgent first) and their ETag.
+
+    Same selection as the live query: the ``limit`` most recently admitted stays across
+    ``clinic_ids``, then ordered by overdue meds, due-soon meds, open high-priority tasks.
+    """
+    rows = [row for board in _clinic_boards(list(clinic_ids), now) for row in board]
+    rows.sort(key=lambda row: row["admitted_ts"], reverse=True)
+
+    now_ts = now.timestamp()
+    horizon_ts = (now + timedelta(minutes=window_minutes)).timestamp()
+    items = []
+    for row in rows[:limit]:
+        overdue = due_soon = 0
+        for due_ts, ends_ts in row["doses"]:
+            if ends_ts is not None and ends_ts < now_ts:
+                continue
+            if due_ts < now_ts:
+                overdue += 1
+            elif due_ts <= horizon_ts:
+                due_soon += 1
+        items.append({**row["item"], "meds_overdue": overdue, "meds_due_soon": due_soon})
+
+    # Sort by urgency: overdue meds, then due soon, then open high tasks, then most recent admit
+    items.sort(
+        key=lambda x: (
+            -int(x.get("meds_overdue") or 0),
+            -int(x.get("meds_due_soon") or 0),
+            -int(x.get("open_high_priority_tasks") or 0),
+            x.get("admitted_at") or "",
+        )
+    )
+    body = json.dumps([window_minutes, items], cls=DjangoJSONEncoder, sort_keys=True)
+    etag = '"' + hashlib.sha1(body.encode("utf-8"), usedforsecurity=False).hexdigest() + '"'
+    return items, etag
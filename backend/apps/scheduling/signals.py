@@ -0,0 +1,101 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.patients.models import Patient
+from apps.scheduling.models import (
+    Appointment,
+    HospitalMedicationAdministration,
+    HospitalMedicationOrder,
+    HospitalStay,
+    HospitalStayNote,
+    HospitalStayTask,
+)
+from apps.scheduling.models_clinic_hours import ClinicWorkingHours
+from apps.scheduling.models_exceptions import VetAvailabilityException
+from apps.scheduling.models_working_hours import VetWorkingHours
+from apps.tenancy.models import ClinicHoliday
+
+from .services.availability_cache import bump_availability_version
+from .services.ward_board import bump_ward_board_version
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+@receiver(post_save, sender=ClinicHoliday)
+@receiver(post_delete, sender=ClinicHoliday)
+@receiver(post_save, sender=ClinicWorkingHours)
+@receiver(post_delete, sender=ClinicWorkingHours)
+@receiver(post_save, sender=VetAvailabilityException)
+@receiver(post_delete, sender=VetAvailabilityException)
+def _clinic_availability_changed(sender, instance, **kwargs) -> None:
+    # After commit: a reader must not cache pre-commit rows under the new version.
+    transaction.on_commit(partial(bump_availability_version, instance.clinic_id))
+
+
+@receiver(post_save, sender=VetWorkingHours)
+@receiver(post_delete, sender=VetWorkingHours)
+def _vet_hours_changed(sender, instance: VetWorkingHours, **kwargs) -> None:
+    # Vet hours are not clinic-scoped; invalidate the vet's home clinic.
+    from apps.accounts.models import User
+
+    clinic_id = User.objects.filter(pk=instance.vet_id).values_list("clinic_id", flat=True).first()
+    transaction.on_commit(partial(bump_availability_version, clinic_id))
+
+
+@receiver(post_save, sender=HospitalStay)
+@receiver(post_delete, sender=HospitalStay)
+def _hospital_stay_changed(sender, instance: HospitalStay, **kwargs) -> None:
+    transaction.on_commit(partial(bump_ward_board_version, instance.clinic_id, instance.pk))
+
+
+def _bump_admitted_stays(**stay_filter) -> None:
+    for stay_id, clinic_id in HospitalStay.objects.filter(
+        status=HospitalStay.Status.ADMITTED, **stay_filter
+    ).values_list("id", "clinic_id"):
+        transaction.on_commit(partial(bump_ward_board_version, clinic_id, stay_id))
+
+
+@receiver(post_save, sender=Patient)
+def _ward_board_patient_changed(sender, instance: Patient, **kwargs) -> None:
+    _bump_admitted_stays(patient_id=instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def _ward_board_vet_changed(sender, instance, update_fields=None, **kwargs) -> None:
+    # Logins only touch last_login; skip the lookup for them.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    _bump_admitted_stays(attending_vet_id=instance.pk)
+
+
+@receiver(post_save, sender=HospitalStayNote)
+@receiver(post_delete, sender=HospitalStayNote)
+@receiver(post_save, sender=HospitalStayTask)
+@receiver(post_delete, sender=HospitalStayTask)
+@receiver(post_save, sender=HospitalMedicationOrder)
+@receiver(post_delete, sender=HospitalMedicationOrder)
+def _ward_board_row_changed(sender, instance, **kwargs) -> None:
+    transaction.on_commit(
+        partial(bump_ward_board_version, instance.clinic_id, instance.hospital_stay_id)
+    )
+
+
+@receiver(post_save, sender=HospitalMedicationAdministration)
+@receiver(post_delete, sender=HospitalMedicationAdministration)
+def _medication_administration_changed(
+    sender, instance: HospitalMedicationAdministration, **kwargs
+) -> None:
+    # Views save administrations with their order loaded; avoid a query in that case.
+    if HospitalMedicationAdministration.medication_order.is_cached(instance):
+        stay_id = instance.medication_order.hospital_stay_id
+    else:
+        stay_id = (
+            HospitalMedicationOrder.objects.filter(pk=instance.medication_order_id)
+            .values_list("hospital_stay_id", flat=True)
+            .first()
+        )
+    transaction.on_commit(partial(bump_ward_board_version, instance.clinic_id, stay_id))
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+
+import pytest
+from apps.accounts.models import User
+from apps.scheduling.models import Appointment, Room
+from apps.scheduling.models_exceptions import VetAvailabilityException
+from apps.scheduling.models_working_hours import VetWorkingHours
+from apps.scheduling.services.availability import (
+    compute_availability,
+    compute_availability_range,
+)
+from apps.tenancy.models import ClinicHoliday
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+def _aware(day, hh: int, mm: int = 0):
+    return timezone.make_aware(datetime.combine(day, time(hh, mm)), timezone.get_current_timezone())
+
+
+@pytest.mark.django_db
+def test_range_matches_single_day_results(clinic, doctor, patient):
+    start = timezone.localdate() + timedelta(days=1)
+    VetWorkingHours.objects.create(
+        vet=doctor, weekday=start.weekday(), start_time=time(8, 0), end_time=time(12, 0)
+    )
+    Appointment.objects.create(
+        clinic=clinic,
+        patient=patient,
+        vet=doctor,
+        starts_at=_aware(start, 9),
+        ends_at=_aware(start, 10),
+    )
+    ClinicHoliday.objects.create(clinic=clinic, date=start + timedelta(days=2), reason="Easter")
+    VetAvailabilityException.objects.create(
+        clinic=clinic, vet=doctor, date=start + timedelta(days=3), is_day_off=True
+    )
+    VetAvailabilityException.objects.create(
+        clinic=clinic,
+        vet=doctor,
+        date=start + timedelta(days=4),
+        start_time=time(13, 0),
+        end_time=time(15, 0),
+    )
+    end = start + timedelta(days=6)
+
+    batch = compute_availability_range(
+        clinic_id=clinic.id,
+        date_from=start,
+        date_to=end,
+        vet_ids=[doctor.id, None],
+        room_ids=[None],
+        slot_minutes=30,
+    )
+
+    assert len(batch) == 14
+    day = start
+    while day <= end:
+        for vet_id in (doctor.id, None):
+            single = compute_availability(
+                clinic_id=clinic.id,
+                date_str=day.isoformat(),
+                vet_id=vet_id,
+                room_id=None,
+                slot_minutes=30,
+            )
+            assert batch[(day, vet_id, None)] == single
+        day += timedelta(days=1)
+
+    first = batch[(start, doctor.id, None)]
+    assert first["work_bounds"].start == _aware(start, 8)
+    assert [s.start for s in first["free_slots"]] == [
+        _aware(start, 8),
+        _aware(start, 8, 30),
+        _aware(start, 10),
+        _aware(start, 10, 30),
+        _aware(start, 11),
+        _aware(start, 11, 30),
+    ]
+    assert batch[(start + timedelta(days=2), doctor.id, None)]["closed_reason"] == "Easter"
+    assert batch[(start + timedelta(days=3), doctor.id, None)]["closed_reason"] == "Vet is off"
+    custom = batch[(start + timedelta(days=4), doctor.id, None)]
+    assert custom["work_bounds"].start == _aware(start + timedelta(days=4), 13)
+    assert custom["work_bounds"].end == _aware(start + timedelta(days=4), 15)
+
+
+@pytest.mark.django_db
+def test_range_query_count_is_constant(clinic, patient):
+    start = timezone.localdate() + timedelta(days=1)
+    vets = [
+        User.objects.create_user(
+            username=f"vet_range_{i}",
+            password="pass",
+            clinic=clinic,
+            is_vet=True,
+            role=User.Role.DOCTOR,
+        )
+        for i in range(8)
+    ]
+    rooms = [Room.objects.create(clinic=clinic, name=f"Room {i}") for i in range(3)]
+    for i, vet in enumerate(vets):
+        Appointment.objects.create(
+            clinic=clinic,
+            patient=patient,
+            vet=vet,
+            room=rooms[i % 3],
+            starts_at=_aware(start, 9 + i),
+            ends_at=_aware(start, 10 + i),
+        )
+
+    with CaptureQueriesContext(connection) as ctx:
+        result = compute_availability_range(
+            clinic_id=clinic.id,
+            date_from=start,
+            date_to=start + timedelta(days=6),
+            vet_ids=[v.id for v in vets],
+            room_ids=[None, *[r.id for r in rooms]],
+        )
+
+    assert len(ctx.captured_queries) <= 5
+    assert len(result) == 7 * 8 * 4
+    busy = result[(start, vets[0].id, rooms[0].id)]["busy_merged"]
+    assert [(b.start, b.end) for b in busy] == [(_aware(start, 9), _aware(start, 10))]
+    assert result[(start, vets[0].id, rooms[1].id)]["busy_merged"] == []
+
+
+@pytest.mark.django_db
+def test_availability_rooms_view_uses_batched_engine(api_client, clinic, doctor, patient):
+    day = timezone.localdate() + timedelta(days=1)
+    room_a = Room.objects.create(clinic=clinic, name="A", display_order=1)
+    Room.objects.create(clinic=clinic, name="B", display_order=2)
+    Appointment.objects.create(
+        clinic=clinic,
+        patient=patient,
+        vet=doctor,
+        room=room_a,
+        starts_at=_aware(day, 9),
+        ends_at=_aware(day, 10),
+    )
+    api_client.force_authenticate(user=doctor)
+
+    response = api_client.get("/api/availability/rooms/", {"date": day.isoformat()})
+
+    assert response.status_code == 200
+    rooms = response.data["rooms"]
+    assert [r["name"] for r in rooms] == ["A", "B"]
+    assert len(rooms[0]["busy"]) == 1
+    assert rooms[1]["busy"] == []
@@ -0,0 +1,153 @@
+"""Medication-due engine and the hospital endpoints built on it."""
+
+from datetime import timedelta
+
+import pytest
+from apps.patients.models import Patient
+from apps.scheduling.models import (
+    HospitalMedicationAdministration,
+    HospitalMedicationOrder,
+    HospitalStay,
+)
+from apps.scheduling.services.medication_due import (
+    active_medication_orders,
+    medication_due,
+    medication_due_counts_by_stay,
+    overdue_medication_orders_count,
+)
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+STAYS = 50
+ORDERS_PER_STAY = 8
+
+# (minutes since each GIVEN administration) per order slot; frequency is 8h for all.
+# never given -> overdue, given 2h ago -> not due, given 7h50m ago -> due soon,
+# given 9h ago -> overdue by an hour.
+GIVEN_AGO = [(), (120,), (470,), (540, 1200)]
+
+
+def _admit_ward(clinic, owner, doctor, now):
+    patients = Patient.objects.bulk_create(
+        [Patient(clinic=clinic, owner=owner, name=f"Ward {i}", species="Dog") for i in range(STAYS)]
+    )
+    stays = HospitalStay.objects.bulk_create(
+        [
+            HospitalStay(
+                clinic=clinic,
+                patient=p,
+                attending_vet=doctor,
+                status=HospitalStay.Status.ADMITTED,
+                admitted_at=now - timedelta(hours=12),
+            )
+            for p in patients
+        ]
+    )
+    orders = HospitalMedicationOrder.objects.bulk_create(
+        [
+            HospitalMedicationOrder(
+                clinic=clinic,
+                hospital_stay=stay,
+                medication_name=f"Med {n}",
+                dose="1.00",
+                frequency_hours=8,
+                starts_at=now - timedelta(hours=12),
+                created_by=doctor,
+            )
+            for stay in stays
+            for n in range(ORDERS_PER_STAY)
+        ]
+    )
+    administrations = []
+    for index, order in enumerate(orders):
+        slot = index % ORDERS_PER_STAY % len(GIVEN_AGO)
+        administrations.extend(
+            HospitalMedicationAdministration(
+                clinic=clinic,
+                medication_order=order,
+                administered_at=now - timedelta(minutes=minutes),
+                status=HospitalMedicationAdministration.Status.GIVEN,
+            )
+            for minutes in GIVEN_AGO[slot]
+        )
+        # A skipped dose never counts as the last one given.
+        administrations.append(
+            HospitalMedicationAdministration(
+                clinic=clinic,
+                medication_order=order,
+                administered_at=now - timedelta(minutes=5),
+                status=HospitalMedicationAdministration.Status.SKIPPED,
+            )
+        )
+    HospitalMedicationAdministration.objects.bulk_create(administrations)
+    return stays
+
+
+@pytest.mark.django_db
+def test_medication_due_engine_computes_states(clinic, client_with_membership, doctor):
+    now = timezone.now()
+    stays = _admit_ward(clinic, client_with_membership, doctor, now)
+    HospitalMedicationOrder.objects.filter(hospital_stay=stays[0], medication_name="Med 0").update(
+        ends_at=now - timedelta(minutes=1)
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        states = [
+            medication_due(order, now=now)
+            for order in active_medication_orders([clinic.id], now=now, hospital_stay=stays[1])
+        ]
+    assert len(ctx.captured_queries) == 1
+    by_name = {s.order.medication_name: s for s in states}
+    assert by_name["Med 0"].last_given_at is None
+    assert by_name["Med 0"].is_overdue and by_name["Med 0"].overdue_minutes == 720
+    assert by_name["Med 1"].next_due_at == now + timedelta(hours=6)
+    assert by_name["Med 3"].last_given_at == now - timedelta(minutes=540)
+    assert by_name["Med 3"].overdue_minutes == 60
+
+    overdue, due_soon = medication_due_counts_by_stay(
+        [clinic.id], [s.id for s in stays], now=now, horizon=now + timedelta(minutes=30)
+    )
+    assert overdue[stays[0].id] == 3 and overdue[stays[1].id] == 4
+    assert set(due_soon.values()) == {2}
+    assert overdue_medication_orders_count([clinic.id], now=now, admitted_only=True) == 199
+    assert overdue_medication_orders_count([clinic.id + 1], now=now) == 0
+
+
+@pytest.mark.django_db
+def test_hospital_endpoints_query_count_is_flat_for_a_full_ward(
+    clinic, client_with_membership, doctor, api_client
+):
+    now = timezone.now()
+    stays = _admit_ward(clinic, client_with_membership, doctor, now)
+    api_client.force_authenticate(user=doctor)
+    expected_overdue = STAYS * ORDERS_PER_STAY // 2
+
+    def get(url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url)
+        assert response.status_code == 200, response.content
+        return response, len(ctx.captured_queries)
+
+    dashboard, queries = get("/api/hospital-stays/nursing-dashboard/?window_minutes=30&limit=50")
+    assert queries <= 3
+    assert dashboard.data["count"] == STAYS
+    assert {(i["meds_overdue"], i["meds_due_soon"]) for i in dashboard.data["items"]} == {(4, 2)}
+
+    handover, queries = get("/api/hospital-stays/shift-handover-report/?hours=12")
+    assert queries <= 10
+    assert handover.data["summary"]["overdue_medication_orders_count"] == expected_overdue
+
+    kpis, queries = get("/api/hospital-stays/kpi-analytics/?hours=24")
+    assert queries <= 6
+    assert kpis.data["kpis"]["overdue_medication_orders_count"] == expected_overdue
+
+    due, queries = get(f"/api/hospital-stays/{stays[0].id}/medications-due/?window_minutes=30")
+    assert queries <= 3
+    assert [i["is_overdue"] for i in due.data["items"]] == [True] * 4 + [False] * 2
+    assert due.data["items"][0]["medication_order"]["created_by_name"] == "doctor"
+
+    safety, queries = get(f"/api/hospital-stays/{stays[0].id}/discharge-safety-checks/")
+    assert queries <= 5
+    warning = next(w for w in safety.data["warnings"] if w["code"] == "overdue_medications")
+    assert warning["count"] == 4
@@ -0,0 +1,200 @@
+"""Bulk medication schedule generation (MAR slots) across admitted stays."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from apps.patients.models import Patient
+from apps.scheduling.models import (
+    HospitalMedicationAdministration,
+    HospitalMedicationOrder,
+    HospitalStay,
+)
+from apps.scheduling.services.medication_schedule import (
+    dose_times,
+    generate_medication_schedules,
+)
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+T0 = datetime(2026, 4, 1, 8, 0, tzinfo=UTC)
+
+
+def test_dose_times_follow_the_order_cadence():
+    slots = dose_times(
+        starts_at=T0,
+        frequency_hours=8,
+        ends_at=None,
+        window_start=T0 + timedelta(hours=1),
+        window_end=T0 + timedelta(hours=24),
+    )
+    assert slots == [T0 + timedelta(hours=h) for h in (8, 16, 24)]
+    # Window before the order starts, ends_at inside the window, slot exactly on the edge.
+    assert dose_times(
+        starts_at=T0,
+        frequency_hours=6,
+        ends_at=T0 + timedelta(hours=12),
+        window_start=T0 - timedelta(hours=12),
+        window_end=T0 + timedelta(hours=48),
+    ) == [T0, T0 + timedelta(hours=6), T0 + timedelta(hours=12)]
+    assert (
+        dose_times(
+            starts_at=T0,
+            frequency_hours=8,
+            ends_at=T0 - timedelta(hours=1),
+            window_start=T0 - timedelta(hours=2),
+            window_end=T0 + timedelta(hours=8),
+        )
+        == []
+    )
+    assert (
+        dose_times(
+            starts_at=T0,
+            frequency_hours=0,
+            ends_at=None,
+            window_start=T0,
+            window_end=T0 + timedelta(hours=8),
+        )
+        == []
+    )
+
+
+def _ward(clinic, owner, doctor, *, stays=20, orders_per_stay=4):
+    now = timezone.now()
+    patients = Patient.objects.bulk_create(
+        [Patient(clinic=clinic, owner=owner, name=f"Ward {i}", species="Cat") for i in range(stays)]
+    )
+    admitted = HospitalStay.objects.bulk_create(
+        [
+            HospitalStay(
+                clinic=clinic,
+                patient=p,
+                attending_vet=doctor,
+                status=HospitalStay.Status.ADMITTED,
+                admitted_at=now - timedelta(hours=6),
+            )
+            for p in patients
+        ]
+    )
+    HospitalMedicationOrder.objects.bulk_create(
+        [
+            HospitalMedicationOrder(
+                clinic=clinic,
+                hospital_stay=stay,
+                medication_name=f"Med {n}",
+                dose="1.00",
+                frequency_hours=(4, 6, 8, 12)[n % 4],
+                starts_at=now - timedelta(hours=5),
+            )
+            for stay in admitted
+            for n in range(orders_per_stay)
+        ]
+    )
+    return admitted
+
+
+@pytest.mark.django_db
+def test_ward_generation_is_one_pass_and_idempotent(clinic, client_with_membership, doctor):
+    stays = _ward(clinic, client_with_membership, doctor)
+    discharged = stays[0]
+    discharged.status = HospitalStay.Status.DISCHARGED
+    discharged.save(update_fields=["status"])
+    given_order = HospitalMedicationOrder.objects.filter(hospital_stay=stays[1]).first()
+    HospitalMedicationAdministration.objects.create(
+        clinic=clinic,
+        medication_order=given_order,
+        scheduled_for=given_order.starts_at,
+        administered_at=given_order.starts_at,
+        status=HospitalMedicationAdministration.Status.GIVEN,
+    )
+    now = timezone.now()
+    window = {"window_start": now - timedelta(hours=12), "window_end": now + timedelta(hours=24)}
+
+    with CaptureQueriesContext(connection) as ctx:
+        first = generate_medication_schedules([clinic.id], **window)
+    assert len(ctx.captured_queries) <= 6
+
+    # 19 admitted stays x (4h, 6h, 8h, 12h orders) from now-5h through now+24h.
+    per_stay = sum(len(range(0, 29 + 1, f)) for f in (4, 6, 8, 12))
+    assert first.orders == 19 * 4
+    assert first.skipped_existing == 1
+    assert first.created == 19 * per_stay - 1
+    assert not HospitalMedicationAdministration.objects.filter(
+        medication_order__hospital_stay=discharged
+    ).exists()
+
+    again = generate_medication_schedules([clinic.id], **window)
+    assert again.created == 0
+    assert again.skipped_existing == 19 * per_stay
+    assert HospitalMedicationAdministration.objects.count() == 19 * per_stay
+
+
+@pytest.mark.django_db
+def test_pending_slot_conflicts_are_ignored(clinic, client_with_membership, doctor):
+    stay = _ward(clinic, client_with_membership, doctor, stays=1, orders_per_stay=1)[0]
+    order = stay.medication_orders.get()
+    now = timezone.now()
+    generate_medication_schedules(
+        [clinic.id], window_start=now, window_end=now + timedelta(hours=8)
+    )
+    slots = list(HospitalMedicationAdministration.objects.values_list("scheduled_for", flat=True))
+
+    # Another run racing this one cannot insert the same pending slot twice.
+    HospitalMedicationAdministration.objects.bulk_create(
+        [
+            HospitalMedicationAdministration(
+                clinic=clinic, medication_order=order, scheduled_for=slot, status="pending"
+            )
+            for slot in slots
+        ],
+        ignore_conflicts=True,
+    )
+    assert HospitalMedicationAdministration.objects.count() == len(slots)
+
+
+@pytest.mark.django_db
+def test_ward_generate_schedule_endpoint(clinic, client_with_membership, doctor, api_client):
+    _ward(clinic, client_with_membership, doctor, stays=3, orders_per_stay=2)
+    api_client.force_authenticate(user=doctor)
+
+    r = api_client.post(
+        "/api/hospital-stays/medications/generate-schedule/?horizon_hours=12&past_hours=0",
+        {},
+        format="json",
+    )
+    assert r.status_code == 200
+    assert r.data["orders"] == 6
+    assert r.data["created"] == HospitalMedicationAdministration.objects.count() > 0
+
+    bad = api_client.post("/api/hospital-stays/medications/generate-schedule/?horizon_hours=0")
+    assert bad.status_code == 400
+
+
+@pytest.mark.django_db
+def test_duplicate_pending_administration_is_rejected(
+    clinic, client_with_membership, doctor, api_client
+):
+    stay = _ward(clinic, client_with_membership, doctor, stays=1, orders_per_stay=1)[0]
+    order = stay.medication_orders.get()
+    api_client.force_authenticate(user=doctor)
+    url = f"/api/hospital-stays/{stay.id}/medications/{order.id}/administrations/"
+    payload = {"scheduled_for": order.starts_at.isoformat(), "status": "pending"}
+
+    assert api_client.post(url, payload, format="json").status_code == 201
+    duplicate = api_client.post(url, payload, format="json")
+    assert duplicate.status_code == 400
+    assert "scheduled_for" in duplicate.data
+
+
+@pytest.mark.django_db
+def test_generate_medication_schedules_command(clinic, client_with_membership, doctor, capsys):
+    _ward(clinic, client_with_membership, doctor, stays=2, orders_per_stay=1)
+
+    call_command("generate_medication_schedules", "--clinic-id", str(clinic.id))
+    assert "administration(s) created" in capsys.readouterr().out
+    created = HospitalMedicationAdministration.objects.count()
+    assert created > 0
+
+    call_command("generate_medication_schedules")
+    assert HospitalMedicationAdministration.objects.count() == created
@@ -8,7 +8,10 @@ from apps.clients.models import Client, ClientClinic
 from apps.patients.models import Patient
 from apps.scheduling.models import Appointment
 from apps.scheduling.models_working_hours import VetWorkingHours
+from apps.scheduling.services.scheduling_assistant import generate_capacity_insights
 from apps.tenancy.models import Clinic
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 
@@ -212,3 +215,46 @@ def test_schedule_optimization_rejects_invalid_limit(api_client, doctor):
         {"limit": "999"},
     )
     assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_capacity_insights_query_count_constant_in_range_size(clinic, doctor, patient):
+    start = timezone.localdate() + timedelta(days=1)
+    for i in range(3):
+        User.objects.create_user(
+            username=f"capacity_vet_{i}",
+            password="pass",
+            clinic=clinic,
+            is_vet=True,
+            role=User.Role.DOCTOR,
+        )
+    for offset in range(30):
+        day = start + timedelta(days=offset)
+        Appointment.objects.create(
+            clinic=clinic,
+            patient=patient,
+            vet=doctor,
+            starts_at=_aware(datetime.combine(day, datetime.strptime("10:00", "%H:%M").time())),
+            ends_at=_aware(datetime.combine(day, datetime.strptime("10:45", "%H:%M").time())),
+            status=Appointment.Status.SCHEDULED,
+        )
+
+    def count_queries(days: int, granularity: str) -> tuple[int, dict]:
+        with CaptureQueriesContext(connection) as ctx:
+            result = generate_capacity_insights(
+                clinic_id=clinic.id,
+                start_date=start,
+                end_date=start + timedelta(days=days - 1),
+                granularity=granularity,
+            )
+        return len(ctx.captured_queries), result
+
+    short_count, _ = count_queries(2, "hour")
+    long_count, long_result = count_queries(30, "hour")
+    day_count, day_result = count_queries(30, "day")
+
+    assert short_count == long_count == day_count <= 5
+    assert day_result["summary"]["booked_minutes"] == 30 * 45
+    assert long_result["summary"]["booked_minutes"] == 30 * 45
+    doctor_hour_rows = [r for r in long_result["rows"] if r["vet_id"] == doctor.id]
+    assert sum(r["booked_minutes"] for r in doctor_hour_rows) == 30 * 45
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 import io
+import json
 from unittest.mock import MagicMock, patch
 
 import pytest
 from apps.medical.models import ClinicalExam
 from apps.scheduling.models import VisitRecording
-from apps.scheduling.services.visit_transcription import SUMMARY_UNKNOWN, enforce_strict_summary
+from apps.scheduling.services.visit_recording_pipeline import process_visit_recording
+from apps.scheduling.services.visit_transcription import (
+    SUMMARY_UNKNOWN,
+    VisitTranscriptionError,
+    enforce_strict_summary,
+    transcribe_audio_with_whisper,
+)
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.management import call_command
 
@@ -50,7 +57,7 @@ def test_visit_recording_upload_inline_processing(api_client, doctor, appointmen
     ):
         with patch(
             "apps.scheduling.views_visit_recordings.process_visit_recording",
-            side_effect=lambda recording, audio_bytes: VisitRecording.objects.filter(
+            side_effect=lambda recording, audio_file: VisitRecording.objects.filter(
                 pk=recording.pk
             ).update(
                 status=VisitRecording.Status.READY,
@@ -98,7 +105,7 @@ def test_process_visit_recordings_command_sets_ready(
         with patch(
             "apps.scheduling.management.commands.process_visit_recordings.process_visit_recording"
         ) as process_mock:
-            process_mock.side_effect = lambda recording, audio_bytes: VisitRecording.objects.filter(
+            process_mock.side_effect = lambda recording, audio_file: VisitRecording.objects.filter(
                 pk=recording.pk
             ).update(
                 status=VisitRecording.Status.READY,
@@ -201,3 +208,165 @@ def test_enforce_strict_summary_replaces_non_grounded_with_unknown():
     assert strict["treatment_plan"] == SUMMARY_UNKNOWN
     assert strict["owner_instructions"] == SUMMARY_UNKNOWN
     assert needs_review is True
+
+
+class _FakeStreamResponse:
+    """Context-manager stand-in for urlopen() yielding NDJSON lines, with a hook per line."""
+
+    def __init__(self, events, on_line=None):
+        self._lines = [json.dumps(e).encode() + b"\n" for e in events]
+        self._on_line = on_line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        for i, line in enumerate(self._lines):
+            if self._on_line:
+                self._on_line(i)
+            yield line
+
+
+def _stream_events(texts):
+    events = [{"type": "plan", "chunks": len(texts), "duration": 60.0 * len(texts)}]
+    events += [{"type": "chunk", "index": i, "text": t} for i, t in enumerate(texts)]
+    events.append({"type": "done", "chunks": len(texts), "language": "pl"})
+    return events
+
+
+def test_chunked_transcription_reassembles_stream_in_order(settings):
+    settings.WHISPER_SERVICE_URL = "http://whisper:9000"
+    progress = []
+    captured = {}
+
+    def fake_urlopen(req, timeout):
+        captured["url"] = req.full_url
+        captured["body"] = b"".join(req.data)
+        return _FakeStreamResponse(_stream_events(["Owner reports cough.", "", "Mild fever."]))
+
+    with patch("apps.scheduling.services.visit_transcription.request.urlopen", fake_urlopen):
+        transcript = transcribe_audio_with_whisper(
+            audio_bytes=b"raw-audio",
+            filename="visit.webm",
+            content_type="audio/webm",
+            on_progress=lambda text, done, total: progress.append((text, done, total)),
+        )
+
+    assert transcript == "Owner reports cough. Mild fever."
+    assert captured["url"] == "http://whisper:9000/transcribe/stream?filename=visit.webm"
+    assert captured["body"] == b"raw-audio"
+    assert progress == [
+        ("Owner reports cough.", 1, 3),
+        ("Owner reports cough.", 2, 3),
+        ("Owner reports cough. Mild fever.", 3, 3),
+    ]
+
+
+@pytest.mark.parametrize(
+    "events, message",
+    [
+        ([{"type": "plan", "chunks": 2}, {"type": "error", "error": "boom"}], "boom"),
+        ([{"type": "plan", "chunks": 2}, {"type": "chunk", "index": 0, "text": "a"}], "ended"),
+    ],
+)
+def test_chunked_transcription_errors(settings, events, message):
+    settings.WHISPER_SERVICE_URL = "http://whisper:9000"
+    with patch(
+        "apps.scheduling.services.visit_transcription.request.urlopen",
+        lambda req, timeout: _FakeStreamResponse(events),
+    ):
+        with pytest.raises(VisitTranscriptionError, match=message):
+            transcribe_audio_with_whisper(
+                audio_bytes=b"raw-audio", filename="visit.webm", content_type="audio/webm"
+            )
+
+
+@pytest.mark.django_db
+def test_process_visit_recording_persists_partial_transcripts(
+    clinic, doctor, appointment, settings
+):
+    settings.WHISPER_SERVICE_URL = "http://whisper:9000"
+    row = VisitRecording.objects.create(
+        clinic=clinic,
+        appointment=appointment,
+        uploaded_by=doctor,
+        original_filename="visit.webm",
+        content_type="audio/webm",
+        status=VisitRecording.Status.PROCESSING,
+    )
+    seen = []
+
+    def observe(line_index):
+        # Before the 3rd line (2nd chunk) is read, the 1st chunk must already be stored.
+        if line_index == 2:
+            seen.append(
+                VisitRecording.objects.values_list(
+                    "transcript", "transcript_chunks_done", "transcript_chunks_total"
+                ).get(pk=row.pk)
+            )
+
+    events = _stream_events(["Owner reports cough.", "Mild fever."])
+    with patch(
+        "apps.scheduling.services.visit_transcription.request.urlopen",
+        lambda req, timeout: _FakeStreamResponse(events, on_line=observe),
+    ):
+        with patch(
+            "apps.scheduling.services.visit_recording_pipeline.structure_transcript_with_claude",
+            return_value={"anamnesis": "Owner reports cough.", "clinical_findings": "Mild fever."},
+        ):
+            process_visit_recording(recording=row, audio_bytes=b"raw-audio")
+
+    assert seen == [("Owner reports cough.", 1, 2)]
+    row.refresh_from_db()
+    assert row.status == VisitRecording.Status.READY
+    assert row.transcript == "Owner reports cough. Mild fever."
+    assert (row.transcript_chunks_done, row.transcript_chunks_total) == (2, 2)
+
+
+def test_chunked_transcription_uploads_file_objects_in_blocks(settings, monkeypatch):
+    settings.WHISPER_SERVICE_URL = "http://whisper:9000"
+    monkeypatch.setattr("apps.scheduling.services.visit_transcription.UPLOAD_BLOCK_BYTES", 4)
+    blocks = []
+
+    def fake_urlopen(req, timeout):
+        assert req.get_header("Content-length") is None
+        blocks.extend(req.data)
+        return _FakeStreamResponse(_stream_events(["Owner reports cough."]))
+
+    with patch("apps.scheduling.services.visit_transcription.request.urlopen", fake_urlopen):
+        transcribe_audio_with_whisper(
+            audio_file=io.BytesIO(b"raw-audio"), filename="visit.webm", content_type="audio/webm"
+        )
+
+    assert blocks == [b"raw-", b"audi", b"o"]
+
+
+@pytest.mark.django_db
+def test_failed_transcription_drops_the_partial_transcript(clinic, doctor, appointment, settings):
+    settings.WHISPER_SERVICE_URL = "http://whisper:9000"
+    row = VisitRecording.objects.create(
+        clinic=clinic,
+        appointment=appointment,
+        uploaded_by=doctor,
+        original_filename="visit.webm",
+        content_type="audio/webm",
+        status=VisitRecording.Status.PROCESSING,
+    )
+    events = [
+        {"type": "plan", "chunks": 2},
+        {"type": "chunk", "index": 0, "text": "Owner reports cough."},
+        {"type": "error", "error": "boom"},
+    ]
+    with patch(
+        "apps.scheduling.services.visit_transcription.request.urlopen",
+        lambda req, timeout: _FakeStreamResponse(events),
+    ):
+        with pytest.raises(VisitTranscriptionError, match="boom"):
+            process_visit_recording(recording=row, audio_bytes=b"raw-audio")
+
+    row.refresh_from_db()
+    assert row.transcript == ""
+    assert (row.transcript_chunks_done, row.transcript_chunks_total) == (0, 0)
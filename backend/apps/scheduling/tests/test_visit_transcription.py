@@ -165,3 +165,221 @@ def test_visit_transcription_async_accepted_then_poll(
 
     exam = ClinicalExam.objects.get(appointment=appointment)
     assert "Suspected gastroenteritis" in exam.initial_diagnosis
+
+
+def _queued_job(clinic, doctor, appointment, name="visit.wav"):
+    from apps.scheduling.models import VisitTranscriptionJob
+
+    return VisitTranscriptionJob.objects.create(
+        clinic=clinic,
+        appointment=appointment,
+        created_by=doctor,
+        audio=SimpleUploadedFile(name, b"fake-audio", content_type="audio/wav"),
+        original_filename=name,
+        content_type="audio/wav",
+        size_bytes=10,
+    )
+
+
+@pytest.mark.django_db
+def test_transcription_jobs_command_submits_then_completes_on_poll(
+    clinic, doctor, appointment, settings, tmp_path, monkeypatch
+):
+    from io import StringIO
+
+    import apps.scheduling.services.visit_transcription as vt_mod
+    from apps.scheduling.models import VisitTranscriptionJob
+    from django.core.management import call_command
+
+    settings.MEDIA_ROOT = tmp_path
+    settings.WHISPER_SERVICE_URL = "http://whisper:9000"
+    settings.WHISPER_ASYNC_JOBS = True
+    job = _queued_job(clinic, doctor, appointment)
+    submitted = []
+    monkeypatch.setattr(
+        vt_mod, "submit_whisper_job", lambda **kw: submitted.append(kw["audio_bytes"]) or "w-1"
+    )
+
+    call_command("process_visit_transcription_jobs", stdout=StringIO())
+    job.refresh_from_db()
+    assert submitted == [b"fake-audio"]
+    assert job.status == VisitTranscriptionJob.Status.PROCESSING
+    assert job.whisper_job_id == "w-1"
+
+    remote = {"status": "running", "transcript": "Owner reports cough."}
+    monkeypatch.setattr(vt_mod, "get_whisper_job", lambda job_id: remote)
+    call_command("process_visit_transcription_jobs", stdout=StringIO())
+    job.refresh_from_db()
+    assert job.status == VisitTranscriptionJob.Status.PROCESSING
+    assert job.transcript == "Owner reports cough."
+
+    remote = {"status": "completed", "transcript": "Owner reports cough. Suspected kennel cough."}
+    monkeypatch.setattr(vt_mod, "get_whisper_job", lambda job_id: remote)
+    monkeypatch.setattr(
+        vt_mod,
+        "structure_transcript_with_claude",
+        lambda *, transcript: {
+            "anamnesis": "Owner reports cough.",
+            "diagnosis": "Suspected kennel cough.",
+        },
+    )
+    out = StringIO()
+    call_command("process_visit_transcription_jobs", stdout=out)
+    job.refresh_from_db()
+    assert job.status == VisitTranscriptionJob.Status.COMPLETED
+    assert "Finished 1" in out.getvalue()
+    assert ClinicalExam.objects.get(appointment=appointment).initial_diagnosis == (
+        "Suspected kennel cough"
+    )
+
+
+@pytest.mark.django_db
+def test_transcription_jobs_command_backs_off_when_service_busy(
+    clinic, doctor, appointment, settings, tmp_path, monkeypatch
+):
+    from io import StringIO
+
+    import apps.scheduling.services.visit_transcription as vt_mod
+    from apps.scheduling.models import VisitTranscriptionJob
+    from django.core.management import call_command
+
+    settings.MEDIA_ROOT = tmp_path
+    settings.WHISPER_SERVICE_URL = "http://whisper:9000"
+    settings.WHISPER_ASYNC_JOBS = True
+    first = _queued_job(clinic, doctor, appointment, "a.wav")
+    second = _queued_job(clinic, doctor, appointment, "b.wav")
+    calls = []
+
+    def busy(**kw):
+        calls.append(kw["filename"])
+        raise vt_mod.WhisperServiceBusy(15)
+
+    monkeypatch.setattr(vt_mod, "submit_whisper_job", busy)
+    out = StringIO()
+    call_command("process_visit_transcription_jobs", stdout=out)
+
+    assert calls == ["a.wav"]
+    assert "busy" in out.getvalue()
+    for job in (first, second):
+        job.refresh_from_db()
+        assert job.status == VisitTranscriptionJob.Status.PENDING
+
+
+@pytest.mark.django_db
+def test_transcription_job_unknown_to_service_is_requeued(
+    clinic, doctor, appointment, settings, tmp_path, monkeypatch
+):
+    import apps.scheduling.services.visit_transcription as vt_mod
+    from apps.scheduling.models import VisitTranscriptionJob
+    from apps.scheduling.services.visit_transcription_job import poll_visit_transcription_job
+
+    settings.MEDIA_ROOT = tmp_path
+    job = _queued_job(clinic, doctor, appointment)
+    job.status = VisitTranscriptionJob.Status.PROCESSING
+    job.whisper_job_id = "gone"
+    job.save()
+    monkeypatch.setattr(vt_mod, "get_whisper_job", lambda job_id: None)
+
+    assert poll_visit_transcription_job(job) == "missing"
+    job.refresh_from_db()
+    assert job.status == VisitTranscriptionJob.Status.PENDING
+    assert job.whisper_job_id == ""
+
+
+@pytest.mark.django_db
+def test_finished_job_is_completed_by_one_poller_only(
+    clinic, doctor, appointment, settings, tmp_path, monkeypatch
+):
+    import apps.scheduling.services.visit_transcription as vt_mod
+    from apps.scheduling.models import VisitTranscriptionJob
+    from apps.scheduling.services.visit_transcription_job import poll_visit_transcription_job
+
+    settings.MEDIA_ROOT = tmp_path
+    job = _queued_job(clinic, doctor, appointment)
+    job.status = VisitTranscriptionJob.Status.PROCESSING
+    job.whisper_job_id = "w-1"
+    job.save()
+    stale_copy = VisitTranscriptionJob.objects.get(pk=job.pk)
+    structured = []
+    monkeypatch.setattr(
+        vt_mod, "get_whisper_job", lambda job_id: {"status": "completed", "transcript": "Cough."}
+    )
+    monkeypatch.setattr(
+        vt_mod,
+        "structure_transcript_with_claude",
+        lambda *, transcript: structured.append(transcript) or {"anamnesis": "Cough."},
+    )
+
+    assert poll_visit_transcription_job(job) == "completed"
+    assert poll_visit_transcription_job(stale_copy) == "claimed"
+    assert structured == ["Cough."]
+    job.refresh_from_db()
+    assert job.status == VisitTranscriptionJob.Status.COMPLETED
+
+
+@pytest.mark.django_db
+def test_submitted_jobs_past_the_deadline_fail(
+    clinic, doctor, appointment, settings, tmp_path, monkeypatch
+):
+    from datetime import timedelta
+    from io import StringIO
+
+    import apps.scheduling.services.visit_transcription as vt_mod
+    from apps.scheduling.models import VisitTranscriptionJob
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    settings.MEDIA_ROOT = tmp_path
+    settings.WHISPER_SERVICE_URL = "http://whisper:9000"
+    settings.WHISPER_ASYNC_JOBS = True
+    settings.WHISPER_JOB_DEADLINE_MINUTES = 60
+    stalled = _queued_job(clinic, doctor, appointment, "a.wav")
+    fresh = _queued_job(clinic, doctor, appointment, "b.wav")
+    now = timezone.now()
+    for job, submitted_at in ((stalled, now - timedelta(minutes=61)), (fresh, now)):
+        job.status = VisitTranscriptionJob.Status.PROCESSING
+        job.whisper_job_id = f"w-{job.pk}"
+        job.whisper_submitted_at = submitted_at
+        job.save()
+
+    def unreachable(job_id):
+        raise vt_mod.VisitTranscriptionError("connection refused")
+
+    monkeypatch.setattr(vt_mod, "get_whisper_job", unreachable)
+    out = StringIO()
+    call_command("process_visit_transcription_jobs", stdout=out)
+
+    assert "1 stalled job(s) failed" in out.getvalue()
+    stalled.refresh_from_db()
+    fresh.refresh_from_db()
+    assert stalled.status == VisitTranscriptionJob.Status.FAILED
+    assert "deadline" in stalled.last_error
+    assert fresh.status == VisitTranscriptionJob.Status.PROCESSING
+
+
+def test_async_jobs_are_off_by_default():
+    from apps.scheduling.management.commands.process_visit_transcription_jobs import (
+        _async_enabled,
+    )
+
+    assert _async_enabled() is False
+
+
+def test_submit_whisper_job_maps_429_to_busy(settings):
+    from email.message import Message
+    from unittest.mock import patch
+    from urllib.error import HTTPError
+
+    from apps.scheduling.services.visit_transcription import WhisperServiceBusy, submit_whisper_job
+
+    settings.WHISPER_SERVICE_URL = "http://whisper:9000"
+    headers = Message()
+    headers["Retry-After"] = "7"
+
+    def saturated(req, timeout):
+        raise HTTPError(req.full_url, 429, "Too Many Requests", headers, None)
+
+    with patch("apps.scheduling.services.visit_transcription.request.urlopen", saturated):
+        with pytest.raises(WhisperServiceBusy) as excinfo:
+            submit_whisper_job(audio_bytes=b"a", filename="v.wav", content_type="audio/wav")
+    assert excinfo.value.retry_after == 7
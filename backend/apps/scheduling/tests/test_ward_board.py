@@ -0,0 +1,186 @@
+"""Materialized ward board behind the nursing dashboard."""
+
+from datetime import timedelta
+
+import pytest
+from apps.scheduling.models import (
+    HospitalMedicationAdministration,
+    HospitalMedicationOrder,
+    HospitalStay,
+    HospitalStayNote,
+)
+from apps.scheduling.services import ward_board
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+DASHBOARD_URL = "/api/hospital-stays/nursing-dashboard/?window_minutes=30&limit=50"
+
+
+def _admit(clinic, patient, doctor, *, hours_ago=1, orders=0):
+    now = timezone.now()
+    stay = HospitalStay.objects.create(
+        clinic=clinic,
+        patient=patient,
+        attending_vet=doctor,
+        status=HospitalStay.Status.ADMITTED,
+        admitted_at=now - timedelta(hours=hours_ago),
+    )
+    for n in range(orders):
+        HospitalMedicationOrder.objects.create(
+            clinic=clinic,
+            hospital_stay=stay,
+            medication_name=f"Med {n}",
+            dose="1.00",
+            frequency_hours=8,
+            starts_at=now - timedelta(hours=1),
+        )
+    return stay
+
+
+def _item(response, stay):
+    return next(item for item in response.data["items"] if item["id"] == stay.id)
+
+
+@pytest.mark.django_db
+def test_unchanged_poll_is_a_304_without_queries(doctor, patient, api_client):
+    stay = _admit(doctor.clinic, patient, doctor, orders=2)
+    api_client.force_authenticate(user=doctor)
+
+    first = api_client.get(DASHBOARD_URL)
+    assert first.status_code == 200
+    assert _item(first, stay)["meds_overdue"] == 2
+    etag = first["ETag"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        again = api_client.get(DASHBOARD_URL, HTTP_IF_NONE_MATCH=etag)
+    assert again.status_code == 304
+    assert again["ETag"] == etag
+    assert len(ctx.captured_queries) == 0
+
+
+@pytest.mark.django_db
+def test_changes_rebuild_only_the_affected_stay(
+    doctor, patient, api_client, monkeypatch, django_capture_on_commit_callbacks
+):
+    quiet = _admit(doctor.clinic, patient, doctor, hours_ago=3, orders=1)
+    busy = _admit(doctor.clinic, patient, doctor, hours_ago=2, orders=1)
+    api_client.force_authenticate(user=doctor)
+    etag = api_client.get(DASHBOARD_URL)["ETag"]
+
+    rebuilt = []
+    build_rows = ward_board._build_rows
+
+    def spy(clinic_id, stay_ids, now):
+        rebuilt.append(list(stay_ids))
+        return build_rows(clinic_id, stay_ids, now)
+
+    monkeypatch.setattr(ward_board, "_build_rows", spy)
+    with django_capture_on_commit_callbacks(execute=True):
+        HospitalStayNote.objects.create(
+            clinic=doctor.clinic, hospital_stay=busy, created_by=doctor, note="Eating well"
+        )
+        order = busy.medication_orders.get()
+        HospitalMedicationAdministration.objects.create(
+            clinic=doctor.clinic,
+            medication_order=order,
+            administered_at=timezone.now(),
+            status=HospitalMedicationAdministration.Status.GIVEN,
+        )
+
+    response = api_client.get(DASHBOARD_URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert rebuilt == [[busy.id]]
+    assert _item(response, busy)["last_round_note"] == "Eating well"
+    assert _item(response, busy)["meds_overdue"] == 0
+    assert _item(response, quiet)["meds_overdue"] == 1
+    assert [item["id"] for item in response.data["items"]] == [quiet.id, busy.id]
+
+
+@pytest.mark.django_db
+def test_patient_and_vet_edits_refresh_the_row(
+    doctor, patient, api_client, monkeypatch, django_capture_on_commit_callbacks
+):
+    stay = _admit(doctor.clinic, patient, doctor)
+    api_client.force_authenticate(user=doctor)
+    etag = api_client.get(DASHBOARD_URL)["ETag"]
+
+    rebuilt = []
+    build_rows = ward_board._build_rows
+
+    def spy(clinic_id, stay_ids, now):
+        rebuilt.append(list(stay_ids))
+        return build_rows(clinic_id, stay_ids, now)
+
+    monkeypatch.setattr(ward_board, "_build_rows", spy)
+    patient.name = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        patient.save()
+    api_client.get(DASHBOARD_URL, HTTP_IF_NONE_MATCH=etag)
+    assert rebuilt == [[stay.id]]
+
+    doctor.first_name = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        doctor.save()
+    api_client.get(DASHBOARD_URL)
+    assert rebuilt == [[stay.id], [stay.id]]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        doctor.save(update_fields=["last_login"])
+    api_client.get(DASHBOARD_URL)
+    assert len(rebuilt) == 2
+
+
+@pytest.mark.django_db
+def test_discharge_drops_the_stay_from_the_board(
+    doctor, patient, api_client, django_capture_on_commit_callbacks
+):
+    stay = _admit(doctor.clinic, patient, doctor)
+    api_client.force_authenticate(user=doctor)
+    assert api_client.get(DASHBOARD_URL).data["count"] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(f"/api/hospital-stays/{stay.id}/discharge/")
+    assert response.status_code == 200
+    assert api_client.get(DASHBOARD_URL).data["count"] == 0
+
+
+@pytest.mark.django_db
+def test_due_counts_follow_the_clock_without_writes(doctor, patient):
+    stay = _admit(doctor.clinic, patient, doctor)
+    HospitalMedicationOrder.objects.create(
+        clinic=doctor.clinic,
+        hospital_stay=stay,
+        medication_name="Meloxicam",
+        dose="1.00",
+        frequency_hours=24,
+        starts_at=timezone.now() + timedelta(minutes=45),
+        ends_at=timezone.now() + timedelta(hours=3),
+    )
+    now = timezone.now()
+
+    def counts(at):
+        items, etag = ward_board.ward_board_items(
+            [doctor.clinic_id], now=at, window_minutes=30, limit=50
+        )
+        return (items[0]["meds_overdue"], items[0]["meds_due_soon"]), etag
+
+    later_counts, later_etag = counts(now + timedelta(minutes=20))
+    first_counts, first_etag = counts(now)
+    assert first_counts == (0, 0)
+    assert later_counts == (0, 1)
+    assert counts(now + timedelta(hours=1))[0] == (1, 0)
+    assert counts(now + timedelta(hours=4))[0] == (0, 0)
+    assert first_etag != later_etag
+
+
+@pytest.mark.django_db
+@override_settings(WARD_BOARD_CACHE_TIMEOUT=0)
+def test_board_works_with_the_cache_disabled(doctor, patient, api_client):
+    stay = _admit(doctor.clinic, patient, doctor, orders=1)
+    api_client.force_authenticate(user=doctor)
+    first = api_client.get(DASHBOARD_URL)
+    assert _item(first, stay)["meds_overdue"] == 1
+    assert api_client.get(DASHBOARD_URL, HTTP_IF_NONE_MATCH=first["ETag"]).status_code == 304
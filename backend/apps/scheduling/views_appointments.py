@@ -23,6 +23,7 @@ from apps.patients.models import Patient
 from apps.scheduling.models import Appointment
 from apps.scheduling.serializers import AppointmentReadSerializer, AppointmentWriteSerializer
 from apps.tenancy.access import accessible_clinic_ids, clinic_instance_for_mutation
+from apps.tenancy.dates import clinic_timezone, date_range_q
 
 
 class AppointmentViewSet(viewsets.ModelViewSet):
@@ -42,7 +43,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             .order_by("starts_at")
         )
 
-        # Optional filters
+        # Optional filters (clinic-local dates -> starts_at ranges, so the index is usable)
+        zone = clinic_timezone(user.clinic_id)
         day = self.request.query_params.get("date")
         if day:
             try:
@@ -50,7 +52,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             except ValueError:
                 parsed = None
             if parsed:
-                qs = qs.filter(starts_at__date=parsed)
+                qs = qs.filter(date_range_q("starts_at", parsed, parsed, tz=zone))
 
         date_from = self.request.query_params.get("date_from")
         if date_from:
@@ -59,7 +61,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             except ValueError:
                 parsed_from = None
             if parsed_from:
-                qs = qs.filter(starts_at__date__gte=parsed_from)
+                qs = qs.filter(date_range_q("starts_at", parsed_from, None, tz=zone))
 
         date_to = self.request.query_params.get("date_to")
         if date_to:
@@ -68,7 +70,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             except ValueError:
                 parsed_to = None
             if parsed_to:
-                qs = qs.filter(starts_at__date__lte=parsed_to)
+                qs = qs.filter(date_range_q("starts_at", None, parsed_to, tz=zone))
 
         vet_id = self.request.query_params.get("vet")
         if vet_id:
@@ -171,19 +173,19 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         GET /api/appointments/cancellation-analytics/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
         Aggregate cancelled/no-show insights for operations.
         """
+        zone = clinic_timezone(request.user.clinic_id)
         date_from = parse_date(request.query_params.get("date_from") or "")
         date_to = parse_date(request.query_params.get("date_to") or "")
         if not date_to:
-            date_to = timezone.localdate()
+            date_to = timezone.localdate(timezone=zone)
         if not date_from:
             date_from = date_to - timedelta(days=30)
         if date_from > date_to:
             return Response({"detail": "date_from cannot be after date_to."}, status=400)
 
         qs = Appointment.objects.filter(
+            date_range_q("starts_at", date_from, date_to, tz=zone),
             clinic_id__in=accessible_clinic_ids(request.user),
-            starts_at__date__gte=date_from,
-            starts_at__date__lte=date_to,
             status__in=[Appointment.Status.CANCELLED, Appointment.Status.NO_SHOW],
         )
 
@@ -16,7 +16,7 @@ from apps.scheduling.services.scheduling_assistant import (
     generate_optimization_suggestions,
 )
 from apps.tenancy.access import accessible_clinic_ids, clinic_id_for_mutation
-from apps.tenancy.models import Clinic
+from apps.tenancy.clinic_settings import is_clinic_feature_enabled
 
 logger = logging.getLogger(__name__)
 DEFAULT_WINDOW_DAYS = 14
@@ -93,7 +93,7 @@ class SchedulingCapacityInsightsView(APIView):
 
     def get(self, request):
         cid = clinic_id_for_mutation(request.user, request=request, instance_clinic_id=None)
-        if not Clinic.objects.filter(pk=cid, feature_ai_enabled=True).exists():
+        if not is_clinic_feature_enabled(cid, "feature_ai_enabled"):
             return Response(
                 {"detail": "Scheduling assistant is disabled for this clinic."},
                 status=403,
@@ -171,7 +171,7 @@ class SchedulingOptimizationSuggestionsView(APIView):
 
     def get(self, request):
         cid = clinic_id_for_mutation(request.user, request=request, instance_clinic_id=None)
-        if not Clinic.objects.filter(pk=cid, feature_ai_enabled=True).exists():
+        if not is_clinic_feature_enabled(cid, "feature_ai_enabled"):
             return Response(
                 {"detail": "Scheduling assistant is disabled for this clinic."},
                 status=403,
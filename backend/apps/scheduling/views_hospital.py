@@ -5,10 +5,10 @@ from datetime import timedelta
 from io import StringIO
 
 from django.conf import settings
-from django.db import transaction
-from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.db import IntegrityError, transaction
 from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.http import parse_etags
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -39,11 +39,22 @@ from apps.scheduling.serializers import (
     HospitalStayWriteSerializer,
 )
 from apps.scheduling.services.discharge_pdf import render_discharge_summary_pdf_bytes
+from apps.scheduling.services.medication_due import (
+    active_medication_orders,
+    medication_due,
+    overdue_medication_orders_count,
+)
+from apps.scheduling.services.medication_schedule import generate_medication_schedules
+from apps.scheduling.services.ward_board import ward_board_items
 from apps.tenancy.access import (
     accessible_clinic_ids,
     clinic_id_for_mutation,
 )
 
+DUPLICATE_PENDING_SLOT_ERROR = {
+    "scheduled_for": ["A pending administration is already scheduled for this time."]
+}
+
 
 class HospitalStayViewSet(viewsets.ModelViewSet):
     """
@@ -55,7 +66,10 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         # Staff dashboard should be accessible to broader clinic staff.
-        if self.action in ("nursing_dashboard", "shift_handover_report"):
+        if self.action in (
+            "nursing_dashboard",
+            "shift_handover_report",
+        ):
             return [IsAuthenticated(), HasClinic(), IsStaffOrVet()]
         return [permission() for permission in self.permission_classes]
 
@@ -109,111 +123,27 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
             return Response({"detail": "limit must be between 1 and 200."}, status=400)
 
         now = timezone.now()
-        horizon = now + timedelta(minutes=window_minutes)
-
-        latest_note_qs = HospitalStayNote.objects.filter(
-            clinic_id__in=accessible_clinic_ids(request.user),
-            hospital_stay_id=OuterRef("pk"),
-        ).order_by("-created_at", "-id")
-
-        stays = (
-            HospitalStay.objects.filter(
-                clinic_id__in=accessible_clinic_ids(request.user),
-                status=HospitalStay.Status.ADMITTED,
-            )
-            .select_related("patient", "attending_vet")
-            .annotate(
-                last_round_note=Subquery(latest_note_qs.values("note")[:1]),
-                last_round_at=Subquery(latest_note_qs.values("created_at")[:1]),
-                open_high_priority_tasks=Count(
-                    "tasks",
-                    filter=Q(tasks__priority=HospitalStayTask.Priority.HIGH)
-                    & ~Q(tasks__status=HospitalStayTask.Status.COMPLETED),
-                    distinct=True,
-                ),
-            )
-            .order_by("-admitted_at")[:limit_int]
+        items, etag = ward_board_items(
+            accessible_clinic_ids(request.user),
+            now=now,
+            window_minutes=window_minutes,
+            limit=limit_int,
         )
-
-        stay_ids = [s.id for s in stays]
-        meds_overdue_by_stay: dict[int, int] = {sid: 0 for sid in stay_ids}
-        meds_due_soon_by_stay: dict[int, int] = {sid: 0 for sid in stay_ids}
-
-        if stay_ids:
-            orders = (
-                HospitalMedicationOrder.objects.filter(
-                    clinic_id__in=accessible_clinic_ids(request.user),
-                    hospital_stay_id__in=stay_ids,
-                    is_active=True,
-                )
-                .annotate(
-                    last_given_at=Max(
-                        "administrations__administered_at",
-                        filter=Q(
-                            administrations__status=HospitalMedicationAdministration.Status.GIVEN
-                        ),
-                    )
-                )
-                .only(
-                    "id",
-                    "hospital_stay_id",
-                    "frequency_hours",
-                    "starts_at",
-                    "ends_at",
-                    "is_active",
-                )
-            )
-
-            for order in orders:
-                if order.ends_at and order.ends_at < now:
-                    continue
-                freq = int(order.frequency_hours or 0)
-                if freq <= 0:
-                    continue
-                next_due_at = (
-                    order.starts_at
-                    if not order.last_given_at
-                    else (order.last_given_at + timedelta(hours=freq))
-                )
-                if next_due_at < now:
-                    meds_overdue_by_stay[order.hospital_stay_id] = (
-                        meds_overdue_by_stay.get(order.hospital_stay_id, 0) + 1
-                    )
-                elif next_due_at <= horizon:
-                    meds_due_soon_by_stay[order.hospital_stay_id] = (
-                        meds_due_soon_by_stay.get(order.hospital_stay_id, 0) + 1
-                    )
-
-        items = []
-        for stay in stays:
-            data = HospitalStayReadSerializer(stay).data
-            data["last_round_note"] = getattr(stay, "last_round_note", None)
-            last_round_at = getattr(stay, "last_round_at", None)
-            data["last_round_at"] = last_round_at.isoformat() if last_round_at else None
-            data["open_high_priority_tasks"] = int(getattr(stay, "open_high_priority_tasks", 0))
-            data["meds_overdue"] = meds_overdue_by_stay.get(stay.id, 0)
-            data["meds_due_soon"] = meds_due_soon_by_stay.get(stay.id, 0)
-            items.append(data)
-
-        # Sort by urgency: overdue meds, then due soon, then open high tasks, then most recent admit
-        items.sort(
-            key=lambda x: (
-                -int(x.get("meds_overdue") or 0),
-                -int(x.get("meds_due_soon") or 0),
-                -int(x.get("open_high_priority_tasks") or 0),
-                x.get("admitted_at") or "",
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=304)
+        else:
+            response = Response(
+                {
+                    "now": now.isoformat(),
+                    "window_minutes": window_minutes,
+                    "count": len(items),
+                    "items": items,
+                },
+                status=200,
             )
-        )
-
-        return Response(
-            {
-                "now": now.isoformat(),
-                "window_minutes": window_minutes,
-                "count": len(items),
-                "items": items,
-            },
-            status=200,
-        )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
 
     @action(detail=False, methods=["get"], url_path="shift-handover-report")
     def shift_handover_report(self, request):
@@ -268,32 +198,9 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
             .order_by("-created_at", "-id")
         )
 
-        active_orders = HospitalMedicationOrder.objects.filter(
-            clinic_id__in=accessible_clinic_ids(request.user),
-            is_active=True,
-            hospital_stay__status=HospitalStay.Status.ADMITTED,
+        overdue_medication_count = overdue_medication_orders_count(
+            accessible_clinic_ids(request.user), now=now, admitted_only=True
         )
-        overdue_medication_count = 0
-        for order in active_orders:
-            if order.ends_at and order.ends_at < now:
-                continue
-            last_given = (
-                HospitalMedicationAdministration.objects.filter(
-                    clinic_id__in=accessible_clinic_ids(request.user),
-                    medication_order=order,
-                    status=HospitalMedicationAdministration.Status.GIVEN,
-                    administered_at__isnull=False,
-                )
-                .order_by("-administered_at", "-id")
-                .first()
-            )
-            next_due_at = (
-                order.starts_at
-                if not last_given
-                else (last_given.administered_at + timedelta(hours=int(order.frequency_hours or 0)))
-            )
-            if next_due_at < now:
-                overdue_medication_count += 1
 
         admissions = []
         for stay in admissions_qs[:100]:
@@ -435,32 +342,9 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
             round((tasks_completed / tasks_total) * 100.0, 2) if tasks_total else 0.0
         )
 
-        overdue_medication_orders_count = 0
-        active_orders = HospitalMedicationOrder.objects.filter(
-            clinic_id__in=accessible_clinic_ids(request.user),
-            is_active=True,
-            hospital_stay__status=HospitalStay.Status.ADMITTED,
+        overdue_medication_count = overdue_medication_orders_count(
+            accessible_clinic_ids(request.user), now=now, admitted_only=True
         )
-        for order in active_orders:
-            if order.ends_at and order.ends_at < now:
-                continue
-            last_given = (
-                HospitalMedicationAdministration.objects.filter(
-                    clinic_id__in=accessible_clinic_ids(request.user),
-                    medication_order=order,
-                    status=HospitalMedicationAdministration.Status.GIVEN,
-                    administered_at__isnull=False,
-                )
-                .order_by("-administered_at", "-id")
-                .first()
-            )
-            next_due_at = (
-                order.starts_at
-                if not last_given
-                else (last_given.administered_at + timedelta(hours=int(order.frequency_hours or 0)))
-            )
-            if next_due_at < now:
-                overdue_medication_orders_count += 1
 
         payload = {
             "now": now.isoformat(),
@@ -473,7 +357,7 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
                 "summary_completion_pct": summary_completion_pct,
                 "finalized_summary_pct": finalized_summary_pct,
                 "task_completion_pct": task_completion_pct,
-                "overdue_medication_orders_count": overdue_medication_orders_count,
+                "overdue_medication_orders_count": overdue_medication_count,
             },
         }
 
@@ -598,33 +482,9 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
                 }
             )
 
-        overdue_count = 0
-        now = timezone.now()
-        active_orders = HospitalMedicationOrder.objects.filter(
-            clinic_id__in=accessible_clinic_ids(self.request.user),
-            hospital_stay=stay,
-            is_active=True,
+        overdue_count = overdue_medication_orders_count(
+            accessible_clinic_ids(self.request.user), now=timezone.now(), hospital_stay=stay
         )
-        for order in active_orders:
-            if order.ends_at and order.ends_at < now:
-                continue
-            last_given = (
-                HospitalMedicationAdministration.objects.filter(
-                    clinic_id__in=accessible_clinic_ids(self.request.user),
-                    medication_order=order,
-                    status=HospitalMedicationAdministration.Status.GIVEN,
-                    administered_at__isnull=False,
-                )
-                .order_by("-administered_at", "-id")
-                .first()
-            )
-            next_due_at = (
-                order.starts_at
-                if not last_given
-                else (last_given.administered_at + timedelta(hours=int(order.frequency_hours or 0)))
-            )
-            if next_due_at < now:
-                overdue_count += 1
         if overdue_count:
             warnings.append(
                 {
@@ -997,13 +857,9 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
         )
         return Response(HospitalMedicationOrderReadSerializer(medication).data, status=201)
 
-    @action(detail=True, methods=["post"], url_path="medications/generate-schedule")
-    def generate_medication_schedule(self, request, pk=None):
-        """
-        Generate pending medication administrations for active medication orders.
-        Idempotent: does not create duplicates for the same (order, scheduled_for).
-        """
-        stay = self.get_object()
+    @staticmethod
+    def _schedule_window(request):
+        """(window_start, window_end) from horizon_hours/past_hours, or an error Response."""
         horizon_hours = request.query_params.get("horizon_hours", "24")
         past_hours = request.query_params.get("past_hours", "12")
         try:
@@ -1015,77 +871,61 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
             return Response({"detail": "horizon_hours must be between 1 and 336."}, status=400)
         if past_hours_int < 0 or past_hours_int > 24 * 14:
             return Response({"detail": "past_hours must be between 0 and 336."}, status=400)
-
         now = timezone.now()
-        window_start = now - timedelta(hours=past_hours_int)
-        window_end = now + timedelta(hours=horizon_hours_int)
+        return now - timedelta(hours=past_hours_int), now + timedelta(hours=horizon_hours_int)
 
-        orders = HospitalMedicationOrder.objects.filter(
-            clinic_id__in=accessible_clinic_ids(request.user),
+    @action(detail=True, methods=["post"], url_path="medications/generate-schedule")
+    def generate_medication_schedule(self, request, pk=None):
+        """
+        Generate pending medication administrations for active medication orders.
+        Idempotent: does not create duplicates for the same (order, scheduled_for).
+        """
+        stay = self.get_object()
+        window = self._schedule_window(request)
+        if isinstance(window, Response):
+            return window
+        window_start, window_end = window
+
+        result = generate_medication_schedules(
+            accessible_clinic_ids(request.user),
+            window_start=window_start,
+            window_end=window_end,
             hospital_stay=stay,
-            is_active=True,
-        ).order_by("-created_at", "-id")
-
-        created = 0
-        skipped_existing = 0
-
-        with transaction.atomic():
-            for order in orders:
-                if order.ends_at and order.ends_at < window_start:
-                    continue
-                if order.starts_at and order.starts_at > window_end:
-                    continue
-
-                freq = int(order.frequency_hours or 0)
-                if freq <= 0:
-                    continue
-
-                start = max(order.starts_at, window_start)
-                # Align to the order starts_at cadence
-                delta_seconds = (start - order.starts_at).total_seconds()
-                steps = int(delta_seconds // (freq * 3600))
-                candidate = order.starts_at + timedelta(hours=freq * steps)
-                while candidate < start:
-                    candidate = candidate + timedelta(hours=freq)
-
-                existing_times = set(
-                    HospitalMedicationAdministration.objects.filter(
-                        clinic_id__in=accessible_clinic_ids(request.user),
-                        medication_order=order,
-                        scheduled_for__gte=window_start,
-                        scheduled_for__lte=window_end,
-                    ).values_list("scheduled_for", flat=True)
-                )
-
-                to_create = []
-                while candidate <= window_end:
-                    if order.ends_at and candidate > order.ends_at:
-                        break
-                    if candidate in existing_times:
-                        skipped_existing += 1
-                    else:
-                        to_create.append(
-                            HospitalMedicationAdministration(
-                                clinic_id=order.clinic_id,
-                                medication_order=order,
-                                scheduled_for=candidate,
-                                status=HospitalMedicationAdministration.Status.PENDING,
-                            )
-                        )
-                        existing_times.add(candidate)
-                    candidate = candidate + timedelta(hours=freq)
-
-                if to_create:
-                    HospitalMedicationAdministration.objects.bulk_create(to_create)
-                    created += len(to_create)
-
+        )
         return Response(
             {
                 "hospital_stay_id": stay.id,
                 "window_start": window_start.isoformat(),
                 "window_end": window_end.isoformat(),
-                "created": created,
-                "skipped_existing": skipped_existing,
+                "created": result.created,
+                "skipped_existing": result.skipped_existing,
+            },
+            status=200,
+        )
+
+    @action(detail=False, methods=["post"], url_path="medications/generate-schedule")
+    def generate_ward_medication_schedule(self, request):
+        """
+        Shift-change variant of generate-schedule: every active order of every admitted stay
+        in the user's clinics (network-wide for network admins) in one pass.
+        """
+        window = self._schedule_window(request)
+        if isinstance(window, Response):
+            return window
+        window_start, window_end = window
+
+        result = generate_medication_schedules(
+            accessible_clinic_ids(request.user),
+            window_start=window_start,
+            window_end=window_end,
+        )
+        return Response(
+            {
+                "window_start": window_start.isoformat(),
+                "window_end": window_end.isoformat(),
+                "orders": result.orders,
+                "created": result.created,
+                "skipped_existing": result.skipped_existing,
             },
             status=200,
         )
@@ -1143,10 +983,14 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
 
         serializer = HospitalMedicationAdministrationWriteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        administration = serializer.save(
-            clinic_id=medication.clinic_id,
-            medication_order=medication,
-        )
+        try:
+            with transaction.atomic():
+                administration = serializer.save(
+                    clinic_id=medication.clinic_id,
+                    medication_order=medication,
+                )
+        except IntegrityError:
+            return Response(DUPLICATE_PENDING_SLOT_ERROR, status=400)
         if administration.status == HospitalMedicationAdministration.Status.GIVEN:
             if administration.administered_at is None:
                 administration.administered_at = timezone.now()
@@ -1209,7 +1053,11 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
             administration, data=request.data, partial=True
         )
         serializer.is_valid(raise_exception=True)
-        administration = serializer.save()
+        try:
+            with transaction.atomic():
+                administration = serializer.save()
+        except IntegrityError:
+            return Response(DUPLICATE_PENDING_SLOT_ERROR, status=400)
         if administration.status == HospitalMedicationAdministration.Status.GIVEN:
             if administration.administered_at is None:
                 administration.administered_at = timezone.now()
@@ -1258,56 +1106,31 @@ class HospitalStayViewSet(viewsets.ModelViewSet):
         now = timezone.now()
         horizon = now + timedelta(minutes=window_minutes)
 
-        orders = HospitalMedicationOrder.objects.filter(
-            clinic_id__in=accessible_clinic_ids(request.user),
-            hospital_stay=stay,
-            is_active=True,
-        ).order_by("-created_at", "-id")
+        orders = (
+            active_medication_orders(
+                accessible_clinic_ids(request.user), now=now, hospital_stay=stay
+            )
+            .select_related("created_by")
+            .order_by("-created_at", "-id")
+        )
 
         due_items = []
         for order in orders:
-            if order.ends_at and order.ends_at < now:
-                continue
             if order.starts_at and order.starts_at > horizon:
                 continue
-
-            last_given = (
-                HospitalMedicationAdministration.objects.filter(
-                    clinic_id__in=accessible_clinic_ids(request.user),
-                    medication_order=order,
-                    status=HospitalMedicationAdministration.Status.GIVEN,
-                    administered_at__isnull=False,
-                )
-                .order_by("-administered_at", "-id")
-                .first()
-            )
-
-            if last_given is None:
-                next_due_at = order.starts_at
-            else:
-                next_due_at = last_given.administered_at + timedelta(
-                    hours=int(order.frequency_hours or 0)
-                )
-
-            overdue = next_due_at < now
-            if overdue and not include_overdue_bool:
+            due = medication_due(order, now=now)
+            if due.is_overdue and not include_overdue_bool:
                 continue
-            if not overdue and next_due_at > horizon:
+            if not due.is_overdue and due.next_due_at > horizon:
                 continue
 
             due_items.append(
                 {
                     "medication_order": HospitalMedicationOrderReadSerializer(order).data,
-                    "last_given_at": (
-                        last_given.administered_at.isoformat()
-                        if last_given and last_given.administered_at
-                        else None
-                    ),
-                    "next_due_at": next_due_at.isoformat(),
-                    "is_overdue": overdue,
-                    "overdue_minutes": (
-                        int((now - next_due_at).total_seconds() // 60) if overdue else 0
-                    ),
+                    "last_given_at": due.last_given_at.isoformat() if due.last_given_at else None,
+                    "next_due_at": due.next_due_at.isoformat(),
+                    "is_overdue": due.is_overdue,
+                    "overdue_minutes": due.overdue_minutes,
                 }
             )
 
@@ -19,7 +19,10 @@ from apps.scheduling.serializers import (
     WaitingQueueEntryReadSerializer,
     WaitingQueueEntryWriteSerializer,
 )
-from apps.scheduling.services.availability import compute_availability
+from apps.scheduling.services.availability import (
+    compute_availability,
+    compute_availability_range,
+)
 from apps.tenancy.access import accessible_clinic_ids, clinic_id_for_mutation
 
 
@@ -127,19 +130,39 @@ class AvailabilityRoomsView(APIView):
                 status=400,
             )
         try:
-            parse_date(date_str)
+            day = parse_date(date_str)
         except ValueError:
+            day = None
+        if day is None:
             return Response(
                 {"detail": "Invalid date. Use YYYY-MM-DD."},
                 status=400,
             )
 
-        rooms = Room.objects.filter(clinic_id__in=accessible_clinic_ids(user)).order_by(
-            "display_order", "name"
+        rooms = list(
+            Room.objects.filter(clinic_id__in=accessible_clinic_ids(user)).order_by(
+                "display_order", "name"
+            )
         )
         slot_minutes = 30
         result = []
 
+        # One batched availability computation per clinic instead of one per room
+        room_ids_by_clinic: dict[int, list[int]] = {}
+        for room in rooms:
+            room_ids_by_clinic.setdefault(room.clinic_id, []).append(room.id)
+        availability = {}
+        for clinic_id, room_ids in room_ids_by_clinic.items():
+            availability.update(
+                compute_availability_range(
+                    clinic_id=clinic_id,
+                    date_from=day,
+                    date_to=day,
+                    room_ids=room_ids,
+                    slot_minutes=slot_minutes,
+                )
+            )
+
         def dump_interval(interval):
             return {
                 "start": interval.start.isoformat(),
@@ -147,13 +170,7 @@ class AvailabilityRoomsView(APIView):
             }
 
         for room in rooms:
-            data = compute_availability(
-                clinic_id=room.clinic_id,
-                date_str=date_str,
-                vet_id=None,
-                room_id=room.id,
-                slot_minutes=slot_minutes,
-            )
+            data = availability[(day, None, room.id)]
             result.append(
                 {
                     "id": room.id,
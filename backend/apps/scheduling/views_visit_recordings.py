@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import threading
 import uuid
+from contextlib import closing
 
 from django.conf import settings
 from django.core.files.base import ContentFile
@@ -240,9 +241,9 @@ class VisitRecordingUploadView(APIView):
                     response = _recording_helpers._get_recording_s3_client().get_object(
                         Bucket=bucket, Key=input_s3_key
                     )
-                    audio_bytes = response["Body"].read()
                     recording.refresh_from_db()
-                    process_visit_recording(recording=recording, audio_bytes=audio_bytes)
+                    with closing(response["Body"]) as audio_file:
+                        process_visit_recording(recording=recording, audio_file=audio_file)
                 except Exception as exc:
                     recording.refresh_from_db()
                     recording.status = VisitRecording.Status.FAILED
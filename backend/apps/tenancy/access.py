@@ -3,10 +3,18 @@ Clinic access helpers for staff and network-level users.
 
 Use :func:`accessible_clinic_ids` in querysets (``clinic_id__in=...``).
 Use :func:`clinic_id_for_mutation` when creating or updating rows that require a single clinic.
+
+Inside :func:`clinic_access_scope` (every HTTP request gets one from
+``ClinicAccessScopeMiddleware``) the clinic list of a user is resolved once and reused, so a
+handler calling :func:`accessible_clinic_ids` ten times costs one cache round trip, not ten.
 """
 
 from __future__ import annotations
 
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 from django.conf import settings
@@ -19,6 +27,50 @@ if TYPE_CHECKING:
 SUPERUSER_CLINIC_IDS_CACHE_KEY = "tenancy:superuser_clinic_ids"
 
 
+@dataclass
+class ClinicAccessScope:
+    """Per-request memo of resolved clinic lists plus counters (see the middleware)."""
+
+    clinic_ids: dict[tuple, tuple[int, ...]] = field(default_factory=dict)
+    lookups: int = 0
+    memo_hits: int = 0
+    cache_round_trips: int = 0
+
+
+_scope_var: ContextVar[ClinicAccessScope | None] = ContextVar("clinic_access_scope", default=None)
+
+
+@contextmanager
+def clinic_access_scope() -> Iterator[ClinicAccessScope]:
+    """
+    Memoize :func:`accessible_clinic_ids` per user for the duration of the block.
+    Nested blocks join the outermost scope.
+    """
+    scope = _scope_var.get()
+    if scope is not None:
+        yield scope
+        return
+    scope = ClinicAccessScope()
+    token = _scope_var.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope_var.reset(token)
+
+
+def clear_clinic_access_scope() -> None:
+    """Forget clinic lists memoized in the active scope (called when clinics change)."""
+    scope = _scope_var.get()
+    if scope is not None:
+        scope.clinic_ids.clear()
+
+
+def _count_cache_round_trip() -> None:
+    scope = _scope_var.get()
+    if scope is not None:
+        scope.cache_round_trips += 1
+
+
 def network_clinic_ids_cache_key(network_id: int) -> str:
     return f"tenancy:network_clinic_ids:{network_id}"
 
@@ -28,12 +80,14 @@ def _accessible_clinic_ids_cache_timeout() -> int:
 
 
 def _all_clinic_ids_for_superuser() -> list[int]:
+    _count_cache_round_trip()
     cached = cache.get(SUPERUSER_CLINIC_IDS_CACHE_KEY)
     if cached is not None:
         return list(cached)
     from apps.tenancy.models import Clinic
 
     ids = list(Clinic.objects.order_by().values_list("id", flat=True))
+    _count_cache_round_trip()
     cache.set(
         SUPERUSER_CLINIC_IDS_CACHE_KEY,
         ids,
@@ -44,12 +98,14 @@ def _all_clinic_ids_for_superuser() -> list[int]:
 
 def _clinic_ids_for_network(network_id: int) -> list[int]:
     key = network_clinic_ids_cache_key(network_id)
+    _count_cache_round_trip()
     cached = cache.get(key)
     if cached is not None:
         return list(cached)
     from apps.tenancy.models import Clinic
 
     ids = list(Clinic.objects.filter(network_id=network_id).order_by().values_list("id", flat=True))
+    _count_cache_round_trip()
     cache.set(key, ids, _accessible_clinic_ids_cache_timeout())
     return ids
 
@@ -61,9 +117,34 @@ def accessible_clinic_ids(user: AbstractBaseUser | None) -> list[int]:
     - Superuser: all clinics.
     - Network admin: all clinics in ``user.network``.
     - Everyone else: at most ``[user.clinic_id]`` when set.
+
+    Returns a new list on every call; callers may mutate it.
     """
     if not user or not user.is_authenticated:
         return []
+    scope = _scope_var.get()
+    if scope is None:
+        return _resolve_accessible_clinic_ids(user)
+    # The attributes that decide the result are part of the key, so a user edited
+    # mid-request (role change, clinic move) is resolved again.
+    key = (
+        user.pk,
+        bool(getattr(user, "is_superuser", False)),
+        getattr(user, "role", None),
+        getattr(user, "network_id", None),
+        getattr(user, "clinic_id", None),
+    )
+    scope.lookups += 1
+    ids = scope.clinic_ids.get(key)
+    if ids is None:
+        ids = tuple(_resolve_accessible_clinic_ids(user))
+        scope.clinic_ids[key] = ids
+    else:
+        scope.memo_hits += 1
+    return list(ids)
+
+
+def _resolve_accessible_clinic_ids(user) -> list[int]:
     if getattr(user, "is_superuser", False):
         return _all_clinic_ids_for_superuser()
 
@@ -0,0 +1,191 @@
+"""
+Read-through cache of per-clinic configuration (feature flags, portal booking, reminders).
+
+Hot paths — KSeF / AI feature checks, the reminder processor, public portal endpoints,
+clinic-local date handling — read a :class:`ClinicSettings` snapshot instead of querying
+``Clinic``. Snapshots live in a small in-process LRU in front of the Django cache. Local
+entries are trusted for ``CLINIC_SETTINGS_LOCAL_TTL_SECONDS`` before the shared entry is read
+again, so other processes pick up a change within that window; ``apps.tenancy.signals`` drops
+the shared entries (and this process's local ones) once a clinic save or delete commits.
+
+The shared cache holds plain dicts under keys that embed the field list, so a deploy that
+changes :class:`ClinicSettings` never reads entries written by the previous version.
+
+Writes that bypass ``Clinic.save()`` (``QuerySet.update``, raw SQL) must call
+:func:`invalidate_clinic_settings` themselves, from ``transaction.on_commit`` when inside a
+transaction.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Clinic
+
+
+@dataclass(frozen=True)
+class ClinicSettings:
+    id: int
+    slug: str
+    name: str
+    network_id: int | None
+    timezone: str
+    online_booking_enabled: bool
+    portal_booking_deposit_amount: Decimal
+    portal_booking_deposit_line_label: str
+    reminder_sms_enabled: bool
+    feature_ai_enabled: bool
+    feature_ksef_enabled: bool
+    feature_portal_deposit_enabled: bool
+
+    def effective_portal_deposit_amount(self) -> Decimal:
+        """Same rule as :meth:`Clinic.effective_portal_deposit_amount`."""
+        if not self.feature_portal_deposit_enabled:
+            return Decimal("0")
+        return self.portal_booking_deposit_amount or Decimal("0")
+
+    def to_clinic(self) -> Clinic:
+        """
+        A ``Clinic`` instance carrying only the cached fields, usable as a foreign-key value
+        without a query. Other fields are deferred and load on first access.
+        """
+        names = [f.name for f in fields(self)]
+        return Clinic.from_db(DEFAULT_DB_ALIAS, names, [getattr(self, n) for n in names])
+
+
+_FIELDS = tuple(f.name for f in fields(ClinicSettings))
+_SCHEMA = hashlib.sha1(",".join(_FIELDS).encode(), usedforsecurity=False).hexdigest()[:8]
+
+
+@dataclass
+class _LocalEntry:
+    checked_at: float
+    value: ClinicSettings
+
+
+_local: OrderedDict[int, _LocalEntry] = OrderedDict()
+_local_slugs: dict[str, int] = {}
+_lock = threading.Lock()
+_stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+
+def clinic_settings_cache_key(clinic_id: int) -> str:
+    return f"tenancy:clinic_settings:{_SCHEMA}:{clinic_id}"
+
+
+def clinic_slug_cache_key(slug: str) -> str:
+    return f"tenancy:clinic_slug:{slug}"
+
+
+def _cache_timeout() -> int:
+    return int(getattr(settings, "CLINIC_SETTINGS_CACHE_TIMEOUT", 300))
+
+
+def _remember(value: ClinicSettings, now: float) -> None:
+    max_entries = int(getattr(settings, "CLINIC_SETTINGS_LRU_SIZE", 1024))
+    with _lock:
+        _local[value.id] = _LocalEntry(checked_at=now, value=value)
+        _local.move_to_end(value.id)
+        _local_slugs[value.slug] = value.id
+        while len(_local) > max_entries:
+            _, evicted = _local.popitem(last=False)
+            _local_slugs.pop(evicted.value.slug, None)
+
+
+def load_clinic_settings(clinic_id: int) -> ClinicSettings | None:
+    row = Clinic.objects.filter(pk=clinic_id).values(*_FIELDS).first()
+    return ClinicSettings(**row) if row else None
+
+
+def get_clinic_settings(clinic_id: int | None) -> ClinicSettings | None:
+    """Settings of the clinic, or ``None`` when it does not exist."""
+    if not clinic_id:
+        return None
+    now = time.monotonic()
+    ttl = float(getattr(settings, "CLINIC_SETTINGS_LOCAL_TTL_SECONDS", 5))
+    with _lock:
+        entry = _local.get(clinic_id)
+        if entry is not None and now - entry.checked_at < ttl:
+            _local.move_to_end(clinic_id)
+            _stats["local_hits"] += 1
+            return entry.value
+
+    row = cache.get(clinic_settings_cache_key(clinic_id))
+    if row is None:
+        value = load_clinic_settings(clinic_id)
+        if value is None:
+            return None
+        cache.set(clinic_settings_cache_key(clinic_id), asdict(value), _cache_timeout())
+        stat = "misses"
+    else:
+        value = ClinicSettings(**row)
+        stat = "shared_hits"
+    with _lock:
+        _stats[stat] += 1
+    _remember(value, now)
+    return value
+
+
+def get_clinic_settings_by_slug(slug: str) -> ClinicSettings | None:
+    if not slug:
+        return None
+    with _lock:
+        clinic_id = _local_slugs.get(slug)
+    if clinic_id is None:
+        clinic_id = cache.get(clinic_slug_cache_key(slug))
+    if clinic_id is not None:
+        value = get_clinic_settings(clinic_id)
+        if value is not None and value.slug == slug:
+            return value
+
+    clinic_id = Clinic.objects.filter(slug=slug).values_list("id", flat=True).first()
+    if clinic_id is None:
+        return None
+    cache.set(clinic_slug_cache_key(slug), clinic_id, _cache_timeout())
+    return get_clinic_settings(clinic_id)
+
+
+def is_clinic_feature_enabled(clinic_id: int | None, flag: str) -> bool:
+    """``flag`` is a boolean ``ClinicSettings`` field, e.g. ``"feature_ksef_enabled"``."""
+    value = get_clinic_settings(clinic_id)
+    return bool(value and getattr(value, flag))
+
+
+def invalidate_clinic_settings(clinic_id: int | None, *slugs: str | None) -> None:
+    """Drop the clinic's cached settings (and slug lookups) here and in the shared cache."""
+    keys = [clinic_slug_cache_key(s) for s in slugs if s]
+    if clinic_id is not None:
+        keys.append(clinic_settings_cache_key(clinic_id))
+    cache.delete_many(keys)
+    with _lock:
+        entry = _local.pop(clinic_id, None) if clinic_id is not None else None
+        for slug in {*(s for s in slugs if s), *([entry.value.slug] if entry else [])}:
+            _local_slugs.pop(slug, None)
+
+
+def clinic_settings_cache_stats() -> dict[str, float]:
+    """In-process counters: local LRU hits, shared (Django cache) hits, DB loads."""
+    with _lock:
+        stats: dict[str, float] = dict(_stats)
+        stats["size"] = len(_local)
+    lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["local_hits"] + stats["shared_hits"]) / lookups if lookups else 0.0
+    return stats
+
+
+def clear_clinic_settings_cache() -> None:
+    """Drop the in-process LRU and reset counters (tests / admin tooling)."""
+    with _lock:
+        _local.clear()
+        _local_slugs.clear()
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,60 @@
+"""
+Clinic-local date ranges as index-friendly datetime bounds.
+
+Filtering with ``created_at__date__gte`` casts every row's timestamp to a date in the query
+(``(created_at AT TIME ZONE ...)::date`` on Postgres), so the ``(clinic, created_at)`` indexes
+cannot be used. ``date_range_q`` instead turns local calendar dates into a half-open
+``[start of date_from, start of day after date_to)`` range of aware datetimes, which compares
+the bare column and keeps the predicate sargable.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .clinic_settings import get_clinic_settings
+
+
+def clinic_timezone(clinic_id: int | None) -> tzinfo:
+    """The clinic's configured zone; falls back to the active (``TIME_ZONE``) zone."""
+    clinic_settings = get_clinic_settings(clinic_id)
+    name = clinic_settings.timezone if clinic_settings else ""
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.get_current_timezone()
+
+
+def local_day_start(day: date, tz: tzinfo | None = None) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=tz or timezone.get_current_timezone())
+
+
+def local_date_range(
+    date_from: date | None, date_to: date | None, tz: tzinfo | None = None
+) -> tuple[datetime | None, datetime | None]:
+    """``(start, end)`` with ``start <= t < end`` covering both dates inclusively."""
+    start = local_day_start(date_from, tz) if date_from else None
+    end = local_day_start(date_to + timedelta(days=1), tz) if date_to else None
+    return start, end
+
+
+def date_range_q(
+    field: str, date_from: date | None, date_to: date | None, *, tz: tzinfo | None = None
+) -> Q:
+    """
+    ``Q`` equivalent of ``{field}__date__gte=date_from, {field}__date__lte=date_to`` (either
+    bound may be ``None``), evaluated in ``tz`` (default: active timezone).
+    """
+    start, end = local_date_range(date_from, date_to, tz)
+    q = Q()
+    if start is not None:
+        q &= Q(**{f"{field}__gte": start})
+    if end is not None:
+        q &= Q(**{f"{field}__lt": end})
+    return q
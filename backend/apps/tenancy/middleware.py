@@ -0,0 +1,33 @@
+import logging
+
+from django.conf import settings
+
+from .access import clinic_access_scope
+
+logger = logging.getLogger(__name__)
+
+CLINIC_ACCESS_SCOPE_HEADER = "X-Clinic-Access-Scope"
+
+
+class ClinicAccessScopeMiddleware:
+    """
+    Resolve each user's accessible clinics at most once per request.
+
+    With ``DEBUG`` on, the response carries the per-request counters in
+    ``X-Clinic-Access-Scope`` (``lookups``, ``memo_hits``, ``cache_round_trips``).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with clinic_access_scope() as scope:
+            response = self.get_response(request)
+        if settings.DEBUG:
+            counters = (
+                f"lookups={scope.lookups}; memo_hits={scope.memo_hits}; "
+                f"cache_round_trips={scope.cache_round_trips}"
+            )
+            response[CLINIC_ACCESS_SCOPE_HEADER] = counters
+            logger.debug("clinic access scope %s %s", request.path, counters)
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenancy", "0008_clinic_feature_flags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="clinic",
+            name="timezone",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
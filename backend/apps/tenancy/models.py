@@ -47,6 +47,8 @@ class Clinic(models.Model):
     address = models.CharField(max_length=512, blank=True)
     phone = models.CharField(max_length=64, blank=True)
     email = models.EmailField(blank=True)
+    # IANA zone for clinic-local calendar dates in reports/analytics (blank = TIME_ZONE)
+    timezone = models.CharField(max_length=64, blank=True)
 
     # Polish tax identifier (10 digits, no dashes)
     nip = models.CharField(max_length=10, blank=True)
@@ -1,4 +1,7 @@
+from functools import partial
+
 from django.core.cache import cache
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
@@ -6,8 +9,10 @@ from apps.tenancy.models import Clinic
 
 from .access import (
     SUPERUSER_CLINIC_IDS_CACHE_KEY,
+    clear_clinic_access_scope,
     network_clinic_ids_cache_key,
 )
+from .clinic_settings import invalidate_clinic_settings
 
 
 def invalidate_clinic_access_list_caches(clinic: Clinic) -> None:
@@ -19,20 +24,30 @@ def invalidate_clinic_access_list_caches(clinic: Clinic) -> None:
     nets.discard(None)
     for nid in nets:
         cache.delete(network_clinic_ids_cache_key(nid))
+    clear_clinic_access_scope()
 
 
 @receiver(pre_save, sender=Clinic)
 def _clinic_stash_old_network_id(sender, instance: Clinic, **kwargs) -> None:
+    prev = None
     if instance.pk:
-        prev = Clinic.objects.filter(pk=instance.pk).values_list("network_id", flat=True).first()
-        instance._old_network_id = prev  # type: ignore[attr-defined]
-    else:
-        instance._old_network_id = None  # type: ignore[attr-defined]
+        prev = Clinic.objects.filter(pk=instance.pk).values_list("network_id", "slug").first()
+    instance._old_network_id = prev[0] if prev else None  # type: ignore[attr-defined]
+    instance._old_slug = prev[1] if prev else None  # type: ignore[attr-defined]
 
 
 @receiver(post_save, sender=Clinic)
 def _clinic_saved_invalidate_access_cache(sender, instance: Clinic, **kwargs) -> None:
     invalidate_clinic_access_list_caches(instance)
+    # After commit, so a concurrent request cannot re-cache the old settings meanwhile.
+    transaction.on_commit(
+        partial(
+            invalidate_clinic_settings,
+            instance.pk,
+            instance.slug,
+            getattr(instance, "_old_slug", None),
+        )
+    )
 
 
 @receiver(post_delete, sender=Clinic)
@@ -40,3 +55,5 @@ def _clinic_deleted_invalidate_access_cache(sender, instance: Clinic, **kwargs)
     cache.delete(SUPERUSER_CLINIC_IDS_CACHE_KEY)
     if instance.network_id:
         cache.delete(network_clinic_ids_cache_key(instance.network_id))
+    clear_clinic_access_scope()
+    transaction.on_commit(partial(invalidate_clinic_settings, instance.pk, instance.slug))
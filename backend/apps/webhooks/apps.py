@@ -6,3 +6,6 @@ class WebhooksConfig(AppConfig):
     name = "apps.webhooks"
     label = "webhooks"
     verbose_name = "Integration webhooks"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
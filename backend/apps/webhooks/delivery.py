@@ -0,0 +1,258 @@
+"""
+Durable webhook delivery queue.
+
+``WebhookDelivery`` rows are the queue: ``dispatch`` inserts them as ``pending`` and hands the
+ids to RQ (or leaves them for ``process_webhook_deliveries``). Workers claim due rows with
+``select_for_update(skip_locked=True)`` and lease them by pushing ``next_attempt_at`` forward,
+so RQ jobs and sweeper runs can overlap without double-sending; results are written back only
+for rows still under the batch's lease. POSTs go through the shared
+keep-alive pool in ``transport``, at most ``subscription.max_concurrency`` at a time per
+endpoint; failures are retried with exponential backoff until ``WEBHOOK_MAX_ATTEMPTS``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import random
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from itertools import batched
+
+from config.http_pool import HttpResult
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import WebhookDelivery, WebhookSubscription
+from .transport import get_connection_pool
+
+logger = logging.getLogger(__name__)
+
+_UPDATE_FIELDS = [
+    "status",
+    "http_status",
+    "response_body",
+    "error",
+    "attempts",
+    "next_attempt_at",
+    "last_attempt_at",
+    "completed_at",
+]
+# Client errors worth retrying; every other 4xx is treated as a permanent rejection.
+_RETRYABLE_HTTP_STATUSES = frozenset({408, 425, 429})
+
+
+@dataclass
+class DeliveryCounts:
+    delivered: int = 0
+    retrying: int = 0
+    failed: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(getattr(self, f.name) for f in fields(self))
+
+    def add(self, other: DeliveryCounts) -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Exponential backoff (base * 2^(attempts-1), capped) with up to 10% jitter."""
+    base = float(getattr(settings, "WEBHOOK_RETRY_BASE_SECONDS", 30))
+    cap = float(getattr(settings, "WEBHOOK_RETRY_MAX_SECONDS", 3600))
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return delay + random.uniform(0, delay * 0.1)
+
+
+def claim_due_deliveries(
+    *,
+    now: datetime,
+    limit: int,
+    lease_seconds: int,
+    delivery_ids: Sequence[int] | None = None,
+) -> list[WebhookDelivery]:
+    """Lock and lease up to ``limit`` due deliveries (optionally restricted to ``delivery_ids``)."""
+    with transaction.atomic():
+        qs = WebhookDelivery.objects.select_for_update(skip_locked=True).filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+            status__in=[WebhookDelivery.Status.PENDING, WebhookDelivery.Status.RETRYING],
+        )
+        if delivery_ids is not None:
+            qs = qs.filter(id__in=list(delivery_ids))
+        ids = list(qs.order_by("created_at", "id").values_list("id", flat=True)[:limit])
+        if not ids:
+            return []
+        WebhookDelivery.objects.filter(id__in=ids).update(
+            next_attempt_at=now + timedelta(seconds=lease_seconds)
+        )
+    return list(
+        WebhookDelivery.objects.filter(id__in=ids)
+        .select_related("subscription")
+        .order_by("created_at", "id")
+    )
+
+
+def process_delivery_batch(
+    deliveries: list[WebhookDelivery], *, now: datetime, workers: int | None = None
+) -> DeliveryCounts:
+    """POST claimed deliveries (per-subscription lanes, optional batching) and persist results."""
+    counts = DeliveryCounts()
+    if not deliveries:
+        return counts
+    leases = {delivery.id: delivery.next_attempt_at for delivery in deliveries}
+
+    by_subscription: dict[int, list[WebhookDelivery]] = {}
+    for delivery in deliveries:
+        by_subscription.setdefault(delivery.subscription_id, []).append(delivery)
+
+    lanes: list[list[tuple[WebhookSubscription, tuple[WebhookDelivery, ...]]]] = []
+    for group in by_subscription.values():
+        sub = group[0].subscription
+        if not sub.is_active:
+            for delivery in group:
+                _finish(delivery, now=now, status=WebhookDelivery.Status.FAILED)
+                delivery.error = "Subscription is inactive."
+                counts.failed += 1
+            continue
+        units = list(batched(group, max(1, sub.max_batch_size)))
+        lane_count = max(1, min(sub.max_concurrency, len(units)))
+        # Units for one endpoint are spread over at most ``max_concurrency`` sequential lanes.
+        for i in range(lane_count):
+            lanes.append([(sub, unit) for unit in units[i::lane_count]])
+
+    results = _run_lanes(lanes, workers=workers)
+    max_attempts = int(getattr(settings, "WEBHOOK_MAX_ATTEMPTS", 6))
+    for unit, result, exc in results:
+        for delivery in unit:
+            delivery.attempts += 1
+            delivery.last_attempt_at = now
+            if result is not None:
+                delivery.http_status = result.status
+                delivery.response_body = result.body[:2000].decode("utf-8", errors="replace")
+            if result is not None and 200 <= result.status < 300:
+                _finish(delivery, now=now, status=WebhookDelivery.Status.DELIVERED)
+                delivery.error = ""
+                counts.delivered += 1
+                continue
+
+            delivery.error = str(exc)[:1000] if exc is not None else f"HTTP {result.status}"
+            retryable = exc is not None or (
+                result.status >= 500 or result.status in _RETRYABLE_HTTP_STATUSES
+            )
+            if retryable and delivery.attempts < max_attempts:
+                delivery.status = WebhookDelivery.Status.RETRYING
+                delivery.next_attempt_at = now + timedelta(
+                    seconds=retry_delay_seconds(delivery.attempts)
+                )
+                counts.retrying += 1
+            else:
+                _finish(delivery, now=now, status=WebhookDelivery.Status.FAILED)
+                counts.failed += 1
+
+    with transaction.atomic():
+        # A lane can outlive the lease; rows re-claimed meanwhile keep the newer worker's state.
+        held = set(
+            WebhookDelivery.objects.select_for_update()
+            .filter(
+                id__in=list(leases),
+                status__in=[WebhookDelivery.Status.PENDING, WebhookDelivery.Status.RETRYING],
+                next_attempt_at__in=set(leases.values()),
+            )
+            .values_list("id", "next_attempt_at")
+        )
+        current = [d for d in deliveries if (d.id, leases[d.id]) in held]
+        if len(current) < len(deliveries):
+            logger.warning(
+                "Webhook lease lost for %s delivery(ies); results discarded",
+                len(deliveries) - len(current),
+            )
+        WebhookDelivery.objects.bulk_update(current, _UPDATE_FIELDS)
+    return counts
+
+
+def deliver_due_webhooks(
+    *,
+    limit: int = 0,
+    batch_size: int = 100,
+    delivery_ids: Sequence[int] | None = None,
+) -> DeliveryCounts:
+    """Claim-and-send loop shared by the RQ task, the worker command and inline mode."""
+    lease = int(getattr(settings, "WEBHOOK_DELIVERY_LEASE_SECONDS", 120))
+    totals = DeliveryCounts()
+    while not limit or totals.total < limit:
+        now = timezone.now()
+        size = min(batch_size, limit - totals.total) if limit else batch_size
+        claimed = claim_due_deliveries(
+            now=now, limit=size, lease_seconds=lease, delivery_ids=delivery_ids
+        )
+        if not claimed:
+            break
+        totals.add(process_delivery_batch(claimed, now=now))
+    return totals
+
+
+def build_request(
+    sub: WebhookSubscription, unit: Sequence[WebhookDelivery]
+) -> tuple[bytes, dict[str, str]]:
+    if sub.max_batch_size > 1:
+        body_dict = {
+            "event": "batch",
+            "clinic_id": sub.clinic_id,
+            "events": [d.payload for d in unit],
+        }
+    else:
+        body_dict = unit[0].payload
+    body_bytes = json.dumps(body_dict, separators=(",", ":"), default=str).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "Veto-Webhook/1.0",
+        "X-Veto-Webhook-Delivery": ",".join(str(d.id) for d in unit),
+    }
+    secret = (sub.secret or "").strip()
+    if secret:
+        sig = hmac.new(secret.encode("utf-8"), body_bytes, hashlib.sha256).hexdigest()
+        headers["X-Veto-Webhook-Signature"] = f"sha256={sig}"
+    return body_bytes, headers
+
+
+def _run_lanes(lanes, *, workers: int | None):
+    # HTTP only in pool threads; all database writes happen back on the calling thread.
+    pool = get_connection_pool()
+
+    def _run_lane(lane):
+        out = []
+        for sub, unit in lane:
+            body, headers = build_request(sub, unit)
+            try:
+                out.append((unit, pool.post(sub.target_url, body, headers), None))
+            except Exception as exc:  # noqa: BLE001 - recorded on the delivery and retried
+                logger.warning("Webhook POST failed subscription=%s error=%s", sub.id, exc)
+                out.append((unit, None, exc))
+        return out
+
+    if workers is None:
+        workers = int(getattr(settings, "WEBHOOK_DELIVERY_WORKERS", 8))
+    results: list[tuple[tuple[WebhookDelivery, ...], HttpResult | None, Exception | None]] = []
+    if workers <= 1 or len(lanes) <= 1:
+        for lane in lanes:
+            results.extend(_run_lane(lane))
+        return results
+    with ThreadPoolExecutor(
+        max_workers=min(workers, len(lanes)), thread_name_prefix="webhook-send"
+    ) as executor:
+        for lane_results in executor.map(_run_lane, lanes):
+            results.extend(lane_results)
+    return results
+
+
+def _finish(delivery: WebhookDelivery, *, now: datetime, status: str) -> None:
+    delivery.status = status
+    delivery.next_attempt_at = None
+    delivery.completed_at = now
@@ -4,26 +4,52 @@ Dispatch outbound integration webhooks after audit-relevant events.
 
 from __future__ import annotations
 
-import hashlib
-import hmac
-import json
 import logging
 import threading
-import urllib.error
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import close_old_connections, transaction
+from django.utils import timezone
 
+from .delivery import deliver_due_webhooks
 from .models import WebhookDelivery, WebhookEventType, WebhookSubscription
+from .rq_tasks import try_enqueue_webhook_deliveries
 
 logger = logging.getLogger(__name__)
 
 _DISPATCHABLE_ACTIONS = frozenset(c[0] for c in WebhookEventType.choices)
 
+_handoff_lock = threading.Lock()
+_handoff_pool: ThreadPoolExecutor | None = None
 
-def maybe_dispatch_webhooks_for_audit(
+
+def subscription_cache_key(clinic_id: int) -> str:
+    return f"webhooks:subscriptions:{clinic_id}"
+
+
+def invalidate_subscription_cache(clinic_id: int) -> None:
+    cache.delete(subscription_cache_key(clinic_id))
+
+
+def active_subscriptions(clinic_id: int) -> list[tuple[int, list[str]]]:
+    """``(subscription_id, event_types)`` for a clinic's active subscriptions (cached)."""
+    key = subscription_cache_key(clinic_id)
+    subs = cache.get(key)
+    if subs is None:
+        subs = [
+            (sub_id, list(event_types or []))
+            for sub_id, event_types in WebhookSubscription.objects.filter(
+                clinic_id=clinic_id, is_active=True
+            ).values_list("id", "event_types")
+        ]
+        cache.set(key, subs, int(getattr(settings, "WEBHOOK_SUBSCRIPTION_CACHE_TIMEOUT", 300)))
+    return subs
+
+
+def build_event_payload(
     *,
     clinic_id: int,
     action: str,
@@ -31,17 +57,13 @@ def maybe_dispatch_webhooks_for_audit(
     entity_id: str,
     after: dict,
     metadata: dict,
-    actor,
-) -> None:
-    if action not in _DISPATCHABLE_ACTIONS:
-        return
-    actor_id = (
-        getattr(actor, "id", None) if actor and getattr(actor, "is_authenticated", False) else None
-    )
-    payload = {
+    actor_id: int | None,
+    occurred_at: datetime | None = None,
+) -> dict:
+    return {
         "event": action,
         "clinic_id": clinic_id,
-        "occurred_at": datetime.now(UTC).isoformat(),
+        "occurred_at": (occurred_at or datetime.now(UTC)).isoformat(),
         "entity_type": entity_type,
         "entity_id": str(entity_id),
         "data": {
@@ -50,119 +72,124 @@ def maybe_dispatch_webhooks_for_audit(
             "actor_id": actor_id,
         },
     }
+
+
+def maybe_dispatch_webhooks_for_audit(
+    *,
+    clinic_id: int,
+    action: str,
+    entity_type: str,
+    entity_id: str,
+    after: dict,
+    metadata: dict,
+    actor,
+) -> None:
+    if action not in _DISPATCHABLE_ACTIONS:
+        return
+    actor_id = (
+        getattr(actor, "id", None) if actor and getattr(actor, "is_authenticated", False) else None
+    )
+    payload = build_event_payload(
+        clinic_id=clinic_id,
+        action=action,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        after=after,
+        metadata=metadata,
+        actor_id=actor_id,
+    )
     schedule_deliveries_for_event(clinic_id, action, payload)
 
 
+def dispatch_webhooks_for_audit_logs(logs) -> None:
+    """Fan a batch of persisted ``AuditLog`` rows out to subscriptions in one insert."""
+    deliveries = []
+    for log in logs:
+        if log.action not in _DISPATCHABLE_ACTIONS:
+            continue
+        payload = None
+        for sub_id, event_types in active_subscriptions(log.clinic_id):
+            if log.action not in event_types:
+                continue
+            if payload is None:
+                payload = build_event_payload(
+                    clinic_id=log.clinic_id,
+                    action=log.action,
+                    entity_type=log.entity_type,
+                    entity_id=log.entity_id,
+                    after=log.after,
+                    metadata=log.metadata,
+                    actor_id=log.actor_id,
+                    occurred_at=log.created_at,
+                )
+            deliveries.append(_new_delivery(sub_id, log.action, payload))
+    _queue_deliveries(deliveries)
+
+
 def schedule_deliveries_for_event(clinic_id: int, event_type: str, payload: dict) -> None:
-    subs = WebhookSubscription.objects.filter(clinic_id=clinic_id, is_active=True).only(
-        "id", "target_url", "secret", "event_types"
+    """
+    Queue one ``WebhookDelivery`` per matching subscription. Once the surrounding transaction
+    commits the rows are handed to RQ when enabled, otherwise sent from a background thread;
+    ``process_webhook_deliveries`` picks up retries and anything left behind.
+    """
+    _queue_deliveries(
+        [
+            _new_delivery(sub_id, event_type, payload)
+            for sub_id, event_types in active_subscriptions(clinic_id)
+            if event_type in event_types
+        ]
     )
-    for sub in subs:
-        types = sub.event_types or []
-        if event_type not in types:
-            continue
-        delivery = WebhookDelivery.objects.create(
-            subscription=sub,
-            event_type=event_type,
-            payload=payload,
-            status=WebhookDelivery.Status.PENDING,
-        )
-        delivery_id = delivery.id
-
-        def _spawn(did: int = delivery_id) -> None:
-            threading.Thread(
-                target=_deliver_delivery_thread_entry,
-                args=(did,),
-                daemon=True,
-            ).start()
-
-        if getattr(settings, "WEBHOOK_DELIVERY_USE_THREAD", True):
-            transaction.on_commit(_spawn)
-        else:
-            # Same thread as caller (e.g. tests): do not close DB connections — that
-            # breaks django-pytest / request transactions on PostgreSQL.
-            try:
-                _deliver_delivery(delivery_id)
-            except Exception:
-                logger.exception("Webhook delivery %s crashed", delivery_id)
-
-
-def _deliver_delivery_thread_entry(delivery_id: int) -> None:
-    close_old_connections()
-    try:
-        _deliver_delivery(delivery_id)
-    except Exception:
-        logger.exception("Webhook delivery %s crashed", delivery_id)
-    finally:
-        close_old_connections()
 
 
-def _deliver_delivery(delivery_id: int) -> None:
-    delivery = WebhookDelivery.objects.select_related("subscription").filter(pk=delivery_id).first()
-    if not delivery:
-        return
-    sub = delivery.subscription
-    body_dict = delivery.payload
-    body_bytes = json.dumps(body_dict, separators=(",", ":"), default=str).encode("utf-8")
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "Veto-Webhook/1.0",
-    }
-    secret = (sub.secret or "").strip()
-    if secret:
-        sig = hmac.new(secret.encode("utf-8"), body_bytes, hashlib.sha256).hexdigest()
-        headers["X-Veto-Webhook-Signature"] = f"sha256={sig}"
-
-    req = urllib.request.Request(
-        sub.target_url,
-        data=body_bytes,
-        method="POST",
-        headers=headers,
+def _new_delivery(subscription_id: int, event_type: str, payload: dict) -> WebhookDelivery:
+    return WebhookDelivery(
+        subscription_id=subscription_id,
+        event_type=event_type,
+        payload=payload,
+        status=WebhookDelivery.Status.PENDING,
+        next_attempt_at=timezone.now(),
     )
-    try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            raw = resp.read()[:2000]
-            text = raw.decode("utf-8", errors="replace")
-            delivery.status = WebhookDelivery.Status.DELIVERED
-            delivery.http_status = resp.status
-            delivery.response_body = text
-            delivery.completed_at = datetime.now(UTC)
-            delivery.save(
-                update_fields=[
-                    "status",
-                    "http_status",
-                    "response_body",
-                    "completed_at",
-                ]
-            )
-    except urllib.error.HTTPError as exc:
-        err_body = ""
+
+
+def _queue_deliveries(deliveries: list[WebhookDelivery]) -> None:
+    if not deliveries:
+        return
+    delivery_ids = [d.id for d in WebhookDelivery.objects.bulk_create(deliveries)]
+
+    if getattr(settings, "WEBHOOK_DELIVERY_INLINE", False):
+        # Same thread as caller (e.g. tests / debugging); blocks until the POSTs finish.
         try:
-            err_body = exc.read()[:2000].decode("utf-8", errors="replace")
+            deliver_due_webhooks(delivery_ids=delivery_ids)
         except Exception:
-            pass
-        delivery.status = WebhookDelivery.Status.FAILED
-        delivery.http_status = exc.code
-        delivery.response_body = err_body
-        delivery.error = str(exc)[:1000]
-        delivery.completed_at = datetime.now(UTC)
-        delivery.save(
-            update_fields=[
-                "status",
-                "http_status",
-                "response_body",
-                "error",
-                "completed_at",
-            ]
-        )
-    except Exception as exc:
-        delivery.status = WebhookDelivery.Status.FAILED
-        delivery.error = str(exc)[:1000]
-        delivery.completed_at = datetime.now(UTC)
-        delivery.save(
-            update_fields=[
-                "status",
-                "error",
-                "completed_at",
-            ]
-        )
+            logger.exception("Inline webhook delivery crashed ids=%s", delivery_ids)
+        return
+    transaction.on_commit(lambda: _hand_off_deliveries(delivery_ids))
+
+
+def _handoff_executor() -> ThreadPoolExecutor:
+    """Process-wide sender threads (``WEBHOOK_HANDOFF_THREADS``), created on first use."""
+    global _handoff_pool
+    with _handoff_lock:
+        if _handoff_pool is None:
+            _handoff_pool = ThreadPoolExecutor(
+                max_workers=max(1, int(getattr(settings, "WEBHOOK_HANDOFF_THREADS", 2))),
+                thread_name_prefix="webhook-handoff",
+            )
+        return _handoff_pool
+
+
+def _hand_off_deliveries(delivery_ids: list[int]) -> None:
+    if try_enqueue_webhook_deliveries(delivery_ids):
+        return
+    # Bounded: a burst of events (e.g. a bulk import) queues here instead of spawning threads.
+    _handoff_executor().submit(_deliver_in_thread, delivery_ids)
+
+
+def _deliver_in_thread(delivery_ids: list[int]) -> None:
+    close_old_connections()
+    try:
+        deliver_due_webhooks(delivery_ids=delivery_ids)
+    except Exception:
+        logger.exception("Webhook delivery thread crashed ids=%s", delivery_ids)
+    finally:
+        close_old_connections()
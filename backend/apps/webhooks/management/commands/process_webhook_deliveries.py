@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import time
+
+from apps.webhooks.delivery import DeliveryCounts, deliver_due_webhooks
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Send due outbound webhook deliveries (new and retries). Safe to run alongside RQ "
+        "workers and other instances of this command (claims use SKIP LOCKED)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=0,
+            help="Maximum deliveries per run (0 = drain until nothing is due).",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling instead of exiting when the queue is drained.",
+        )
+        parser.add_argument("--sleep", type=float, default=5.0, help="Seconds between polls.")
+
+    def handle(self, *args, **options):
+        limit = max(0, options["limit"])
+        batch_size = max(1, options["batch_size"])
+        totals = DeliveryCounts()
+        while True:
+            counts = deliver_due_webhooks(limit=limit, batch_size=batch_size)
+            totals.add(counts)
+            if not options["loop"]:
+                break
+            if not counts.total:
+                time.sleep(max(0.1, options["sleep"]))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Webhook deliveries: delivered={totals.delivered}, "
+                f"retrying={totals.retrying}, failed={totals.failed}"
+            )
+        )
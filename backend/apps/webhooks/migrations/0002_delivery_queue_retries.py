@@ -0,0 +1,63 @@
+# Generated by Django 6.1.2 on 2026-10-18 05:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhooks", "0001_initial_webhook_subscriptions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhookdelivery",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="webhookdelivery",
+            name="last_attempt_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="webhookdelivery",
+            name="next_attempt_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="webhooksubscription",
+            name="max_batch_size",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                help_text="If > 1, up to this many pending events are sent in one POST ({'events': [...]}).",
+            ),
+        ),
+        migrations.AddField(
+            model_name="webhooksubscription",
+            name="max_concurrency",
+            field=models.PositiveSmallIntegerField(
+                default=2, help_text="Maximum POSTs in flight to this endpoint at once."
+            ),
+        ),
+        migrations.AlterField(
+            model_name="webhookdelivery",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("retrying", "Retrying"),
+                    ("delivered", "Delivered"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=16,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="webhookdelivery",
+            index=models.Index(
+                fields=["status", "next_attempt_at"], name="webhooks_we_status_afd94b_idx"
+            ),
+        ),
+    ]
@@ -37,6 +37,14 @@ class WebhookSubscription(models.Model):
         help_text="List of event type strings (see WebhookEventType).",
     )
     is_active = models.BooleanField(default=True)
+    max_concurrency = models.PositiveSmallIntegerField(
+        default=2,
+        help_text="Maximum POSTs in flight to this endpoint at once.",
+    )
+    max_batch_size = models.PositiveSmallIntegerField(
+        default=1,
+        help_text="If > 1, up to this many pending events are sent in one POST ({'events': [...]}).",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -60,6 +68,7 @@ class WebhookSubscription(models.Model):
 class WebhookDelivery(models.Model):
     class Status(models.TextChoices):
         PENDING = "pending", "Pending"
+        RETRYING = "retrying", "Retrying"
         DELIVERED = "delivered", "Delivered"
         FAILED = "failed", "Failed"
 
@@ -78,6 +87,9 @@ class WebhookDelivery(models.Model):
     http_status = models.PositiveSmallIntegerField(null=True, blank=True)
     response_body = models.TextField(blank=True)
     error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_attempt_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
@@ -85,4 +97,5 @@ class WebhookDelivery(models.Model):
         ordering = ["-created_at", "-id"]
         indexes = [
             models.Index(fields=["subscription", "status", "created_at"]),
+            models.Index(fields=["status", "next_attempt_at"]),
         ]
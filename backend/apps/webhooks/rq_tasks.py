@@ -0,0 +1,56 @@
+"""
+RQ worker tasks and enqueue helpers for outbound webhooks.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def webhook_deliveries_task(delivery_ids: list[int]) -> None:
+    """RQ entrypoint: send the given deliveries and schedule a follow-up for any retries."""
+    from apps.webhooks.delivery import deliver_due_webhooks
+    from apps.webhooks.models import WebhookDelivery
+    from django.utils import timezone
+
+    counts = deliver_due_webhooks(delivery_ids=delivery_ids)
+    if not counts.retrying:
+        return
+    retries = dict(
+        WebhookDelivery.objects.filter(
+            id__in=delivery_ids, status=WebhookDelivery.Status.RETRYING
+        ).values_list("id", "next_attempt_at")
+    )
+    if retries:
+        delay = max(timedelta(0), min(retries.values()) - timezone.now())
+        try_enqueue_webhook_deliveries(list(retries), delay=delay)
+
+
+def try_enqueue_webhook_deliveries(
+    delivery_ids: list[int], *, delay: timedelta | None = None
+) -> bool:
+    """
+    Push deliveries to the default RQ queue when enabled in settings (``delay`` needs a worker
+    started with ``--with-scheduler``). Returns whether the job was enqueued.
+
+    Failures are logged; rows stay queued for ``process_webhook_deliveries``.
+    """
+    if not delivery_ids or not getattr(settings, "RQ_WEBHOOK_DELIVERY_ENQUEUE", False):
+        return False
+    try:
+        import django_rq
+
+        queue = django_rq.get_queue("default")
+        if delay:
+            queue.enqueue_in(delay, webhook_deliveries_task, delivery_ids)
+        else:
+            queue.enqueue(webhook_deliveries_task, delivery_ids)
+    except Exception:
+        logger.exception("Failed to enqueue webhook deliveries %s", delivery_ids)
+        return False
+    return True
@@ -13,11 +13,17 @@ class WebhookSubscriptionSerializer(serializers.ModelSerializer):
             "secret",
             "event_types",
             "is_active",
+            "max_concurrency",
+            "max_batch_size",
             "created_at",
             "updated_at",
         )
         read_only_fields = ("id", "created_at", "updated_at")
-        extra_kwargs = {"secret": {"write_only": True}}
+        extra_kwargs = {
+            "secret": {"write_only": True},
+            "max_concurrency": {"min_value": 1, "max_value": 16},
+            "max_batch_size": {"min_value": 1, "max_value": 100},
+        }
 
     def validate_event_types(self, value):
         if not isinstance(value, list) or not value:
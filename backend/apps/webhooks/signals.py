@@ -0,0 +1,15 @@
+"""Drop the per-clinic subscription cache used by webhook fan-out when subscriptions change."""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .dispatch import invalidate_subscription_cache
+from .models import WebhookSubscription
+
+
+@receiver(post_save, sender=WebhookSubscription)
+@receiver(post_delete, sender=WebhookSubscription)
+def _webhook_subscription_changed(sender, instance, **kwargs):
+    invalidate_subscription_cache(instance.clinic_id)
@@ -1,10 +1,41 @@
+import json
+import threading
+import time
+from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
 import pytest
 from apps.audit.services import log_audit_event
+from apps.webhooks import dispatch
+from apps.webhooks.delivery import (
+    claim_due_deliveries,
+    deliver_due_webhooks,
+    process_delivery_batch,
+)
 from apps.webhooks.models import WebhookDelivery, WebhookEventType, WebhookSubscription
+from config.http_pool import HttpResult
+from django.core.management import call_command
 from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
+
+
+def _fake_pool(*results):
+    pool = MagicMock()
+    pool.post.side_effect = list(results)
+    return pool
+
+
+def _booked_event(clinic_id, entity_id="1"):
+    log_audit_event(
+        clinic_id=clinic_id,
+        actor=None,
+        action=WebhookEventType.PORTAL_APPOINTMENT_BOOKED,
+        entity_type="appointment",
+        entity_id=entity_id,
+        after={},
+        metadata={},
+    )
 
 
 @pytest.mark.django_db
@@ -51,7 +82,7 @@ def test_receptionist_cannot_manage_webhooks(api_client, receptionist, clinic):
 
 
 @pytest.mark.django_db
-@override_settings(WEBHOOK_DELIVERY_USE_THREAD=False)
+@override_settings(WEBHOOK_DELIVERY_INLINE=True)
 def test_audit_triggers_webhook_delivery(clinic, clinic_admin):
     sub = WebhookSubscription.objects.create(
         clinic=clinic,
@@ -61,14 +92,9 @@ def test_audit_triggers_webhook_delivery(clinic, clinic_admin):
         is_active=True,
         created_by=clinic_admin,
     )
-    inner = MagicMock()
-    inner.read.return_value = b"ok"
-    inner.status = 200
-    cm = MagicMock()
-    cm.__enter__.return_value = inner
-    cm.__exit__.return_value = None
+    pool = _fake_pool(HttpResult(status=200, body=b"ok"))
 
-    with patch("apps.webhooks.dispatch.urllib.request.urlopen", return_value=cm):
+    with patch("apps.webhooks.delivery.get_connection_pool", return_value=pool):
         log_audit_event(
             clinic_id=clinic.id,
             actor=None,
@@ -83,7 +109,13 @@ def test_audit_triggers_webhook_delivery(clinic, clinic_admin):
     assert d is not None
     assert d.status == WebhookDelivery.Status.DELIVERED
     assert d.http_status == 200
+    assert d.attempts == 1
     assert d.payload["event"] == WebhookEventType.PORTAL_APPOINTMENT_BOOKED
+    url, body, headers = pool.post.call_args.args
+    assert url == "https://httpbin.org/post"
+    assert json.loads(body)["entity_id"] == "99"
+    assert headers["X-Veto-Webhook-Signature"].startswith("sha256=")
+    assert headers["X-Veto-Webhook-Delivery"] == str(d.id)
 
 
 @pytest.mark.django_db
@@ -105,3 +137,239 @@ def test_wrong_event_not_dispatched(clinic, clinic_admin):
         metadata={},
     )
     assert WebhookDelivery.objects.count() == 0
+
+
+@pytest.mark.django_db
+@override_settings(RQ_WEBHOOK_DELIVERY_ENQUEUE=True)
+def test_deliveries_are_enqueued_after_commit(
+    clinic, clinic_admin, django_capture_on_commit_callbacks
+):
+    WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        created_by=clinic_admin,
+    )
+    with patch("django_rq.get_queue") as gq:
+        with django_capture_on_commit_callbacks(execute=True):
+            _booked_event(clinic.id)
+        delivery = WebhookDelivery.objects.get()
+        assert delivery.status == WebhookDelivery.Status.PENDING
+        gq.return_value.enqueue.assert_called_once()
+        assert gq.return_value.enqueue.call_args.args[1] == [delivery.id]
+
+
+@pytest.mark.django_db
+def test_deliveries_without_rq_are_sent_from_a_thread_after_commit(
+    clinic, clinic_admin, django_capture_on_commit_callbacks
+):
+    WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        created_by=clinic_admin,
+    )
+    executor = MagicMock()
+    with patch("apps.webhooks.dispatch._handoff_executor", return_value=executor):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            _booked_event(clinic.id)
+        executor.submit.assert_not_called()
+        for callback in callbacks:
+            callback()
+    delivery = WebhookDelivery.objects.get()
+    executor.submit.assert_called_once_with(dispatch._deliver_in_thread, [delivery.id])
+
+
+@pytest.mark.django_db
+@override_settings(RQ_WEBHOOK_DELIVERY_ENQUEUE=True)
+def test_failed_enqueue_falls_back_to_a_thread(
+    clinic, clinic_admin, django_capture_on_commit_callbacks
+):
+    WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        created_by=clinic_admin,
+    )
+    with (
+        patch("django_rq.get_queue", side_effect=ConnectionError("no redis")),
+        patch("apps.webhooks.dispatch._handoff_executor") as executor,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        _booked_event(clinic.id)
+    executor.return_value.submit.assert_called_once()
+
+
+def test_handoff_threads_are_shared_and_bounded(settings):
+    settings.WEBHOOK_HANDOFF_THREADS = 2
+    with patch.object(dispatch, "_handoff_pool", None):
+        executor = dispatch._handoff_executor()
+        assert dispatch._handoff_executor() is executor
+        assert executor._max_workers == 2
+        executor.shutdown()
+
+
+@pytest.mark.django_db
+def test_worker_command_sends_queued_deliveries(clinic, clinic_admin):
+    sub = WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        created_by=clinic_admin,
+    )
+    _booked_event(clinic.id, "1")
+    _booked_event(clinic.id, "2")
+    assert sub.deliveries.filter(status=WebhookDelivery.Status.PENDING).count() == 2
+
+    pool = _fake_pool(HttpResult(200, b"ok"), HttpResult(200, b"ok"))
+    with patch("apps.webhooks.delivery.get_connection_pool", return_value=pool):
+        call_command("process_webhook_deliveries")
+
+    assert pool.post.call_count == 2
+    assert sub.deliveries.filter(status=WebhookDelivery.Status.DELIVERED).count() == 2
+
+
+@pytest.mark.django_db
+def test_results_are_not_written_after_the_lease_is_lost(clinic, clinic_admin):
+    sub = WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        created_by=clinic_admin,
+    )
+    _booked_event(clinic.id, "1")
+    _booked_event(clinic.id, "2")
+    now = timezone.now()
+    claimed = claim_due_deliveries(now=now, limit=10, lease_seconds=120)
+    assert len(claimed) == 2
+    # The lease ran out mid-send and another worker re-claimed the second delivery.
+    WebhookDelivery.objects.filter(pk=claimed[1].pk).update(
+        next_attempt_at=now + timedelta(minutes=10)
+    )
+
+    pool = _fake_pool(HttpResult(200, b"ok"), HttpResult(200, b"ok"))
+    with patch("apps.webhooks.delivery.get_connection_pool", return_value=pool):
+        process_delivery_batch(claimed, now=now, workers=1)
+
+    assert sub.deliveries.get(pk=claimed[0].pk).status == WebhookDelivery.Status.DELIVERED
+    taken = sub.deliveries.get(pk=claimed[1].pk)
+    assert (taken.status, taken.attempts) == (WebhookDelivery.Status.PENDING, 0)
+
+
+@pytest.mark.django_db
+@override_settings(WEBHOOK_MAX_ATTEMPTS=2, WEBHOOK_RETRY_BASE_SECONDS=60)
+def test_failed_delivery_retries_with_backoff_then_fails(clinic, clinic_admin):
+    sub = WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        created_by=clinic_admin,
+    )
+    _booked_event(clinic.id)
+    delivery = sub.deliveries.get()
+
+    pool = _fake_pool(HttpResult(503, b"busy"), ConnectionRefusedError("refused"))
+    with patch("apps.webhooks.delivery.get_connection_pool", return_value=pool):
+        first = deliver_due_webhooks()
+        delivery.refresh_from_db()
+        assert first.retrying == 1
+        assert delivery.status == WebhookDelivery.Status.RETRYING
+        assert delivery.attempts == 1
+        assert delivery.http_status == 503
+        delay = (delivery.next_attempt_at - delivery.last_attempt_at).total_seconds()
+        assert 60 <= delay <= 66
+
+        # Not due yet: nothing is claimed.
+        assert deliver_due_webhooks().total == 0
+
+        WebhookDelivery.objects.filter(pk=delivery.pk).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        second = deliver_due_webhooks()
+
+    delivery.refresh_from_db()
+    assert second.failed == 1
+    assert delivery.status == WebhookDelivery.Status.FAILED
+    assert delivery.attempts == 2
+    assert "refused" in delivery.error
+    assert delivery.next_attempt_at is None
+
+
+@pytest.mark.django_db
+def test_client_error_is_not_retried(clinic, clinic_admin):
+    sub = WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        created_by=clinic_admin,
+    )
+    _booked_event(clinic.id)
+    with patch(
+        "apps.webhooks.delivery.get_connection_pool",
+        return_value=_fake_pool(HttpResult(410, b"gone")),
+    ):
+        deliver_due_webhooks()
+    delivery = sub.deliveries.get()
+    assert delivery.status == WebhookDelivery.Status.FAILED
+    assert delivery.http_status == 410
+
+
+@pytest.mark.django_db
+def test_batched_subscription_gets_single_post(clinic, clinic_admin):
+    sub = WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        max_batch_size=10,
+        created_by=clinic_admin,
+    )
+    for i in range(3):
+        _booked_event(clinic.id, str(i))
+
+    pool = _fake_pool(HttpResult(202, b""))
+    with patch("apps.webhooks.delivery.get_connection_pool", return_value=pool):
+        counts = deliver_due_webhooks()
+
+    assert counts.delivered == 3
+    assert pool.post.call_count == 1
+    body = json.loads(pool.post.call_args.args[1])
+    assert body["event"] == "batch"
+    assert [e["entity_id"] for e in body["events"]] == ["0", "1", "2"]
+    assert sub.deliveries.filter(status=WebhookDelivery.Status.DELIVERED).count() == 3
+
+
+@pytest.mark.django_db
+def test_per_subscription_concurrency_limit(clinic, clinic_admin):
+    sub = WebhookSubscription.objects.create(
+        clinic=clinic,
+        target_url="https://example.com/hook",
+        event_types=[WebhookEventType.PORTAL_APPOINTMENT_BOOKED],
+        max_concurrency=2,
+        created_by=clinic_admin,
+    )
+    for i in range(6):
+        _booked_event(clinic.id, str(i))
+
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+
+    def _post(url, body, headers):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.02)
+        with lock:
+            in_flight["now"] -= 1
+        return HttpResult(200, b"ok")
+
+    pool = MagicMock()
+    pool.post.side_effect = _post
+    with (
+        override_settings(WEBHOOK_DELIVERY_WORKERS=8),
+        patch("apps.webhooks.delivery.get_connection_pool", return_value=pool),
+    ):
+        counts = deliver_due_webhooks()
+
+    assert counts.delivered == 6
+    assert in_flight["peak"] == 2
+    assert sub.deliveries.filter(status=WebhookDelivery.Status.DELIVERED).count() == 6
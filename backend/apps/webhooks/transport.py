@@ -0,0 +1,31 @@
+"""
+Keep-alive HTTP transport for outbound webhooks.
+
+One process-wide :class:`config.http_pool.KeepAlivePool`, shared by all delivery threads, so
+consecutive POSTs to the same integration reuse the TCP / TLS session instead of reconnecting
+for every event.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from config.http_pool import KeepAlivePool
+
+_pool: KeepAlivePool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> KeepAlivePool:
+    """Process-wide pool (created lazily so settings are read after Django setup)."""
+    global _pool
+    if _pool is None:
+        from django.conf import settings
+
+        with _pool_lock:
+            if _pool is None:
+                _pool = KeepAlivePool(
+                    max_idle_per_host=int(getattr(settings, "WEBHOOK_POOL_MAX_IDLE_PER_HOST", 4)),
+                    timeout=float(getattr(settings, "WEBHOOK_HTTP_TIMEOUT_SECONDS", 15)),
+                )
+    return _pool
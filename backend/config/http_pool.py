@@ -0,0 +1,114 @@
+"""
+Keep-alive HTTP/1.1 connection pool for outbound integrations (webhooks, reminder providers).
+
+Idle ``http.client`` connections are kept per (scheme, host, port) and shared by all threads of
+the process, so consecutive requests to the same origin reuse the TCP / TLS session instead of
+reconnecting for every message.
+
+A request is retried, once and on a fresh connection, only when it provably was not sent: a
+reused connection failed with ``CannotSendRequest`` or ``RemoteDisconnected`` (the server had
+closed the idle connection). Any other error, ``BadStatusLine`` or a reset included, is raised —
+the server may already have acted on the request, and resending a POST would duplicate the
+webhook, e-mail or SMS.
+"""
+
+from __future__ import annotations
+
+import http.client
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+_UNSENT_REQUEST_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest)
+
+
+@dataclass(frozen=True)
+class HttpResult:
+    status: int
+    body: bytes
+    # Header names are lower-cased.
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class KeepAlivePool:
+    def __init__(self, *, max_idle_per_host: int = 4, timeout: float = 15.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def post(self, url: str, body: bytes, headers: dict[str, str]) -> HttpResult:
+        return self.request("POST", url, body=body, headers=headers)
+
+    def request(
+        self, method: str, url: str, *, body: bytes = b"", headers: dict[str, str] | None = None
+    ) -> HttpResult:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url!r}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        host_key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        headers = {**(headers or {}), "Connection": "keep-alive"}
+
+        conn, reused = self._acquire(host_key)
+        try:
+            try:
+                result, keep = self._send(conn, method, path, body, headers)
+            except _UNSENT_REQUEST_ERRORS:
+                if not reused:
+                    raise
+                conn.close()
+                conn = self._connect(host_key)
+                result, keep = self._send(conn, method, path, body, headers)
+        except BaseException:
+            conn.close()
+            raise
+        if keep:
+            self._release(host_key, conn)
+        else:
+            conn.close()
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _send(self, conn, method, path, body, headers) -> tuple[HttpResult, bool]:
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        # The body must be drained fully before the connection can be reused.
+        data = resp.read()
+        result = HttpResult(
+            status=resp.status,
+            body=data,
+            headers={k.lower(): v for k, v in resp.getheaders()},
+        )
+        return result, not resp.will_close
+
+    def _acquire(self, host_key) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(host_key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(host_key), False
+
+    def _release(self, host_key, conn) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(host_key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _connect(self, host_key) -> http.client.HTTPConnection:
+        scheme, host, port = host_key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
@@ -121,6 +121,8 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "config.middleware.RequestContextMiddleware",
+    "apps.tenancy.middleware.ClinicAccessScopeMiddleware",
+    "apps.audit.middleware.AuditBufferMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -174,13 +176,44 @@ CACHES = get_caches_config()
 # Redis Queue (async workers); see documentation/ASYNC_JOB_QUEUE.md
 RQ_QUEUES, RQ_REPORT_EXPORT_ENQUEUE = build_rq_config()
 
+# Audit log writer — see documentation/AUDIT_LOG.md. Events are buffered per request and
+# bulk-inserted at the end of it; "redis_stream" publishes them to Redis instead and
+# `manage.py consume_audit_stream --loop` persists them.
+AUDIT_LOG_MODE = os.getenv("AUDIT_LOG_MODE", "db").strip().lower()
+AUDIT_LOG_BUFFER_MAX_EVENTS = int(os.getenv("AUDIT_LOG_BUFFER_MAX_EVENTS", "500"))
+AUDIT_LOG_REDIS_STREAM = os.getenv("AUDIT_LOG_REDIS_STREAM", "audit:events")
+AUDIT_LOG_REDIS_GROUP = os.getenv("AUDIT_LOG_REDIS_GROUP", "audit-writer")
+AUDIT_LOG_REDIS_MAXLEN = int(os.getenv("AUDIT_LOG_REDIS_MAXLEN", "1000000"))
+
 # Outbound integration webhooks — see documentation/INTEGRATION_WEBHOOKS.md
-WEBHOOK_DELIVERY_USE_THREAD = _env_bool("WEBHOOK_DELIVERY_USE_THREAD", True)
+# Deliveries are queued as WebhookDelivery rows. After commit they go to RQ when
+# RQ_WEBHOOK_DELIVERY_ENQUEUE=1 (needs Redis and an rqworker; off by default), otherwise a
+# background thread sends them; `manage.py process_webhook_deliveries` (scheduled in
+# terraform/ops.tf) sends retries and anything left behind. WEBHOOK_DELIVERY_INLINE sends in
+# the calling thread (tests / debugging; legacy WEBHOOK_DELIVERY_USE_THREAD=0 maps to it).
+RQ_WEBHOOK_DELIVERY_ENQUEUE = _env_bool("RQ_WEBHOOK_DELIVERY_ENQUEUE", False)
+WEBHOOK_DELIVERY_INLINE = _env_bool(
+    "WEBHOOK_DELIVERY_INLINE", not _env_bool("WEBHOOK_DELIVERY_USE_THREAD", True)
+)
+WEBHOOK_DELIVERY_WORKERS = int(os.getenv("WEBHOOK_DELIVERY_WORKERS", "8"))
+# Shared threads that send new deliveries after commit when RQ is off (per process).
+WEBHOOK_HANDOFF_THREADS = int(os.getenv("WEBHOOK_HANDOFF_THREADS", "2"))
+WEBHOOK_DELIVERY_LEASE_SECONDS = int(os.getenv("WEBHOOK_DELIVERY_LEASE_SECONDS", "120"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "6"))
+WEBHOOK_RETRY_BASE_SECONDS = int(os.getenv("WEBHOOK_RETRY_BASE_SECONDS", "30"))
+WEBHOOK_RETRY_MAX_SECONDS = int(os.getenv("WEBHOOK_RETRY_MAX_SECONDS", "3600"))
+WEBHOOK_HTTP_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_HTTP_TIMEOUT_SECONDS", "15"))
+WEBHOOK_SUBSCRIPTION_CACHE_TIMEOUT = int(os.getenv("WEBHOOK_SUBSCRIPTION_CACHE_TIMEOUT", "300"))
+WEBHOOK_POOL_MAX_IDLE_PER_HOST = int(os.getenv("WEBHOOK_POOL_MAX_IDLE_PER_HOST", "4"))
 
 # Superuser / network_admin clinic-id lists (see apps.tenancy.access); invalidated when Clinic rows change.
 ACCESSIBLE_CLINIC_IDS_CACHE_TIMEOUT = int(
     (os.getenv("ACCESSIBLE_CLINIC_IDS_CACHE_TIMEOUT") or "300").strip() or "300"
 )
+# Clinic settings / feature flags (apps.tenancy.clinic_settings): in-process LRU in front of the cache.
+CLINIC_SETTINGS_LRU_SIZE = int(os.getenv("CLINIC_SETTINGS_LRU_SIZE", "1024"))
+CLINIC_SETTINGS_LOCAL_TTL_SECONDS = float(os.getenv("CLINIC_SETTINGS_LOCAL_TTL_SECONDS", "5"))
+CLINIC_SETTINGS_CACHE_TIMEOUT = int(os.getenv("CLINIC_SETTINGS_CACHE_TIMEOUT", "300"))
 
 
 # Password validation
@@ -388,6 +421,20 @@ REMINDER_TWILIO_STATUS_CALLBACK_URL = os.getenv("REMINDER_TWILIO_STATUS_CALLBACK
 REMINDER_TWILIO_WEBHOOK_SECRET = os.getenv("REMINDER_TWILIO_WEBHOOK_SECRET", "")
 REMINDER_PORTAL_BASE_URL = os.getenv("REMINDER_PORTAL_BASE_URL", "")
 REMINDER_PORTAL_TOKEN_TTL_HOURS = int(os.getenv("REMINDER_PORTAL_TOKEN_TTL_HOURS", "72"))
+# Provider transport (apps/reminders/transport.py): keep-alive sessions, per-provider rate
+# limits (requests/second, 0 = unlimited) and SendGrid recipients per mail/send request.
+# The base URLs can point at `manage.py run_fake_reminder_providers` for load tests.
+REMINDER_SENDGRID_API_BASE_URL = os.getenv(
+    "REMINDER_SENDGRID_API_BASE_URL", "https://api.sendgrid.com"
+)
+REMINDER_TWILIO_API_BASE_URL = os.getenv("REMINDER_TWILIO_API_BASE_URL", "https://api.twilio.com")
+REMINDER_SENDGRID_RATE_PER_SECOND = float(os.getenv("REMINDER_SENDGRID_RATE_PER_SECOND", "10"))
+REMINDER_TWILIO_RATE_PER_SECOND = float(os.getenv("REMINDER_TWILIO_RATE_PER_SECOND", "10"))
+REMINDER_SENDGRID_BATCH_SIZE = int(os.getenv("REMINDER_SENDGRID_BATCH_SIZE", "500"))
+REMINDER_PROVIDER_TIMEOUT_SECONDS = float(os.getenv("REMINDER_PROVIDER_TIMEOUT_SECONDS", "15"))
+REMINDER_PROVIDER_CONFIG_CACHE_TIMEOUT = int(
+    os.getenv("REMINDER_PROVIDER_CONFIG_CACHE_TIMEOUT", "300")
+)
 
 # Availability defaults (MVP)
 # REMEMBER
@@ -395,11 +442,29 @@ REMINDER_PORTAL_TOKEN_TTL_HOURS = int(os.getenv("REMINDER_PORTAL_TOKEN_TTL_HOURS
 DEFAULT_CLINIC_OPEN_TIME = "09:00"
 DEFAULT_CLINIC_CLOSE_TIME = "17:00"
 DEFAULT_SLOT_MINUTES = 30
+# Portal availability snapshots (apps.scheduling.services.availability_cache); 0 disables.
+AVAILABILITY_CACHE_TIMEOUT = int(os.getenv("AVAILABILITY_CACHE_TIMEOUT", "300"))
+# Nursing-dashboard ward board snapshots (apps.scheduling.services.ward_board); 0 disables.
+WARD_BOARD_CACHE_TIMEOUT = int(os.getenv("WARD_BOARD_CACHE_TIMEOUT", "300"))
 
 # Document ingestion pipeline (single bucket for I/O)
 DOCUMENTS_DATA_S3_BUCKET = os.getenv("DOCUMENTS_DATA_S3_BUCKET", "")
 DOCUMENTS_S3_REGION = os.getenv("DOCUMENTS_S3_REGION", "us-east-1")
 DOCUMENTS_MAX_UPLOAD_MB = int(os.getenv("DOCUMENTS_MAX_UPLOAD_MB", "50"))
+# Documents converted in parallel by process_document_ingestion, and in-flight OpenAI OCR
+# requests per process (shared by all documents); OCR text is cached per page image hash.
+DOCUMENTS_INGESTION_WORKERS = int(os.getenv("DOCUMENTS_INGESTION_WORKERS", "4"))
+DOCUMENTS_OCR_CONCURRENCY = int(os.getenv("DOCUMENTS_OCR_CONCURRENCY", "4"))
+DOCUMENTS_OCR_CACHE_TIMEOUT = int(os.getenv("DOCUMENTS_OCR_CACHE_TIMEOUT", str(30 * 24 * 3600)))
+# Converted HTML cached in the documents bucket by input SHA-256 + converter version
+# (apps.documents.services.conversion_cache); LRU-evicted above the size budget.
+DOCUMENTS_CONVERSION_CACHE_ENABLED = _env_bool("DOCUMENTS_CONVERSION_CACHE_ENABLED", True)
+DOCUMENTS_CONVERSION_CACHE_PREFIX = (
+    os.getenv("DOCUMENTS_CONVERSION_CACHE_PREFIX", "documents_data/_conversion_cache")
+    .strip()
+    .strip("/")
+)
+DOCUMENTS_CONVERSION_CACHE_MAX_MB = int(os.getenv("DOCUMENTS_CONVERSION_CACHE_MAX_MB", "2048"))
 
 # Lab instrument ingest — raw payloads on S3 (see documentation/LAB_INTEGRATION.md)
 # LAB_INGESTION_S3_ENABLED: set false if you share a prod-like .env locally but do not want lab blobs on S3.
@@ -414,6 +479,29 @@ LAB_INGESTION_RAW_INLINE_MAX_BYTES = int(
     os.getenv("LAB_INGESTION_RAW_INLINE_MAX_BYTES", str(512 * 1024))
 )
 LAB_INGESTION_S3_MODE = os.getenv("LAB_INGESTION_S3_MODE", "auto").strip().lower()
+# Envelopes accepted by one POST /api/lab-devices/<id>/ingest/batch/ (lab connector bursts).
+LAB_INGEST_BATCH_MAX_ENVELOPES = int(os.getenv("LAB_INGEST_BATCH_MAX_ENVELOPES", "100"))
+# Vendor code maps (apps.labs.services.code_map_cache): in-process LRU in front of the cache.
+LAB_CODE_MAP_LRU_SIZE = int(os.getenv("LAB_CODE_MAP_LRU_SIZE", "256"))
+LAB_CODE_MAP_LOCAL_TTL_SECONDS = int(os.getenv("LAB_CODE_MAP_LOCAL_TTL_SECONDS", "30"))
+LAB_CODE_MAP_CACHE_TIMEOUT = int(os.getenv("LAB_CODE_MAP_CACHE_TIMEOUT", "3600"))
+
+# Report exports — gzip CSV streamed to S3 (multipart) or local disk (see
+# documentation/ASYNC_REPORT_EXPORTS.md). Bucket: REPORT_EXPORTS_S3_BUCKET, or when empty
+# fallback to DOCUMENTS_DATA_S3_BUCKET. Without a bucket the CSV is stored inline on the job row,
+# or with REPORT_EXPORTS_LOCAL_STORAGE on (single host only: other ECS tasks cannot read it) as a
+# file under REPORT_EXPORTS_LOCAL_ROOT.
+REPORT_EXPORTS_S3_BUCKET = os.getenv("REPORT_EXPORTS_S3_BUCKET", "").strip()
+REPORT_EXPORTS_S3_REGION = os.getenv("REPORT_EXPORTS_S3_REGION", "").strip() or DOCUMENTS_S3_REGION
+REPORT_EXPORTS_S3_PREFIX = (
+    os.getenv("REPORT_EXPORTS_S3_PREFIX", "report-exports").strip().strip("/")
+)
+REPORT_EXPORTS_S3_PART_SIZE_MB = int(os.getenv("REPORT_EXPORTS_S3_PART_SIZE_MB", "8"))
+REPORT_EXPORTS_LOCAL_STORAGE = _env_bool("REPORT_EXPORTS_LOCAL_STORAGE", False)
+REPORT_EXPORTS_LOCAL_ROOT = os.getenv("REPORT_EXPORTS_LOCAL_ROOT", "") or str(
+    MEDIA_ROOT / "report-exports"
+)
+REPORT_EXPORTS_GZIP_LEVEL = int(os.getenv("REPORT_EXPORTS_GZIP_LEVEL", "6"))
 
 # Visit recording + AI summary pipeline
 VISIT_RECORDINGS_S3_BUCKET = os.getenv("VISIT_RECORDINGS_S3_BUCKET", "")
@@ -434,3 +522,13 @@ VISIT_TRANSCRIPTION_INLINE_PROCESSING = (
 
 # Self-hosted Whisper transcription service
 WHISPER_SERVICE_URL = os.getenv("WHISPER_SERVICE_URL", "http://localhost:9000")
+# Stream audio to /transcribe/stream (VAD chunks transcribed in parallel, partial transcripts
+# saved as they arrive). Set false for an older service that only has /transcribe.
+WHISPER_CHUNKED_TRANSCRIPTION = _env_bool("WHISPER_CHUNKED_TRANSCRIPTION", True)
+WHISPER_STREAM_READ_TIMEOUT_SECONDS = int(os.getenv("WHISPER_STREAM_READ_TIMEOUT_SECONDS", "300"))
+# process_visit_transcription_jobs submits audio to the service's /jobs queue and polls for the
+# result on later runs instead of blocking on each transcription (--sync forces the old path).
+# Off by default: enable it only where the self-hosted service actually runs.
+WHISPER_ASYNC_JOBS = _env_bool("WHISPER_ASYNC_JOBS", False)
+# Submitted jobs the service has not finished after this many minutes are marked failed.
+WHISPER_JOB_DEADLINE_MINUTES = int(os.getenv("WHISPER_JOB_DEADLINE_MINUTES", "120"))
@@ -160,11 +160,17 @@ def lab_test(lab):
 @pytest.fixture(autouse=True)
 def _clear_django_cache():
     """Isolate tests that use django.core.cache (e.g. portal OTP rate limits)."""
+    from apps.labs.services.code_map_cache import clear_code_map_cache
+    from apps.tenancy.clinic_settings import clear_clinic_settings_cache
     from django.core.cache import cache
 
     cache.clear()
+    clear_code_map_cache()
+    clear_clinic_settings_cache()
     yield
     cache.clear()
+    clear_code_map_cache()
+    clear_clinic_settings_cache()
 
 
 @pytest.fixture
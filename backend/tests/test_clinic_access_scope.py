@@ -0,0 +1,73 @@
+"""Request-scoped memo of accessible clinic ids."""
+
+import pytest
+from apps.accounts.models import User
+from apps.tenancy.access import accessible_clinic_ids, clinic_access_scope
+from apps.tenancy.middleware import CLINIC_ACCESS_SCOPE_HEADER
+from apps.tenancy.models import Clinic, ClinicNetwork
+from django.test import override_settings
+
+
+@pytest.fixture
+def network_admin(clinic):
+    net = ClinicNetwork.objects.create(name="Chain")
+    clinic.network = net
+    clinic.save(update_fields=["network"])
+    return User.objects.create_user(
+        username="netadmin",
+        password="pass",
+        role=User.Role.NETWORK_ADMIN,
+        network=net,
+        is_staff=True,
+    )
+
+
+def _counters(response) -> dict[str, int]:
+    pairs = (part.split("=") for part in response[CLINIC_ACCESS_SCOPE_HEADER].split("; "))
+    return {name: int(value) for name, value in pairs}
+
+
+@pytest.mark.django_db
+def test_scope_resolves_clinic_ids_once(network_admin, clinic):
+    with clinic_access_scope() as scope:
+        first = accessible_clinic_ids(network_admin)
+        first.append(-1)
+        for _ in range(5):
+            assert accessible_clinic_ids(network_admin) == [clinic.id]
+        assert (scope.lookups, scope.memo_hits, scope.cache_round_trips) == (6, 5, 2)
+
+        # A clinic joining the network is visible later in the same request.
+        other = Clinic.objects.create(name="C2", network=network_admin.network)
+        assert set(accessible_clinic_ids(network_admin)) == {clinic.id, other.id}
+
+        # Attributes that decide the scope are part of the memo key.
+        network_admin.role = User.Role.DOCTOR
+        network_admin.clinic = clinic
+        assert accessible_clinic_ids(network_admin) == [clinic.id]
+
+    # Outside a scope nothing is memoized.
+    network_admin.role = User.Role.NETWORK_ADMIN
+    assert set(accessible_clinic_ids(network_admin)) == {clinic.id, other.id}
+
+
+@pytest.mark.django_db
+@override_settings(DEBUG=True)
+def test_hospital_endpoint_makes_one_cache_round_trip(network_admin, api_client):
+    api_client.force_authenticate(user=network_admin)
+    cold = api_client.get("/api/hospital-stays/shift-handover-report/")
+    assert cold.status_code == 200
+    assert _counters(cold)["cache_round_trips"] == 2  # miss + set
+
+    r = api_client.get("/api/hospital-stays/shift-handover-report/")
+    counters = _counters(r)
+    assert counters["lookups"] > 1
+    assert counters["memo_hits"] == counters["lookups"] - 1
+    assert counters["cache_round_trips"] == 1
+
+
+@pytest.mark.django_db
+def test_counters_header_is_debug_only(doctor, api_client):
+    api_client.force_authenticate(user=doctor)
+    r = api_client.get("/api/hospital-stays/shift-handover-report/")
+    assert r.status_code == 200
+    assert CLINIC_ACCESS_SCOPE_HEADER not in r
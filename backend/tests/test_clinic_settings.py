@@ -0,0 +1,116 @@
+"""Cached clinic settings / feature flags on request hot paths."""
+
+from zoneinfo import ZoneInfo
+
+import pytest
+from apps.billing.models import Invoice
+from apps.tenancy import clinic_settings
+from apps.tenancy.clinic_settings import (
+    clear_clinic_settings_cache,
+    clinic_settings_cache_stats,
+    get_clinic_settings,
+    get_clinic_settings_by_slug,
+    is_clinic_feature_enabled,
+)
+from apps.tenancy.dates import clinic_timezone
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+def _clinic_queries(ctx) -> list[str]:
+    return [q["sql"] for q in ctx.captured_queries if '"tenancy_clinic"' in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_settings_are_read_once_and_invalidated_on_save(clinic, django_capture_on_commit_callbacks):
+    assert is_clinic_feature_enabled(clinic.id, "feature_ksef_enabled") is True
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(5):
+            assert is_clinic_feature_enabled(clinic.id, "feature_ksef_enabled") is True
+        clinic_timezone(clinic.id)
+    assert ctx.captured_queries == []
+
+    clinic.feature_ksef_enabled = False
+    clinic.timezone = "Europe/Warsaw"
+    with django_capture_on_commit_callbacks(execute=True):
+        clinic.save(update_fields=["feature_ksef_enabled", "timezone"])
+        # Not dropped until the write is committed.
+        assert is_clinic_feature_enabled(clinic.id, "feature_ksef_enabled") is True
+    assert is_clinic_feature_enabled(clinic.id, "feature_ksef_enabled") is False
+    assert clinic_timezone(clinic.id) == ZoneInfo("Europe/Warsaw")
+
+    # Another process: empty local LRU, served from the shared cache.
+    clear_clinic_settings_cache()
+    with CaptureQueriesContext(connection) as ctx:
+        assert get_clinic_settings(clinic.id).feature_ksef_enabled is False
+    assert ctx.captured_queries == []
+    assert clinic_settings_cache_stats()["shared_hits"] == 1
+
+    # Entries are versioned by field list, so a deploy that changes it never
+    # reads rows cached by the previous release.
+    assert clinic_settings._SCHEMA in clinic_settings.clinic_settings_cache_key(clinic.id)
+    assert isinstance(
+        clinic_settings.cache.get(clinic_settings.clinic_settings_cache_key(clinic.id)), dict
+    )
+
+    assert get_clinic_settings(clinic.id + 1000) is None
+    assert is_clinic_feature_enabled(None, "feature_ai_enabled") is False
+
+
+@pytest.mark.django_db
+@override_settings(CLINIC_SETTINGS_LOCAL_TTL_SECONDS=60)
+def test_local_entries_expire_after_the_ttl(clinic, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(clinic_settings.time, "monotonic", lambda: now[0])
+    assert get_clinic_settings(clinic.id).reminder_sms_enabled is True
+
+    # Changed by another process: only the shared entry is dropped here.
+    type(clinic).objects.filter(pk=clinic.pk).update(reminder_sms_enabled=False)
+    clinic_settings.cache.delete(clinic_settings.clinic_settings_cache_key(clinic.id))
+    assert get_clinic_settings(clinic.id).reminder_sms_enabled is True
+    now[0] += 61
+    assert get_clinic_settings(clinic.id).reminder_sms_enabled is False
+
+
+@pytest.mark.django_db
+def test_slug_lookup_follows_renames(clinic, django_capture_on_commit_callbacks):
+    old_slug = clinic.slug
+    assert get_clinic_settings_by_slug(old_slug).id == clinic.id
+
+    clinic.slug = "renamed-clinic"
+    with django_capture_on_commit_callbacks(execute=True):
+        clinic.save(update_fields=["slug"])
+    assert get_clinic_settings_by_slug(old_slug) is None
+    assert get_clinic_settings_by_slug("renamed-clinic").id == clinic.id
+    assert get_clinic_settings_by_slug("") is None
+
+
+@pytest.mark.django_db
+def test_portal_and_ksef_requests_do_no_clinic_queries(
+    api_client, doctor, patient, client_with_membership, clinic, django_capture_on_commit_callbacks
+):
+    assert api_client.get(f"/api/portal/clinics/{clinic.slug}/").status_code == 200
+    with CaptureQueriesContext(connection) as ctx:
+        r = api_client.get(f"/api/portal/clinics/{clinic.slug}/")
+    assert r.status_code == 200
+    assert r.data["name"] == clinic.name
+    assert ctx.captured_queries == []
+
+    clinic.feature_ksef_enabled = False
+    with django_capture_on_commit_callbacks(execute=True):
+        clinic.save(update_fields=["feature_ksef_enabled"])
+    invoice = Invoice.objects.create(
+        clinic=clinic,
+        client=client_with_membership,
+        patient=patient,
+        status=Invoice.Status.DRAFT,
+        currency="PLN",
+        created_by=doctor,
+    )
+    api_client.force_authenticate(user=doctor)
+    assert api_client.get(f"/api/billing/invoices/{invoice.id}/ksef-xml/").status_code == 403
+    with CaptureQueriesContext(connection) as ctx:
+        r = api_client.post(f"/api/billing/invoices/{invoice.id}/submit-ksef/")
+    assert r.status_code == 403
+    assert _clinic_queries(ctx) == []
@@ -0,0 +1,141 @@
+"""
+Clinic-local date ranges (apps.tenancy.dates) and an EXPLAIN harness checking that the
+analytics date filters stay index-friendly.
+
+The harness reads the real query plan: on Postgres it disables sequential scans for the
+statement and requires an ``Index Cond`` on the filtered column; on SQLite it requires a
+``SEARCH ... USING INDEX`` step whose constraint includes a range on that column.
+"""
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+from apps.audit.models import AuditLog
+from apps.billing.models import Invoice, InvoiceLine, Payment
+from apps.reminders.models import Reminder
+from apps.scheduling.models import Appointment
+from apps.tenancy.dates import clinic_timezone, date_range_q, local_date_range
+from django.db import connection, transaction
+from django.utils import timezone
+
+WARSAW = ZoneInfo("Europe/Warsaw")
+
+
+def assert_range_uses_index(qs, column: str) -> None:
+    if connection.vendor == "postgresql":
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = qs.explain()
+        ok = any("Index Cond" in line and column in line for line in plan.splitlines())
+    elif connection.vendor == "sqlite":
+        plan = qs.explain()
+        ok = any(
+            "USING" in line and "INDEX" in line and f"{column}>" in line
+            for line in plan.splitlines()
+        )
+    else:  # pragma: no cover - other backends are not used by this project
+        pytest.skip(f"No EXPLAIN harness for {connection.vendor}")
+    assert ok, f"range on {column} does not use an index:\n{plan}"
+
+
+def test_local_date_range_is_half_open_in_zone():
+    start, end = local_date_range(date(2026, 3, 29), date(2026, 3, 29), WARSAW)
+    assert start == datetime(2026, 3, 29, tzinfo=WARSAW)
+    assert end == datetime(2026, 3, 30, tzinfo=WARSAW)
+    # DST switch day in Warsaw is 23 hours long
+    utc = ZoneInfo("UTC")
+    assert (end.astimezone(utc) - start.astimezone(utc)).total_seconds() == 23 * 3600
+    assert local_date_range(None, None) == (None, None)
+
+
+@pytest.mark.django_db
+def test_clinic_timezone_falls_back_to_time_zone(clinic, django_capture_on_commit_callbacks):
+    assert clinic_timezone(clinic.id) == timezone.get_current_timezone()
+    clinic.timezone = "Not/AZone"
+    with django_capture_on_commit_callbacks(execute=True):
+        clinic.save(update_fields=["timezone"])
+    assert clinic_timezone(clinic.id) == timezone.get_current_timezone()
+    clinic.timezone = "Europe/Warsaw"
+    with django_capture_on_commit_callbacks(execute=True):
+        clinic.save(update_fields=["timezone"])
+    assert clinic_timezone(clinic.id) == WARSAW
+
+
+@pytest.mark.django_db
+def test_revenue_summary_buckets_by_clinic_local_date(
+    api_client, clinic_admin, clinic, client_with_membership
+):
+    clinic.timezone = "Europe/Warsaw"
+    clinic.save(update_fields=["timezone"])
+    invoice = Invoice.objects.create(clinic=clinic, client=client_with_membership, status="sent")
+    InvoiceLine.objects.create(invoice=invoice, description="Visit", quantity=1, unit_price=100)
+    # 23:30 UTC on 31 March is already 1 April in Warsaw
+    Invoice.objects.filter(pk=invoice.pk).update(
+        created_at=datetime(2026, 3, 31, 23, 30, tzinfo=ZoneInfo("UTC"))
+    )
+    api_client.force_authenticate(user=clinic_admin)
+
+    march = api_client.get("/api/billing/revenue-summary/?from=2026-03-01&to=2026-03-31")
+    april = api_client.get("/api/billing/revenue-summary/?from=2026-04-01&to=2026-04-30")
+    assert march.data["total_invoiced"] == "0.00"
+    assert april.data["total_invoiced"] == "100.00"
+    assert april.data["by_period"] == [{"label": "2026-04", "invoiced": "100.00", "paid": "0.00"}]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("qs_factory", "column"),
+    [
+        (
+            lambda d0, d1: Invoice.objects.filter(
+                date_range_q("created_at", d0, d1), clinic_id=1
+            ).exclude(status=Invoice.Status.CANCELLED),
+            "created_at",
+        ),
+        (
+            lambda d0, d1: Payment.objects.filter(
+                date_range_q("paid_at", d0, d1),
+                invoice__clinic_id=1,
+                status=Payment.Status.COMPLETED,
+            ),
+            "paid_at",
+        ),
+        (
+            lambda d0, d1: InvoiceLine.objects.filter(
+                date_range_q("invoice__created_at", d0, d1), invoice__clinic_id=1
+            ),
+            "created_at",
+        ),
+        (
+            lambda d0, d1: Reminder.objects.filter(
+                date_range_q("created_at", d0, d1), clinic_id__in=[1]
+            ),
+            "created_at",
+        ),
+        (
+            lambda d0, d1: Appointment.objects.filter(
+                date_range_q("starts_at", d0, d1),
+                clinic_id__in=[1],
+                status__in=[Appointment.Status.CANCELLED, Appointment.Status.NO_SHOW],
+            ),
+            "starts_at",
+        ),
+        (
+            lambda d0, d1: AuditLog.objects.filter(
+                date_range_q("created_at", d0, d1), clinic_id__in=[1]
+            ),
+            "created_at",
+        ),
+    ],
+    ids=["invoice", "payment", "invoice-line", "reminder", "appointment", "audit"],
+)
+def test_analytics_date_filters_use_indexes(qs_factory, column):
+    assert_range_uses_index(qs_factory(date(2026, 1, 1), date(2026, 1, 31)), column)
+
+
+@pytest.mark.django_db
+def test_harness_rejects_date_cast_filter():
+    qs = Invoice.objects.filter(clinic_id=1, created_at__date__gte=date(2026, 1, 1))
+    with pytest.raises(AssertionError):
+        assert_range_uses_index(qs, "created_at")
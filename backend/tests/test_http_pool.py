@@ -0,0 +1,146 @@
+import http.client
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from config.http_pool import KeepAlivePool
+
+HOST_KEY = ("http", "hooks.example.com", 80)
+URL = "http://hooks.example.com/hook"
+
+
+class _Response:
+    status = 200
+    will_close = False
+
+    def read(self):
+        return b"ok"
+
+    def getheaders(self):
+        return [("Content-Type", "text/plain")]
+
+
+class _Connection:
+    def __init__(self, *, request_error=None, response_error=None):
+        self.request_error = request_error
+        self.response_error = response_error
+        self.sent = []
+        self.closed = False
+
+    def request(self, method, path, body=None, headers=None):
+        if self.request_error:
+            raise self.request_error
+        self.sent.append((method, path, body))
+
+    def getresponse(self):
+        if self.response_error:
+            raise self.response_error
+        return _Response()
+
+    def close(self):
+        self.closed = True
+
+
+def _pool_with_idle(idle, monkeypatch):
+    pool = KeepAlivePool(timeout=5)
+    pool._release(HOST_KEY, idle)
+    fresh = []
+
+    def connect(host_key):
+        fresh.append(_Connection())
+        return fresh[-1]
+
+    monkeypatch.setattr(pool, "_connect", connect)
+    return pool, fresh
+
+
+def test_connection_pool_reuses_keep_alive_connections():
+    client_ports = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            client_ports.append(self.client_address[1])
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    pool = KeepAlivePool(timeout=5)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/hook"
+        results = [pool.post(url, b"{}", {"Content-Type": "application/json"}) for _ in range(3)]
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+
+    assert [r.status for r in results] == [200, 200, 200]
+    assert results[0].body == b"ok"
+    assert results[0].headers["content-length"] == "2"
+    assert len(set(client_ports)) == 1
+
+
+@pytest.mark.parametrize(
+    "stale",
+    [
+        _Connection(response_error=http.client.RemoteDisconnected("closed")),
+        _Connection(request_error=http.client.CannotSendRequest()),
+    ],
+    ids=["remote-disconnected", "cannot-send"],
+)
+def test_unsent_request_on_a_reused_connection_is_retried_once(stale, monkeypatch):
+    pool, fresh = _pool_with_idle(stale, monkeypatch)
+
+    result = pool.post(URL, b"{}", {})
+
+    assert result.status == 200
+    assert stale.closed
+    assert len(fresh) == 1
+    assert fresh[0].sent == [("POST", "/hook", b"{}")]
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        http.client.BadStatusLine("garbage"),
+        ConnectionResetError("reset"),
+        TimeoutError("timed out"),
+    ],
+    ids=["bad-status-line", "reset", "timeout"],
+)
+def test_post_that_may_have_been_sent_is_not_retried(error, monkeypatch):
+    stale = _Connection(response_error=error)
+    pool, fresh = _pool_with_idle(stale, monkeypatch)
+
+    with pytest.raises(type(error)):
+        pool.post(URL, b"{}", {})
+
+    assert stale.sent == [("POST", "/hook", b"{}")]
+    assert stale.closed
+    assert fresh == []
+
+
+def test_fresh_connection_is_not_retried(monkeypatch):
+    pool = KeepAlivePool(timeout=5)
+    conn = _Connection(response_error=http.client.RemoteDisconnected("closed"))
+    connects = []
+
+    def connect(host_key):
+        connects.append(host_key)
+        return conn
+
+    monkeypatch.setattr(pool, "_connect", connect)
+
+    with pytest.raises(http.client.RemoteDisconnected):
+        pool.post(URL, b"{}", {})
+    assert connects == [HOST_KEY]
+    assert conn.closed
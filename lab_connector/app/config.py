@@ -29,6 +29,11 @@ class Settings(BaseSettings):
     outbox_poll_sec: float = 5.0
     retry_backoff_sec: list[int] = [60, 300, 900, 3600]
     max_delivery_attempts: int = 15
+    # Delivery: rows read per outbox pass, bodies per ingest/batch request, requests in flight.
+    outbox_fetch_limit: int = 200
+    ingest_batch_size: int = 25
+    delivery_concurrency: int = 4
+    delivery_timeout_sec: float = 60.0
 
     @field_validator("outbox_db_path", mode="before")
     @classmethod
@@ -53,3 +58,6 @@ class Settings(BaseSettings):
 
     def ingest_url(self) -> str:
         return f"{self.veto_base_url}/api/lab-devices/{self.veto_device_id}/ingest/"
+
+    def ingest_batch_url(self) -> str:
+        return f"{self.ingest_url()}batch/"
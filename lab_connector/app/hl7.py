@@ -15,21 +15,90 @@ def wrap_mllp(payload: bytes) -> bytes:
 def extract_mllp_frames(buf: bytearray) -> list[bytes]:
     """Remove complete MLLP frames from buf (mutates buf), return payloads (no SB/EB/CR)."""
     out: list[bytes] = []
-    while True:
-        start = buf.find(SB)
-        if start == -1:
-            break
-        if start > 0:
-            del buf[:start]
-        end = buf.find(EB + CR, 0)
-        if end == -1:
-            break
-        inner = bytes(buf[1:end])
-        del buf[: end + 2]
-        out.append(inner)
+    pos = 0
+    with memoryview(buf) as view:
+        while True:
+            start = buf.find(SB, pos)
+            if start == -1:
+                pos = len(buf)
+                break
+            end = buf.find(EB + CR, start + 1)
+            if end == -1:
+                pos = start
+                break
+            out.append(bytes(view[start + 1 : end]))
+            pos = end + 2
+    del buf[:pos]
     return out
 
 
+class MllpFramer:
+    """
+    Incremental MLLP de-framer for one connection.
+
+    ``feed`` appends a read and returns the payloads it completed. The framer remembers where
+    the current frame starts and how far it has already searched for ``EB CR``, so each byte is
+    scanned once no matter how many reads a large frame spans. Payloads are copied once out of
+    a ``memoryview``; consumed bytes are dropped in one compaction per read. Bytes outside
+    frames are discarded, and a frame growing past ``max_frame_bytes`` is dropped.
+    """
+
+    def __init__(self, max_frame_bytes: int = 16 * 1024 * 1024) -> None:
+        self.max_frame_bytes = max_frame_bytes
+        self.dropped_frames = 0
+        self._buf = bytearray()
+        self._frame_start = -1  # offset of the payload's first byte, -1 = outside a frame
+        self._scan = 0  # next offset to search from
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buf)
+
+    def feed(self, data: bytes) -> list[bytes]:
+        buf = self._buf
+        buf.extend(data)
+        out: list[bytes] = []
+        with memoryview(buf) as view:
+            while True:
+                if self._frame_start < 0:
+                    start = buf.find(SB, self._scan)
+                    if start == -1:
+                        self._scan = len(buf)
+                        break
+                    self._frame_start = self._scan = start + 1
+                end = buf.find(EB + CR, self._scan)
+                if end == -1:
+                    # EB may be the last byte read, with CR still to come.
+                    self._scan = max(self._frame_start, len(buf) - 1)
+                    if len(buf) - self._frame_start > self.max_frame_bytes:
+                        self.dropped_frames += 1
+                        self._frame_start = -1
+                        self._scan = len(buf)
+                    break
+                out.append(bytes(view[self._frame_start : end]))
+                self._frame_start = -1
+                self._scan = end + 2
+        self._compact()
+        return out
+
+    def _compact(self) -> None:
+        keep_from = self._scan if self._frame_start < 0 else self._frame_start - 1
+        if keep_from <= 0:
+            return
+        del self._buf[:keep_from]
+        self._scan -= keep_from
+        if self._frame_start >= 0:
+            self._frame_start -= keep_from
+
+
+# Segment separators: CR per HL7; LF / CRLF from analyzers and files that got them rewritten.
+_SEGMENT_SEP = re.compile(r"\r\n|\r|\n")
+_REF_RANGE = re.compile(r"^\s*([\d.]+)\s*-\s*([\d.]+)\s*$")
+# Plain decimal numbers, "," or "." as decimal mark. Image / text OBX values (tens of KB of
+# base64 on BC-60R histograms) are rejected at their first character.
+_NUMERIC = re.compile(r"\s*[+-]?(?:\d+[.,]?\d*|[.,]\d+)(?:[eE][+-]?\d+)?\s*")
+
+
 def _split_fields(segment: str) -> list[str]:
     return segment.split("|")
 
@@ -44,7 +113,7 @@ def _parse_ref_range(obx7: str) -> tuple[str, str]:
     if not obx7 or obx7 == "-":
         return "", ""
     # e.g. 6.00-17.00 or 6.00 - 17.00
-    m = re.match(r"^\s*([\d.]+)\s*-\s*([\d.]+)\s*$", obx7)
+    m = _REF_RANGE.match(obx7)
     if m:
         return m.group(1), m.group(2)
     return "", ""
@@ -62,6 +131,17 @@ def _msh_control_id(fields: list[str]) -> str:
     return fields[9].strip()
 
 
+def _segments(hl7_text: str) -> list[str]:
+    if "\n" in hl7_text:
+        hl7_text = hl7_text.replace("\r\n", "\r").replace("\n", "\r")
+    return hl7_text.split("\r")
+
+
+def _first_segment(hl7_text: str) -> str:
+    m = _SEGMENT_SEP.search(hl7_text)
+    return hl7_text[: m.start()] if m else hl7_text
+
+
 def build_ack(*, control_id: str, ack_code: str = "AA") -> bytes:
     """ACK^R01 with MSA|AA|control_id (Mindray BC-60R HL7 doc)."""
     ts = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
@@ -75,6 +155,38 @@ def build_ack(*, control_id: str, ack_code: str = "AA") -> bytes:
     return text.encode("utf-8")
 
 
+def _obx_observation(segment: str, index: int) -> dict[str, Any] | None:
+    f = _split_fields(segment)
+    if len(f) < 6:
+        return None
+    set_id = f[1].strip()
+    obx3 = f[3].split("^")
+    vendor_code = obx3[0].strip()
+    if not vendor_code:
+        return None
+    vendor_name = obx3[1] if len(obx3) > 1 else ""
+
+    value = f[5]
+    unit = _first_component(f[6]) if len(f) > 6 else ""
+    ref_raw = f[7] if len(f) > 7 else ""
+    ref_low, ref_high = _parse_ref_range(ref_raw)
+    flag = f[8].strip() if len(f) > 8 else ""
+
+    obs: dict[str, Any] = {
+        "vendor_code": vendor_code,
+        "natural_key": set_id or str(index),
+        "vendor_name": vendor_name,
+        "value_text": value,
+        "unit": unit,
+        "ref_low": ref_low,
+        "ref_high": ref_high,
+        "abnormal_flag": flag,
+    }
+    if _NUMERIC.fullmatch(value):
+        obs["value_numeric"] = value.replace(",", ".")
+    return obs
+
+
 def oru_r01_to_veto_json(
     hl7_text: str,
     *,
@@ -84,12 +196,11 @@ def oru_r01_to_veto_json(
     Parse ORU^R01 → Veto ingest JSON dict, or (None, error).
     Returns (None, None) if message is not ORU^R01 (caller may still ACK).
     """
-    text = hl7_text.replace("\r\n", "\r").replace("\n", "\r")
-    lines = [ln for ln in text.split("\r") if ln.strip()]
-    if not lines:
+    # Single pass over the segments: MSH first, then the first OBR and every OBX as they come.
+    segments = (seg for seg in _segments(hl7_text) if seg.strip())
+    msh = next(segments, None)
+    if msh is None:
         return None, "empty_message"
-
-    msh = lines[0]
     if not msh.startswith("MSH|"):
         return None, "missing_msh"
 
@@ -98,12 +209,19 @@ def oru_r01_to_veto_json(
     if mt != "ORU^R01":
         return None, None  # not an error — not our payload type
 
-    obr_lines = [ln for ln in lines if ln.startswith("OBR|")]
-    obx_lines = [ln for ln in lines if ln.startswith("OBX|")]
-    if not obr_lines:
+    obr_f: list[str] | None = None
+    observations: list[dict[str, Any]] = []
+    for seg in segments:
+        tag = seg[:4]
+        if tag == "OBX|":
+            obs = _obx_observation(seg, len(observations))
+            if obs is not None:
+                observations.append(obs)
+        elif tag == "OBR|" and obr_f is None:
+            obr_f = _split_fields(seg)
+
+    if obr_f is None:
         return None, "missing_obr"
-
-    obr_f = _split_fields(obr_lines[0])
     # HL7: OBR-3 = Filler Order Number = sample ID for results (BC-60R doc)
     if len(obr_f) < 4:
         return None, "obr_missing_sample_id"
@@ -111,43 +229,6 @@ def oru_r01_to_veto_json(
     if not sample_id:
         return None, "empty_sample_id"
 
-    observations: list[dict[str, Any]] = []
-    for obx in obx_lines:
-        f = _split_fields(obx)
-        if len(f) < 6:
-            continue
-        set_id = f[1].strip() if len(f) > 1 else "0"
-        obx3 = f[3] if len(f) > 3 else ""
-        vendor_code = _first_component(obx3)
-        if not vendor_code:
-            continue
-        name_parts = obx3.split("^")
-        vendor_name = name_parts[1] if len(name_parts) > 1 else ""
-
-        value = f[5] if len(f) > 5 else ""
-        unit = _first_component(f[6]) if len(f) > 6 else ""
-        ref_raw = f[7] if len(f) > 7 else ""
-        ref_low, ref_high = _parse_ref_range(ref_raw)
-        flag = f[8].strip() if len(f) > 8 else ""
-
-        obs: dict[str, Any] = {
-            "vendor_code": vendor_code,
-            "natural_key": set_id or str(len(observations)),
-            "vendor_name": vendor_name,
-            "value_text": value,
-            "unit": unit,
-            "ref_low": ref_low,
-            "ref_high": ref_high,
-            "abnormal_flag": flag,
-        }
-        try:
-            float(value.replace(",", "."))
-            obs["value_numeric"] = str(value.replace(",", "."))
-        except ValueError:
-            pass
-
-        observations.append(obs)
-
     if not observations:
         return None, "no_obx_observations"
 
@@ -168,8 +249,8 @@ def veto_json_dumps(body: dict[str, Any]) -> bytes:
 
 
 def extract_control_id(hl7_text: str) -> str:
-    lines = hl7_text.replace("\r\n", "\r").replace("\n", "\r").split("\r")
-    if not lines or not lines[0].startswith("MSH|"):
+    msh = _first_segment(hl7_text)
+    if not msh.startswith("MSH|"):
         return "UNKNOWN"
-    f = lines[0].split("|")
+    f = msh.split("|")
     return f[9].strip() if len(f) > 9 else "UNKNOWN"
@@ -53,14 +53,17 @@ async def _run() -> None:
         with contextlib.suppress(NotImplementedError):
             loop.add_signal_handler(sig, _shutdown)
 
-    async with srv:
-        worker = asyncio.create_task(outbox_loop(settings, outbox, stop, metrics), name="outbox")
-        try:
-            await stop.wait()
-        finally:
-            worker.cancel()
-            with contextlib.suppress(asyncio.CancelledError):
-                await worker
+    try:
+        async with srv:
+            worker = asyncio.create_task(outbox_loop(settings, outbox, stop, metrics), name="outbox")
+            try:
+                await stop.wait()
+            finally:
+                worker.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await worker
+    finally:
+        outbox.close()
 
 
 def main() -> None:
@@ -3,28 +3,40 @@ from __future__ import annotations
 import json
 import sqlite3
 import threading
+from collections.abc import Iterable
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
 
 class Outbox:
-    """SQLite-backed durable queue for POST bodies."""
+    """
+    SQLite-backed durable queue for POST bodies.
+
+    One connection is opened for the lifetime of the outbox (WAL journal, ``synchronous=NORMAL``)
+    and shared by the TCP handlers and the delivery worker under a lock; WAL lets ``enqueue``
+    commits stay cheap while a delivery batch is being read. Delivery results for a whole batch
+    are written in one transaction with :meth:`apply_results`.
+    """
 
     def __init__(self, db_path: Path, backoff_sec: list[int]) -> None:
         self._db_path = db_path
         self._backoff = backoff_sec or [60]
         self._lock = threading.Lock()
         db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = self._connect()
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(str(self._db_path), timeout=30.0)
+        conn = sqlite3.connect(str(self._db_path), timeout=30.0, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Durable across process crashes; only an OS crash / power loss may drop the last commits.
+        conn.execute("PRAGMA synchronous=NORMAL")
         return conn
 
     def _init_db(self) -> None:
-        with self._connect() as c:
+        with self._lock, self._conn as c:
             c.execute(
                 """
                 CREATE TABLE IF NOT EXISTS outbox (
@@ -40,20 +52,27 @@ class Outbox:
             )
             c.execute("CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (status, next_retry_at, id)")
 
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def journal_mode(self) -> str:
+        with self._lock:
+            return str(self._conn.execute("PRAGMA journal_mode").fetchone()[0])
+
     def enqueue(self, body: bytes) -> int:
-        with self._lock, self._connect() as c:
+        with self._lock, self._conn as c:
             cur = c.execute(
                 "INSERT INTO outbox (body, status, created_at) VALUES (?, 'pending', ?)",
                 (body.decode("utf-8"), _utc_now_iso()),
             )
-            c.commit()
             return int(cur.lastrowid)
 
     def fetch_pending(self, limit: int = 20) -> list[sqlite3.Row]:
         now = _utc_now_iso()
-        with self._lock, self._connect() as c:
+        with self._lock:
             return list(
-                c.execute(
+                self._conn.execute(
                     """
                     SELECT id, body, attempts, status
                     FROM outbox
@@ -65,33 +84,45 @@ class Outbox:
                 ).fetchall()
             )
 
-    def mark_delivered(self, row_id: int) -> None:
-        with self._lock, self._connect() as c:
-            c.execute("UPDATE outbox SET status = 'delivered' WHERE id = ?", (row_id,))
-            c.commit()
-
-    def mark_retry(self, row_id: int, attempts_before: int, err: str) -> None:
+    def _retry_at(self, attempts_before: int) -> str:
         idx = min(attempts_before, len(self._backoff) - 1)
-        delay = self._backoff[idx]
-        nxt = (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat()
-        with self._lock, self._connect() as c:
-            c.execute(
+        return (datetime.now(timezone.utc) + timedelta(seconds=self._backoff[idx])).isoformat()
+
+    def apply_results(
+        self,
+        *,
+        delivered: Iterable[int] = (),
+        retry: Iterable[tuple[int, int, str]] = (),
+        dead: Iterable[tuple[int, str]] = (),
+    ) -> None:
+        """
+        Record a delivery batch in one transaction: ``delivered`` row ids, ``retry`` as
+        ``(row_id, attempts_before, error)`` and ``dead`` as ``(row_id, error)``.
+        """
+        retry_rows = [(self._retry_at(att), err[:2000], rid) for rid, att, err in retry]
+        with self._lock, self._conn as c:
+            c.executemany("UPDATE outbox SET status = 'delivered' WHERE id = ?", [(rid,) for rid in delivered])
+            c.executemany(
                 """
                 UPDATE outbox
                 SET attempts = attempts + 1, next_retry_at = ?, last_error = ?
                 WHERE id = ?
                 """,
-                (nxt, err[:2000], row_id),
+                retry_rows,
             )
-            c.commit()
-
-    def mark_dead(self, row_id: int, err: str) -> None:
-        with self._lock, self._connect() as c:
-            c.execute(
+            c.executemany(
                 "UPDATE outbox SET status = 'dead', last_error = ? WHERE id = ?",
-                (err[:2000], row_id),
+                [(err[:2000], rid) for rid, err in dead],
             )
-            c.commit()
+
+    def mark_delivered(self, row_id: int) -> None:
+        self.apply_results(delivered=[row_id])
+
+    def mark_retry(self, row_id: int, attempts_before: int, err: str) -> None:
+        self.apply_results(retry=[(row_id, attempts_before, err)])
+
+    def mark_dead(self, row_id: int, err: str) -> None:
+        self.apply_results(dead=[(row_id, err)])
 
 
 def _utc_now_iso() -> str:
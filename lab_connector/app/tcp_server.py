@@ -5,9 +5,9 @@ import logging
 from typing import TYPE_CHECKING
 
 from app.hl7 import (
+    MllpFramer,
     build_ack,
     extract_control_id,
-    extract_mllp_frames,
     oru_r01_to_veto_json,
     veto_json_dumps,
     wrap_mllp,
@@ -76,14 +76,17 @@ async def client_handler(
     metrics: ConnectorMetrics,
 ) -> None:
     addr = writer.get_extra_info("peername")
-    buf = bytearray()
+    framer = MllpFramer()
     try:
         while True:
             chunk = await reader.read(65536)
             if not chunk:
                 break
-            buf.extend(chunk)
-            frames = extract_mllp_frames(buf)
+            dropped = framer.dropped_frames
+            frames = framer.feed(chunk)
+            if framer.dropped_frames != dropped:
+                log.warning("Dropped oversized MLLP frame peer=%s", addr)
+                metrics.inc("mllp_frames_dropped_total", framer.dropped_frames - dropped)
             for payload in frames:
                 await _handle_mllp_payload(writer, payload, settings, outbox, metrics)
     except asyncio.CancelledError:
@@ -1,28 +1,123 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+
 import httpx
 
 from app.config import Settings
 
+log = logging.getLogger(__name__)
+
+
+def _headers(settings: Settings) -> dict[str, str]:
+    return {
+        "X-Lab-Ingest-Token": settings.veto_ingest_token,
+        "Content-Type": "application/json; charset=utf-8",
+    }
+
+
+def _result(r: httpx.Response) -> tuple[bool, str]:
+    if 200 <= r.status_code < 300:
+        return True, f"http_{r.status_code}"
+    if 400 <= r.status_code < 500:
+        return False, f"client_{r.status_code}:{r.text[:500]}"
+    return False, f"server_{r.status_code}:{r.text[:500]}"
+
 
 def deliver_ingest(settings: Settings, body: bytes, *, timeout_sec: float = 60.0) -> tuple[bool, str]:
     """
     POST JSON to Veto lab ingest. Returns (success, message).
     2xx = success (including 200 duplicate idempotency).
     """
-    url = settings.ingest_url()
-    headers = {
-        "X-Lab-Ingest-Token": settings.veto_ingest_token,
-        "Content-Type": "application/json; charset=utf-8",
-    }
     try:
         with httpx.Client(timeout=timeout_sec) as client:
-            r = client.post(url, content=body, headers=headers)
+            r = client.post(settings.ingest_url(), content=body, headers=_headers(settings))
     except httpx.RequestError as e:
         return False, f"network:{e}"
+    return _result(r)
 
-    if 200 <= r.status_code < 300:
-        return True, f"http_{r.status_code}"
-    if 400 <= r.status_code < 500:
-        return False, f"client_{r.status_code}:{r.text[:500]}"
-    return False, f"server_{r.status_code}:{r.text[:500]}"
+
+class VetoIngestClient:
+    """
+    Long-lived async client for Veto lab ingest: one keep-alive ``httpx.AsyncClient`` for the
+    connector's lifetime, at most ``concurrency`` requests in flight.
+
+    :meth:`deliver_batch` sends several outbox bodies in one ``ingest/batch/`` request. A Veto
+    that does not know the batch endpoint yet (404/405) is remembered and served one POST per
+    body over the same connections.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._settings = settings
+        self._client = httpx.AsyncClient(
+            timeout=settings.delivery_timeout_sec,
+            headers=_headers(settings),
+            limits=httpx.Limits(
+                max_connections=settings.delivery_concurrency,
+                max_keepalive_connections=settings.delivery_concurrency,
+            ),
+            transport=transport,
+        )
+        self._slots = asyncio.Semaphore(settings.delivery_concurrency)
+        self.batch_supported = True
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> VetoIngestClient:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    async def deliver(self, body: bytes) -> tuple[bool, str]:
+        async with self._slots:
+            try:
+                r = await self._client.post(self._settings.ingest_url(), content=body)
+            except httpx.RequestError as e:
+                return False, f"network:{e}"
+        return _result(r)
+
+    async def deliver_batch(self, bodies: list[bytes]) -> list[tuple[bool, str]]:
+        """One (success, message) per body, in order."""
+        if not bodies:
+            return []
+        if len(bodies) == 1 or not self.batch_supported:
+            return list(await asyncio.gather(*(self.deliver(b) for b in bodies)))
+        # Bodies travel as strings so Veto hashes exactly the bytes a single POST would send.
+        payload = json.dumps({"envelopes": [b.decode("utf-8") for b in bodies]}).encode("utf-8")
+        async with self._slots:
+            try:
+                r = await self._client.post(self._settings.ingest_batch_url(), content=payload)
+            except httpx.RequestError as e:
+                return [(False, f"network:{e}")] * len(bodies)
+        if r.status_code in (404, 405):
+            log.warning("Veto has no batch ingest endpoint (http_%s); delivering one by one", r.status_code)
+            self.batch_supported = False
+            return await self.deliver_batch(bodies)
+        ok, msg = _result(r)
+        if not ok:
+            return [(False, msg)] * len(bodies)
+        try:
+            items = r.json()["results"]
+        except (ValueError, KeyError, TypeError):
+            return [(False, f"bad_batch_response:{r.text[:500]}")] * len(bodies)
+        if len(items) != len(bodies):
+            return [(False, f"bad_batch_response:{len(items)} results for {len(bodies)} bodies")] * len(bodies)
+        return [
+            (True, f"http_{item.get('status')}") if item.get("ok") else (False, _item_error(item))
+            for item in items
+        ]
+
+
+def _item_error(item: dict) -> str:
+    code = int(item.get("status") or 500)
+    kind = "client" if 400 <= code < 500 else "server"
+    return f"{kind}_{code}:{str(item.get('error', ''))[:500]}"
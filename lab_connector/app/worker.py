@@ -4,7 +4,7 @@ import asyncio
 import logging
 from typing import TYPE_CHECKING
 
-from app.veto import deliver_ingest
+from app.veto import VetoIngestClient
 
 if TYPE_CHECKING:
     from app.config import Settings
@@ -14,29 +14,68 @@ if TYPE_CHECKING:
 log = logging.getLogger(__name__)
 
 
-async def outbox_loop(settings: Settings, outbox: Outbox, stop: asyncio.Event, metrics: ConnectorMetrics) -> None:
+async def deliver_pending(
+    settings: Settings, outbox: Outbox, client: VetoIngestClient, metrics: ConnectorMetrics
+) -> int:
+    """
+    One outbox pass: deliver up to ``outbox_fetch_limit`` due rows in ``ingest_batch_size``
+    batches (concurrency bounded by the client) and record all outcomes in one transaction.
+    Returns the number of rows handled.
+    """
+    rows = await asyncio.to_thread(outbox.fetch_pending, settings.outbox_fetch_limit)
+    if not rows:
+        return 0
+    size = max(1, settings.ingest_batch_size)
+    chunks = [rows[i : i + size] for i in range(0, len(rows), size)]
+    outcomes = await asyncio.gather(
+        *(client.deliver_batch([row["body"].encode("utf-8") for row in chunk]) for chunk in chunks)
+    )
+
     max_att = settings.max_delivery_attempts
-    while not stop.is_set():
-        rows = await asyncio.to_thread(outbox.fetch_pending, 20)
-        for row in rows:
+    delivered: list[int] = []
+    retry: list[tuple[int, int, str]] = []
+    dead: list[tuple[int, str]] = []
+    for chunk, results in zip(chunks, outcomes, strict=True):
+        for row, (ok, msg) in zip(chunk, results, strict=True):
             rid = int(row["id"])
-            body = row["body"].encode("utf-8")
             attempts = int(row["attempts"])
-            ok, msg = await asyncio.to_thread(deliver_ingest, settings, body)
             if ok:
-                await asyncio.to_thread(outbox.mark_delivered, rid)
-                metrics.inc("outbox_delivered_total")
-                log.info("Delivered outbox id=%s %s", rid, msg)
+                delivered.append(rid)
+                continue
+            log.warning("Delivery failed id=%s attempt=%s %s", rid, attempts, msg)
+            if attempts + 1 >= max_att:
+                dead.append((rid, msg))
             else:
-                metrics.inc("outbox_delivery_fail_total")
-                log.warning("Delivery failed id=%s attempt=%s %s", rid, attempts, msg)
-                if attempts + 1 >= max_att:
-                    await asyncio.to_thread(outbox.mark_dead, rid, msg)
-                    metrics.inc("outbox_dead_total")
-                else:
-                    await asyncio.to_thread(outbox.mark_retry, rid, attempts, msg)
-                    metrics.inc("outbox_retry_scheduled_total")
-        try:
-            await asyncio.wait_for(stop.wait(), timeout=settings.outbox_poll_sec)
-        except TimeoutError:
-            pass
+                retry.append((rid, attempts, msg))
+    await asyncio.to_thread(outbox.apply_results, delivered=delivered, retry=retry, dead=dead)
+
+    metrics.inc("outbox_delivered_total", len(delivered))
+    metrics.inc("outbox_delivery_fail_total", len(retry) + len(dead))
+    metrics.inc("outbox_retry_scheduled_total", len(retry))
+    metrics.inc("outbox_dead_total", len(dead))
+    log.info("Outbox pass rows=%s delivered=%s retry=%s dead=%s", len(rows), len(delivered), len(retry), len(dead))
+    return len(rows)
+
+
+async def outbox_loop(
+    settings: Settings,
+    outbox: Outbox,
+    stop: asyncio.Event,
+    metrics: ConnectorMetrics,
+    client: VetoIngestClient | None = None,
+) -> None:
+    owns_client = client is None
+    client = client or VetoIngestClient(settings)
+    try:
+        while not stop.is_set():
+            handled = await deliver_pending(settings, outbox, client, metrics)
+            if handled >= settings.outbox_fetch_limit:
+                # Analyzer burst: keep draining instead of waiting for the next poll.
+                continue
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.outbox_poll_sec)
+            except TimeoutError:
+                pass
+    finally:
+        if owns_client:
+            await client.aclose()
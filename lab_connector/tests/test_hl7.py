@@ -1,4 +1,5 @@
 from app.hl7 import (
+    MllpFramer,
     build_ack,
     extract_control_id,
     extract_mllp_frames,
@@ -14,6 +15,24 @@ def test_mllp_roundtrip() -> None:
     assert len(buf) == 0
 
 
+def test_framer_handles_frames_split_across_reads() -> None:
+    raw = b"MSH|^~\\&|x\rPID|1||id\r"
+    stream = b"noise" + wrap_mllp(raw) + b"\n" + wrap_mllp(raw)
+    framer = MllpFramer()
+    frames: list[bytes] = []
+    for i in range(len(stream)):
+        frames += framer.feed(stream[i : i + 1])
+    assert frames == [raw, raw]
+    assert framer.buffered == 0
+
+
+def test_framer_drops_oversized_frame_and_recovers() -> None:
+    framer = MllpFramer(max_frame_bytes=16)
+    assert framer.feed(b"\x0b" + b"A" * 20) == []
+    assert framer.dropped_frames == 1
+    assert framer.feed(b"A\x1c\x0d" + wrap_mllp(b"MSH|ok")) == [b"MSH|ok"]
+
+
 def test_oru_to_json_minimal() -> None:
     hl7 = (
         "MSH|^~\\&| |Mindray|||20210312092538||ORU^R01|2|P|2.3.1||||||UNICODE\r"
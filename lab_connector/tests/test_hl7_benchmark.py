@@ -0,0 +1,79 @@
+"""
+Micro-benchmarks for the MLLP framer and the ORU^R01 parser on a Mindray BC-60R CBC fixture
+(5-part diff, reticulocytes, histogram / scattergram images; ~35 KB per message).
+
+They run with the normal suite on a short time budget and only assert correctness; the
+throughput figures are printed — see them with ``pytest tests/test_hl7_benchmark.py -s``.
+Set ``LAB_CONNECTOR_BENCH_SECONDS`` for longer, steadier runs.
+"""
+
+import os
+import statistics
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from app.hl7 import MllpFramer, oru_r01_to_veto_json, wrap_mllp
+
+FIXTURE = Path(__file__).parent / "fixtures" / "bc60r_cbc_dog.hl7"
+BENCH_SECONDS = float(os.environ.get("LAB_CONNECTOR_BENCH_SECONDS", "0.2"))
+# A morning batch: the analyzer pushes 200 CBC results back to back.
+BATCH = 200
+
+
+def _message() -> str:
+    return FIXTURE.read_text(encoding="utf-8", newline="")
+
+
+def _timed(fn: Callable[[], object]) -> list[float]:
+    """Per-call durations (seconds) of ``fn`` run repeatedly for about BENCH_SECONDS."""
+    samples: list[float] = []
+    deadline = time.perf_counter() + BENCH_SECONDS
+    while not samples or time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("read_size", [65536, 1460])
+def test_bench_mllp_framer_frames_per_second(read_size: int) -> None:
+    payload = _message().encode("utf-8")
+    stream = wrap_mllp(payload) * BATCH
+    reads = _chunks(stream, read_size)
+    frames: list[bytes] = []
+
+    def run() -> None:
+        framer = MllpFramer()
+        frames.clear()
+        for chunk in reads:
+            frames.extend(framer.feed(chunk))
+
+    samples = _timed(run)
+    assert frames == [payload] * BATCH
+    best = min(samples)
+    print(
+        f"\nmllp framer read={read_size}B: {BATCH / best:,.0f} frames/s "
+        f"({len(stream) / best / 1e6:,.1f} MB/s, {len(samples)} runs)"
+    )
+
+
+def test_bench_oru_parse_latency() -> None:
+    text = _message()
+    payload, err = oru_r01_to_veto_json(text)
+    assert err is None and payload is not None
+    assert payload["identifiers"] == [{"scheme": "barcode", "value": "240305-0042"}]
+    assert len(payload["observations"]) == 37
+
+    samples = sorted(_timed(lambda: oru_r01_to_veto_json(text)))
+    p50 = statistics.median(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) > 1 else samples[0]
+    print(
+        f"\noru_r01_to_veto_json: p50={p50 * 1e6:,.0f}us p95={p95 * 1e6:,.0f}us "
+        f"({1 / p50:,.0f} msg/s, {len(samples)} runs)"
+    )
@@ -0,0 +1,92 @@
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+from app.config import Settings
+from app.metrics import ConnectorMetrics
+from app.outbox import Outbox
+from app.veto import VetoIngestClient
+from app.worker import deliver_pending
+
+
+def _settings(tmp_path: Path, **overrides: object) -> Settings:
+    return Settings(
+        veto_base_url="https://veto.test",
+        veto_device_id=7,
+        veto_ingest_token="tok",
+        outbox_db_path=tmp_path / "outbox.sqlite3",
+        **overrides,
+    )
+
+
+def _pending_ids(outbox: Outbox) -> list[int]:
+    return [int(r["id"]) for r in outbox.fetch_pending(1000)]
+
+
+def test_outbox_uses_wal_and_records_batch_results(tmp_path: Path) -> None:
+    outbox = Outbox(tmp_path / "outbox.sqlite3", [60])
+    ids = [outbox.enqueue(f'{{"n": {n}}}'.encode()) for n in range(4)]
+    assert outbox.journal_mode() == "wal"
+
+    outbox.apply_results(delivered=[ids[0]], retry=[(ids[1], 0, "server_503")], dead=[(ids[2], "client_400")])
+
+    assert _pending_ids(outbox) == [ids[3]]
+    outbox.close()
+    reopened = Outbox(tmp_path / "outbox.sqlite3", [60])
+    assert _pending_ids(reopened) == [ids[3]]
+    reopened.close()
+
+
+def test_burst_is_delivered_in_batches_over_one_client(tmp_path: Path) -> None:
+    settings = _settings(tmp_path, ingest_batch_size=25, outbox_fetch_limit=200)
+    outbox = Outbox(settings.outbox_db_path, [60])
+    for n in range(60):
+        outbox.enqueue(json.dumps({"n": n}).encode())
+    seen: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/api/lab-devices/7/ingest/batch/"
+        assert request.headers["X-Lab-Ingest-Token"] == "tok"
+        bodies = [json.loads(e) for e in json.loads(request.content)["envelopes"]]
+        seen.append(len(bodies))
+        results = [
+            {"ok": False, "status": 500, "error": "boom"} if b["n"] == 5 else {"ok": True, "status": 201}
+            for b in bodies
+        ]
+        return httpx.Response(200, json={"results": results})
+
+    async def run() -> int:
+        async with VetoIngestClient(settings, transport=httpx.MockTransport(handler)) as client:
+            return await deliver_pending(settings, outbox, client, metrics)
+
+    metrics = ConnectorMetrics()
+    assert asyncio.run(run()) == 60
+    assert sorted(seen) == [10, 25, 25]
+    assert metrics.snapshot()["outbox_delivered_total"] == 59
+    assert metrics.snapshot()["outbox_retry_scheduled_total"] == 1
+    assert _pending_ids(outbox) == []
+    outbox.close()
+
+
+def test_falls_back_to_single_posts_without_batch_endpoint(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path.endswith("/batch/"):
+            return httpx.Response(404)
+        return httpx.Response(201, json={"created": True})
+
+    async def run() -> tuple[list[tuple[bool, str]], bool]:
+        async with VetoIngestClient(settings, transport=httpx.MockTransport(handler)) as client:
+            results = await client.deliver_batch([b'{"a": 1}', b'{"a": 2}'])
+            await client.deliver_batch([b'{"a": 3}', b'{"a": 4}'])
+            return results, client.batch_supported
+
+    results, batch_supported = asyncio.run(run())
+    assert results == [(True, "http_201"), (True, "http_201")]
+    assert batch_supported is False
+    assert paths.count("/api/lab-devices/7/ingest/batch/") == 1
+    assert paths.count("/api/lab-devices/7/ingest/") == 4
@@ -1,25 +1,380 @@
+"""
+Self-hosted faster-whisper inference server.
+
+Audio is split into VAD-aligned chunks that a pool of model worker processes (each with its
+own int8 model, pinned to its own cores) transcribes in parallel. At most
+``WHISPER_MAX_ACTIVE_JOBS`` recordings are admitted at once; beyond that every transcription
+endpoint answers 429 with ``Retry-After`` so callers back off instead of piling up.
+
+- ``POST /jobs``               raw audio body -> 202 ``{id, status}``; poll ``GET /jobs/<id>``
+- ``POST /transcribe/stream``  raw audio body -> NDJSON (plan, ordered chunks, done)
+- ``POST /transcribe``         multipart ``audio`` -> ``{transcript, language}`` (legacy)
+- ``GET /metrics``             Prometheus text: queue depth, real-time factor, stage latency
+"""
+
+import json
 import os
 import tempfile
-from flask import Flask, request, jsonify
-from faster_whisper import WhisperModel
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from faster_whisper import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+import worker
 
 app = Flask(__name__)
 
 MODEL_SIZE = os.getenv("WHISPER_MODEL", "small")
-print(f"Loading Whisper model: {MODEL_SIZE} ...", flush=True)
-model = WhisperModel(MODEL_SIZE, device="cpu", compute_type="int8")
-print("Whisper model ready.", flush=True)
+LANGUAGE = os.getenv("WHISPER_LANGUAGE", "pl")
+SAMPLE_RATE = 16000
+# Model worker processes, each holding its own int8 model; threads per worker for CTranslate2.
+WORKERS = max(1, int(os.getenv("WHISPER_WORKERS", "2")))
+CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0")) or max(1, (os.cpu_count() or 1) // WORKERS)
+# Segments of one chunk decoded together by BatchedInferencePipeline (1 = plain model).
+BATCH_SIZE = max(1, int(os.getenv("WHISPER_BATCH_SIZE", "4")))
+# Chunks are cut at VAD silences and kept at or below this length.
+CHUNK_SECONDS = float(os.getenv("WHISPER_CHUNK_SECONDS", "60"))
+# Recordings admitted at once (queued + running); more get 429.
+MAX_ACTIVE_JOBS = max(1, int(os.getenv("WHISPER_MAX_ACTIVE_JOBS", str(WORKERS * 2))))
+RETRY_AFTER_SECONDS = int(os.getenv("WHISPER_RETRY_AFTER_SECONDS", "15"))
+# Finished jobs stay pollable this long.
+JOB_TTL_SECONDS = int(os.getenv("WHISPER_JOB_TTL_SECONDS", "3600"))
+UPLOAD_READ_BYTES = 1024 * 1024
+
+STAGES = ("upload", "decode", "vad", "queue_wait", "inference", "total")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Created lazily: spawned workers re-import this module and must not start pools."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            ctx = get_context("spawn")
+            cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+            _pool = ProcessPoolExecutor(
+                max_workers=WORKERS,
+                mp_context=ctx,
+                initializer=worker.init_worker,
+                initargs=(MODEL_SIZE, CPU_THREADS, BATCH_SIZE, cores, ctx.Value("i", 0)),
+            )
+    return _pool
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_sum = dict.fromkeys(STAGES, 0.0)
+        self.stage_count = dict.fromkeys(STAGES, 0)
+        self.jobs = {"completed": 0, "failed": 0, "rejected": 0}
+        self.rtf_sum = 0.0
+        self.rtf_count = 0
+        self.audio_seconds = 0.0
+        self.pending_chunks = 0
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self.stage_sum[stage] += seconds
+            self.stage_count[stage] += 1
+
+    def count_job(self, outcome):
+        with self._lock:
+            self.jobs[outcome] += 1
+
+    def observe_job(self, audio_seconds, wall_seconds):
+        with self._lock:
+            self.audio_seconds += audio_seconds
+            if audio_seconds > 0:
+                self.rtf_sum += wall_seconds / audio_seconds
+                self.rtf_count += 1
+
+    def add_pending(self, delta):
+        with self._lock:
+            self.pending_chunks += delta
+
+    def render(self, active_jobs):
+        with self._lock:
+            lines = [
+                "# TYPE whisper_jobs_active gauge",
+                f"whisper_jobs_active {active_jobs}",
+                f"whisper_jobs_capacity {MAX_ACTIVE_JOBS}",
+                "# TYPE whisper_queue_depth gauge",
+                f"whisper_queue_depth {self.pending_chunks}",
+                f"whisper_workers {WORKERS}",
+                "# TYPE whisper_jobs_total counter",
+            ]
+            lines += [f'whisper_jobs_total{{outcome="{k}"}} {v}' for k, v in self.jobs.items()]
+            lines.append("# TYPE whisper_stage_seconds summary")
+            for stage in STAGES:
+                lines.append(
+                    f'whisper_stage_seconds_sum{{stage="{stage}"}} {self.stage_sum[stage]:.6f}'
+                )
+                lines.append(
+                    f'whisper_stage_seconds_count{{stage="{stage}"}} {self.stage_count[stage]}'
+                )
+            lines += [
+                "# TYPE whisper_real_time_factor summary",
+                f"whisper_real_time_factor_sum {self.rtf_sum:.6f}",
+                f"whisper_real_time_factor_count {self.rtf_count}",
+                "# TYPE whisper_audio_seconds_total counter",
+                f"whisper_audio_seconds_total {self.audio_seconds:.3f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class Job:
+    def __init__(self, language):
+        self.id = uuid.uuid4().hex
+        self.language = language
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at = None
+        self.duration = 0.0
+        self.chunks_total = 0
+        self.parts = []
+        self.error = ""
+        self.stages = {}
+
+    @property
+    def transcript(self):
+        return " ".join(p for p in self.parts if p).strip()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "language": self.language,
+            "duration": self.duration,
+            "chunks_total": self.chunks_total,
+            "chunks_done": len(self.parts),
+            "transcript": self.transcript,
+            "error": self.error,
+            "stages": self.stages,
+        }
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_active_jobs = 0
+
+
+def _admit(language):
+    """Register a job if there is capacity; None means saturated (-> 429)."""
+    global _active_jobs
+    now = time.time()
+    with _jobs_lock:
+        for job_id in [
+            j.id for j in _jobs.values() if j.finished_at and now - j.finished_at > JOB_TTL_SECONDS
+        ]:
+            del _jobs[job_id]
+        if _active_jobs >= MAX_ACTIVE_JOBS:
+            metrics.count_job("rejected")
+            return None
+        _active_jobs += 1
+        job = Job(language)
+        _jobs[job.id] = job
+    return job
+
+
+def _finish(job, status, error=""):
+    global _active_jobs
+    job.status = status
+    job.error = error
+    job.finished_at = time.time()
+    job.stages["total"] = job.finished_at - job.created_at
+    metrics.observe("total", job.stages["total"])
+    metrics.count_job("completed" if status == "completed" else "failed")
+    with _jobs_lock:
+        _active_jobs -= 1
+
+
+def _busy_response():
+    response = jsonify({"error": "busy", "retry_after": RETRY_AFTER_SECONDS})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+    return response
+
+
+def _timed(job, stage, started):
+    elapsed = time.time() - started
+    job.stages[stage] = job.stages.get(stage, 0.0) + elapsed
+    metrics.observe(stage, elapsed)
+
+
+def plan_chunks(speech, total_samples, max_samples):
+    """
+    Group VAD speech spans (``[{"start", "end"}]`` in samples) into chunks of at most
+    ``max_samples``, cutting only in the silence between spans. A single span longer than
+    the limit is split at fixed offsets.
+    """
+    chunks = []
+    start = end = None
+    for span in speech:
+        s, e = span["start"], span["end"]
+        if start is not None and e - start > max_samples:
+            chunks.append((start, end))
+            start = None
+        if start is None:
+            start = s
+        while e - start > max_samples:
+            chunks.append((start, start + max_samples))
+            start += max_samples
+        end = e
+    if start is not None:
+        chunks.append((start, min(end, total_samples)))
+    return chunks
+
+
+def _save_upload_stream(job):
+    """Copy the raw request body to a temp file without holding it in memory."""
+    started = time.time()
+    suffix = os.path.splitext(request.args.get("filename", "audio.webm"))[1] or ".webm"
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        while True:
+            block = request.stream.read(UPLOAD_READ_BYTES)
+            if not block:
+                break
+            tmp.write(block)
+    _timed(job, "upload", started)
+    return tmp.name
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _iter_chunks(job, path):
+    """
+    Decode, VAD-split and fan the chunks out to the worker pool; yield chunk dicts in order
+    as soon as each chunk and all earlier ones are done. Closes the job when exhausted.
+    """
+    futures = []
+    status, error = "failed", "interrupted"
+    try:
+        started = time.time()
+        audio = decode_audio(path, sampling_rate=SAMPLE_RATE)
+        _timed(job, "decode", started)
+        _unlink(path)
+        job.duration = len(audio) / SAMPLE_RATE
+
+        started = time.time()
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+        chunks = plan_chunks(speech, len(audio), int(CHUNK_SECONDS * SAMPLE_RATE))
+        _timed(job, "vad", started)
+        job.chunks_total = len(chunks)
+        job.status = "running"
+        yield {"type": "plan", "chunks": len(chunks), "duration": job.duration}
+
+        pool = get_pool()
+        for start, end in chunks:
+            submitted = time.time()
+            future = pool.submit(worker.transcribe, audio[start:end], job.language)
+            metrics.add_pending(1)
+            future.add_done_callback(lambda _f: metrics.add_pending(-1))
+            futures.append((submitted, future))
+
+        for index, ((start, end), (submitted, future)) in enumerate(
+            zip(chunks, futures, strict=True)
+        ):
+            text, _language, run_started, run_finished = future.result()
+            job.stages["queue_wait"] = job.stages.get("queue_wait", 0.0) + max(
+                0.0, run_started - submitted
+            )
+            job.stages["inference"] = job.stages.get("inference", 0.0) + (
+                run_finished - run_started
+            )
+            metrics.observe("queue_wait", max(0.0, run_started - submitted))
+            metrics.observe("inference", run_finished - run_started)
+            job.parts.append(text)
+            yield {
+                "type": "chunk",
+                "index": index,
+                "start": start / SAMPLE_RATE,
+                "end": end / SAMPLE_RATE,
+                "text": text,
+            }
+        status, error = "completed", ""
+        metrics.observe_job(job.duration, time.time() - job.created_at)
+    except Exception as exc:
+        error = str(exc)
+        yield {"type": "error", "error": error}
+    finally:
+        for _submitted, future in futures:
+            future.cancel()
+        _unlink(path)
+        _finish(job, status, error)
+    if status == "completed":
+        yield {"type": "done", "chunks": job.chunks_total, "language": job.language}
+
+
+def _run_job(job, path):
+    for _event in _iter_chunks(job, path):
+        pass
 
 
 @app.route("/health")
 def health():
-    return jsonify({"status": "ok", "model": MODEL_SIZE})
+    return jsonify(
+        {
+            "status": "ok",
+            "model": MODEL_SIZE,
+            "workers": WORKERS,
+            "active_jobs": _active_jobs,
+            "capacity": MAX_ACTIVE_JOBS,
+        }
+    )
+
+
+@app.route("/metrics")
+def metrics_view():
+    return Response(metrics.render(_active_jobs), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    job = _admit(request.args.get("language", LANGUAGE))
+    if job is None:
+        return _busy_response()
+    try:
+        path = _save_upload_stream(job)
+    except Exception as exc:
+        _finish(job, "failed", f"Upload failed: {exc}")
+        return jsonify({"error": job.error}), 400
+    threading.Thread(target=_run_job, args=(job, path), name=f"job-{job.id}", daemon=True).start()
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return response
+
+
+@app.route("/jobs/<job_id>")
+def get_job(job_id):
+    job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
 
 
 @app.route("/transcribe", methods=["POST"])
 def transcribe():
     if "audio" not in request.files:
         return jsonify({"error": "No audio file provided"}), 400
+    job = _admit(LANGUAGE)
+    if job is None:
+        return _busy_response()
 
     audio_file = request.files["audio"]
     suffix = os.path.splitext(audio_file.filename or "audio.webm")[1] or ".webm"
@@ -29,17 +384,40 @@ def transcribe():
         tmp_path = tmp.name
 
     try:
-        segments, info = model.transcribe(tmp_path, language="pl", beam_size=2)
-        transcript = " ".join(seg.text.strip() for seg in segments).strip()
-        return jsonify({"transcript": transcript, "language": info.language})
+        transcript, language, _started, _finished = (
+            get_pool().submit(worker.transcribe, tmp_path, LANGUAGE).result()
+        )
+        _finish(job, "completed")
+        return jsonify({"transcript": transcript, "language": language})
     except Exception as exc:
+        _finish(job, "failed", str(exc))
         return jsonify({"error": str(exc)}), 500
     finally:
-        try:
-            os.unlink(tmp_path)
-        except OSError:
-            pass
+        _unlink(tmp_path)
+
+
+@app.route("/transcribe/stream", methods=["POST"])
+def transcribe_stream():
+    """
+    Raw audio body in, NDJSON out: a ``plan`` line, one ``chunk`` line per VAD-aligned chunk
+    (in order, as soon as it and every earlier chunk are done), then ``done``.
+    """
+    job = _admit(request.args.get("language", LANGUAGE))
+    if job is None:
+        return _busy_response()
+    try:
+        path = _save_upload_stream(job)
+    except Exception as exc:
+        _finish(job, "failed", f"Upload failed: {exc}")
+        return jsonify({"error": job.error}), 400
+
+    def generate():
+        for event in _iter_chunks(job, path):
+            yield json.dumps(event) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=9000, debug=False)
+    get_pool()
+    app.run(host="0.0.0.0", port=9000, debug=False, threaded=True)
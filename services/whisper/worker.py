@@ -0,0 +1,52 @@
+"""
+Model worker process: one int8 WhisperModel per process, loaded by the pool initializer.
+
+Each worker claims a slot from a shared counter and pins itself to its own slice of cores
+(``cpu_threads`` cores per worker), so concurrent chunks do not fight over the same CPUs.
+"""
+
+import os
+import time
+
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+_model = None
+_pipeline = None
+_batch_size = 1
+
+
+def init_worker(model_size, cpu_threads, batch_size, cores, slot_counter):
+    global _model, _pipeline, _batch_size
+    with slot_counter.get_lock():
+        slot = slot_counter.value
+        slot_counter.value += 1
+    if cores and hasattr(os, "sched_setaffinity"):
+        start = (slot * cpu_threads) % len(cores)
+        pinned = {cores[(start + i) % len(cores)] for i in range(min(cpu_threads, len(cores)))}
+        os.sched_setaffinity(0, pinned)
+    print(
+        f"[worker {os.getpid()} slot {slot}] Loading Whisper model: {model_size} "
+        f"(cpu_threads={cpu_threads}, batch_size={batch_size}) ...",
+        flush=True,
+    )
+    _model = WhisperModel(model_size, device="cpu", compute_type="int8", cpu_threads=cpu_threads)
+    _batch_size = batch_size
+    _pipeline = BatchedInferencePipeline(model=_model) if batch_size > 1 else None
+    print(f"[worker {os.getpid()} slot {slot}] Whisper model ready.", flush=True)
+
+
+def transcribe(audio, language):
+    """
+    ``audio`` is a file path or a 16 kHz float32 sample array (one VAD-aligned chunk).
+    Returns (text, language, started_at, finished_at) with wall-clock timestamps so the
+    parent can split queue wait from inference time.
+    """
+    started = time.time()
+    if _pipeline is not None:
+        segments, info = _pipeline.transcribe(
+            audio, language=language, beam_size=2, batch_size=_batch_size
+        )
+    else:
+        segments, info = _model.transcribe(audio, language=language, beam_size=2)
+    text = " ".join(seg.text.strip() for seg in segments).strip()
+    return text, info.language, started, time.time()
@@ -58,6 +58,8 @@ resource "aws_ecs_task_definition" "backend" {
         { name = "DOCUMENTS_DATA_S3_BUCKET", value = var.documents_data_s3_bucket_name },
         { name = "DOCUMENTS_S3_REGION", value = var.documents_s3_region },
         { name = "DOCUMENTS_MAX_UPLOAD_MB", value = tostring(var.documents_max_upload_mb) },
+        { name = "REPORT_EXPORTS_S3_BUCKET", value = var.documents_data_s3_bucket_name },
+        { name = "REPORT_EXPORTS_S3_PREFIX", value = var.report_exports_s3_prefix },
       ] : []
     )
 
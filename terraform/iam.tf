@@ -175,7 +175,8 @@ resource "aws_iam_role_policy" "ecs_task_exec_command" {
   })
 }
 
-# Document ingestion: ECS task needs S3 GetObject/PutObject (and ListBucket) on documents bucket
+# Document ingestion and report exports: ECS task needs S3 GetObject/PutObject (and ListBucket)
+# on the documents bucket
 resource "aws_iam_role_policy" "ecs_task_documents_s3" {
   count = length(trimspace(var.documents_data_s3_bucket_name)) > 0 ? 1 : 0
 
@@ -193,6 +194,22 @@ resource "aws_iam_role_policy" "ecs_task_documents_s3" {
         ]
         Resource = "arn:aws:s3:::${var.documents_data_s3_bucket_name}/documents_data/*"
       },
+      {
+        # Conversion cache eviction (DOCUMENTS_CONVERSION_CACHE_PREFIX, LRU over the size budget)
+        Effect   = "Allow"
+        Action   = ["s3:DeleteObject"]
+        Resource = "arn:aws:s3:::${var.documents_data_s3_bucket_name}/documents_data/_conversion_cache/*"
+      },
+      {
+        # Report exports (REPORT_EXPORTS_S3_PREFIX): multipart upload, download, abort on failure
+        Effect = "Allow"
+        Action = [
+          "s3:GetObject",
+          "s3:PutObject",
+          "s3:AbortMultipartUpload",
+        ]
+        Resource = "arn:aws:s3:::${var.documents_data_s3_bucket_name}/${var.report_exports_s3_prefix}/*"
+      },
       {
         Effect = "Allow"
         Action = [
@@ -1,6 +1,7 @@
 #
 # Operational baseline:
 # - scheduled overdue invoice marking
+# - nightly daily revenue rollups
 # - CloudWatch alarms for backend health
 #
 
@@ -85,6 +86,41 @@ resource "aws_cloudwatch_event_target" "mark_overdue_invoices_daily" {
   })
 }
 
+resource "aws_cloudwatch_event_rule" "rebuild_revenue_rollups_daily" {
+  name                = "${local.name}-rebuild-revenue-rollups"
+  description         = "Runs rebuild_revenue_rollups command on schedule"
+  schedule_expression = var.revenue_rollups_schedule_expression
+}
+
+resource "aws_cloudwatch_event_target" "rebuild_revenue_rollups_daily" {
+  rule      = aws_cloudwatch_event_rule.rebuild_revenue_rollups_daily.name
+  target_id = "rebuild-revenue-rollups"
+  arn       = aws_ecs_cluster.main.arn
+  role_arn  = aws_iam_role.eventbridge_ecs_runner.arn
+
+  ecs_target {
+    launch_type         = "FARGATE"
+    task_count          = 1
+    task_definition_arn = aws_ecs_task_definition.backend.arn
+    platform_version    = "LATEST"
+
+    network_configuration {
+      subnets          = aws_subnet.private[*].id
+      security_groups  = [aws_security_group.ecs.id]
+      assign_public_ip = false
+    }
+  }
+
+  input = jsonencode({
+    containerOverrides = [
+      {
+        name    = "backend"
+        command = ["python", "manage.py", "rebuild_revenue_rollups"]
+      }
+    ]
+  })
+}
+
 resource "aws_cloudwatch_event_rule" "enqueue_reminders" {
   name                = "${local.name}-enqueue-reminders"
   description         = "Runs enqueue_reminders command on schedule"
@@ -155,6 +191,42 @@ resource "aws_cloudwatch_event_target" "process_reminders" {
   })
 }
 
+# Webhook deliveries: retries and rows left behind by a web task that stopped mid-send
+resource "aws_cloudwatch_event_rule" "process_webhook_deliveries" {
+  name                = "${local.name}-process-webhook-deliveries"
+  description         = "Runs process_webhook_deliveries command on schedule"
+  schedule_expression = var.webhook_deliveries_schedule_expression
+}
+
+resource "aws_cloudwatch_event_target" "process_webhook_deliveries" {
+  rule      = aws_cloudwatch_event_rule.process_webhook_deliveries.name
+  target_id = "process-webhook-deliveries"
+  arn       = aws_ecs_cluster.main.arn
+  role_arn  = aws_iam_role.eventbridge_ecs_runner.arn
+
+  ecs_target {
+    launch_type         = "FARGATE"
+    task_count          = 1
+    task_definition_arn = aws_ecs_task_definition.backend.arn
+    platform_version    = "LATEST"
+
+    network_configuration {
+      subnets          = aws_subnet.private[*].id
+      security_groups  = [aws_security_group.ecs.id]
+      assign_public_ip = false
+    }
+  }
+
+  input = jsonencode({
+    containerOverrides = [
+      {
+        name    = "backend"
+        command = ["python", "manage.py", "process_webhook_deliveries"]
+      }
+    ]
+  })
+}
+
 # Document ingestion: run process_document_ingestion on schedule (only when bucket is configured)
 resource "aws_cloudwatch_event_rule" "process_document_ingestion" {
   count               = length(trimspace(var.documents_data_s3_bucket_name)) > 0 ? 1 : 0
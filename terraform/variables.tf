@@ -228,6 +228,12 @@ variable "overdue_invoices_schedule_expression" {
   default     = "cron(0 1 * * ? *)"
 }
 
+variable "revenue_rollups_schedule_expression" {
+  description = "EventBridge schedule for rebuild_revenue_rollups command (after midnight in all clinic time zones)"
+  type        = string
+  default     = "cron(30 1 * * ? *)"
+}
+
 variable "reminder_enqueue_schedule_expression" {
   description = "EventBridge schedule for enqueue_reminders command"
   type        = string
@@ -240,6 +246,12 @@ variable "reminder_process_schedule_expression" {
   default     = "rate(5 minutes)"
 }
 
+variable "webhook_deliveries_schedule_expression" {
+  description = "EventBridge schedule for process_webhook_deliveries command (webhook retries)"
+  type        = string
+  default     = "rate(5 minutes)"
+}
+
 # --- Document ingestion pipeline ---
 variable "documents_data_s3_bucket_name" {
   description = "S3 bucket name for document ingestion (input and output under documents_data/). Empty to disable."
@@ -259,6 +271,12 @@ variable "documents_max_upload_mb" {
   default     = 50
 }
 
+variable "report_exports_s3_prefix" {
+  description = "Key prefix for report exports in the documents bucket (REPORT_EXPORTS_S3_PREFIX)"
+  type        = string
+  default     = "report-exports"
+}
+
 variable "document_ingestion_schedule_expression" {
   description = "EventBridge schedule for process_document_ingestion command"
   type        = string